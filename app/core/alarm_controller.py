@@ -1,90 +1,236 @@
 """告警控制器：连接 AppState 与 AlarmEngine，评估在后台线程执行避免阻塞主线程"""
 
+import collections
 import logging
+import math
+import threading
+import time
 
-from PyQt6.QtCore import QObject, pyqtSignal, QThread, Qt
+from PyQt6.QtCore import QObject, pyqtSignal, QThread, QTimer, Qt
 
 from app.core.state import AppState, Snapshot
 from app.core.alarm_engine import AlarmEngine
-from app.core.config import get_config
+from app.core.config import AppConfig, get_config, subscribe_config
 
 logger = logging.getLogger(__name__)
 
 
-def _make_get_thresholds():
-    """返回从 config.alarm_thresholds 读取的回调，每次 evaluate 动态获取，Settings 保存后无需重启"""
-    def _get() -> dict:
-        cfg = get_config()
-        at = cfg.alarm_thresholds
-        return {
-            "co_warn": at.co_warn,
-            "co_crit": at.co_crit,
-            "lpg_warn_lel_x10": at.lpg_warn_lel_x10,
-            "lpg_crit_lel_x10": at.lpg_crit_lel_x10,
-        }
-    return _get
+def _thresholds_from_config(cfg: AppConfig) -> dict:
+    """config.alarm_thresholds -> 引擎阈值字典"""
+    at = cfg.alarm_thresholds
+    return {
+        "co_warn": at.co_warn,
+        "co_crit": at.co_crit,
+        "lpg_warn_lel_x10": at.lpg_warn_lel_x10,
+        "lpg_crit_lel_x10": at.lpg_crit_lel_x10,
+    }
+
+
+# 评估延迟/耗时样本窗口（最近 N 次评估）
+EVAL_METRICS_WINDOW = 256
+
+
+def _pct(samples: list[float], q: float) -> float | None:
+    if not samples:
+        return None
+    s = sorted(samples)
+    return s[min(len(s) - 1, max(0, int(round(q * len(s))) - 1))]
+
+
+class _SnapshotMailbox:
+    """
+    单槽邮箱（latest-wins）：主线程 put 覆盖未取走的旧快照，worker take 总是拿到最新一份。
+    只有槽由空变满时才需要唤醒 worker，突发期间被覆盖的快照计入 superseded。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot: Snapshot | None = None
+        self._first_post_ts = 0.0  # 当前槽内首次投递时刻（评估延迟从最早未处理的变化算起）
+        self.posted = 0
+        self.superseded = 0
+
+    def put(self, snapshot: Snapshot) -> bool:
+        """投递快照；返回 True 表示槽原为空，需要唤醒 worker"""
+        with self._lock:
+            self.posted += 1
+            wake = self._snapshot is None
+            if wake:
+                self._first_post_ts = time.monotonic()
+            else:
+                self.superseded += 1
+            self._snapshot = snapshot
+            return wake
+
+    def take(self) -> tuple[Snapshot, float] | None:
+        """取走最新快照及其首次投递时刻；槽空返回 None"""
+        with self._lock:
+            snap = self._snapshot
+            if snap is None:
+                return None
+            self._snapshot = None
+            return snap, self._first_post_ts
 
 
 class AlarmEvalWorker(QObject):
-    """在独立线程中执行 evaluate(snapshot)，结果通过信号回传主线程"""
+    """
+    在独立线程中执行 evaluate(snapshot)，结果通过信号回传主线程。
+    debounce 到期由单次 QTimer（在后台线程内创建）驱动 engine.poll_timers()，无新快照也按时置位。
+    """
 
-    alarms_ready = pyqtSignal(object)  # list[Alarm]
+    transitions_ready = pyqtSignal(object)  # list[AlarmTransition]，仅在有变迁时发出
 
-    def __init__(self, engine: AlarmEngine):
+    def __init__(self, engine: AlarmEngine, mailbox: _SnapshotMailbox):
         super().__init__()
         self._engine = engine
-
-    def run_eval(self, snapshot: Snapshot) -> None:
+        self._mailbox = mailbox
+        self._metrics_lock = threading.Lock()
+        self._evaluated = 0
+        self._lag_ms: collections.deque[float] = collections.deque(maxlen=EVAL_METRICS_WINDOW)
+        self._eval_ms: collections.deque[float] = collections.deque(maxlen=EVAL_METRICS_WINDOW)
+        # 在后台线程首次使用时创建：定时器及其槽连接须属于 worker 所在线程
+        self._deadline_timer: QTimer | None = None
+
+    def run_eval(self) -> None:
+        """从邮箱取最新快照评估；期间被覆盖的旧快照直接跳过"""
+        item = self._mailbox.take()
+        if item is None:
+            return
+        snapshot, posted_ts = item
+        t0 = time.monotonic()
         logger.debug("AlarmEvalWorker.run_eval 开始 evaluate")
-        alarms = self._engine.evaluate(snapshot)
-        logger.debug("AlarmEvalWorker.run_eval 完成 emit alarms_ready len=%s", len(alarms))
-        self.alarms_ready.emit(alarms)
+        transitions = self._engine.evaluate(snapshot)
+        t1 = time.monotonic()
+        with self._metrics_lock:
+            self._evaluated += 1
+            self._lag_ms.append((t0 - posted_ts) * 1000)
+            self._eval_ms.append((t1 - t0) * 1000)
+        if transitions:
+            logger.debug("AlarmEvalWorker.run_eval 完成 emit transitions_ready len=%s", len(transitions))
+            self.transitions_ready.emit(transitions)
+        self._schedule_deadline()
+
+    def run_set_thresholds(self, thresholds: dict) -> None:
+        """后台线程：推送新阈值，下一次 evaluate 重算 th.* 相关规则"""
+        self._engine.set_thresholds(thresholds)
+
+    def run_ack(self, alarm_id: str) -> None:
+        """后台线程：确认单条告警，ACKED 变迁经 transitions_ready 回主线程"""
+        t = self._engine.ack(alarm_id)
+        if t is not None:
+            self.transitions_ready.emit([t])
+
+    def run_ack_all_warn(self) -> None:
+        """后台线程：确认当前所有未确认的 WARN 级别告警（不包含 CRITICAL）"""
+        from app.core.alarm_engine import Severity
+
+        transitions = []
+        for a in self._engine.active_alarms():
+            if a.severity == Severity.WARN and not a.ack:
+                t = self._engine.ack(a.id)
+                if t is not None:
+                    transitions.append(t)
+        if transitions:
+            self.transitions_ready.emit(transitions)
+
+    def get_metrics(self) -> dict:
+        """评估统计（任意线程可调）：投递/评估/跳过次数，评估延迟与耗时分位（ms）"""
+        with self._metrics_lock:
+            lag = list(self._lag_ms)
+            dur = list(self._eval_ms)
+            evaluated = self._evaluated
+        return {
+            "posted": self._mailbox.posted,
+            "evaluated": evaluated,
+            "skipped": self._mailbox.superseded,
+            "lag_p50_ms": _pct(lag, 0.50),
+            "lag_p95_ms": _pct(lag, 0.95),
+            "lag_max_ms": max(lag) if lag else None,
+            "eval_p95_ms": _pct(dur, 0.95),
+        }
+
+    def _on_deadline(self) -> None:
+        transitions = self._engine.poll_timers()
+        if transitions:
+            logger.debug("AlarmEvalWorker debounce 到期 emit transitions_ready len=%s", len(transitions))
+            self.transitions_ready.emit(transitions)
+        self._schedule_deadline()
+
+    def _schedule_deadline(self) -> None:
+        """按 engine 最近的 debounce 到期时刻重设单次定时器"""
+        deadline = self._engine.next_deadline()
+        if self._deadline_timer is None:
+            if deadline is None:
+                return
+            self._deadline_timer = QTimer(self)
+            self._deadline_timer.setSingleShot(True)
+            self._deadline_timer.setTimerType(Qt.TimerType.PreciseTimer)
+            self._deadline_timer.timeout.connect(self._on_deadline)
+        if deadline is None:
+            self._deadline_timer.stop()
+            return
+        self._deadline_timer.start(max(0, math.ceil((deadline - time.time()) * 1000)))
 
 
 class AlarmController(QObject):
-    """state.changed 后在后台线程调用 evaluate，结果回主线程后 update(alarms=...)"""
+    """state.changed 后在后台线程调用 evaluate，告警变迁回主线程后 apply_alarm_transitions"""
 
-    _eval_requested = pyqtSignal(object)
+    _eval_requested = pyqtSignal()
+    _ack_requested = pyqtSignal(str)
+    _ack_all_warn_requested = pyqtSignal()
+    _thresholds_changed = pyqtSignal(object)  # dict
 
-    def __init__(self, app_state: AppState):
+    def __init__(self, app_state: AppState, spec: dict | None = None):
         super().__init__()
         self._app_state = app_state
-        self._engine = AlarmEngine(get_thresholds=_make_get_thresholds())
+        # spec 提供时为其全部故障点位生成规则（见 alarm_rules.fault_rules_from_spec）
+        # 阈值为推送模式：启动时取一次，之后只在配置变更通知里更新，evaluate 不再读 config
+        self._engine = AlarmEngine(spec=spec)
+        self._thresholds = _thresholds_from_config(get_config())
+        self._engine.set_thresholds(self._thresholds)
         self._thread = QThread()
-        self._worker = AlarmEvalWorker(self._engine)
+        self._mailbox = _SnapshotMailbox()
+        self._worker = AlarmEvalWorker(self._engine, self._mailbox)
         self._worker.moveToThread(self._thread)
         self._thread.start()
 
         # QueuedConnection：不在 AppState.update 的 emit 链里同步执行，避免主线程卡死/长链
         app_state.changed.connect(self._on_state_changed, Qt.ConnectionType.QueuedConnection)
-        self._worker.alarms_ready.connect(self._apply_alarms, Qt.ConnectionType.QueuedConnection)
+        self._worker.transitions_ready.connect(self._apply_transitions, Qt.ConnectionType.QueuedConnection)
         self._eval_requested.connect(self._worker.run_eval, Qt.ConnectionType.QueuedConnection)
+        # Ack 作为命令投递到 worker 线程：engine 状态只由 worker 线程读写
+        self._ack_requested.connect(self._worker.run_ack, Qt.ConnectionType.QueuedConnection)
+        self._ack_all_warn_requested.connect(self._worker.run_ack_all_warn, Qt.ConnectionType.QueuedConnection)
+        self._thresholds_changed.connect(self._worker.run_set_thresholds, Qt.ConnectionType.QueuedConnection)
+        self._unsubscribe_config = subscribe_config(self._on_config_changed)
+
+    def _on_config_changed(self, cfg: AppConfig, _version: int) -> None:
+        """配置变更：阈值有变化时投递到 worker 线程"""
+        thresholds = _thresholds_from_config(cfg)
+        if thresholds != self._thresholds:
+            self._thresholds = thresholds
+            logger.info("告警阈值已更新: %s", thresholds)
+            self._thresholds_changed.emit(thresholds)
 
     def _on_state_changed(self, snapshot: Snapshot) -> None:
-        """主线程：仅发出评估请求，不阻塞。"""
-        logger.debug("AlarmController._on_state_changed 主线程发出 eval 请求")
-        self._eval_requested.emit(snapshot)
+        """主线程：快照放入邮箱，仅在邮箱由空变满时唤醒 worker，不阻塞。"""
+        if self._mailbox.put(snapshot):
+            logger.debug("AlarmController._on_state_changed 主线程发出 eval 请求")
+            self._eval_requested.emit()
+
+    def get_eval_metrics(self) -> dict:
+        """告警评估统计（诊断页使用）"""
+        return self._worker.get_metrics()
 
-    def _apply_alarms(self, alarms: list) -> None:
-        """主线程：收到评估结果后更新 AppState。"""
-        logger.debug("AlarmController._apply_alarms 主线程更新 alarms len=%s", len(alarms) if alarms else 0)
-        self._app_state.update(alarms=alarms)
-        logger.debug("AlarmController._apply_alarms 完成")
+    def _apply_transitions(self, transitions: list) -> None:
+        """主线程：收到告警变迁后更新 AppState。"""
+        logger.debug("AlarmController._apply_transitions 主线程应用变迁 len=%s", len(transitions))
+        self._app_state.apply_alarm_transitions(transitions)
 
     def ack(self, alarm_id: str) -> None:
-        """主线程调用；engine.ack 与 evaluate 在单线程顺序执行，无竞态。"""
-        self._engine.ack(alarm_id)
-        alarms = self._engine.evaluate(self._app_state.get_snapshot())
-        self._app_state.update(alarms=alarms)
+        """主线程调用；投递到 worker 线程执行，ACKED 变迁异步回到 AppState，不阻塞 UI。"""
+        self._ack_requested.emit(alarm_id)
 
     def ack_all_warn(self) -> None:
-        """主线程调用；一键 Ack 当前所有 WARN 级别告警（不包含 CRITICAL）。"""
-        from app.core.alarm_engine import Severity
-
-        snapshot = self._app_state.get_snapshot()
-        alarms = self._engine.evaluate(snapshot)
-        for a in alarms:
-            if a.severity == Severity.WARN and not a.ack:
-                self._engine.ack(a.id)
-        alarms = self._engine.evaluate(snapshot)
-        self._app_state.update(alarms=alarms)
+        """主线程调用；一键 Ack 当前所有 WARN 级别告警（不包含 CRITICAL），在 worker 线程执行。"""
+        self._ack_all_warn_requested.emit()
@@ -1,27 +1,35 @@
-"""告警引擎 - v1.0 AlarmRules 实现
+"""告警引擎 - v1.0 AlarmRules 实现（表驱动）
 
-CO/LPG 阈值来源：config.alarm_thresholds（co_warn, co_crit, lpg_warn_lel_x10, lpg_crit_lel_x10）
-通过 get_thresholds 回调每次 evaluate 时动态读取，Settings 保存后无需重启即可生效。
+规则以数据声明于 app.core.alarm_rules（BUILTIN_RULES + spec 故障点位生成规则），构造时编译为
+字段 -> 规则索引；evaluate 只重算输入字段相对上次评估发生变化的规则，外加 debounce 计时中与
+连续计数类规则。未变化的 Snapshot 子域整体按相等比较跳过，规则数增长不增加每次更新的开销。
+
+CO/LPG 阈值来源：config.alarm_thresholds（co_warn, co_crit, lpg_warn_lel_x10, lpg_crit_lel_x10），
+作为 "th.*" 输入字段参与变化检测；get_thresholds 回调至多每 THRESHOLDS_REFRESH_S 调用一次；
+不传回调时为推送模式，仅由 set_thresholds 更新（AlarmController 订阅配置变更后推送），Settings 保存后无需重启即可生效。
 debounce/回差规则保持 v1.0（10s/3s debounce，固定回差）。
+
+debounce 到期时刻登记在最小堆中：next_deadline() 给出最近到期时刻，poll_timers() 在无新快照时
+按已记录的输入值重算到期规则，告警置位延迟只取决于 debounce 时长而不依赖数据到达。
+
+evaluate / poll_timers / ack 返回告警变迁（AlarmTransition：RAISED / CLEARED / ACKED / ESCALATED），
+无变迁时返回空列表；告警 first_seen_ts 与 message 在置位时确定，持续期间不变。告警清除后其 Ack 状态一并清除，
+再次置位需重新确认。
 """
 
+import heapq
 import logging
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from typing import Any, Callable
 
+from app.core.alarm_rules import AlarmRule, Severity, build_rules
 from app.core.state import Snapshot
 
 logger = logging.getLogger(__name__)
 
 
-class Severity(str, Enum):
-    INFO = "INFO"
-    WARN = "WARN"
-    CRITICAL = "CRITICAL"
-
-
 @dataclass
 class Alarm:
     """告警项"""
@@ -36,17 +44,32 @@ class Alarm:
     last_seen_ts: float = 0.0
 
 
+class TransitionKind(str, Enum):
+    RAISED = "RAISED"
+    CLEARED = "CLEARED"
+    ACKED = "ACKED"
+    ESCALATED = "ESCALATED"  # 同组（AlarmRule.group）更高级别告警置位，如 CO 预警 -> CO 严重
+
+
+@dataclass(frozen=True)
+class AlarmTransition:
+    """告警变迁：alarm 为变迁后的告警（CLEARED 时 active=False）；Alarm 对象发出后不再修改"""
+    kind: TransitionKind
+    alarm: Alarm
+    ts: float
+    escalated_from: str | None = None  # ESCALATED：同组中被升级的较低级别告警 id
+
+
 # --- 阈值默认值（当 get_thresholds 未提供或返回不全时使用）---
 _DEFAULT_CO_WARN = 35
 _DEFAULT_CO_CRIT = 100
 _DEFAULT_LPG_WARN_LEL_X10 = 200  # 20%
 _DEFAULT_LPG_CRIT_LEL_X10 = 400  # 40%
-# 回差 v1.0：CO 10/30 ppm，LPG 5%/10%
-_CO_HYSTERESIS_WARN = 10
-_CO_HYSTERESIS_CRIT = 30
-_LPG_HYSTERESIS_WARN_X10 = 50   # 5%
-_LPG_HYSTERESIS_CRIT_X10 = 100  # 10%
-ENV_OFFLINE_CONSECUTIVE = 3
+# get_thresholds 回调的最小调用间隔（秒），避免每次 evaluate 都读 config
+THRESHOLDS_REFRESH_S = 1.0
+
+_MISSING = object()
+_SEVERITY_RANK = {Severity.INFO: 0, Severity.WARN: 1, Severity.CRITICAL: 2}
 
 
 def _default_get_thresholds() -> dict[str, int]:
@@ -60,21 +83,30 @@ def _default_get_thresholds() -> dict[str, int]:
 
 
 class AlarmEngine:
-    """告警引擎：根据 Snapshot 计算告警列表。CO/LPG 阈值从 get_thresholds 动态读取。"""
+    """告警引擎：按编译后的规则表增量计算告警列表。CO/LPG 阈值从 get_thresholds 动态读取。"""
 
     def __init__(
         self,
         get_thresholds: Callable[[], dict[str, int]] | Any | None = None,
+        spec: dict | None = None,
+        rules: list[AlarmRule] | None = None,
     ):
         """
         Args:
             get_thresholds: 回调 () -> {co_warn, co_crit, lpg_warn_lel_x10, lpg_crit_lel_x10}，
                 或 Config 对象（取其 alarm_thresholds）。
-                每次 evaluate 时调用，确保 Settings 保存后无需重启即可生效。
+            spec: Modbus spec；提供时为其中全部故障点位生成规则。
+            rules: 直接指定规则表（缺省为 build_rules(spec)）。
         """
         self._get_thresholds = self._resolve_get_thresholds(get_thresholds)
+        self._thresholds: dict[str, int] = {}
+        self._thresholds_ts = float("-inf")
+        if self._get_thresholds is None:
+            # 无回调：使用默认阈值，之后只由 set_thresholds 推送
+            self.set_thresholds({})
         self._active: dict[str, Alarm] = {}
-        self._ack_ids: set[str] = set()
+        # 本次评估产生的变迁（_eval_rule 追加）
+        self._out: list[AlarmTransition] = []
         # debounce: {rule_id: first_true_ts}
         self._debounce: dict[str, float] = {}
         # 回差：当前已触发的告警，需低于 clear 阈值才消
@@ -82,11 +114,49 @@ class AlarmEngine:
         # 连续失败计数：{rule_id: count}
         self._consecutive_fail: dict[str, int] = {}
         self._last_eval_ts = 0.0
-
-    def _resolve_get_thresholds(self, arg: Callable[[], dict[str, int]] | Any | None) -> Callable[[], dict[str, int]]:
-        """将 Config 或回调转为统一的 get_thresholds 可调用"""
+        self._compile(rules if rules is not None else build_rules(spec))
+
+    def _compile(self, rules: list[AlarmRule]) -> None:
+        """建立 域 -> 字段 -> 规则下标 索引；consecutive 规则每次评估都重算"""
+        self._rules = list(rules)
+        self._order: dict[str, int] = {r.id: i for i, r in enumerate(self._rules)}
+        self._groups: dict[str, list[str]] = {}
+        for r in self._rules:
+            if r.group:
+                self._groups.setdefault(r.group, []).append(r.id)
+        self._by_domain: dict[str, dict[str, list[int]]] = {}
+        self._always: set[int] = set()
+        for idx, rule in enumerate(self._rules):
+            paths = list(rule.inputs)
+            if rule.inhibit:
+                paths.append(rule.inhibit)
+            if isinstance(rule.set_at, str):
+                paths.append(rule.set_at)
+            for path in paths:
+                domain, _, key = path.partition(".")
+                self._by_domain.setdefault(domain, {}).setdefault(key, []).append(idx)
+            if rule.consecutive > 0:
+                self._always.add(idx)
+        # 上次评估时各子域对象与各字段值
+        self._prev_domain: dict[str, Any] = {}
+        self._values: dict[str, Any] = {}
+        # debounce 计时中（尚未置位）的规则 {下标: 到期时刻}，时间推移本身即可改变结果
+        self._pending: dict[int, float] = {}
+        # 到期最小堆 [(到期时刻, 下标)]，惰性删除：与 _pending 不一致的项弹出时丢弃
+        self._timers: list[tuple[float, int]] = []
+        logger.info("AlarmEngine 已编译 %d 条规则，%d 个输入字段",
+                    len(self._rules), sum(len(k) for k in self._by_domain.values()))
+
+    @property
+    def rules(self) -> list[AlarmRule]:
+        return list(self._rules)
+
+    def _resolve_get_thresholds(
+        self, arg: Callable[[], dict[str, int]] | Any | None
+    ) -> Callable[[], dict[str, int]] | None:
+        """将 Config 或回调转为统一的 get_thresholds 可调用；None 表示仅推送模式"""
         if arg is None:
-            return _default_get_thresholds
+            return None
         if callable(arg):
             return arg
         # Config 对象：取 alarm_thresholds
@@ -102,169 +172,218 @@ class AlarmEngine:
             return _from_config
         return _default_get_thresholds
 
-    def _get_gas_thresholds(self) -> tuple[int, int, int, int, int, int, int, int]:
-        """从 config.alarm_thresholds 读取 CO/LPG 阈值及回差 clear 值。"""
-        t = self._get_thresholds()
-        co_warn = int(t.get("co_warn", _DEFAULT_CO_WARN))
-        co_crit = int(t.get("co_crit", _DEFAULT_CO_CRIT))
-        lpg_warn_x10 = int(t.get("lpg_warn_lel_x10", _DEFAULT_LPG_WARN_LEL_X10))
-        lpg_crit_x10 = int(t.get("lpg_crit_lel_x10", _DEFAULT_LPG_CRIT_LEL_X10))
-        co_warn_clear = max(0, co_warn - _CO_HYSTERESIS_WARN)
-        co_crit_clear = max(0, co_crit - _CO_HYSTERESIS_CRIT)
-        lpg_warn_clear_x10 = max(0, lpg_warn_x10 - _LPG_HYSTERESIS_WARN_X10)
-        lpg_crit_clear_x10 = max(0, lpg_crit_x10 - _LPG_HYSTERESIS_CRIT_X10)
-        return co_warn, co_warn_clear, co_crit, co_crit_clear, lpg_warn_x10, lpg_warn_clear_x10, lpg_crit_x10, lpg_crit_clear_x10
-
-    def ack(self, alarm_id: str) -> None:
-        """确认告警"""
-        self._ack_ids.add(alarm_id)
-        if alarm_id in self._active:
-            a = self._active[alarm_id]
-            self._active[alarm_id] = Alarm(
-                id=a.id,
-                severity=a.severity,
-                title=a.title,
-                message=a.message,
-                source_slave=a.source_slave,
-                active=a.active,
-                ack=True,
-                first_seen_ts=a.first_seen_ts,
-                last_seen_ts=a.last_seen_ts,
-            )
-
-    def evaluate(self, snapshot: Snapshot) -> list[Alarm]:
-        """根据快照计算告警列表。CO/LPG 阈值每次从 get_thresholds 读取，Settings 保存后无需重启生效。"""
+    def set_thresholds(self, thresholds: dict[str, int]) -> None:
+        """直接推送阈值（覆盖默认值中对应项），下一次 evaluate 重算相关规则"""
+        merged = _default_get_thresholds()
+        for k, v in (thresholds or {}).items():
+            try:
+                merged[k] = int(v)
+            except (TypeError, ValueError):
+                continue
+        if merged != self._thresholds:
+            self._thresholds = merged
+        self._thresholds_ts = time.monotonic()
+
+    def _refresh_thresholds(self) -> None:
+        if self._get_thresholds is None:
+            return
+        now = time.monotonic()
+        if now - self._thresholds_ts < THRESHOLDS_REFRESH_S:
+            return
+        try:
+            self.set_thresholds(self._get_thresholds())
+        except Exception as e:
+            logger.warning("读取告警阈值失败，沿用上次值: %s", e)
+            self._thresholds_ts = now
+
+    def ack(self, alarm_id: str) -> AlarmTransition | None:
+        """确认告警；仅对当前激活且未确认的告警产生 ACKED 变迁"""
+        a = self._active.get(alarm_id)
+        if a is None or a.ack:
+            return None
+        now = time.time()
+        a = replace(a, ack=True, last_seen_ts=now)
+        self._active[alarm_id] = a
+        return AlarmTransition(TransitionKind.ACKED, a, now)
+
+    def active_alarms(self) -> list[Alarm]:
+        """当前激活告警，按规则表顺序"""
+        order = self._order
+        return sorted(self._active.values(), key=lambda a: order[a.id])
+
+    def evaluate(self, snapshot: Snapshot) -> list[AlarmTransition]:
+        """根据快照增量评估：仅重算输入变化、debounce 计时中及连续计数类规则，返回本次产生的变迁。"""
         now = time.time()
         self._last_eval_ts = now
-        results: list[Alarm] = []
-
-        self._eval_hvac(snapshot, now, results)
-        self._eval_webasto(snapshot, now, results)
-        self._eval_gas(snapshot, now, results)
-        self._eval_pdu(snapshot, now, results)
-        self._eval_env(snapshot, now, results)
-
-        self._active = {a.id: a for a in results}
-        return results
-
-    def _eval_hvac(self, snap: Snapshot, now: float, out: list[Alarm]) -> None:
-        h = snap.hvac
-        if h.hp_ok is False:
-            out.append(self._make_alarm("HVAC_HP_TRIP", Severity.CRITICAL, "空调高压保护", "高压开关动作", now, now))
-        if h.lp_ok is False:
-            out.append(self._make_alarm("HVAC_LP_TRIP", Severity.CRITICAL, "空调低压保护", "低压开关动作", now, now))
-        if h.refrig_ok is False:
-            out.append(self._make_alarm("HVAC_REFRIG_SW", Severity.CRITICAL, "空调制冷开关", "制冷开关异常", now, now))
-
-    def _eval_gas(self, snap: Snapshot, now: float, out: list[Alarm]) -> None:
-        # 阈值来源：config.alarm_thresholds，每次 evaluate 动态读取，Settings 保存后无需重启
-        (
-            co_warn, co_warn_clear, co_crit, co_crit_clear,
-            lpg_warn_x10, lpg_warn_clear_x10, lpg_crit_x10, lpg_crit_clear_x10,
-        ) = self._get_gas_thresholds()
-
-        g = snap.gas
-        if g.warmup:
+        self._refresh_thresholds()
+
+        dirty = self._always | self._pop_due(now)
+        values = self._values
+        # 缓存恢复、尚无实时数据的子域不参与评估（等同启动时无数据），避免据旧值置位
+        stale = getattr(snapshot, "stale", ())
+        for domain, keys in self._by_domain.items():
+            if domain in stale:
+                continue
+            cur = self._thresholds if domain == "th" else getattr(snapshot, domain, None)
+            if cur is None:
+                continue
+            if self._prev_domain.get(domain, _MISSING) == cur:
+                continue
+            self._prev_domain[domain] = cur
+            is_map = isinstance(cur, dict)
+            for key, idxs in keys.items():
+                v = cur.get(key) if is_map else getattr(cur, key, None)
+                path = f"{domain}.{key}"
+                if values.get(path, _MISSING) != v:
+                    values[path] = v
+                    dirty.update(idxs)
+
+        return self._run(dirty, now)
+
+    def next_deadline(self) -> float | None:
+        """最近一个 debounce 到期时刻（time.time() 时基），无计时中规则时为 None"""
+        timers = self._timers
+        while timers and self._pending.get(timers[0][1]) != timers[0][0]:
+            heapq.heappop(timers)
+        return timers[0][0] if timers else None
+
+    def poll_timers(self) -> list[AlarmTransition]:
+        """重算已到期的 debounce 规则（沿用上次评估的输入值，无需新快照），返回产生的变迁。"""
+        now = time.time()
+        due = self._pop_due(now)
+        if not due:
+            return []
+        return self._run(due, now)
+
+    def _run(self, idxs: set[int], now: float) -> list[AlarmTransition]:
+        self._out = []
+        for idx in sorted(idxs):
+            self._eval_rule(idx, self._rules[idx], now)
+        out, self._out = self._out, []
+        return out
+
+    def _pop_due(self, now: float) -> set[int]:
+        due: set[int] = set()
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            deadline, idx = heapq.heappop(timers)
+            if self._pending.get(idx) == deadline:
+                del self._pending[idx]
+                due.add(idx)
+        return due
+
+    def _arm(self, idx: int, deadline: float) -> None:
+        if self._pending.get(idx) == deadline:
+            return
+        self._pending[idx] = deadline
+        heapq.heappush(self._timers, (deadline, idx))
+
+    def _eval_rule(self, idx: int, rule: AlarmRule, now: float) -> None:
+        values = self._values
+        if rule.inhibit and values.get(rule.inhibit):
+            # 抑制期间不评估、不输出，已置位状态保留（如燃气传感器预热）
+            self._pending.pop(idx, None)
+            self._clear(rule.id, now)
             return
-        co = g.co_ppm if g.co_ppm is not None else 0
-        lpg_x10 = g.lpg_lel_x10 if g.lpg_lel_x10 is not None else 0
-
-        # GAS_CO_WARN: 10s debounce, 回差 co_warn/co_warn_clear
-        if co >= co_warn:
-            if "GAS_CO_WARN" not in self._debounce:
-                self._debounce["GAS_CO_WARN"] = now
-            if now - self._debounce["GAS_CO_WARN"] >= 10.0:
-                self._triggered.add("GAS_CO_WARN")
-        if co < co_warn_clear:
-            self._debounce.pop("GAS_CO_WARN", None)
-            self._triggered.discard("GAS_CO_WARN")
-        if "GAS_CO_WARN" in self._triggered:
-            out.append(self._make_alarm("GAS_CO_WARN", Severity.WARN, "CO 预警", f"CO {co} ppm", now, now))
-
-        # GAS_CO_CRIT: 3s debounce, 回差 co_crit/co_crit_clear
-        if co >= co_crit:
-            if "GAS_CO_CRIT" not in self._debounce:
-                self._debounce["GAS_CO_CRIT"] = now
-            if now - self._debounce["GAS_CO_CRIT"] >= 3.0:
-                self._triggered.add("GAS_CO_CRIT")
-        if co < co_crit_clear:
-            self._debounce.pop("GAS_CO_CRIT", None)
-            self._triggered.discard("GAS_CO_CRIT")
-        if "GAS_CO_CRIT" in self._triggered:
-            out.append(self._make_alarm("GAS_CO_CRIT", Severity.CRITICAL, "CO 严重", f"CO {co} ppm", now, now))
-
-        # GAS_LPG_WARN: 10s debounce, 回差 lpg_warn_lel_x10 / lpg_warn_clear_lel_x10
-        if lpg_x10 >= lpg_warn_x10:
-            if "GAS_LPG_WARN" not in self._debounce:
-                self._debounce["GAS_LPG_WARN"] = now
-            if now - self._debounce["GAS_LPG_WARN"] >= 10.0:
-                self._triggered.add("GAS_LPG_WARN")
-        if lpg_x10 < lpg_warn_clear_x10:
-            self._debounce.pop("GAS_LPG_WARN", None)
-            self._triggered.discard("GAS_LPG_WARN")
-        if "GAS_LPG_WARN" in self._triggered:
-            out.append(self._make_alarm("GAS_LPG_WARN", Severity.WARN, "LPG 预警", f"LPG {lpg_x10/10:.1f}% LEL", now, now))
-
-        # GAS_LPG_CRIT: 3s debounce, 回差 lpg_crit_lel_x10 / lpg_crit_clear_lel_x10
-        if lpg_x10 >= lpg_crit_x10:
-            if "GAS_LPG_CRIT" not in self._debounce:
-                self._debounce["GAS_LPG_CRIT"] = now
-            if now - self._debounce["GAS_LPG_CRIT"] >= 3.0:
-                self._triggered.add("GAS_LPG_CRIT")
-        if lpg_x10 < lpg_crit_clear_x10:
-            self._debounce.pop("GAS_LPG_CRIT", None)
-            self._triggered.discard("GAS_LPG_CRIT")
-        if "GAS_LPG_CRIT" in self._triggered:
-            out.append(self._make_alarm("GAS_LPG_CRIT", Severity.CRITICAL, "LPG 严重", f"LPG {lpg_x10/10:.1f}% LEL", now, now))
-
-    def _eval_webasto(self, snap: Snapshot, now: float, out: list[Alarm]) -> None:
-        w = snap.webasto
-        if w.web_fault_code is not None and w.web_fault_code != 0:
-            out.append(self._make_alarm(
-                "WEBASTO_FAULT",
-                Severity.WARN,
-                "Webasto 故障",
-                f"故障码: {w.web_fault_code}",
-                now, now,
-                slave=2,
-            ))
-
-    def _eval_pdu(self, snap: Snapshot, now: float, out: list[Alarm]) -> None:
-        p = snap.pdu
-        if p.e_stop is True:
-            out.append(self._make_alarm("PDU_ESTOP", Severity.CRITICAL, "急停", "PDU 急停按下", now, now))
-
-        if p.inv_ac_out_on is not None and p.inv_ac_out_fb is not None and p.inv_ac_out_on != p.inv_ac_out_fb:
-            if "PDU_AC_CONTACTOR_MISMATCH" not in self._debounce:
-                self._debounce["PDU_AC_CONTACTOR_MISMATCH"] = now
-            if now - self._debounce["PDU_AC_CONTACTOR_MISMATCH"] >= 2.0:
-                out.append(self._make_alarm(
-                    "PDU_AC_CONTACTOR_MISMATCH",
-                    Severity.CRITICAL,
-                    "交流接触器不一致",
-                    "逆变器 AC 输出与反馈不符",
-                    now, now,
-                ))
-        else:
-            self._debounce.pop("PDU_AC_CONTACTOR_MISMATCH", None)
 
-    def _eval_env(self, snap: Snapshot, now: float, out: list[Alarm]) -> None:
-        e = snap.env
-        cabin_off = e.cabin_temp_x10 is None
-        if cabin_off:
-            self._consecutive_fail["ENV_CABIN_TH_OFFLINE"] = self._consecutive_fail.get("ENV_CABIN_TH_OFFLINE", 0) + 1
+        rid = rule.id
+        hit_path = rule.inputs[0]
+        hit = values.get(hit_path)
+        if hit is None and rule.default is not None:
+            hit = rule.default
+
+        if rule.op == ">=":
+            set_at = rule.set_at
+            if isinstance(set_at, str):
+                set_at = values.get(set_at)
+            if set_at is None or hit is None:
+                return
+            clear_at = max(0, set_at - rule.hysteresis)
+            if hit >= set_at:
+                first = self._debounce.setdefault(rid, now)
+                if now - first >= rule.debounce_s:
+                    self._triggered.add(rid)
+            if hit < clear_at:
+                self._debounce.pop(rid, None)
+                self._triggered.discard(rid)
+            # 仅当条件仍满足时计时才有意义；落在回差区间内的 debounce 起点保留，待输入变化再评估
+            if hit >= set_at and rid not in self._triggered:
+                self._arm(idx, self._debounce[rid] + rule.debounce_s)
+            else:
+                self._pending.pop(idx, None)
+            active = rid in self._triggered
         else:
-            self._consecutive_fail["ENV_CABIN_TH_OFFLINE"] = 0
-        if self._consecutive_fail.get("ENV_CABIN_TH_OFFLINE", 0) >= ENV_OFFLINE_CONSECUTIVE:
-            out.append(self._make_alarm("ENV_CABIN_TH_OFFLINE", Severity.WARN, "舱内温湿度离线", "舱内传感器无数据", now, now))
-
-        out_off = e.out_temp_x10 is None
-        if out_off:
-            self._consecutive_fail["ENV_OUT_TH_OFFLINE"] = self._consecutive_fail.get("ENV_OUT_TH_OFFLINE", 0) + 1
+            if rule.op == "is_false":
+                cond = hit is False
+            elif rule.op == "is_true":
+                cond = hit is True
+            elif rule.op == "nonzero":
+                cond = hit is not None and hit != 0
+            elif rule.op == "is_none":
+                cond = hit is None
+            elif rule.op == "mismatch":
+                other = values.get(rule.inputs[1])
+                cond = hit is not None and other is not None and hit != other
+            elif rule.op == "any_nonzero":
+                cond = False
+                for path in rule.inputs:
+                    v = values.get(path)
+                    if v is not None and v != 0:
+                        cond, hit, hit_path = True, v, path
+                        break
+            else:
+                logger.warning("未知告警规则判据 %s (%s)", rule.op, rid)
+                return
+
+            if rule.consecutive > 0:
+                n = self._consecutive_fail.get(rid, 0) + 1 if cond else 0
+                self._consecutive_fail[rid] = n
+                active = n >= rule.consecutive
+            elif rule.debounce_s > 0:
+                if cond:
+                    first = self._debounce.setdefault(rid, now)
+                    active = now - first >= rule.debounce_s
+                    if active:
+                        self._pending.pop(idx, None)
+                    else:
+                        self._arm(idx, first + rule.debounce_s)
+                else:
+                    self._debounce.pop(rid, None)
+                    self._pending.pop(idx, None)
+                    active = False
+            else:
+                active = cond
+
+        if not active:
+            self._clear(rid, now)
+            return
+        if rid in self._active:
+            return
+        value = hit * rule.scale if (rule.scale != 1.0 and isinstance(hit, (int, float))) else hit
+        message = rule.message.format(value=value, point=hit_path.partition(".")[2])
+        alarm = self._make_alarm(rid, rule.severity, rule.title, message, now, now, slave=rule.source_slave)
+        self._active[rid] = alarm
+        lower = self._lower_in_group(rule)
+        if lower is not None:
+            self._out.append(AlarmTransition(TransitionKind.ESCALATED, alarm, now, escalated_from=lower))
         else:
-            self._consecutive_fail["ENV_OUT_TH_OFFLINE"] = 0
-        if self._consecutive_fail.get("ENV_OUT_TH_OFFLINE", 0) >= ENV_OFFLINE_CONSECUTIVE:
-            out.append(self._make_alarm("ENV_OUT_TH_OFFLINE", Severity.WARN, "舱外温湿度离线", "舱外传感器无数据", now, now))
+            self._out.append(AlarmTransition(TransitionKind.RAISED, alarm, now))
+
+    def _clear(self, rid: str, now: float) -> None:
+        a = self._active.pop(rid, None)
+        if a is not None:
+            self._out.append(AlarmTransition(TransitionKind.CLEARED, replace(a, active=False, last_seen_ts=now), now))
+
+    def _lower_in_group(self, rule: AlarmRule) -> str | None:
+        """同组内已激活的较低级别告警 id（用于判定 ESCALATED）"""
+        if not rule.group:
+            return None
+        rank = _SEVERITY_RANK[rule.severity]
+        for other in self._groups.get(rule.group, ()):
+            a = self._active.get(other)
+            if a is not None and _SEVERITY_RANK[a.severity] < rank:
+                return other
+        return None
 
     def _make_alarm(
         self,
@@ -283,7 +402,7 @@ class AlarmEngine:
             message=message,
             source_slave=slave,
             active=True,
-            ack=aid in self._ack_ids,
+            ack=False,
             first_seen_ts=first,
             last_seen_ts=last,
         )
@@ -0,0 +1,157 @@
+"""告警规则表：规则以数据声明（输入字段、判据、置位/清除阈值、debounce、严重级别），由 AlarmEngine 编译执行。
+
+输入字段路径：
+- "<域>.<字段>"：Snapshot 子域字段，如 "gas.co_ppm"、"pdu.e_stop"
+- "faults.S<slave>.<点位名>"：spec 故障点位原始值，如 "faults.S8.FAULT_CODE"
+- "th.<键>"：告警阈值（config.alarm_thresholds），阈值变化同样触发相关规则重算
+
+判据 op：
+- is_false / is_true：首个输入 is False / is True
+- nonzero：首个输入非 None 且 != 0
+- any_nonzero：任一输入非 None 且 != 0（spec 故障点位规则）
+- mismatch：前两个输入均非 None 且不相等
+- is_none：首个输入为 None（配合 consecutive 连续次数）
+- ">="：首个输入 >= set_at 置位，< set_at - hysteresis 清除（锁存回差）
+"""
+
+import re
+from dataclasses import dataclass
+from enum import Enum
+
+from app.devices.spec_utils import fault_key, fault_points
+
+
+class Severity(str, Enum):
+    INFO = "INFO"
+    WARN = "WARN"
+    CRITICAL = "CRITICAL"
+
+
+@dataclass(frozen=True)
+class AlarmRule:
+    """单条告警规则（不可变，编译后由 AlarmEngine 按字段索引调度）"""
+    id: str
+    severity: Severity
+    title: str
+    message: str  # format 模板：{value} 为触发输入值（已乘 scale），{point} 为触发输入路径
+    inputs: tuple[str, ...]
+    op: str
+    set_at: int | str | None = None  # ">=" 置位阈值：整数或 "th.<键>"
+    hysteresis: int = 0  # 清除阈值 = max(0, set_at - hysteresis)
+    debounce_s: float = 0.0  # 条件持续满足该时长后才置位
+    consecutive: int = 0  # 连续 N 次 evaluate 满足才置位（每次 evaluate 都重算）
+    inhibit: str | None = None  # 该字段为真时抑制本规则（不评估、不输出，保留已置位状态）
+    default: int | None = None  # 输入为 None 时的替代值
+    scale: float = 1.0
+    source_slave: int | None = None
+    covers: tuple[str, ...] = ()  # 本规则已覆盖的 spec 故障点位键（S<slave>.<name>），spec 生成规则时跳过
+    group: str = ""  # 同组规则按严重级别构成升级关系（低级别激活时高级别置位 -> ESCALATED）
+
+
+# 回差 v1.0：CO 10/30 ppm，LPG 5%/10%
+_CO_HYSTERESIS_WARN = 10
+_CO_HYSTERESIS_CRIT = 30
+_LPG_HYSTERESIS_WARN_X10 = 50   # 5%
+_LPG_HYSTERESIS_CRIT_X10 = 100  # 10%
+ENV_OFFLINE_CONSECUTIVE = 3
+
+BUILTIN_RULES: tuple[AlarmRule, ...] = (
+    AlarmRule("HVAC_HP_TRIP", Severity.CRITICAL, "空调高压保护", "高压开关动作", ("hvac.hp_ok",), "is_false"),
+    AlarmRule("HVAC_LP_TRIP", Severity.CRITICAL, "空调低压保护", "低压开关动作", ("hvac.lp_ok",), "is_false"),
+    AlarmRule("HVAC_REFRIG_SW", Severity.CRITICAL, "空调制冷开关", "制冷开关异常", ("hvac.refrig_ok",), "is_false"),
+    AlarmRule(
+        "WEBASTO_FAULT", Severity.WARN, "Webasto 故障", "故障码: {value}",
+        ("webasto.web_fault_code",), "nonzero", source_slave=2, covers=("S2.FAULT_CODE",),
+    ),
+    AlarmRule(
+        "GAS_CO_WARN", Severity.WARN, "CO 预警", "CO {value} ppm",
+        ("gas.co_ppm",), ">=", set_at="th.co_warn", hysteresis=_CO_HYSTERESIS_WARN,
+        debounce_s=10.0, inhibit="gas.warmup", default=0, group="gas_co",
+    ),
+    AlarmRule(
+        "GAS_CO_CRIT", Severity.CRITICAL, "CO 严重", "CO {value} ppm",
+        ("gas.co_ppm",), ">=", set_at="th.co_crit", hysteresis=_CO_HYSTERESIS_CRIT,
+        debounce_s=3.0, inhibit="gas.warmup", default=0, group="gas_co",
+    ),
+    AlarmRule(
+        "GAS_LPG_WARN", Severity.WARN, "LPG 预警", "LPG {value:.1f}% LEL",
+        ("gas.lpg_lel_x10",), ">=", set_at="th.lpg_warn_lel_x10", hysteresis=_LPG_HYSTERESIS_WARN_X10,
+        debounce_s=10.0, inhibit="gas.warmup", default=0, scale=0.1, group="gas_lpg",
+    ),
+    AlarmRule(
+        "GAS_LPG_CRIT", Severity.CRITICAL, "LPG 严重", "LPG {value:.1f}% LEL",
+        ("gas.lpg_lel_x10",), ">=", set_at="th.lpg_crit_lel_x10", hysteresis=_LPG_HYSTERESIS_CRIT_X10,
+        debounce_s=3.0, inhibit="gas.warmup", default=0, scale=0.1, group="gas_lpg",
+    ),
+    AlarmRule("PDU_ESTOP", Severity.CRITICAL, "急停", "PDU 急停按下", ("pdu.e_stop",), "is_true"),
+    AlarmRule(
+        "PDU_AC_CONTACTOR_MISMATCH", Severity.CRITICAL, "交流接触器不一致", "逆变器 AC 输出与反馈不符",
+        ("pdu.inv_ac_out_on", "pdu.inv_ac_out_fb"), "mismatch", debounce_s=2.0,
+    ),
+    AlarmRule(
+        "ENV_CABIN_TH_OFFLINE", Severity.WARN, "舱内温湿度离线", "舱内传感器无数据",
+        ("env.cabin_temp_x10",), "is_none", consecutive=ENV_OFFLINE_CONSECUTIVE,
+    ),
+    AlarmRule(
+        "ENV_OUT_TH_OFFLINE", Severity.WARN, "舱外温湿度离线", "舱外传感器无数据",
+        ("env.out_temp_x10",), "is_none", consecutive=ENV_OFFLINE_CONSECUTIVE,
+    ),
+)
+
+# 从站显示名（spec 生成的故障规则标题用）
+SLAVE_NAMES: dict[int, str] = {
+    1: "空调",
+    2: "Webasto",
+    3: "灯光",
+    4: "电源",
+    5: "副油箱",
+    6: "舱内温湿度",
+    7: "燃气",
+    8: "PDU",
+    9: "舱外温湿度",
+}
+
+_FAULT_PREFIX_RE = re.compile(r"^(\w+?)_?FAULT_(CODE|ACTIVE)$")
+
+
+def fault_rules_from_spec(spec: dict, exclude: set[str] | None = None) -> list[AlarmRule]:
+    """
+    为 spec 中每个 slave 的故障点位（FAULT_CODE/FAULT_ACTIVE/XXX_FAULT_CODE）生成 WARN 规则：
+    同一子系统（前缀相同）的点位合并为一条 any_nonzero 规则。exclude 为已被手写规则覆盖的键。
+    """
+    exclude = exclude or set()
+    rules: list[AlarmRule] = []
+    for sid_str in sorted(spec, key=lambda s: int(s) if str(s).isdigit() else 0):
+        if not str(sid_str).isdigit():
+            continue
+        sid = int(sid_str)
+        groups: dict[str, list[str]] = {}
+        for name, _raw_key, _addr0 in fault_points(spec.get(sid_str) or {}):
+            key = fault_key(sid, name)
+            if key in exclude:
+                continue
+            m = _FAULT_PREFIX_RE.match(name)
+            prefix = m.group(1) if m else ""
+            groups.setdefault(prefix, []).append(key)
+        dev = SLAVE_NAMES.get(sid, f"Slave {sid}")
+        for prefix, keys in groups.items():
+            suffix = f"_{prefix}" if prefix else ""
+            rules.append(AlarmRule(
+                id=f"S{sid:02d}{suffix}_FAULT",
+                severity=Severity.WARN,
+                title=f"{dev}{(' ' + prefix) if prefix else ''} 故障",
+                message="{point}={value}",
+                inputs=tuple(f"faults.{k}" for k in keys),
+                op="any_nonzero",
+                source_slave=sid,
+            ))
+    return rules
+
+
+def build_rules(spec: dict | None = None) -> list[AlarmRule]:
+    """内置规则 + spec 故障点位规则（spec 为空时仅内置规则）"""
+    rules = list(BUILTIN_RULES)
+    if spec:
+        covered = {k for r in rules for k in r.covers}
+        rules.extend(fault_rules_from_spec(spec, exclude=covered))
+    return rules
@@ -0,0 +1,54 @@
+"""原子写文件：写临时文件 -> fsync -> rename 覆盖目标，掉电时目标文件要么是旧内容要么是新内容，不会写一半。"""
+
+import os
+import shutil
+from pathlib import Path
+
+
+def fsync_dir(path: Path) -> None:
+    """同步目录项（rename、新建、删除文件后调用；部分文件系统不支持目录 fsync，忽略）"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(
+    path: str | Path,
+    text: str,
+    encoding: str = "utf-8",
+    backup_path: str | Path | None = None,
+) -> None:
+    """原子写入文本，见 atomic_write_bytes"""
+    atomic_write_bytes(path, text.encode(encoding), backup_path=backup_path)
+
+
+def atomic_write_bytes(path: str | Path, data: bytes, backup_path: str | Path | None = None) -> None:
+    """
+    原子写入。backup_path 非空且目标已存在时，先把当前目标复制为备份（保留上一份完好的文件）。
+    失败抛出 OSError，临时文件被清理，目标文件保持原样。
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if backup_path is not None and path.exists():
+            shutil.copy2(path, backup_path)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    fsync_dir(path.parent)
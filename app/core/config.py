@@ -1,15 +1,22 @@
 """应用配置 - 支持 config.yaml，不存在则使用默认值"""
 
 import logging
+import queue
+import threading
+import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+from app.core.atomic_io import atomic_write_text
 
 logger = logging.getLogger(__name__)
 
 # 项目根目录（app 的上级）
 _ROOT = Path(__file__).resolve().parent.parent.parent
 _CONFIG_PATH = _ROOT / "config.yaml"
+# 每次保存前把当前 config.yaml 复制为备份；主文件无法解析时从备份加载
+_BACKUP_PATH = _ROOT / "config.yaml.bak"
 
 # 最近一次保存失败时的错误信息与路径（供 UI 弹窗展示）
 _last_save_error: str | None = None
@@ -36,6 +43,15 @@ class ModbusConfig:
     parity: str = "N"
     stopbits: int = 1
     timeout: float = 0.2
+    # 线路抓包：非空时包装 transport，把请求/响应写入该文件（按 capture_max_mb 轮转）
+    capture_path: str = ""
+    capture_max_mb: int = 16
+    # 抓包回放：非空时用 ReplayTransport 按原始节奏回放该文件（优先于 use_mock）
+    replay_path: str = ""
+    # use_mock 时改用物理仿真 SimTransport（从站延迟 sim_latency_ms + 波特率帧时间，模型倍速 sim_speed）
+    sim: bool = False
+    sim_latency_ms: float = 3.0
+    sim_speed: float = 1.0
 
 
 @dataclass
@@ -87,6 +103,12 @@ class AlarmThresholdsConfig:
     lpg_crit_lel_x10: int = 400
 
 
+@dataclass
+class BatteryConfig:
+    """电池参数：可用容量（Wh），续航估算用功率换算 SOC 变化率；0 表示只用 SOC 回归"""
+    capacity_wh: float = 4800.0
+
+
 @dataclass
 class VideoConfig:
     """视频嵌入配置（树莓派 X11/Wayland 等）"""
@@ -102,6 +124,64 @@ class SecurityConfig:
     session_timeout_s: int = 900
 
 
+@dataclass
+class StorageConfig:
+    """本地持久化：数据目录（相对路径基于项目根目录）、告警日志保留期、状态缓存（启动时恢复上次的值）、遥测记录"""
+    data_dir: str = "data"
+    alarm_journal: bool = True
+    alarm_retention_days: int = 90
+    state_cache: bool = True
+    state_cache_interval_s: float = 10.0
+    telemetry: bool = True
+    telemetry_quota_mb: int = 2048
+    telemetry_write_budget_mb_per_day: int = 64
+    telemetry_codec: str = "zlib"  # zlib | lzma
+    energy_meter: bool = True
+
+
+@dataclass
+class LoggingConfig:
+    """日志：默认级别、分模块级别（logger 名前缀 -> 级别）、内存飞行记录器容量与级别、app.log 落盘限速与批量间隔"""
+    level: str = "INFO"
+    modules: dict[str, str] = field(default_factory=dict)
+    ring_size: int = 5000
+    ring_level: str = "INFO"
+    file_max_records_per_s: int = 50
+    flush_interval_s: float = 2.0
+
+
+@dataclass
+class AutomationConfig:
+    """自动化规则（字段/定时触发 -> 写控制器动作，见 app.services.automation）与全局限流；自定义场景（见 app.services.scene_executor）"""
+    enabled: bool = True
+    max_actions_per_min: int = 10
+    rules: list[dict] = field(default_factory=list)
+    scenes: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class LiveApiConfig:
+    """局域网实时状态 API（HTTP 快照 + WebSocket 增量，见 app.services.live_api）；须设置 token，为空时不启动"""
+    enabled: bool = False
+    host: str = "0.0.0.0"
+    port: int = 8765
+    max_clients: int = 8
+    token: str = ""
+
+
+@dataclass
+class UplinkConfig:
+    """遥测上行到 backend（先存后传，见 app.services.uplink）；url 为 backend 根地址，vehicle_id 为空时用主机名"""
+    enabled: bool = False
+    url: str = ""
+    vehicle_id: str = ""
+    token: str = ""
+    sample_interval_s: float = 10.0
+    chunk_interval_s: float = 60.0
+    max_queue_mb: int = 64
+    timeout_s: float = 10.0
+
+
 @dataclass
 class AppConfig:
     """应用全局配置"""
@@ -112,14 +192,27 @@ class AppConfig:
     display: DisplayConfig = field(default_factory=DisplayConfig)
     system: SystemConfig = field(default_factory=SystemConfig)
     alarm_thresholds: AlarmThresholdsConfig = field(default_factory=AlarmThresholdsConfig)
+    battery: BatteryConfig = field(default_factory=BatteryConfig)
     video: VideoConfig = field(default_factory=VideoConfig)
     security: SecurityConfig = field(default_factory=SecurityConfig)
+    storage: StorageConfig = field(default_factory=StorageConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    automation: AutomationConfig = field(default_factory=AutomationConfig)
+    live_api: LiveApiConfig = field(default_factory=LiveApiConfig)
+    uplink: UplinkConfig = field(default_factory=UplinkConfig)
     dev_mode: bool = False
     theme_path: Path = field(default_factory=lambda: Path(__file__).resolve().parent.parent / "ui" / "theme.qss")
 
 
 _config: AppConfig | None = None
 
+# 配置变更通知：save_config / set_config 成功后版本号 +1 并回调订阅者 (config, version)。
+# 消费方缓存由配置派生的值，只在回调里刷新，热路径不再调用 get_config()。
+ConfigListener = Callable[[AppConfig, int], None]
+_config_version = 0
+_listeners: list[ConfigListener] = []
+_listeners_lock = threading.Lock()
+
 
 def _load_yaml(path: Path) -> dict[str, Any] | None:
     """加载 YAML 文件，失败返回 None"""
@@ -161,6 +254,18 @@ def _merge(config: AppConfig, data: dict[str, Any]) -> None:
             config.modbus.stopbits = int(m["stopbits"])
         if "timeout" in m:
             config.modbus.timeout = float(m["timeout"])
+        if "capture_path" in m:
+            config.modbus.capture_path = str(m["capture_path"] or "").strip()
+        if "capture_max_mb" in m:
+            config.modbus.capture_max_mb = max(1, int(m["capture_max_mb"]))
+        if "replay_path" in m:
+            config.modbus.replay_path = str(m["replay_path"] or "").strip()
+        if "sim" in m:
+            config.modbus.sim = bool(m["sim"])
+        if "sim_latency_ms" in m:
+            config.modbus.sim_latency_ms = max(0.0, float(m["sim_latency_ms"]))
+        if "sim_speed" in m:
+            config.modbus.sim_speed = max(0.0, float(m["sim_speed"]))
 
     if "poll" in data and isinstance(data["poll"], dict):
         p = data["poll"]
@@ -217,6 +322,11 @@ def _merge(config: AppConfig, data: dict[str, Any]) -> None:
         if "lpg_crit_lel_x10" in at:
             config.alarm_thresholds.lpg_crit_lel_x10 = int(at["lpg_crit_lel_x10"])
 
+    if "battery" in data and isinstance(data["battery"], dict):
+        b = data["battery"]
+        if "capacity_wh" in b:
+            config.battery.capacity_wh = max(0.0, float(b["capacity_wh"]))
+
     if "video" in data and isinstance(data["video"], dict):
         v = data["video"]
         if "prefer_backend" in v:
@@ -233,6 +343,90 @@ def _merge(config: AppConfig, data: dict[str, Any]) -> None:
         if "session_timeout_s" in s:
             config.security.session_timeout_s = max(60, int(s["session_timeout_s"]))
 
+    if "storage" in data and isinstance(data["storage"], dict):
+        st = data["storage"]
+        if "data_dir" in st:
+            config.storage.data_dir = str(st["data_dir"] or "").strip() or "data"
+        if "alarm_journal" in st:
+            config.storage.alarm_journal = bool(st["alarm_journal"])
+        if "alarm_retention_days" in st:
+            config.storage.alarm_retention_days = max(1, int(st["alarm_retention_days"]))
+        if "state_cache" in st:
+            config.storage.state_cache = bool(st["state_cache"])
+        if "state_cache_interval_s" in st:
+            config.storage.state_cache_interval_s = max(1.0, float(st["state_cache_interval_s"]))
+        if "telemetry" in st:
+            config.storage.telemetry = bool(st["telemetry"])
+        if "telemetry_quota_mb" in st:
+            config.storage.telemetry_quota_mb = max(16, int(st["telemetry_quota_mb"]))
+        if "telemetry_write_budget_mb_per_day" in st:
+            config.storage.telemetry_write_budget_mb_per_day = max(1, int(st["telemetry_write_budget_mb_per_day"]))
+        if "telemetry_codec" in st:
+            codec = str(st["telemetry_codec"]).strip().lower()
+            config.storage.telemetry_codec = codec if codec in ("zlib", "lzma") else "zlib"
+        if "energy_meter" in st:
+            config.storage.energy_meter = bool(st["energy_meter"])
+
+    if "logging" in data and isinstance(data["logging"], dict):
+        lg = data["logging"]
+        if "level" in lg:
+            config.logging.level = str(lg["level"] or "").strip().upper() or "INFO"
+        if "modules" in lg and isinstance(lg["modules"], dict):
+            config.logging.modules = {
+                str(k): str(v).strip().upper() for k, v in lg["modules"].items() if k and v
+            }
+        if "ring_size" in lg:
+            config.logging.ring_size = max(100, int(lg["ring_size"]))
+        if "ring_level" in lg:
+            config.logging.ring_level = str(lg["ring_level"] or "").strip().upper() or "INFO"
+        if "file_max_records_per_s" in lg:
+            config.logging.file_max_records_per_s = max(1, int(lg["file_max_records_per_s"]))
+        if "flush_interval_s" in lg:
+            config.logging.flush_interval_s = max(0.1, float(lg["flush_interval_s"]))
+
+    if "automation" in data and isinstance(data["automation"], dict):
+        au = data["automation"]
+        if "enabled" in au:
+            config.automation.enabled = bool(au["enabled"])
+        if "max_actions_per_min" in au:
+            config.automation.max_actions_per_min = max(1, int(au["max_actions_per_min"]))
+        if "rules" in au and isinstance(au["rules"], list):
+            config.automation.rules = [dict(r) for r in au["rules"] if isinstance(r, dict)]
+        if "scenes" in au and isinstance(au["scenes"], list):
+            config.automation.scenes = [dict(r) for r in au["scenes"] if isinstance(r, dict)]
+
+    if "live_api" in data and isinstance(data["live_api"], dict):
+        la = data["live_api"]
+        if "enabled" in la:
+            config.live_api.enabled = bool(la["enabled"])
+        if "host" in la:
+            config.live_api.host = str(la["host"] or "").strip() or "0.0.0.0"
+        if "port" in la:
+            config.live_api.port = max(0, min(65535, int(la["port"])))
+        if "max_clients" in la:
+            config.live_api.max_clients = max(1, int(la["max_clients"]))
+        if "token" in la:
+            config.live_api.token = str(la["token"] or "").strip()
+
+    if "uplink" in data and isinstance(data["uplink"], dict):
+        ul = data["uplink"]
+        if "enabled" in ul:
+            config.uplink.enabled = bool(ul["enabled"])
+        if "url" in ul:
+            config.uplink.url = str(ul["url"] or "").strip()
+        if "vehicle_id" in ul:
+            config.uplink.vehicle_id = str(ul["vehicle_id"] or "").strip()
+        if "token" in ul:
+            config.uplink.token = str(ul["token"] or "").strip()
+        if "sample_interval_s" in ul:
+            config.uplink.sample_interval_s = max(1.0, float(ul["sample_interval_s"]))
+        if "chunk_interval_s" in ul:
+            config.uplink.chunk_interval_s = max(10.0, float(ul["chunk_interval_s"]))
+        if "max_queue_mb" in ul:
+            config.uplink.max_queue_mb = max(1, int(ul["max_queue_mb"]))
+        if "timeout_s" in ul:
+            config.uplink.timeout_s = max(1.0, float(ul["timeout_s"]))
+
     if "dev_mode" in data:
         config.dev_mode = bool(data["dev_mode"])
 
@@ -241,6 +435,9 @@ def load_config() -> AppConfig:
     """读取 config.yaml 并与默认配置深度合并（缺项用默认，不覆盖已有项）。无 config.yaml 也能运行。"""
     config = AppConfig()
     data = _load_yaml(_CONFIG_PATH)
+    if data is None and _CONFIG_PATH.exists() and _BACKUP_PATH.exists():
+        logger.warning("config.yaml 无法解析，改用备份 %s", _BACKUP_PATH)
+        data = _load_yaml(_BACKUP_PATH)
     _merge(config, data or {})
     return config
 
@@ -254,9 +451,46 @@ def get_config() -> AppConfig:
 
 
 def set_config(config: AppConfig) -> None:
-    """设置当前配置（用于恢复默认等场景）"""
+    """设置当前配置（用于恢复默认等场景），并通知订阅者"""
     global _config
     _config = config
+    notify_config_changed()
+
+
+def get_config_version() -> int:
+    """当前配置版本号（每次变更通知 +1，启动时为 0）"""
+    return _config_version
+
+
+def subscribe_config(listener: ConfigListener) -> Callable[[], None]:
+    """
+    订阅配置变更，返回取消订阅函数。回调在发起变更的线程（通常为主线程）同步执行，
+    应只刷新缓存或投递信号，不做耗时操作；跨线程消费方自行排队到所属线程。
+    """
+    with _listeners_lock:
+        _listeners.append(listener)
+
+    def _unsubscribe() -> None:
+        with _listeners_lock:
+            if listener in _listeners:
+                _listeners.remove(listener)
+    return _unsubscribe
+
+
+def notify_config_changed() -> int:
+    """配置版本 +1 并回调全部订阅者（单个回调异常只记录日志），返回新版本号"""
+    global _config_version
+    cfg = get_config()
+    with _listeners_lock:
+        _config_version += 1
+        version = _config_version
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(cfg, version)
+        except Exception as e:
+            logger.exception("配置变更回调失败 %r: %s", listener, e)
+    return version
 
 
 def _config_to_dict(cfg: AppConfig) -> dict[str, Any]:
@@ -269,6 +503,12 @@ def _config_to_dict(cfg: AppConfig) -> dict[str, Any]:
             "parity": cfg.modbus.parity,
             "stopbits": cfg.modbus.stopbits,
             "timeout": cfg.modbus.timeout,
+            "capture_path": cfg.modbus.capture_path,
+            "capture_max_mb": cfg.modbus.capture_max_mb,
+            "replay_path": cfg.modbus.replay_path,
+            "sim": cfg.modbus.sim,
+            "sim_latency_ms": cfg.modbus.sim_latency_ms,
+            "sim_speed": cfg.modbus.sim_speed,
         },
         "poll": {
             "FAST_MS": cfg.poll.FAST_MS,
@@ -301,6 +541,9 @@ def _config_to_dict(cfg: AppConfig) -> dict[str, Any]:
             "lpg_warn_lel_x10": cfg.alarm_thresholds.lpg_warn_lel_x10,
             "lpg_crit_lel_x10": cfg.alarm_thresholds.lpg_crit_lel_x10,
         },
+        "battery": {
+            "capacity_wh": cfg.battery.capacity_wh,
+        },
         "video": {
             "prefer_backend": cfg.video.prefer_backend,
             "sink": cfg.video.sink,
@@ -310,10 +553,60 @@ def _config_to_dict(cfg: AppConfig) -> dict[str, Any]:
             "maintenance_pin": cfg.security.maintenance_pin,
             "session_timeout_s": cfg.security.session_timeout_s,
         },
+        "storage": {
+            "data_dir": cfg.storage.data_dir,
+            "alarm_journal": cfg.storage.alarm_journal,
+            "alarm_retention_days": cfg.storage.alarm_retention_days,
+            "state_cache": cfg.storage.state_cache,
+            "state_cache_interval_s": cfg.storage.state_cache_interval_s,
+            "telemetry": cfg.storage.telemetry,
+            "telemetry_quota_mb": cfg.storage.telemetry_quota_mb,
+            "telemetry_write_budget_mb_per_day": cfg.storage.telemetry_write_budget_mb_per_day,
+            "telemetry_codec": cfg.storage.telemetry_codec,
+            "energy_meter": cfg.storage.energy_meter,
+        },
+        "logging": {
+            "level": cfg.logging.level,
+            "modules": dict(cfg.logging.modules),
+            "ring_size": cfg.logging.ring_size,
+            "ring_level": cfg.logging.ring_level,
+            "file_max_records_per_s": cfg.logging.file_max_records_per_s,
+            "flush_interval_s": cfg.logging.flush_interval_s,
+        },
+        "automation": {
+            "enabled": cfg.automation.enabled,
+            "max_actions_per_min": cfg.automation.max_actions_per_min,
+            "rules": [dict(r) for r in cfg.automation.rules],
+            "scenes": [dict(r) for r in cfg.automation.scenes],
+        },
+        "live_api": {
+            "enabled": cfg.live_api.enabled,
+            "host": cfg.live_api.host,
+            "port": cfg.live_api.port,
+            "max_clients": cfg.live_api.max_clients,
+            "token": cfg.live_api.token,
+        },
+        "uplink": {
+            "enabled": cfg.uplink.enabled,
+            "url": cfg.uplink.url,
+            "vehicle_id": cfg.uplink.vehicle_id,
+            "token": cfg.uplink.token,
+            "sample_interval_s": cfg.uplink.sample_interval_s,
+            "chunk_interval_s": cfg.uplink.chunk_interval_s,
+            "max_queue_mb": cfg.uplink.max_queue_mb,
+            "timeout_s": cfg.uplink.timeout_s,
+        },
         "dev_mode": cfg.dev_mode,
     }
 
 
+def get_data_dir(config: AppConfig | None = None) -> Path:
+    """数据目录绝对路径（storage.data_dir，相对路径基于项目根目录），不自动创建"""
+    cfg = config or get_config()
+    p = Path(cfg.storage.data_dir).expanduser()
+    return p if p.is_absolute() else _ROOT / p
+
+
 def get_config_path() -> str:
     """返回 config.yaml 的绝对路径（供保存失败时提示用）。"""
     return str(_CONFIG_PATH.resolve())
@@ -325,7 +618,18 @@ def get_last_save_error() -> str | None:
 
 
 def save_config(config: AppConfig) -> bool:
-    """把当前配置写回 config.yaml，保留结构与可读性。失败记录路径与异常并返回 False。"""
+    """
+    把当前配置写回 config.yaml，保留结构与可读性。失败记录路径与异常并返回 False。
+    保存的是当前单例时通知订阅者：内存中的修改已生效，写盘失败也通知（保存其它实例的调用方随后 set_config 时再通知）。
+    """
+    ok = _write_config(_config_to_dict(config))
+    if config is _config:
+        notify_config_changed()
+    return ok
+
+
+def _write_config(data: dict[str, Any]) -> bool:
+    """序列化并原子写入 config.yaml（临时文件 + fsync + rename，旧文件留作 .bak）"""
     global _last_save_error
     path_str = get_config_path()
     try:
@@ -336,16 +640,13 @@ def save_config(config: AppConfig) -> bool:
         return False
 
     try:
-        data = _config_to_dict(config)
-        _CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(_CONFIG_PATH, "w", encoding="utf-8") as f:
-            yaml.dump(
-                data,
-                f,
-                allow_unicode=True,
-                default_flow_style=False,
-                sort_keys=False,
-            )
+        text = yaml.dump(
+            data,
+            allow_unicode=True,
+            default_flow_style=False,
+            sort_keys=False,
+        )
+        atomic_write_text(_CONFIG_PATH, text, backup_path=_BACKUP_PATH)
         _last_save_error = None
         logger.info("配置已保存至 %s", path_str)
         return True
@@ -354,3 +655,86 @@ def save_config(config: AppConfig) -> bool:
         _last_save_error = err_msg
         logger.exception("保存 config.yaml 失败，路径: %s，异常: %s", path_str, e)
         return False
+
+
+# ---------- 后台保存 ----------
+
+# 合并窗口（秒）：首个保存请求后等待该时长，期间的后续请求只写最新一份
+SAVE_COALESCE_S = 0.3
+
+SaveCallback = Callable[[bool, "str | None"], None]
+
+
+class _ConfigWriter:
+    """
+    后台写线程：save_config_async 在调用线程把配置转为字典（快照），YAML 序列化与写盘在本线程完成。
+    合并窗口内的多次保存只写最后一份，所有请求的回调都收到该次写入结果。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._latest: dict[str, Any] | None = None
+        self._callbacks: list[SaveCallback] = []
+        self._wake = queue.Queue()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, data: dict[str, Any], on_done: SaveCallback | None) -> None:
+        with self._lock:
+            wake = self._latest is None
+            self._latest = data
+            if on_done is not None:
+                self._callbacks.append(on_done)
+            self._idle.clear()
+        if wake:
+            self._wake.put(None)
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        return self._idle.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            self._wake.get()
+            time.sleep(SAVE_COALESCE_S)
+            with self._lock:
+                data, self._latest = self._latest, None
+                callbacks, self._callbacks = self._callbacks, []
+            if data is None:
+                continue
+            ok = _write_config(data)
+            err = None if ok else _last_save_error
+            for cb in callbacks:
+                try:
+                    cb(ok, err)
+                except Exception as e:
+                    logger.exception("配置保存回调失败: %s", e)
+            with self._lock:
+                if self._latest is None:
+                    self._idle.set()
+
+
+_writer: _ConfigWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def save_config_async(config: AppConfig, on_done: SaveCallback | None = None) -> None:
+    """
+    后台保存配置（不阻塞调用线程），语义同 save_config：保存当前单例时立即通知订阅者。
+    on_done(ok, error) 在写线程回调，UI 需自行排队回主线程（如经 Qt 信号）。
+    """
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _ConfigWriter()
+        writer = _writer
+    writer.submit(_config_to_dict(config), on_done)
+    if config is _config:
+        notify_config_changed()
+
+
+def flush_config_writes(timeout: float = 5.0) -> bool:
+    """等待已提交的后台保存全部落盘（退出前调用）；无后台写入时立即返回 True"""
+    writer = _writer
+    return True if writer is None else writer.wait_idle(timeout)
@@ -1,38 +1,351 @@
-"""日志配置 - 控制台 + logs/app.log（按大小轮转）"""
+"""
+日志配置 - 异步管线：调用线程只经 QueueHandler 入队（不格式化、不做 IO），后台写线程批量格式化并写出到
+控制台 + logs/app.log（按大小轮转）。
 
+- 分模块级别：modules={"app.services.modbus_master": "DEBUG", ...}，按最长前缀匹配，其余用 level
+- 飞行记录器：内存环形缓冲保存最近 ring_size 条记录（≥ ring_level，deque 追加无锁），
+  未捕获异常时与诊断页“导出最近日志”时写到 logs/flight_*.log
+- 落盘限速：app.log 每秒最多 file_max_records_per_s 条（WARNING 及以上不限），每 flush_interval_s 批量写一次，
+  超出的条数在下一批写入一行汇总，减少热路径 CPU 与 SD 卡写入
+"""
+
+import atexit
+import collections
+import datetime
+import faulthandler
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
+from typing import Any
 
 # 项目根目录
 _ROOT = Path(__file__).resolve().parent.parent.parent
-_LOG_PATH = _ROOT / "logs" / "app.log"
+_LOG_DIR = _ROOT / "logs"
+_LOG_PATH = _LOG_DIR / "app.log"
 
 # 格式：时间|级别|线程|模块|消息
 _FORMAT = "%(asctime)s|%(levelname)s|%(threadName)s|%(name)s|%(message)s"
 _DATE_FMT = "%Y-%m-%d %H:%M:%S"
 
+RING_SIZE = 5000
+FLUSH_INTERVAL_S = 2.0
+FILE_MAX_RECORDS_PER_S = 50
+# 单批最多处理的记录数（到达即提前写出）
+BATCH_MAX = 512
 
-def setup_logging(level: int = logging.INFO) -> None:
-    """配置应用日志：输出到控制台 + logs/app.log（5MB 轮转，保留 5 个）"""
-    _LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+_STOP = object()
 
-    formatter = logging.Formatter(_FORMAT, datefmt=_DATE_FMT)
 
-    console = logging.StreamHandler(sys.stdout)
-    console.setFormatter(formatter)
+def _to_level(level: int | str) -> int:
+    if isinstance(level, int):
+        return level
+    v = logging.getLevelName(str(level).strip().upper())
+    return v if isinstance(v, int) else logging.INFO
+
+
+class _ModuleLevelFilter(logging.Filter):
+    """按 logger 名最长前缀匹配分模块级别，未配置的模块使用默认级别"""
+
+    def __init__(self, default: int, modules: dict[str, int]):
+        super().__init__()
+        self._default = default
+        self._modules = sorted(modules.items(), key=lambda kv: len(kv[0]), reverse=True)
+        self._cache: dict[str, int] = {}
+
+    def threshold(self, name: str) -> int:
+        lvl = self._cache.get(name)
+        if lvl is None:
+            lvl = self._default
+            for prefix, v in self._modules:
+                if name == prefix or name.startswith(prefix + "."):
+                    lvl = v
+                    break
+            self._cache[name] = lvl
+        return lvl
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.threshold(record.name)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """入队时不格式化消息（进程内队列无需序列化），格式化推迟到写线程；args 须为不可变或不再修改的值"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class FlightRecorder(logging.Handler):
+    """内存环形缓冲：保存最近的 LogRecord（不格式化），dump() 时才格式化写文件"""
+
+    def __init__(self, capacity: int = RING_SIZE, level: int = logging.DEBUG):
+        super().__init__(level)
+        self._ring: collections.deque[logging.LogRecord] = collections.deque(maxlen=max(1, capacity))
+        self.setFormatter(logging.Formatter(_FORMAT, datefmt=_DATE_FMT))
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # 不取 Handler 锁：deque.append 本身线程安全
+        if record.levelno >= self.level:
+            self._ring.append(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._ring.append(record)
+
+    def records(self) -> list[logging.LogRecord]:
+        return list(self._ring)
+
+    def dump(self, reason: str = "manual") -> Path | None:
+        """把缓冲内记录写到 logs/flight_<时间>_<原因>.log，返回路径；失败返回 None"""
+        from app.core.atomic_io import atomic_write_text
+
+        records = self.records()
+        lines = []
+        for r in records:
+            try:
+                lines.append(self.format(r))
+            except Exception as e:
+                lines.append(f"<格式化失败 {r.name}: {e}>")
+        ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = _LOG_DIR / f"flight_{ts}_{reason}.log"
+        try:
+            atomic_write_text(path, "\n".join(lines) + "\n")
+        except OSError as e:
+            sys.stderr.write(f"飞行记录写入失败 {path}: {e}\n")
+            return None
+        return path
+
+
+class _BatchingStreamHandler(logging.StreamHandler):
+    """emit 只缓存格式化后的行，flush 时一次写出"""
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self._buf: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buf.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        chunk, self._buf = "".join(self._buf), []
+        try:
+            self.stream.write(chunk)
+            self.stream.flush()
+        except Exception:
+            pass
+
+
+class _BatchingFileHandler(RotatingFileHandler):
+    """按批写入的轮转文件；WARNING 以下按每秒条数限速，超出部分计数后以汇总行记录"""
+
+    def __init__(self, path: Path, max_records_per_s: int, max_bytes: int, backup_count: int):
+        super().__init__(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self._buf: list[str] = []
+        self._rate = max(1, int(max_records_per_s))
+        self._tokens = float(self._rate)
+        self._last_refill = time.monotonic()
+        self._dropped = 0
+        self.dropped_total = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno < logging.WARNING:
+            now = time.monotonic()
+            self._tokens = min(float(self._rate), self._tokens + (now - self._last_refill) * self._rate)
+            self._last_refill = now
+            if self._tokens < 1.0:
+                self._dropped += 1
+                self.dropped_total += 1
+                return
+            self._tokens -= 1.0
+        try:
+            self._buf.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        if self._dropped:
+            stamp = time.strftime(_DATE_FMT)
+            self._buf.append(
+                f"{stamp}|WARNING|LogWriter|{__name__}|日志限速：丢弃 {self._dropped} 条低于 WARNING 的记录{self.terminator}"
+            )
+            self._dropped = 0
+        if not self._buf:
+            return
+        chunk, self._buf = "".join(self._buf), []
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0 and self.stream.tell() + len(chunk.encode("utf-8")) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(chunk)
+            self.stream.flush()
+        except Exception as e:
+            sys.stderr.write(f"写 app.log 失败: {e}\n")
 
-    file_handler = RotatingFileHandler(
+
+class _LogWriter:
+    """后台写线程：取队列记录交给输出 handler，按批或按 flush_interval_s 写出"""
+
+    def __init__(self, q: queue.Queue, handlers: list[logging.Handler], flush_interval_s: float):
+        self._queue = q
+        self._handlers = handlers
+        self._flush_interval_s = max(0.05, flush_interval_s)
+        self._thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        pending = 0
+        next_flush = time.monotonic() + self._flush_interval_s
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                for h in self._handlers:
+                    if item.levelno >= h.level:
+                        h.handle(item)
+                pending += 1
+                # 错误级别立即写出，便于崩溃前落盘
+                urgent = item.levelno >= logging.ERROR
+            else:
+                urgent = False
+            if urgent or pending >= BATCH_MAX or time.monotonic() >= next_flush:
+                self._flush()
+                pending = 0
+                next_flush = time.monotonic() + self._flush_interval_s
+        self._flush()
+
+    def _flush(self) -> None:
+        for h in self._handlers:
+            try:
+                h.flush()
+            except Exception:
+                pass
+
+    def stop(self, timeout: float = 2.0) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+
+_writer: _LogWriter | None = None
+_recorder: FlightRecorder | None = None
+
+
+def setup_logging(
+    level: int | str = logging.INFO,
+    modules: dict[str, int | str] | None = None,
+    ring_size: int = RING_SIZE,
+    ring_level: int | str = logging.INFO,
+    file_max_records_per_s: int = FILE_MAX_RECORDS_PER_S,
+    flush_interval_s: float = FLUSH_INTERVAL_S,
+) -> None:
+    """
+    配置应用日志：QueueHandler -> 后台写线程 -> 控制台 + logs/app.log（5MB 轮转，保留 5 个），另挂飞行记录器。
+    根 logger 级别取 level / ring_level / 各模块级别中的最低值；低于输出阈值的记录只进飞行记录器。
+    """
+    global _writer, _recorder
+    _LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    default = _to_level(level)
+    module_levels = {name: _to_level(v) for name, v in (modules or {}).items()}
+    ring_lvl = _to_level(ring_level)
+
+    if _writer is not None:
+        _writer.stop()
+    formatter = logging.Formatter(_FORMAT, datefmt=_DATE_FMT)
+    # 控制台输出走 stderr：批量写出的日志不与进程的 stdout 结果（如基准子进程的 JSON 行）交错
+    console = _BatchingStreamHandler(sys.stderr)
+    console.setFormatter(formatter)
+    file_handler = _BatchingFileHandler(
         _LOG_PATH,
-        maxBytes=5 * 1024 * 1024,  # 5MB
-        backupCount=5,
-        encoding="utf-8",
+        max_records_per_s=file_max_records_per_s,
+        max_bytes=5 * 1024 * 1024,  # 5MB
+        backup_count=5,
     )
     file_handler.setFormatter(formatter)
 
+    q: queue.Queue = queue.Queue()
+    queue_handler = _LazyQueueHandler(q)
+    queue_handler.addFilter(_ModuleLevelFilter(default, module_levels))
+    _writer = _LogWriter(q, [console, file_handler], flush_interval_s)
+    _recorder = FlightRecorder(ring_size, ring_lvl)
+
     root = logging.getLogger()
-    root.setLevel(level)
+    root.setLevel(min([default, ring_lvl, *module_levels.values()]))
     root.handlers.clear()
-    root.addHandler(console)
-    root.addHandler(file_handler)
+    root.addHandler(queue_handler)
+    root.addHandler(_recorder)
+    for name, lvl in module_levels.items():
+        logging.getLogger(name).setLevel(lvl)
+
+    _install_crash_hooks()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """写出队列中剩余记录并停止写线程（退出时由 atexit 调用）"""
+    global _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+
+
+def get_flight_recorder() -> FlightRecorder | None:
+    return _recorder
+
+
+def dump_flight_recorder(reason: str = "manual") -> Path | None:
+    """把飞行记录器写入 logs/，未启用时返回 None"""
+    return _recorder.dump(reason) if _recorder is not None else None
+
+
+_hooks_installed = False
+_fault_file: Any = None
+
+
+def _install_crash_hooks() -> None:
+    """未捕获异常（主线程与子线程）时记录并导出飞行记录；致命信号时 faulthandler 写 logs/fault.log"""
+    global _hooks_installed, _fault_file
+    if _hooks_installed:
+        return
+    _hooks_installed = True
+
+    prev_excepthook = sys.excepthook
+    prev_thread_hook = threading.excepthook
+
+    def _excepthook(exc_type, exc, tb):
+        if not issubclass(exc_type, KeyboardInterrupt):
+            logging.getLogger(__name__).critical("未捕获异常", exc_info=(exc_type, exc, tb))
+            dump_flight_recorder("crash")
+        prev_excepthook(exc_type, exc, tb)
+
+    def _thread_excepthook(args):
+        if args.exc_type is not SystemExit:
+            logging.getLogger(__name__).critical(
+                "线程 %s 未捕获异常", getattr(args.thread, "name", "?"),
+                exc_info=(args.exc_type, args.exc_value, args.exc_traceback),
+            )
+            dump_flight_recorder("crash")
+        prev_thread_hook(args)
+
+    sys.excepthook = _excepthook
+    threading.excepthook = _thread_excepthook
+    try:
+        _fault_file = open(_LOG_DIR / "fault.log", "a", encoding="utf-8")
+        faulthandler.enable(_fault_file)
+    except OSError:
+        pass
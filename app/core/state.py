@@ -2,6 +2,7 @@
 
 import logging
 import threading
+import time
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -34,6 +35,8 @@ class PowerState:
     inv_fault: bool | None = None       # 逆变器故障
     inv_ac_v_x10: int | None = None     # 逆变器交流电压 ×10 V
     inv_ac_p_w: int | None = None       # 逆变器交流功率 W
+    gen2_v_x100: int | None = None      # 48V 第二发电机电压 ×100 V
+    gen2_i_x100: int | None = None      # 48V 第二发电机电流 ×100 A
 
 
 # --- hvac ---
@@ -94,6 +97,10 @@ class PduState:
     inv_ac_out_fb: bool | None = None
     leg_motor_i_x100: int | None = None
     awning_motor_i_x100: int | None = None
+    ac_out_v_x10: int | None = None     # 220V 输出电压 ×10 V（可选计量）
+    ac_out_p_w: int | None = None       # 220V 输出功率 W（可选计量）
+    fridge_i_x100: int | None = None    # 冰箱 24V 支路电流 ×100 A
+    wind_x10: int | None = None         # 风速 ×10 m/s（可选传感器）
 
 
 # --- env ---
@@ -137,6 +144,10 @@ class Snapshot:
     env: EnvState = field(default_factory=EnvState)
     gas: GasState = field(default_factory=GasState)
     auxfuel: AuxFuelState = field(default_factory=AuxFuelState)
+    # spec 中全部故障点位原始值：{"S2.FAULT_CODE": 0, "S8.FAULT_ACTIVE": 1, ...}，供告警规则通用覆盖
+    faults: dict[str, int] = field(default_factory=dict)
+    # 启动时从状态缓存恢复、尚未收到实时数据的子域名（UI 淡显，告警评估跳过）
+    stale: frozenset[str] = frozenset()
 
 
 def _copy_snapshot(snap: Snapshot) -> Snapshot:
@@ -163,6 +174,8 @@ def _copy_snapshot(snap: Snapshot) -> Snapshot:
             inv_fault=snap.power.inv_fault,
             inv_ac_v_x10=snap.power.inv_ac_v_x10,
             inv_ac_p_w=snap.power.inv_ac_p_w,
+            gen2_v_x100=snap.power.gen2_v_x100,
+            gen2_i_x100=snap.power.gen2_i_x100,
         ),
         hvac=HvacState(
             mode=snap.hvac.mode,
@@ -207,6 +220,10 @@ def _copy_snapshot(snap: Snapshot) -> Snapshot:
             inv_ac_out_fb=snap.pdu.inv_ac_out_fb,
             leg_motor_i_x100=snap.pdu.leg_motor_i_x100,
             awning_motor_i_x100=snap.pdu.awning_motor_i_x100,
+            ac_out_v_x10=snap.pdu.ac_out_v_x10,
+            ac_out_p_w=snap.pdu.ac_out_p_w,
+            fridge_i_x100=snap.pdu.fridge_i_x100,
+            wind_x10=snap.pdu.wind_x10,
         ),
         env=EnvState(
             cabin_temp_x10=snap.env.cabin_temp_x10,
@@ -222,6 +239,8 @@ def _copy_snapshot(snap: Snapshot) -> Snapshot:
             warmup=snap.gas.warmup,
         ),
         auxfuel=AuxFuelState(aux_fuel_level_x10=snap.auxfuel.aux_fuel_level_x10),
+        faults=dict(snap.faults),
+        stale=snap.stale,
     )
 
 
@@ -251,28 +270,85 @@ class AppState(QObject):
 
     changed = pyqtSignal(object)        # Snapshot
     alarms_changed = pyqtSignal(object) # list
+    alarm_transitions = pyqtSignal(object)  # list[AlarmTransition]
+    sampled = pyqtSignal(float, object)  # (time.time(), {域: {字段: 值}})，每次 update 中带实时数据的子域，供时序存储
     comm_changed = pyqtSignal(object)   # dict
 
     def __init__(self):
         super().__init__()
         self._lock = threading.Lock()
         self._snapshot = Snapshot()
+        # 当前激活告警 {id: Alarm}（置位顺序），由 apply_alarm_transitions 维护
+        self._alarms: dict[str, Any] = {}
+        # 缓存恢复的故障点位键（S<slave>.<点位名>）：faults 为各从站合并的一个子域，
+        # 首个实时故障更新到达时，未随之上报的从站的恢复值删除，不随 stale 清除而被当作实时值
+        self._restored_fault_keys: set[str] = set()
 
     def get_snapshot(self) -> Snapshot:
         """返回当前快照的深拷贝"""
         with self._lock:
             return _copy_snapshot(self._snapshot)
 
+    def get_alarms(self) -> list:
+        """当前激活告警列表（置位顺序）"""
+        with self._lock:
+            return list(self._alarms.values())
+
+    def apply_alarm_transitions(self, transitions: list) -> None:
+        """
+        应用告警变迁（RAISED/ESCALATED 加入，ACKED 替换，CLEARED 移除），
+        先 emit alarm_transitions（增量订阅者），再 emit alarms_changed（需要完整列表的订阅者）。
+        """
+        if not transitions:
+            return
+        with self._lock:
+            for t in transitions:
+                kind = getattr(t.kind, "value", t.kind)
+                if kind == "CLEARED":
+                    self._alarms.pop(t.alarm.id, None)
+                else:
+                    self._alarms[t.alarm.id] = t.alarm
+            alarms = list(self._alarms.values())
+        self.alarm_transitions.emit(transitions)
+        self.alarms_changed.emit(alarms)
+
+    def restore(self, domains: dict[str, dict[str, Any]]) -> None:
+        """
+        启动时恢复缓存的子域值（{域: {字段: 值}}，faults 为点位字典），标记为 stale 直到该域收到实时数据。
+        仅在收到实时数据前调用；emit changed 供页面首帧显示。
+        """
+        if not domains:
+            return
+        with self._lock:
+            snap = _copy_snapshot(self._snapshot)
+            restored: set[str] = set()
+            for domain, fields in domains.items():
+                if not isinstance(fields, dict):
+                    continue
+                if domain == "faults":
+                    snap.faults.update(fields)
+                    self._restored_fault_keys = set(fields)
+                elif domain != "comm" and hasattr(snap, domain):
+                    _merge_dataclass(getattr(snap, domain), fields)
+                else:
+                    continue
+                restored.add(domain)
+            snap.stale = frozenset(restored)
+            self._snapshot = snap
+            new_snap = _copy_snapshot(snap)
+        logger.info("已恢复缓存状态: %s", sorted(restored))
+        self.changed.emit(new_snap)
+
     def update(self, **kwargs: Any) -> None:
         """增量更新，合并后 emit changed（不阻塞 UI，锁内只做拷贝与合并）"""
         new_snap: Snapshot | None = None
         comm_updates: dict | None = None
         alarms: list | None = None
         snapshot_modified = False
-        keys = list(kwargs.keys())
-        logger.debug("AppState.update 等待锁 thread=%s keys=%s", threading.current_thread().name, keys)
+        # 本次带实时数据的子域，清除其 stale 标记
+        live = {k for k, v in kwargs.items() if isinstance(v, dict)}
+        samples = {k: kwargs[k] for k in live if k != "comm"}
         with self._lock:
-            logger.debug("AppState.update 获得锁 thread=%s", threading.current_thread().name)
             snap = _copy_snapshot(self._snapshot)
 
             if "comm" in kwargs:
@@ -314,18 +390,36 @@ class AppState(QObject):
                 del kwargs["auxfuel"]
                 snapshot_modified = True
 
+            if "faults" in kwargs and isinstance(kwargs["faults"], dict):
+                if self._restored_fault_keys:
+                    live_slaves = {k.partition(".")[0] for k in kwargs["faults"]}
+                    for key in self._restored_fault_keys:
+                        if key.partition(".")[0] not in live_slaves:
+                            snap.faults.pop(key, None)
+                    self._restored_fault_keys = set()
+                snap.faults.update(kwargs["faults"])
+                del kwargs["faults"]
+                snapshot_modified = True
+
             if "alarms" in kwargs:
                 alarms = kwargs.get("alarms")
                 del kwargs["alarms"]
+                if alarms is not None:
+                    self._alarms = {a.id: a for a in alarms}
 
+            if snap.stale and live & snap.stale:
+                snap.stale = snap.stale - live
             self._snapshot = snap
             if snapshot_modified:
                 new_snap = _copy_snapshot(snap)
-        logger.debug("AppState.update 释放锁 thread=%s emit_changed=%s", threading.current_thread().name, new_snap is not None)
+        # 线程名由日志格式输出；参数按引用入队，写线程格式化时才转字符串
+        logger.debug("AppState.update domains=%s emit_changed=%s", live, new_snap is not None)
 
         # 仅在快照（传感器/Modbus 数据）变化时 emit changed，避免 AlarmController 递归
         if new_snap is not None:
             self.changed.emit(new_snap)
+        if samples:
+            self.sampled.emit(time.time(), samples)
         if comm_updates is not None:
             self.comm_changed.emit(comm_updates)
         if alarms is not None:
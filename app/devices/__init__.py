@@ -5,6 +5,8 @@
 
 from typing import Any
 
+from app.devices.spec_utils import fault_key, fault_points, get_raw
+
 from app.devices.hvac import Slave01Adapter
 from app.devices.webasto import Slave02Adapter
 from app.devices.lighting import Slave03Adapter
@@ -43,15 +45,40 @@ def get_adapter(slave_id: str, spec: dict) -> Any | None:
     return _adapter_cache[slave_id]
 
 
+# 缓存每个 slave 的故障点位 [(key, raw_key, addr0)]
+_fault_cache: dict[str, list[tuple[str, str, int]]] = {}
+
+
+def _parse_faults(slave_id: str, raw: dict, spec: dict) -> dict[str, int]:
+    """按 spec 通用读取该 slave 全部故障点位（FAULT_CODE/FAULT_ACTIVE 等），键为 S<slave>.<name>。"""
+    points = _fault_cache.get(slave_id)
+    if points is None:
+        points = [
+            (fault_key(slave_id, name), raw_key, addr0)
+            for name, raw_key, addr0 in fault_points(spec.get(slave_id) or {})
+        ]
+        _fault_cache[slave_id] = points
+    out: dict[str, int] = {}
+    for key, raw_key, addr0 in points:
+        v = get_raw(raw, raw_key, addr0)
+        if v is not None:
+            out[key] = int(v)
+    return out
+
+
 def apply_device_parsers(slave_id: str, raw: dict, spec: dict) -> dict[str, Any]:
     """
     对单个 slave 的 raw 调用对应 Adapter.parse(raw)，返回可传给 app_state.update(**ret) 的字典。
-    地址与缩放均从 spec 按 name 解析，不写死。
+    地址与缩放均从 spec 按 name 解析，不写死。另附 faults：该 slave 全部故障点位原始值。
     """
     adapter = get_adapter(slave_id, spec)
     if adapter is None:
         return {}
-    return adapter.parse(raw)
+    out = adapter.parse(raw)
+    faults = _parse_faults(slave_id, raw, spec)
+    if faults:
+        out["faults"] = faults
+    return out
 
 
 __all__ = [
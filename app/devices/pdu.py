@@ -85,7 +85,7 @@ class Slave08Adapter:
     """
     Slave08 寄存器 -> PduState。
     地址从 spec 按 name 解析，不写死；输出字段与 Snapshot 一致。
-    关键：E_STOP、接触器反馈 INV_AC_OUT_FB、FAULT_ACTIVE -> pdu_fault_code。
+    关键：E_STOP、接触器反馈 INV_AC_OUT_FB、FAULT_ACTIVE -> pdu_fault_code；可选计量 AC_OUT_V/P、FRIDGE_I，可选风速 WIND。
     """
 
     def __init__(self, spec_slave: dict):
@@ -130,4 +130,16 @@ class Slave08Adapter:
         awning_i = get_val(self._name_map, raw, "AWNING_MOTOR_I_x100")
         if awning_i is not None:
             out.setdefault("pdu", {})["awning_motor_i_x100"] = awning_i
+        ac_out_v = get_val(self._name_map, raw, "AC_OUT_V_x10")
+        if ac_out_v is not None:
+            out.setdefault("pdu", {})["ac_out_v_x10"] = ac_out_v
+        ac_out_p = get_val(self._name_map, raw, "AC_OUT_P_W")
+        if ac_out_p is not None:
+            out.setdefault("pdu", {})["ac_out_p_w"] = ac_out_p
+        fridge_i = get_val(self._name_map, raw, "FRIDGE_I_x100")
+        if fridge_i is not None:
+            out.setdefault("pdu", {})["fridge_i_x100"] = fridge_i
+        wind = get_val(self._name_map, raw, "WIND_x10")
+        if wind is not None:
+            out.setdefault("pdu", {})["wind_x10"] = wind
         return out
@@ -9,7 +9,8 @@ class Slave04Adapter:
     """
     Slave04 寄存器 -> PowerState。
     地址与缩放从 spec 按 name 解析，不写死；输出字段与 Snapshot 一致。
-    关键：SOC_x10、BATT_V_x100/BATT_I_x100/BATT_P_W、INV_STATE、INVERTER_FAULT、INV_AC_V_x10/INV_AC_P_W。
+    关键：SOC_x10、BATT_V_x100/BATT_I_x100/BATT_P_W、INV_STATE、INVERTER_FAULT、INV_AC_V_x10/INV_AC_P_W、
+    GEN2_V_x100/GEN2_I_x100（第二发电机，可选）。
     """
 
     def __init__(self, spec_slave: dict):
@@ -41,4 +42,10 @@ class Slave04Adapter:
             out.setdefault("power", {})["inv_ac_v_x10"] = inv_ac_v
         if inv_ac_p is not None:
             out.setdefault("power", {})["inv_ac_p_w"] = inv_ac_p
+        gen2_v = get_val(self._name_map, raw, "GEN2_V_x100")
+        gen2_i = get_val(self._name_map, raw, "GEN2_I_x100")
+        if gen2_v is not None:
+            out.setdefault("power", {})["gen2_v_x100"] = gen2_v
+        if gen2_i is not None:
+            out.setdefault("power", {})["gen2_i_x100"] = gen2_i
         return out
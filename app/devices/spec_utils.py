@@ -13,12 +13,12 @@ BLOCK_TO_RAW: dict[str, str] = {
 }
 
 
-def build_name_map(spec_slave: dict) -> dict[str, tuple[str, int, str]]:
+def build_name_map(spec_slave: dict) -> dict[str, tuple[str, int, str, bool]]:
     """
-    从 spec_slave（单个 slave 的 spec）构建 name -> (raw_key, addr0, scale)。
-    raw_key in ("coils", "di", "hr", "ir")。
+    从 spec_slave（单个 slave 的 spec）构建 name -> (raw_key, addr0, scale, signed)。
+    raw_key in ("coils", "di", "hr", "ir")；signed 为 dtype == "S16"（寄存器按补码解释）。
     """
-    name_map: dict[str, tuple[str, int, str]] = {}
+    name_map: dict[str, tuple[str, int, str, bool]] = {}
     for block_spec, raw_key in BLOCK_TO_RAW.items():
         for point in spec_slave.get(block_spec, []):
             name = (point.get("name") or "").strip()
@@ -26,7 +26,8 @@ def build_name_map(spec_slave: dict) -> dict[str, tuple[str, int, str]]:
                 continue
             addr0 = int(point.get("addr0", 0))
             scale = (point.get("scale") or "").strip()
-            name_map[name] = (raw_key, addr0, scale)
+            signed = (point.get("dtype") or "").strip().upper() == "S16"
+            name_map[name] = (raw_key, addr0, scale, signed)
     return name_map
 
 
@@ -50,6 +51,29 @@ def _apply_scale(raw_val: int, scale: str) -> int | float:
     return raw_val
 
 
+def fault_key(slave_id: str | int, name: str) -> str:
+    """Snapshot.faults 的键：S<slave>.<点位名>，如 S2.FAULT_CODE"""
+    return f"S{int(slave_id)}.{name}"
+
+
+def is_fault_point(name: str) -> bool:
+    """当前故障点位：FAULT_CODE / FAULT_ACTIVE 及 XXX_FAULT_CODE（不含 LAST_FAULT_CODE 等历史值）"""
+    if name.startswith("LAST_"):
+        return False
+    return name in ("FAULT_CODE", "FAULT_ACTIVE") or name.endswith("_FAULT_CODE")
+
+
+def fault_points(spec_slave: dict) -> list[tuple[str, str, int]]:
+    """单个 slave 的故障点位列表 [(name, raw_key, addr0)]，按 spec 顺序。"""
+    out: list[tuple[str, str, int]] = []
+    for block_spec, raw_key in BLOCK_TO_RAW.items():
+        for point in spec_slave.get(block_spec, []):
+            name = (point.get("name") or "").strip()
+            if name and is_fault_point(name):
+                out.append((name, raw_key, int(point.get("addr0", 0))))
+    return out
+
+
 def get_raw(raw: dict, raw_key: str, addr0: int) -> int | None:
     """从 raw 中取单个值；不存在返回 None。"""
     block = raw.get(raw_key, {})
@@ -59,27 +83,29 @@ def get_raw(raw: dict, raw_key: str, addr0: int) -> int | None:
 
 
 def get_val(
-    name_map: dict[str, tuple[str, int, str]],
+    name_map: dict[str, tuple[str, int, str, bool]],
     raw: dict,
     name: str,
     apply_scale: bool = True,
 ) -> int | None:
     """
-    按名称从 raw 取值；若 apply_scale 则按 name_map 中的 scale 转换。
+    按名称从 raw 取值；S16 点位按补码转为有符号；若 apply_scale 则按 name_map 中的 scale 转换。
     返回 None 表示无此点位或未读到。
     """
     if name not in name_map:
         return None
-    raw_key, addr0, scale = name_map[name]
+    raw_key, addr0, scale, signed = name_map[name]
     v = get_raw(raw, raw_key, addr0)
     if v is None:
         return None
+    if signed and v >= 0x8000:
+        v -= 0x10000
     if apply_scale:
         return int(_apply_scale(v, scale))  # type: ignore[return-value]
     return v
 
 
-def get_bool(name_map: dict[str, tuple[str, int, str]], raw: dict, name: str) -> bool | None:
+def get_bool(name_map: dict[str, tuple[str, int, str, bool]], raw: dict, name: str) -> bool | None:
     """按名称取布尔（coil/di）；未读到为 None。"""
     v = get_val(name_map, raw, name, apply_scale=False)
     if v is None:
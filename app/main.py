@@ -3,6 +3,7 @@
 import os
 import sys
 import logging
+import socket
 import threading
 
 # 树莓派/X11 触控：必须在 QApplication 前设置，启用 XInput2 以支持触摸屏
@@ -13,20 +14,40 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt, QTimer, QObject, pyqtSignal
 
 from app.core.logging import setup_logging
-from app.core.config import get_config
+from app.core.config import AppConfig, flush_config_writes, get_config, get_data_dir, subscribe_config
 from app.core.state import AppState
 from app.core.alarm_controller import AlarmController
 from app.ui.main_window import MainWindow
 from app.services.modbus_master import ModbusMaster, MockTransport, load_spec, create_transport_from_config
+from app.services.sim_transport import SimTransport
 from app.services.video_manager import get_video_manager
+from app.services.alarm_journal import AlarmJournal, register_alarm_journal
+from app.services.state_cache import StateCache
+from app.services.stall_watchdog import StallWatchdog, register_stall_watchdog
+from app.services.timeseries import TimeSeriesStore, register_timeseries_store
+from app.services.telemetry_recorder import TelemetryRecorder, register_telemetry_recorder
+from app.services.energy import EnergyMeter, register_energy_meter
+from app.services.estimators import RangeEstimators, register_range_estimators
+from app.services.automation import AutomationController, register_automation
+from app.services.scene_executor import SceneExecutor, register_scene_executor
+from app.services.live_api import LiveApiServer, register_live_api
+from app.services.uplink import TelemetryUplink, register_uplink
 from app.devices import apply_device_parsers
 from app.devices.hvac import register_hvac_controller
 from app.devices.webasto import register_webasto_controller
 from app.devices.pdu import register_pdu_controller
 from app.devices.lighting import register_lighting_controller
 
-# 开启 DEBUG 便于排查主界面卡死：日志输出到控制台与 logs/app.log
-setup_logging(level=logging.DEBUG)
+# 日志级别来自 config.yaml 的 logging 段（排查时可把个别模块设为 DEBUG，其余保持 INFO）
+_log_cfg = get_config().logging
+setup_logging(
+    level=_log_cfg.level,
+    modules=_log_cfg.modules,
+    ring_size=_log_cfg.ring_size,
+    ring_level=_log_cfg.ring_level,
+    file_max_records_per_s=_log_cfg.file_max_records_per_s,
+    flush_interval_s=_log_cfg.flush_interval_s,
+)
 logger = logging.getLogger(__name__)
 
 # GStreamer 调试：设置 GST_DEBUG 输出到 stderr（2=LOG, 3=DEBUG, 4=TRACE）
@@ -42,12 +63,9 @@ class StateUpdateBridge(QObject):
     def __init__(self, app_state, parent=None):
         super().__init__(parent)
         self._app_state = app_state
-        self._log = logging.getLogger(__name__)
 
     def _on_updates_ready(self, d):
-        self._log.debug("StateUpdateBridge: 主线程执行 update(%s)", list(d.keys()))
         self._app_state.update(**d)
-        self._log.debug("StateUpdateBridge: update 完成")
 
 
 def _log_config_summary() -> None:
@@ -71,7 +89,7 @@ def _log_config_summary() -> None:
     )
 
 
-def _seed_mock_transport(transport: MockTransport) -> None:
+def _seed_mock_transport(transport: MockTransport | SimTransport) -> None:
     """为 Mock 预填数据，使首轮轮询后 UI 有显示；并可在后续用 inject_failure 模拟掉线。"""
     # Slave01 HVAC: 高压/低压/制冷 OK，舱温 23.5℃
     transport.set_discrete_input(1, 0, 1)   # HP_OK
@@ -131,6 +149,127 @@ def _seed_mock_transport(transport: MockTransport) -> None:
     # transport.inject_failure(1)  # 或设置 E_STOP=1 / HP_OK=0
 
 
+def _poll_ms_from_config(cfg: AppConfig) -> dict[str, int]:
+    return {
+        "FAST_MS": cfg.poll.FAST_MS,
+        "SLOW_MS": cfg.poll.SLOW_MS,
+        "VERY_SLOW_MS": cfg.poll.VERY_SLOW_MS,
+    }
+
+
+def _start_alarm_journal(app_state: AppState) -> AlarmJournal | None:
+    """按 config.storage 打开告警日志（写线程内建库），订阅告警变迁并注册供诊断页查询"""
+    cfg = get_config()
+    if not cfg.storage.alarm_journal:
+        return None
+    journal = AlarmJournal(
+        get_data_dir(cfg) / "alarm_journal.db",
+        retention_days=cfg.storage.alarm_retention_days,
+    )
+    app_state.alarm_transitions.connect(journal.record)
+    register_alarm_journal(journal)
+    return journal
+
+
+def _start_state_cache(app_state: AppState) -> StateCache | None:
+    """按 config.storage 恢复上次缓存的状态（窗口创建前，首帧即有数据）并开始周期保存"""
+    cfg = get_config()
+    if not cfg.storage.state_cache:
+        return None
+    cache = StateCache(
+        app_state,
+        get_data_dir(cfg) / "state_cache.bin",
+        interval_s=cfg.storage.state_cache_interval_s,
+    )
+    cache.restore()
+    cache.start()
+    return cache
+
+
+def _start_telemetry_recorder(app_state: AppState) -> TelemetryRecorder | None:
+    """按 config.storage 启动遥测长期记录（写线程内建目录与掉电恢复），订阅实时采样"""
+    cfg = get_config()
+    if not cfg.storage.telemetry:
+        return None
+    recorder = TelemetryRecorder(
+        get_data_dir(cfg) / "telemetry",
+        quota_mb=cfg.storage.telemetry_quota_mb,
+        write_budget_mb_per_day=cfg.storage.telemetry_write_budget_mb_per_day,
+        codec=cfg.storage.telemetry_codec,
+    )
+    app_state.sampled.connect(recorder.add_batch)
+    register_telemetry_recorder(recorder)
+    return recorder
+
+
+def _start_energy_meter(app_state: AppState) -> EnergyMeter | None:
+    """按 config.storage 加载电能累计并开始积分（缓存恢复的子域不计入）"""
+    cfg = get_config()
+    if not cfg.storage.energy_meter:
+        return None
+    meter = EnergyMeter(app_state, get_data_dir(cfg) / "energy.json")
+    meter.start()
+    register_energy_meter(meter)
+    return meter
+
+
+def _start_scene_executor(app_state: AppState, spec: dict) -> SceneExecutor:
+    """内置场景 + config.automation.scenes；配置保存后重新加载场景表"""
+    executor = SceneExecutor(app_state, spec, get_config().automation.scenes)
+    subscribe_config(lambda c, _v: executor.set_scenes(c.automation.scenes))
+    register_scene_executor(executor)
+    return executor
+
+
+def _start_automation(app_state: AppState) -> AutomationController | None:
+    """按 config.automation 编译规则并开始评估（写控制器须已注册）"""
+    cfg = get_config()
+    if not cfg.automation.enabled:
+        return None
+    automation = AutomationController(app_state, get_data_dir(cfg) / "automation_audit.jsonl")
+    automation.start()
+    register_automation(automation)
+    return automation
+
+
+def _start_live_api(app_state: AppState) -> LiveApiServer | None:
+    """按 config.live_api 在独立 asyncio 线程上启动 HTTP/WebSocket 服务"""
+    la = get_config().live_api
+    if not la.enabled:
+        return None
+    if not la.token:
+        # 服务监听局域网，无 token 即任何接入 Wi-Fi 的设备都能读取车辆状态
+        logger.error("live_api 已启用但 token 为空，不启动；请在 config.yaml 的 live_api.token 设置访问口令")
+        return None
+    server = LiveApiServer(app_state, la.host, la.port, la.max_clients, la.token)
+    server.start()
+    register_live_api(server)
+    return server
+
+
+def _start_uplink(app_state: AppState) -> TelemetryUplink | None:
+    """按 config.uplink 启动遥测上行（队列在 data_dir/uplink），订阅实时采样与告警变迁；配置保存后更新地址与 token"""
+    cfg = get_config()
+    if not cfg.uplink.enabled:
+        return None
+    ul = cfg.uplink
+    uplink = TelemetryUplink(
+        get_data_dir(cfg) / "uplink",
+        url=ul.url,
+        vehicle_id=ul.vehicle_id or socket.gethostname(),
+        token=ul.token,
+        sample_interval_s=ul.sample_interval_s,
+        chunk_interval_s=ul.chunk_interval_s,
+        max_queue_mb=ul.max_queue_mb,
+        timeout_s=ul.timeout_s,
+    )
+    app_state.sampled.connect(uplink.add_batch)
+    app_state.alarm_transitions.connect(uplink.record)
+    subscribe_config(lambda c, _v: uplink.set_endpoint(c.uplink.url, c.uplink.token))
+    register_uplink(uplink)
+    return uplink
+
+
 def main() -> int:
     get_config()
     _log_config_summary()
@@ -142,12 +281,50 @@ def main() -> int:
     app.setApplicationName("车载 HMI")
     app.setApplicationDisplayName("车载 HMI")
 
+    # 主线程卡顿看门狗：超阈值时抓栈记录，诊断页展示卡顿点汇总
+    watchdog = StallWatchdog()
+    register_stall_watchdog(watchdog)
+    watchdog.start()
+    app.aboutToQuit.connect(watchdog.stop)
+
     app_state = AppState()
-    alarm_controller = AlarmController(app_state)
     # 在 show() 前预加载 spec，避免在事件循环或 QTimer 回调里读大 JSON 导致主界面卡死
     preloaded_spec = load_spec()
     if preloaded_spec is None:
         preloaded_spec = {}
+    alarm_controller = AlarmController(app_state, preloaded_spec)
+    # 时序存储：只记录实时数据（状态缓存恢复的值不进入趋势）
+    timeseries = TimeSeriesStore()
+    app_state.sampled.connect(timeseries.add_batch)
+    register_timeseries_store(timeseries)
+    # 续航估算：电池耗尽/充满、副油箱耗尽时间
+    estimators = RangeEstimators(app_state, get_config().battery.capacity_wh)
+    estimators.start()
+    register_range_estimators(estimators)
+    recorder = _start_telemetry_recorder(app_state)
+    if recorder is not None:
+        app.aboutToQuit.connect(recorder.close)
+    energy_meter = _start_energy_meter(app_state)
+    if energy_meter is not None:
+        app.aboutToQuit.connect(energy_meter.close)
+    journal = _start_alarm_journal(app_state)
+    if journal is not None:
+        app.aboutToQuit.connect(journal.close)
+    state_cache = _start_state_cache(app_state)
+    if state_cache is not None:
+        app.aboutToQuit.connect(state_cache.close)
+    _start_scene_executor(app_state, preloaded_spec)
+    automation = _start_automation(app_state)
+    if automation is not None:
+        app.aboutToQuit.connect(automation.close)
+    live_api = _start_live_api(app_state)
+    if live_api is not None:
+        app.aboutToQuit.connect(live_api.stop)
+    uplink = _start_uplink(app_state)
+    if uplink is not None:
+        app.aboutToQuit.connect(uplink.close)
+    # 退出前等待后台配置保存落盘
+    app.aboutToQuit.connect(flush_config_writes)
 
     video_manager = get_video_manager()
     win = MainWindow(app_state, alarm_controller, video_manager)
@@ -170,27 +347,28 @@ def main() -> int:
                 logger.debug("Modbus 初始化线程: 开始")
                 cfg = get_config()
                 transport = create_transport_from_config(cfg)
-                if cfg.modbus.use_mock:
-                    _seed_mock_transport(transport)
+                # 抓包包装时预填内层 Mock；仿真 Transport 同样以预填值为模型初值
+                inner = getattr(transport, "inner", transport)
+                if isinstance(inner, (MockTransport, SimTransport)):
+                    _seed_mock_transport(inner)
                 modbus_master = ModbusMaster(
                     transport=transport,
                     app_state=app_state,
-                    poll_ms={
-                        "FAST_MS": cfg.poll.FAST_MS,
-                        "SLOW_MS": cfg.poll.SLOW_MS,
-                        "VERY_SLOW_MS": cfg.poll.VERY_SLOW_MS,
-                    },
+                    poll_ms=_poll_ms_from_config(cfg),
                     device_parser=apply_device_parsers,
                     update_bridge=bridge,
                     spec=preloaded_spec,
                 )
-                modbus_master.start()
-                from app.services.modbus_master import register_modbus_master
-                register_modbus_master(modbus_master)
+                # 写控制器先于轮询注册：首批数据到达时自动化规则即可执行动作
                 register_hvac_controller(modbus_master, preloaded_spec)
                 register_webasto_controller(modbus_master, preloaded_spec)
                 register_pdu_controller(modbus_master, preloaded_spec)
                 register_lighting_controller(modbus_master, preloaded_spec)
+                modbus_master.start()
+                # Settings 保存后轮询间隔即时生效，轮询循环不读 config
+                subscribe_config(lambda c, _v: modbus_master.set_poll_ms(_poll_ms_from_config(c)))
+                from app.services.modbus_master import register_modbus_master
+                register_modbus_master(modbus_master)
                 logger.debug("Modbus 初始化线程: ModbusMaster 已启动")
             except Exception as e:
                 logger.exception("Modbus 初始化线程 异常: %s", e)
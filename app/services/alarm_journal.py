@@ -0,0 +1,316 @@
+"""
+告警日志：把告警变迁（RAISED/CLEARED/ACKED/ESCALATED）追加写入 SQLite（WAL 模式），供重启后追溯历史。
+
+- 写入：record() 只入队，后台写线程按批（条数或时间先到）在单个事务内 executemany 落盘
+- 索引：(alarm_id, ts)、(severity, ts)、(ts)，覆盖“某告警的历史/计数”“按级别筛选”“最近 N 条/时间区间”
+- 保留：超过 retention_days 的记录由写线程定期删除
+- 查询：recent / between / counts / count，读连接独立于写线程（WAL 下读写互不阻塞）
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# 批量写入：攒够 BATCH_SIZE 条或距首条入队 FLUSH_INTERVAL_S 秒即提交
+BATCH_SIZE = 64
+FLUSH_INTERVAL_S = 1.0
+# 保留期清理间隔（秒）
+PRUNE_INTERVAL_S = 3600.0
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS alarm_events (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        alarm_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        source_slave INTEGER,
+        first_seen_ts REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_alarm_events_alarm_ts ON alarm_events(alarm_id, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_alarm_events_severity_ts ON alarm_events(severity, ts)",
+    "CREATE INDEX IF NOT EXISTS idx_alarm_events_ts ON alarm_events(ts)",
+)
+
+_COLUMNS = "ts, alarm_id, kind, severity, title, message, source_slave, first_seen_ts"
+_INSERT_SQL = f"INSERT INTO alarm_events ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+_STOP = object()
+
+
+@dataclass
+class JournalEvent:
+    """日志中的一条告警变迁"""
+    ts: float
+    alarm_id: str
+    kind: str
+    severity: str
+    title: str
+    message: str
+    source_slave: int | None = None
+    first_seen_ts: float | None = None
+
+
+def _event_row(t: Any) -> tuple:
+    """AlarmTransition -> 插入行"""
+    a = t.alarm
+    return (
+        float(t.ts),
+        a.id,
+        getattr(t.kind, "value", str(t.kind)),
+        getattr(a.severity, "value", str(a.severity)),
+        a.title,
+        a.message,
+        a.source_slave,
+        a.first_seen_ts,
+    )
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class AlarmJournal:
+    """SQLite 告警日志。写入在后台线程批量进行，查询可在任意线程调用（读连接加锁串行）。"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        retention_days: float = 90.0,
+        batch_size: int = BATCH_SIZE,
+        flush_interval_s: float = FLUSH_INTERVAL_S,
+    ):
+        self._path = Path(path)
+        self._retention_s = max(0.0, float(retention_days)) * 86400.0
+        self._batch_size = max(1, int(batch_size))
+        self._flush_interval_s = max(0.0, float(flush_interval_s))
+        self._queue: queue.Queue = queue.Queue()
+        self._ready = threading.Event()
+        self._read_lock = threading.Lock()
+        self._read_conn: sqlite3.Connection | None = None
+        self._written = 0
+        self._dropped = 0
+        # 建库/建表在写线程内完成，构造不阻塞主线程
+        self._thread = threading.Thread(target=self._run_writer, name="AlarmJournal", daemon=True)
+        self._thread.start()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ---------- 写入 ----------
+
+    def record(self, transitions: list) -> None:
+        """入队告警变迁（AppState.alarm_transitions 的槽），不做 IO"""
+        for t in transitions or ():
+            try:
+                self._queue.put_nowait(_event_row(t))
+            except Exception as e:
+                self._dropped += 1
+                logger.debug("告警日志入队失败: %s", e)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待当前已入队事件全部落盘（测试与退出前使用）"""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """提交剩余事件并停止写线程"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+
+    def _run_writer(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = _connect(self._path)
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+            conn.commit()
+        except Exception as e:
+            logger.error("告警日志初始化失败 %s: %s", self._path, e)
+            return
+        self._ready.set()
+        logger.info("告警日志已打开: %s", self._path)
+        self._prune(conn)
+        last_prune = time.monotonic()
+
+        batch: list[tuple] = []
+        batch_deadline = 0.0
+        waiters: list[threading.Event] = []
+        while True:
+            timeout = max(0.0, batch_deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            stop = item is _STOP
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None and not stop:
+                if not batch:
+                    batch_deadline = time.monotonic() + self._flush_interval_s
+                batch.append(item)
+                if len(batch) < self._batch_size:
+                    continue
+            if batch:
+                self._write_batch(conn, batch)
+                batch = []
+            for w in waiters:
+                w.set()
+            waiters = []
+            if stop:
+                break
+            if self._retention_s > 0 and time.monotonic() - last_prune >= PRUNE_INTERVAL_S:
+                self._prune(conn)
+                last_prune = time.monotonic()
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        try:
+            with conn:
+                conn.executemany(_INSERT_SQL, batch)
+            self._written += len(batch)
+        except sqlite3.Error as e:
+            self._dropped += len(batch)
+            logger.error("告警日志写入失败（丢弃 %d 条）: %s", len(batch), e)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        if self._retention_s <= 0:
+            return
+        try:
+            with conn:
+                cur = conn.execute("DELETE FROM alarm_events WHERE ts < ?", (time.time() - self._retention_s,))
+            if cur.rowcount:
+                logger.info("告警日志清理过期记录 %d 条", cur.rowcount)
+        except sqlite3.Error as e:
+            logger.warning("告警日志清理失败: %s", e)
+
+    # ---------- 查询 ----------
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        if not self._ready.is_set():
+            return []
+        with self._read_lock:
+            try:
+                if self._read_conn is None:
+                    self._read_conn = _connect(self._path)
+                return self._read_conn.execute(sql, params).fetchall()
+            except sqlite3.Error as e:
+                logger.warning("告警日志查询失败: %s", e)
+                return []
+
+    @staticmethod
+    def _where(severity: str | None, alarm_id: str | None) -> tuple[str, tuple]:
+        clauses: list[str] = []
+        params: list[Any] = []
+        if alarm_id:
+            clauses.append("alarm_id = ?")
+            params.append(alarm_id)
+        if severity:
+            clauses.append("severity = ?")
+            params.append(severity)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", tuple(params)
+
+    def recent(
+        self,
+        limit: int = 50,
+        offset: int = 0,
+        severity: str | None = None,
+        alarm_id: str | None = None,
+    ) -> list[JournalEvent]:
+        """最近的事件（按时间倒序），offset 用于分页"""
+        where, params = self._where(severity, alarm_id)
+        rows = self._query(
+            f"SELECT {_COLUMNS} FROM alarm_events{where} ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?",
+            params + (int(limit), int(offset)),
+        )
+        return [JournalEvent(*r) for r in rows]
+
+    def between(
+        self,
+        t0: float,
+        t1: float,
+        alarm_id: str | None = None,
+        severity: str | None = None,
+        limit: int | None = None,
+    ) -> list[JournalEvent]:
+        """[t0, t1] 区间内的事件（按时间正序）"""
+        where, params = self._where(severity, alarm_id)
+        where = (where + " AND" if where else " WHERE") + " ts >= ? AND ts <= ?"
+        sql = f"SELECT {_COLUMNS} FROM alarm_events{where} ORDER BY ts, id"
+        params = params + (float(t0), float(t1))
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        return [JournalEvent(*r) for r in self._query(sql, params)]
+
+    def counts(
+        self,
+        t0: float | None = None,
+        t1: float | None = None,
+        kind: str | None = "RAISED",
+    ) -> dict[str, int]:
+        """各告警在区间内的事件次数 {alarm_id: n}；kind 默认只统计 RAISED（即发生次数），None 统计全部"""
+        clauses: list[str] = []
+        params: list[Any] = []
+        if t0 is not None:
+            clauses.append("ts >= ?")
+            params.append(float(t0))
+        if t1 is not None:
+            clauses.append("ts <= ?")
+            params.append(float(t1))
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        rows = self._query(
+            f"SELECT alarm_id, COUNT(*) FROM alarm_events{where} GROUP BY alarm_id ORDER BY COUNT(*) DESC",
+            tuple(params),
+        )
+        return {aid: n for aid, n in rows}
+
+    def count(self, severity: str | None = None, alarm_id: str | None = None) -> int:
+        """事件总数（分页用）"""
+        where, params = self._where(severity, alarm_id)
+        rows = self._query(f"SELECT COUNT(*) FROM alarm_events{where}", params)
+        return int(rows[0][0]) if rows else 0
+
+    def stats(self) -> dict[str, Any]:
+        return {"path": str(self._path), "written": self._written, "dropped": self._dropped,
+                "pending": self._queue.qsize()}
+
+
+# ---------- 全局实例（供诊断页查询）----------
+
+_alarm_journal: AlarmJournal | None = None
+
+
+def register_alarm_journal(journal: AlarmJournal | None) -> None:
+    """启动时注册，供诊断页等获取"""
+    global _alarm_journal
+    _alarm_journal = journal
+
+
+def get_alarm_journal() -> AlarmJournal | None:
+    """获取已注册的告警日志，未启用时返回 None"""
+    return _alarm_journal
@@ -0,0 +1,546 @@
+"""
+自动化规则：状态字段或每日定时触发，经现有写控制器（PduWriteController、LightingWriteController 等）或场景执行器执行动作。
+
+规则以数据声明（config.automation.rules），与告警规则同样编译为 域 -> 字段 -> 规则下标 索引：
+每次 AppState.changed 只比较有规则引用的字段，字段变化时才重算引用它的规则；未变化的子域整体按相等比较跳过。
+缓存恢复、尚无实时数据的子域（Snapshot.stale）不参与，避免据旧值动作。
+
+- 字段触发为边沿语义：trigger 条件由假变真（且 when 附加条件全部满足、持续 for_s 秒）时执行一次，
+  之后须越过回差 hysteresis 使条件复位才会再次布防；被限流抑制的触发同样消耗本次边沿
+- 时间触发 at="HH:MM"（config.system.timezone 本地时间，每日），到点时 when 条件满足才执行
+- 限流：单条规则 cooldown_s 内不重复执行；全部规则每分钟最多 max_actions_per_min 次
+- 审计：每次执行或被抑制都生成 AuditEntry，保存在内存环（诊断用）并追加写入 data_dir/automation_audit.jsonl
+"""
+
+import collections
+import datetime
+import heapq
+import json
+import logging
+import operator
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from app.core.config import AppConfig, get_config, subscribe_config
+from app.core.state import AppState, Snapshot
+from app.devices.hvac import get_hvac_controller
+from app.devices.lighting import get_lighting_controller
+from app.devices.pdu import get_pdu_controller
+from app.devices.webasto import get_webasto_controller
+from app.services.scene_executor import get_scene_executor
+
+logger = logging.getLogger(__name__)
+
+# 动作 "<控制器>.<方法>" 的控制器：(取已注册实例, 允许的动作方法)。
+# 只列出无人值守可安全执行的写操作：支腿伸缩、遮阳棚展开等运动须现场操作（长按确认），故障复位须人工判断，均不开放
+CONTROLLERS: dict[str, tuple[Callable[[], Any], frozenset[str]]] = {
+    "pdu": (get_pdu_controller, frozenset({
+        "set_inv_ac_out_on", "set_fridge_24v_on", "set_ext_light_on",
+        "awning_retract", "awning_stop", "leg_stop",
+    })),
+    "lighting": (get_lighting_controller, frozenset({
+        "set_main", "set_night", "set_reading", "set_strip_on", "set_strip_brightness",
+        "scene_sleep_pulse", "scene_reading_pulse",
+    })),
+    "hvac": (get_hvac_controller, frozenset({
+        "set_mode", "set_target_temp_x10", "set_evap_fan_level", "set_cond_fan_level",
+        "set_ac_enable", "set_comp_enable",
+    })),
+    "webasto": (get_webasto_controller, frozenset({
+        "set_heater_on", "set_target_water_temp_x10", "set_hydronic_pump_on",
+    })),
+    "scene": (get_scene_executor, frozenset({"apply"})),
+}
+
+_COMPARE = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+OPS = (*_COMPARE, "is_true", "is_false")
+
+AUDIT_RING_SIZE = 500
+# 审计文件超过此大小时轮转为 .1（只保留一份）
+AUDIT_MAX_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class Condition:
+    """字段条件：path 为 "<域>.<字段>"，value 为原始单位（x10 字段写 ×10 后的整数）"""
+    path: str
+    op: str
+    value: int | float | bool | None = None
+
+    def test(self, v: Any) -> bool:
+        if self.op == "is_true":
+            return v is True
+        if self.op == "is_false":
+            return v is False
+        if v is None or self.value is None:
+            return False
+        return _COMPARE[self.op](v, self.value)
+
+    def rearmed(self, v: Any, hysteresis: float) -> bool:
+        """条件已越过回差复位（数值比较按 op 方向让出 hysteresis；其余判据取反即复位）"""
+        if v is None:
+            return False
+        if hysteresis <= 0 or self.op not in ("<", "<=", ">", ">="):
+            return not self.test(v)
+        if self.op in ("<", "<="):
+            return v >= self.value + hysteresis
+        return v <= self.value - hysteresis
+
+    def describe(self, v: Any) -> str:
+        if self.op in ("is_true", "is_false"):
+            return f"{self.path}={v}"
+        return f"{self.path}={v} {self.op} {self.value}"
+
+
+@dataclass(frozen=True)
+class AutomationRule:
+    """单条自动化规则（不可变，由 AutomationEngine 编译调度）"""
+    id: str
+    title: str
+    action: str                         # "<控制器>.<方法>"，如 "pdu.set_inv_ac_out_on"
+    args: tuple = ()
+    trigger: Condition | None = None    # 字段触发
+    at: str | None = None               # 时间触发 "HH:MM"
+    when: tuple[Condition, ...] = ()    # 附加条件（全部满足才执行）
+    hysteresis: float = 0.0
+    for_s: float = 0.0
+    cooldown_s: float = 60.0
+    enabled: bool = True
+
+
+@dataclass(frozen=True)
+class AuditEntry:
+    """一次动作执行或抑制；result 为 ok / cooldown / rate_limited / no_controller / error: ..."""
+    ts: float
+    rule_id: str
+    action: str
+    args: tuple
+    result: str
+    reason: str
+
+
+# ---------- 规则解析 ----------
+
+def _snapshot_paths() -> set[str]:
+    snap = Snapshot()
+    out: set[str] = set()
+    for f in fields(snap):
+        sub = getattr(snap, f.name)
+        if f.name not in ("comm", "faults", "stale") and hasattr(sub, "__dataclass_fields__"):
+            out.update(f"{f.name}.{g.name}" for g in fields(sub))
+    return out
+
+
+def _parse_condition(d: Any, paths: set[str]) -> Condition:
+    if not isinstance(d, dict):
+        raise ValueError(f"条件应为字典: {d!r}")
+    path = str(d.get("field", "")).strip()
+    op = str(d.get("op", "")).strip()
+    if path not in paths:
+        raise ValueError(f"未知字段 {path!r}")
+    if op not in OPS:
+        raise ValueError(f"未知判据 {op!r}")
+    value = d.get("value")
+    if op in _COMPARE and not isinstance(value, (int, float, bool)):
+        raise ValueError(f"{path} {op} 需要数值 value")
+    return Condition(path, op, value)
+
+
+def _parse_at(at: Any) -> str:
+    hh, _, mm = str(at).strip().partition(":")
+    h, m = int(hh), int(mm)
+    if not (0 <= h < 24 and 0 <= m < 60):
+        raise ValueError(f"时间应为 HH:MM: {at!r}")
+    return f"{h:02d}:{m:02d}"
+
+
+def _check_action(action: str) -> None:
+    ctrl, _, method = action.partition(".")
+    if ctrl not in CONTROLLERS:
+        raise ValueError(f"未知控制器 {ctrl!r}")
+    if method not in CONTROLLERS[ctrl][1]:
+        raise ValueError(f"{ctrl} 无动作 {method!r}（可用: {', '.join(sorted(CONTROLLERS[ctrl][1]))}）")
+
+
+def parse_rules(raw: list[dict] | None) -> list[AutomationRule]:
+    """config.automation.rules -> 规则表；无效规则记警告并跳过，不影响其余规则"""
+    paths = _snapshot_paths()
+    rules: list[AutomationRule] = []
+    seen: set[str] = set()
+    for i, d in enumerate(raw or []):
+        try:
+            if not isinstance(d, dict):
+                raise ValueError("规则应为字典")
+            rid = str(d.get("id") or f"rule{i + 1}")
+            if rid in seen:
+                raise ValueError("id 重复")
+            action = str(d.get("action", "")).strip()
+            _check_action(action)
+            args = d.get("args", ())
+            args = tuple(args) if isinstance(args, (list, tuple)) else (args,)
+            trigger = _parse_condition(d["trigger"], paths) if d.get("trigger") else None
+            at = _parse_at(d["at"]) if d.get("at") else None
+            if (trigger is None) == (at is None):
+                raise ValueError("trigger 与 at 须且只能指定一个")
+            when = d.get("when") or []
+            rule = AutomationRule(
+                id=rid,
+                title=str(d.get("title") or rid),
+                action=action,
+                args=args,
+                trigger=trigger,
+                at=at,
+                when=tuple(_parse_condition(c, paths) for c in (when if isinstance(when, list) else [when])),
+                hysteresis=max(0.0, float(d.get("hysteresis", 0))),
+                for_s=max(0.0, float(d.get("for_s", 0))),
+                cooldown_s=max(0.0, float(d.get("cooldown_s", 60))),
+                enabled=bool(d.get("enabled", True)),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("自动化规则 #%d 无效，已跳过: %s", i + 1, e)
+            continue
+        seen.add(rid)
+        rules.append(rule)
+    return rules
+
+
+def execute_action(rule: AutomationRule) -> str:
+    """经已注册写控制器执行动作（写入只入 ModbusMaster 队列，不阻塞）"""
+    ctrl_name, _, method = rule.action.partition(".")
+    ctrl = CONTROLLERS[ctrl_name][0]()
+    if ctrl is None:
+        return "no_controller"
+    try:
+        getattr(ctrl, method)(*rule.args)
+    except Exception as e:
+        return f"error: {e}"
+    return "ok"
+
+
+# ---------- 引擎 ----------
+
+class AutomationEngine:
+    """按字段索引增量评估规则；时间触发与 for_s 计时登记在最小堆，poll_timers 到期执行"""
+
+    def __init__(
+        self,
+        rules: list[AutomationRule],
+        execute: Callable[[AutomationRule], str] = execute_action,
+        max_actions_per_min: int = 10,
+        audit: Callable[[AuditEntry], None] | None = None,
+        tz: datetime.tzinfo | None = None,
+    ):
+        self._execute = execute
+        self._audit = audit
+        self._max_per_min = max(1, max_actions_per_min)
+        self._tz = tz
+        self._fired: collections.deque[float] = collections.deque()
+        self.compile(rules)
+
+    def compile(self, rules: list[AutomationRule]) -> None:
+        """建立 域 -> 字段 -> 规则下标 索引并重置运行状态（配置变更时调用）"""
+        self._rules = [r for r in rules if r.enabled]
+        self._by_domain: dict[str, dict[str, list[int]]] = {}
+        for idx, rule in enumerate(self._rules):
+            conds = ((rule.trigger,) if rule.trigger else ()) + rule.when
+            for c in conds:
+                domain, _, key = c.path.partition(".")
+                self._by_domain.setdefault(domain, {}).setdefault(key, []).append(idx)
+        self._prev_domain: dict[str, Any] = {}
+        self._values: dict[str, Any] = {}
+        # 字段规则已布防（等待触发）；启动时条件若已成立也会执行一次（如开机即低电量）
+        self._armed: set[int] = {i for i, r in enumerate(self._rules) if r.trigger is not None}
+        # for_s：条件开始持续满足的时刻
+        self._hold: dict[int, float] = {}
+        self._pending: dict[int, float] = {}
+        self._last_fire: dict[int, float] = {}
+        self._timers: list[tuple[float, int]] = []
+        now = time.time()
+        for idx, rule in enumerate(self._rules):
+            if rule.at:
+                self._arm(idx, self._next_at(rule.at, now))
+        logger.info("AutomationEngine 已编译 %d 条规则，%d 个输入字段",
+                    len(self._rules), sum(len(k) for k in self._by_domain.values()))
+
+    @property
+    def rules(self) -> list[AutomationRule]:
+        return list(self._rules)
+
+    def _next_at(self, at: str, now: float) -> float:
+        h, m = (int(x) for x in at.split(":"))
+        local = datetime.datetime.fromtimestamp(now, self._tz)
+        t = local.replace(hour=h, minute=m, second=0, microsecond=0)
+        if t.timestamp() <= now:
+            t = (t + datetime.timedelta(days=1)).replace(hour=h, minute=m)
+        return t.timestamp()
+
+    def evaluate(self, snapshot: Snapshot) -> list[AuditEntry]:
+        """按快照增量评估：只重算引用了变化字段的规则，返回本次产生的审计记录"""
+        now = time.time()
+        dirty: set[int] = set()
+        values = self._values
+        stale = getattr(snapshot, "stale", ())
+        for domain, keys in self._by_domain.items():
+            if domain in stale:
+                continue
+            cur = getattr(snapshot, domain, None)
+            if cur is None or self._prev_domain.get(domain) == cur:
+                continue
+            self._prev_domain[domain] = cur
+            for key, idxs in keys.items():
+                v = getattr(cur, key, None)
+                path = f"{domain}.{key}"
+                if path not in values or values[path] != v:
+                    values[path] = v
+                    dirty.update(idxs)
+        return self._run(dirty, now, due=set())
+
+    def next_deadline(self) -> float | None:
+        """最近一个定时/计时到期时刻（time.time() 时基）"""
+        timers = self._timers
+        while timers and self._pending.get(timers[0][1]) != timers[0][0]:
+            heapq.heappop(timers)
+        return timers[0][0] if timers else None
+
+    def poll_timers(self) -> list[AuditEntry]:
+        now = time.time()
+        due: set[int] = set()
+        timers = self._timers
+        while timers and timers[0][0] <= now:
+            deadline, idx = heapq.heappop(timers)
+            if self._pending.get(idx) == deadline:
+                del self._pending[idx]
+                due.add(idx)
+        if not due:
+            return []
+        return self._run(due, now, due)
+
+    def _arm(self, idx: int, deadline: float) -> None:
+        if self._pending.get(idx) == deadline:
+            return
+        self._pending[idx] = deadline
+        heapq.heappush(self._timers, (deadline, idx))
+
+    def _run(self, idxs: set[int], now: float, due: set[int]) -> list[AuditEntry]:
+        out: list[AuditEntry] = []
+        for idx in sorted(idxs):
+            entry = self._eval_rule(idx, self._rules[idx], now, idx in due)
+            if entry is not None:
+                out.append(entry)
+                if self._audit is not None:
+                    self._audit(entry)
+        return out
+
+    def _guards(self, rule: AutomationRule) -> bool:
+        return all(c.test(self._values.get(c.path)) for c in rule.when)
+
+    def _eval_rule(self, idx: int, rule: AutomationRule, now: float, timer_due: bool) -> AuditEntry | None:
+        if rule.at:
+            # 时间规则只在到点时执行；字段变化（when 条件）不触发
+            if not timer_due:
+                return None
+            self._arm(idx, self._next_at(rule.at, now + 1.0))
+            if not self._guards(rule):
+                return None
+            return self._fire(idx, rule, now, f"定时 {rule.at}")
+
+        trig = rule.trigger
+        v = self._values.get(trig.path)
+        if idx not in self._armed:
+            if trig.rearmed(v, rule.hysteresis):
+                self._armed.add(idx)
+            return None
+        if not (trig.test(v) and self._guards(rule)):
+            self._hold.pop(idx, None)
+            self._pending.pop(idx, None)
+            return None
+        if rule.for_s > 0:
+            start = self._hold.setdefault(idx, now)
+            if now - start < rule.for_s:
+                self._arm(idx, start + rule.for_s)
+                return None
+        self._hold.pop(idx, None)
+        self._pending.pop(idx, None)
+        self._armed.discard(idx)
+        return self._fire(idx, rule, now, trig.describe(v))
+
+    def _fire(self, idx: int, rule: AutomationRule, now: float, reason: str) -> AuditEntry:
+        last = self._last_fire.get(idx)
+        fired = self._fired
+        while fired and fired[0] <= now - 60.0:
+            fired.popleft()
+        if last is not None and now - last < rule.cooldown_s:
+            result = "cooldown"
+        elif len(fired) >= self._max_per_min:
+            result = "rate_limited"
+        else:
+            self._last_fire[idx] = now
+            fired.append(now)
+            result = self._execute(rule)
+        if result == "ok":
+            logger.info("自动化 %s 执行 %s%s (%s)", rule.id, rule.action, rule.args, reason)
+        else:
+            logger.warning("自动化 %s 未执行 %s: %s (%s)", rule.id, rule.action, result, reason)
+        return AuditEntry(now, rule.id, rule.action, rule.args, result, reason)
+
+
+# ---------- 审计日志 ----------
+
+class AuditLog:
+    """审计记录：内存环 + 后台线程追加写 JSON Lines（超过 AUDIT_MAX_BYTES 轮转一次）"""
+
+    def __init__(self, path: str | Path | None):
+        self._path = Path(path) if path else None
+        self._ring: collections.deque[AuditEntry] = collections.deque(maxlen=AUDIT_RING_SIZE)
+        self._queue: queue.SimpleQueue[AuditEntry | None] = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        if self._path is not None:
+            self._thread = threading.Thread(target=self._run_writer, name="AutomationAudit", daemon=True)
+            self._thread.start()
+
+    def record(self, entry: AuditEntry) -> None:
+        self._ring.append(entry)
+        if self._thread is not None:
+            self._queue.put(entry)
+
+    def recent(self, n: int = 50) -> list[AuditEntry]:
+        """最近 n 条，新的在前"""
+        return list(self._ring)[-n:][::-1]
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_writer(self) -> None:
+        path = self._path
+        while True:
+            entry = self._queue.get()
+            batch = [entry]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            lines = "".join(
+                json.dumps(asdict(e), ensure_ascii=False, separators=(",", ":")) + "\n"
+                for e in batch if e is not None
+            )
+            if lines:
+                try:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    if path.exists() and path.stat().st_size > AUDIT_MAX_BYTES:
+                        path.replace(path.with_name(path.name + ".1"))
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.write(lines)
+                except OSError as e:
+                    logger.warning("自动化审计写入失败 %s: %s", path, e)
+            if stop:
+                return
+
+
+# ---------- Qt 接入 ----------
+
+def _tz(name: str) -> datetime.tzinfo | None:
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        logger.warning("时区 %s 不可用，自动化定时按系统本地时间", name)
+        return None
+
+
+class AutomationController(QObject):
+    """主线程：订阅 AppState.changed 评估规则，单次 QTimer 驱动定时与 for_s 到期；配置变更时重新编译"""
+
+    audited = pyqtSignal(object)  # AuditEntry
+
+    def __init__(self, app_state: AppState, audit_path: str | Path | None = None, parent=None):
+        super().__init__(parent)
+        self._app_state = app_state
+        self._audit_log = AuditLog(audit_path)
+        cfg = get_config()
+        self._raw_rules = list(cfg.automation.rules)
+        self._engine = AutomationEngine(
+            parse_rules(self._raw_rules),
+            max_actions_per_min=cfg.automation.max_actions_per_min,
+            audit=self._on_audit,
+            tz=_tz(cfg.system.timezone),
+        )
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_deadline)
+        self._unsubscribe_config = subscribe_config(self._on_config_changed)
+
+    def start(self) -> None:
+        self._app_state.changed.connect(self._on_state_changed)
+        self._on_state_changed(self._app_state.get_snapshot())
+
+    def close(self) -> None:
+        self._timer.stop()
+        self._unsubscribe_config()
+        self._audit_log.close()
+
+    def rules(self) -> list[AutomationRule]:
+        return self._engine.rules
+
+    def recent_audit(self, n: int = 50) -> list[AuditEntry]:
+        return self._audit_log.recent(n)
+
+    def _on_audit(self, entry: AuditEntry) -> None:
+        self._audit_log.record(entry)
+        self.audited.emit(entry)
+
+    def _on_config_changed(self, cfg: AppConfig, _version: int) -> None:
+        if list(cfg.automation.rules) == self._raw_rules:
+            return
+        self._raw_rules = list(cfg.automation.rules)
+        self._engine.compile(parse_rules(self._raw_rules))
+        self._on_state_changed(self._app_state.get_snapshot())
+
+    def _on_state_changed(self, snapshot: Snapshot) -> None:
+        self._engine.evaluate(snapshot)
+        self._schedule()
+
+    def _on_deadline(self) -> None:
+        self._engine.poll_timers()
+        self._schedule()
+
+    def _schedule(self) -> None:
+        deadline = self._engine.next_deadline()
+        if deadline is None:
+            self._timer.stop()
+            return
+        # QTimer 上限约 24 天；定时规则最远 1 天
+        self._timer.start(max(0, min(int((deadline - time.time()) * 1000) + 1, 2**31 - 1)))
+
+
+# ---------- 全局实例 ----------
+
+_automation: AutomationController | None = None
+
+
+def register_automation(controller: AutomationController | None) -> None:
+    """启动时注册，供诊断页等获取"""
+    global _automation
+    _automation = controller
+
+
+def get_automation() -> AutomationController | None:
+    """获取已注册的自动化控制器，未启用时返回 None"""
+    return _automation
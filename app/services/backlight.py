@@ -18,6 +18,13 @@ _last_apply_time: float = 0.0
 _APPLY_DEBOUNCE_S = 2.0
 
 
+def _remember_applied(pct: int) -> None:
+    """记录最近写入的 percent（设置页预览与配置变更应用共用，避免同值重复写 sysfs）"""
+    global _last_applied_percent, _last_apply_time
+    _last_applied_percent = pct
+    _last_apply_time = time.time()
+
+
 class BacklightError(Exception):
     """背光设置失败，供 UI 提示用。message 可直接展示给用户。"""
     pass
@@ -111,12 +118,12 @@ class BacklightService:
             raise BacklightError("当前屏幕不支持硬件亮度控制")
         raw = max(1, min(mx, round(effective * mx / 100)))
         self.set_raw(raw)
+        _remember_applied(effective)
 
     def apply_percent_from_config(self, cfg) -> None:
         """
         从 config 应用保存的亮度（启动/进入设置页时调用）。防抖：短时间内不重复写入同一值。
         """
-        global _last_applied_percent, _last_apply_time
         if not self.is_available():
             return
         pct = getattr(getattr(cfg, "display", None), "brightness_percent", 60)
@@ -126,7 +133,5 @@ class BacklightService:
             return
         try:
             self.set_percent(pct, min_pct=5)
-            _last_applied_percent = pct
-            _last_apply_time = now
         except BacklightError:
             pass
@@ -0,0 +1,188 @@
+"""
+Modbus 总线计时统计：固定桶直方图记录每笔事务的排队等待 / 线上耗时 / 解析耗时（按 slave + 功能码），
+并统计总线占用率、各轮询组周期、写入入队→应答延迟。
+由 ModbusMaster 后台线程记录；enabled=False 时调用方跳过计时，诊断页关闭时近乎零开销。
+"""
+
+import bisect
+import threading
+import time
+from typing import Any
+
+# 直方图桶上界（ms），最后一个桶为溢出桶
+HIST_BOUNDS_MS: tuple[float, ...] = (
+    0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+)
+
+# 读块 -> Modbus 功能码
+BLOCK_FC: dict[str, int] = {
+    "coils": 1,
+    "discrete_inputs": 2,
+    "holding_regs": 3,
+    "input_regs": 4,
+}
+# 写类型 -> 功能码（单点写 / 连续多点写）
+WRITE_FC: dict[str, int] = {"coil": 5, "holding": 6}
+WRITE_MULTI_FC: dict[str, int] = {"coil": 15, "holding": 16}
+
+# 总线占用率统计窗口（秒）
+UTIL_WINDOW_S = 5.0
+
+
+class Histogram:
+    """固定桶直方图：内存固定，add 为 O(log 桶数)，百分位按桶上界估算。"""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(HIST_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, value_ms: float) -> None:
+        self.counts[bisect.bisect_left(HIST_BOUNDS_MS, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def percentile(self, q: float) -> float | None:
+        """q in (0, 1]；返回所在桶上界（溢出桶返回 max），无样本返回 None。"""
+        if self.count == 0:
+            return None
+        rank = max(1, int(round(q * self.count)))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                if i >= len(HIST_BOUNDS_MS):
+                    return self.max_ms
+                return min(float(HIST_BOUNDS_MS[i]), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": (self.total_ms / self.count) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms if self.count else None,
+        }
+
+
+class BusMetrics:
+    """
+    总线计时统计容器。写入方为 ModbusMaster 后台线程，读取方（get_metrics）为 UI 线程，锁内只做计数。
+    调用方应先判断 enabled，关闭时不计时也不进锁。
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._reset_locked()
+
+    def _reset_locked(self) -> None:
+        # (slave, fc) -> Histogram
+        self._queue_wait: dict[tuple[int, int], Histogram] = {}
+        self._wire: dict[tuple[int, int], Histogram] = {}
+        # slave -> Histogram（设备解析耗时）
+        self._decode: dict[int, Histogram] = {}
+        # poll_group -> Histogram（单轮读+解析耗时 / 相邻两轮实际间隔）
+        self._cycle: dict[str, Histogram] = {}
+        self._interval: dict[str, Histogram] = {}
+        # slave -> Histogram（写入入队 -> 从站应答）
+        self._write_ack: dict[int, Histogram] = {}
+        self._errors: dict[tuple[int, int], int] = {}
+        self._window_start = time.perf_counter()
+        self._window_busy_s = 0.0
+        self._utilization: float | None = None
+        self._since_ts = time.time()
+
+    def set_enabled(self, enabled: bool) -> None:
+        """开启时清空历史，保证诊断页看到的是本次打开以来的统计。"""
+        with self._lock:
+            if enabled and not self.enabled:
+                self._reset_locked()
+            self.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self._reset_locked()
+
+    @staticmethod
+    def _hist(table: dict, key: Any) -> Histogram:
+        h = table.get(key)
+        if h is None:
+            h = table[key] = Histogram()
+        return h
+
+    def _roll_window_locked(self, now_pc: float) -> None:
+        elapsed = now_pc - self._window_start
+        if elapsed >= UTIL_WINDOW_S:
+            self._utilization = min(1.0, self._window_busy_s / elapsed)
+            self._window_start = now_pc
+            self._window_busy_s = 0.0
+
+    def record_txn(self, slave: int, fc: int, queue_wait_ms: float, wire_ms: float) -> None:
+        """一笔成功事务：排队等待 + 线上耗时（含从站应答）。"""
+        with self._lock:
+            self._hist(self._queue_wait, (slave, fc)).add(queue_wait_ms)
+            self._hist(self._wire, (slave, fc)).add(wire_ms)
+            self._window_busy_s += wire_ms / 1000.0
+            self._roll_window_locked(time.perf_counter())
+
+    def record_error(self, slave: int, fc: int, wire_ms: float) -> None:
+        """失败事务（超时/异常）同样占用总线时间。"""
+        with self._lock:
+            key = (slave, fc)
+            self._errors[key] = self._errors.get(key, 0) + 1
+            self._window_busy_s += wire_ms / 1000.0
+            self._roll_window_locked(time.perf_counter())
+
+    def record_decode(self, slave: int, decode_ms: float) -> None:
+        with self._lock:
+            self._hist(self._decode, slave).add(decode_ms)
+
+    def record_cycle(self, group: str, cycle_ms: float, interval_ms: float | None) -> None:
+        with self._lock:
+            self._hist(self._cycle, group).add(cycle_ms)
+            if interval_ms is not None:
+                self._hist(self._interval, group).add(interval_ms)
+
+    def record_write_ack(self, slave: int, latency_ms: float) -> None:
+        with self._lock:
+            self._hist(self._write_ack, slave).add(latency_ms)
+
+    def snapshot(self) -> dict[str, Any]:
+        """锁内生成摘要字典（只含基本类型），供 UI 线程展示。"""
+        with self._lock:
+            now_pc = time.perf_counter()
+            self._roll_window_locked(now_pc)
+            util = self._utilization
+            if util is None:
+                elapsed = now_pc - self._window_start
+                util = min(1.0, self._window_busy_s / elapsed) if elapsed > 0 else 0.0
+            keys = sorted(set(self._wire) | set(self._errors))
+            txns = []
+            for slave, fc in keys:
+                qw = self._queue_wait.get((slave, fc))
+                wire = self._wire.get((slave, fc))
+                txns.append({
+                    "slave": slave,
+                    "fc": fc,
+                    "errors": self._errors.get((slave, fc), 0),
+                    "queue_wait": qw.summary() if qw else Histogram().summary(),
+                    "wire": wire.summary() if wire else Histogram().summary(),
+                })
+            return {
+                "enabled": self.enabled,
+                "since_ts": self._since_ts,
+                "bus_utilization": util,
+                "transactions": txns,
+                "decode": {sid: h.summary() for sid, h in sorted(self._decode.items())},
+                "cycle": {g: h.summary() for g, h in self._cycle.items()},
+                "interval": {g: h.summary() for g, h in self._interval.items()},
+                "write_ack": {sid: h.summary() for sid, h in sorted(self._write_ack.items())},
+            }
@@ -0,0 +1,90 @@
+"""
+曲线降采样：把任意长的 (时间, 值) 序列压到不超过 max_points 个点，供小屏趋势图使用。
+
+- lttb：Largest-Triangle-Three-Buckets，保留视觉上的峰谷，输出为原始样本的子集
+- buckets：按时间等分为 n 桶，每桶给出 min / max / avg / count（画包络带或表格）
+输入按时间升序，缺失值由调用方先剔除。
+"""
+
+from dataclasses import dataclass
+from typing import Sequence
+
+
+@dataclass(frozen=True)
+class BucketStat:
+    """一个时间桶的统计；t 为桶起点"""
+    t: float
+    min: float
+    max: float
+    avg: float
+    count: int
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], max_points: int) -> tuple[list[float], list[float]]:
+    """
+    LTTB 降采样。保留首尾点，中间按桶各选一个与相邻选点构成最大三角形面积的点。
+    点数不超过 max_points 时原样返回（拷贝为列表）。
+    """
+    n = len(xs)
+    if max_points >= n or max_points < 3:
+        if max_points < 3 and n > max_points:
+            idx = [0, n - 1][:max(0, max_points)]
+            return [xs[i] for i in idx], [ys[i] for i in idx]
+        return list(xs), list(ys)
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    every = (n - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        # 下一个桶的平均点
+        nb0 = int((i + 1) * every) + 1
+        nb1 = min(int((i + 2) * every) + 1, n)
+        cnt = nb1 - nb0
+        if cnt > 0:
+            avg_x = sum(xs[nb0:nb1]) / cnt
+            avg_y = sum(ys[nb0:nb1]) / cnt
+        else:
+            avg_x, avg_y = xs[n - 1], ys[n - 1]
+        # 当前桶中与 a、下一桶平均点构成最大面积的点
+        b0 = int(i * every) + 1
+        b1 = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best = b0
+        best_area = -1.0
+        for j in range(b0, b1):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+        out_x.append(xs[best])
+        out_y.append(ys[best])
+        a = best
+    out_x.append(xs[n - 1])
+    out_y.append(ys[n - 1])
+    return out_x, out_y
+
+
+def buckets(xs: Sequence[float], ys: Sequence[float], t0: float, t1: float, n: int) -> list[BucketStat]:
+    """把 [t0, t1) 等分为 n 桶做 min/max/avg 统计，空桶不输出"""
+    if n <= 0 or t1 <= t0:
+        return []
+    width = (t1 - t0) / n
+    acc: dict[int, list[float]] = {}
+    for x, y in zip(xs, ys):
+        if x < t0 or x >= t1:
+            continue
+        k = min(n - 1, int((x - t0) / width))
+        a = acc.get(k)
+        if a is None:
+            acc[k] = [y, y, y, 1]
+        else:
+            if y < a[0]:
+                a[0] = y
+            if y > a[1]:
+                a[1] = y
+            a[2] += y
+            a[3] += 1
+    return [
+        BucketStat(t=t0 + k * width, min=a[0], max=a[1], avg=a[2] / a[3], count=int(a[3]))
+        for k, a in sorted(acc.items())
+    ]
@@ -0,0 +1,294 @@
+"""
+电能累计：由 AppState.changed 的快照对各功率通道做梯形积分，维护 Wh 累计（当日 / 行程 / 总计 / 最近若干天）。
+
+- 通道：电池充电、电池放电、第二发电机（来源）；逆变器交流、220V 输出、冰箱 24V（负载）
+- 积分：相邻两次采样功率取平均乘时间间隔（单调时钟）；任一端缺值、所在从站离线、子域为缓存恢复值，
+  或间隔超过 MAX_GAP_S 时，该段不计入（过长间隔累计为缺口时长）。每次采样 O(通道数)，不回看历史
+- 日界：按 config.system.timezone 的本地日期（配置热更新生效），不依赖宿主机时区
+- 持久化：JSON（Wh 保留 1 位小数，约数 KB），每 PERSIST_INTERVAL_S 由后台线程原子写入，退出时再写一次
+"""
+
+import datetime
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from PyQt6.QtCore import QObject, QTimer
+
+from app.core.atomic_io import atomic_write_text
+from app.core.config import AppConfig, get_config, subscribe_config
+from app.core.state import AppState, Snapshot
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# 相邻采样间隔超过此值视为数据缺口，不积分（秒）
+MAX_GAP_S = 30.0
+PERSIST_INTERVAL_S = 60.0
+# 保留的每日记录天数
+DAILY_DAYS = 31
+# 冰箱支路标称电压（只测电流）
+FRIDGE_NOMINAL_V = 24.0
+
+_POWER_SLAVE = 4
+_PDU_SLAVE = 8
+
+
+def _batt_charge(s: Snapshot) -> float | None:
+    p = s.power.batt_p_w
+    return None if p is None else max(0.0, float(p))
+
+
+def _batt_discharge(s: Snapshot) -> float | None:
+    p = s.power.batt_p_w
+    return None if p is None else max(0.0, -float(p))
+
+
+def _gen2(s: Snapshot) -> float | None:
+    v, i = s.power.gen2_v_x100, s.power.gen2_i_x100
+    if v is None or i is None:
+        return None
+    return max(0.0, v * i / 10000.0)
+
+
+def _inverter_ac(s: Snapshot) -> float | None:
+    p = s.power.inv_ac_p_w
+    return None if p is None else max(0.0, float(p))
+
+
+def _ac_out(s: Snapshot) -> float | None:
+    p = s.pdu.ac_out_p_w
+    return None if p is None else max(0.0, float(p))
+
+
+def _fridge(s: Snapshot) -> float | None:
+    i = s.pdu.fridge_i_x100
+    return None if i is None else max(0.0, i / 100.0 * FRIDGE_NOMINAL_V)
+
+
+# 通道名 -> (显示名, 类别 source/load, 所在子域, 从站, 取功率 W)
+CHANNELS: dict[str, tuple[str, str, str, int, Callable[[Snapshot], float | None]]] = {
+    "batt_charge": ("电池充电", "source", "power", _POWER_SLAVE, _batt_charge),
+    "gen2": ("第二发电机", "source", "power", _POWER_SLAVE, _gen2),
+    "batt_discharge": ("电池放电", "load", "power", _POWER_SLAVE, _batt_discharge),
+    "inverter_ac": ("逆变器交流", "load", "power", _POWER_SLAVE, _inverter_ac),
+    "ac_out": ("220V 输出", "load", "pdu", _PDU_SLAVE, _ac_out),
+    "fridge": ("冰箱 24V", "load", "pdu", _PDU_SLAVE, _fridge),
+}
+
+
+def _tz(name: str) -> datetime.tzinfo | None:
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(name)
+    except Exception:
+        logger.warning("时区 %s 不可用，电能日界按系统本地时间", name)
+        return None
+
+
+def _today(tz: datetime.tzinfo | None) -> str:
+    return datetime.datetime.now(tz).date().isoformat()
+
+
+class EnergyMeter(QObject):
+    """add_snapshot 接 AppState.changed；totals() 供页面直接显示（不扫描历史）"""
+
+    def __init__(self, app_state: AppState, path: str | Path, parent=None):
+        super().__init__(parent)
+        self._app_state = app_state
+        self._path = Path(path)
+        self._lock = threading.Lock()
+        self._lifetime = {ch: 0.0 for ch in CHANNELS}
+        self._trip = {ch: 0.0 for ch in CHANNELS}
+        self._trip_start = time.time()
+        self._tz_name = get_config().system.timezone
+        self._tz = _tz(self._tz_name)
+        self._day = _today(self._tz)
+        self._days: dict[str, dict[str, float]] = {self._day: {ch: 0.0 for ch in CHANNELS}}
+        # 每通道上次采样 (单调时刻, 功率 W)
+        self._last: dict[str, tuple[float, float] | None] = {ch: None for ch in CHANNELS}
+        self._gap_s = 0.0
+        self._dirty = False
+        self._pending: str | None = None
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run_writer, name="EnergyMeter", daemon=True)
+        self._timer = QTimer(self)
+        self._timer.setInterval(int(PERSIST_INTERVAL_S * 1000))
+        self._timer.timeout.connect(self._save_if_dirty)
+        self._unsubscribe_config = subscribe_config(self._on_config_changed)
+        self._load()
+
+    def _on_config_changed(self, cfg: AppConfig, _version: int) -> None:
+        if cfg.system.timezone != self._tz_name:
+            self._tz_name = cfg.system.timezone
+            self._tz = _tz(self._tz_name)
+
+    # ---------- 持久化 ----------
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning("电能累计文件无法读取，从零开始 %s: %s", self._path, e)
+            return
+        if not isinstance(data, dict) or data.get("v") != FORMAT_VERSION:
+            logger.warning("电能累计文件版本不符，从零开始: %s", self._path)
+            return
+
+        def _wh(d: Any) -> dict[str, float]:
+            d = d if isinstance(d, dict) else {}
+            return {ch: float(d.get(ch, 0.0) or 0.0) for ch in CHANNELS}
+
+        self._lifetime = _wh(data.get("lifetime"))
+        self._trip = _wh(data.get("trip"))
+        self._trip_start = float(data.get("trip_start") or time.time())
+        days = data.get("days") if isinstance(data.get("days"), dict) else {}
+        self._days = {str(day): _wh(v) for day, v in days.items()}
+        self._days.setdefault(self._day, {ch: 0.0 for ch in CHANNELS})
+        self._prune_days()
+
+    def _encode(self) -> str:
+        def _r(d: dict[str, float]) -> dict[str, float]:
+            return {ch: round(v, 1) for ch, v in d.items() if v}
+
+        return json.dumps(
+            {
+                "v": FORMAT_VERSION,
+                "lifetime": _r(self._lifetime),
+                "trip": _r(self._trip),
+                "trip_start": round(self._trip_start, 1),
+                "days": {day: _r(v) for day, v in self._days.items()},
+            },
+            separators=(",", ":"),
+        )
+
+    def start(self) -> None:
+        self._app_state.changed.connect(self.add_snapshot)
+        self._thread.start()
+        self._timer.start()
+
+    def close(self) -> None:
+        """停止定时器，写出最后一份并等待写线程结束"""
+        self._timer.stop()
+        self._unsubscribe_config()
+        with self._lock:
+            self._dirty = True
+        self._save_if_dirty()
+        self._stopped = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(5.0)
+
+    def _save_if_dirty(self) -> None:
+        # 判断、清除与编码在同一临界区：期间的积分不会被清掉标记而漏写
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = self._encode()
+        self._pending = data
+        self._wake.set()
+
+    def _run_writer(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            data, self._pending = self._pending, None
+            if data is not None:
+                try:
+                    atomic_write_text(self._path, data)
+                except OSError as e:
+                    logger.warning("电能累计写入失败 %s: %s", self._path, e)
+            if self._stopped:
+                return
+
+    # ---------- 积分 ----------
+
+    def add_snapshot(self, snap: Snapshot, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        day = _today(self._tz)
+        with self._lock:
+            if day != self._day:
+                self._day = day
+                self._days.setdefault(day, {ch: 0.0 for ch in CHANNELS})
+                self._prune_days()
+            today = self._days[day]
+            for ch, (_, _, domain, slave, getter) in CHANNELS.items():
+                comm = snap.comm.get(slave)
+                p = None
+                if domain not in snap.stale and comm is not None and comm.online:
+                    p = getter(snap)
+                last = self._last[ch]
+                if p is None:
+                    self._last[ch] = None
+                    continue
+                self._last[ch] = (now, p)
+                if last is None:
+                    continue
+                dt = now - last[0]
+                if dt <= 0:
+                    continue
+                if dt > MAX_GAP_S:
+                    self._gap_s += dt
+                    continue
+                wh = (last[1] + p) * 0.5 * dt / 3600.0
+                if wh:
+                    self._lifetime[ch] += wh
+                    self._trip[ch] += wh
+                    today[ch] += wh
+                    self._dirty = True
+
+    def _prune_days(self) -> None:
+        for day in sorted(self._days)[:-DAILY_DAYS]:
+            del self._days[day]
+
+    # ---------- 查询 ----------
+
+    def totals(self) -> dict[str, dict[str, float]]:
+        """{"today"|"trip"|"lifetime": {通道: Wh}}"""
+        with self._lock:
+            return {
+                "today": dict(self._days.get(self._day, {})),
+                "trip": dict(self._trip),
+                "lifetime": dict(self._lifetime),
+            }
+
+    def daily(self) -> dict[str, dict[str, float]]:
+        """最近 DAILY_DAYS 天 {日期: {通道: Wh}}"""
+        with self._lock:
+            return {day: dict(v) for day, v in sorted(self._days.items())}
+
+    def trip_start(self) -> float:
+        return self._trip_start
+
+    def gap_seconds(self) -> float:
+        """本次运行中因采样间隔超过 MAX_GAP_S 未积分的时长（秒，按通道累加）"""
+        return self._gap_s
+
+    def reset_trip(self) -> None:
+        with self._lock:
+            self._trip = {ch: 0.0 for ch in CHANNELS}
+            self._trip_start = time.time()
+            self._dirty = True
+
+
+# ---------- 全局实例 ----------
+
+_energy_meter: EnergyMeter | None = None
+
+
+def register_energy_meter(meter: EnergyMeter | None) -> None:
+    """启动时注册，供动力页等获取"""
+    global _energy_meter
+    _energy_meter = meter
+
+
+def get_energy_meter() -> EnergyMeter | None:
+    """获取已注册的电能累计，未启用时返回 None"""
+    return _energy_meter
@@ -0,0 +1,330 @@
+"""
+续航估算：电池 SOC 耗尽/充满时间、副油箱燃油耗尽时间，均为 O(1) 流式统计，每个样本只更新几组累加量，不回看历史。
+
+- Ewma：按时间衰减的指数加权均值与方差（电池功率，时间常数 POWER_TAU_S）
+- DecayingRegression：指数遗忘的加权最小二乘，在线拟合 电量-时间 直线，给出斜率及其标准误
+- 异常剔除：残差超过 REJECT_K 倍残差标准差（且超过量化下限）的样本丢弃；连续 RESET_AFTER 个都被剔除
+  视为真实跳变（加油、BMS 校准），以新值重新开始
+- 电池：功率换算的变化率（需 battery_capacity_wh）与 SOC 回归斜率按逆方差融合；置信带为 ±Z 倍标准差
+由 AppState.sampled 驱动（只含实时数据，缓存恢复值不参与），主线程更新与读取。
+"""
+
+import math
+from dataclasses import dataclass
+
+from PyQt6.QtCore import QObject
+
+from app.core.state import AppState
+
+# 电池功率均值的时间常数（秒）：负载切换后约 2 分钟跟上
+POWER_TAU_S = 120.0
+# SOC / 燃油回归的遗忘时间常数（秒）
+SOC_TAU_S = 1800.0
+FUEL_TAU_S = 3600.0
+# 回归给出斜率前的最少样本数与最短跨度（秒）
+MIN_SAMPLES = 10
+MIN_SPAN_S = 300.0
+REJECT_K = 4.0
+RESET_AFTER = 10
+# 置信带倍数（约 95%）
+Z = 2.0
+# 功率换算的模型误差（容量/健康度不准），按变化率的比例计入
+POWER_MODEL_ERR = 0.05
+# 变化率标准差下限（按变化率比例）：负载随时会变，置信带不窄于此
+MIN_REL_SIGMA = 0.05
+# 变化率低于此值（%/h）视为静止，不给出时间
+MIN_RATE_PER_H = 0.05
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """某一时刻的估算；变化率 %/h（负为下降），时间单位秒，None 表示不可估（静止或置信带跨过 0）"""
+    level: float
+    rate_per_h: float
+    rate_sigma_per_h: float
+    time_to_empty_s: float | None = None
+    time_to_empty_lo_s: float | None = None
+    time_to_empty_hi_s: float | None = None
+    time_to_full_s: float | None = None
+    time_to_full_lo_s: float | None = None
+    time_to_full_hi_s: float | None = None
+
+
+class Ewma:
+    """时间衰减的指数加权均值/方差；超过 REJECT_K 倍标准差的样本剔除，连续剔除 RESET_AFTER 次后以新值重置"""
+
+    __slots__ = ("tau_s", "floor", "mean", "var", "last_t", "n", "rejected_run")
+
+    def __init__(self, tau_s: float, floor: float = 0.0):
+        self.tau_s = tau_s
+        self.floor = floor
+        self.mean: float | None = None
+        self.var = 0.0
+        self.last_t = 0.0
+        self.n = 0
+        self.rejected_run = 0
+
+    def reset(self) -> None:
+        self.mean = None
+        self.var = 0.0
+        self.n = 0
+        self.rejected_run = 0
+
+    def add(self, t: float, x: float) -> bool:
+        """加入样本，返回是否被采纳"""
+        if self.mean is None:
+            self.mean, self.var, self.last_t, self.n = x, 0.0, t, 1
+            return True
+        dt = t - self.last_t
+        if dt <= 0:
+            return False
+        d = x - self.mean
+        if self.n >= MIN_SAMPLES and abs(d) > max(REJECT_K * math.sqrt(self.var), self.floor):
+            self.rejected_run += 1
+            if self.rejected_run < RESET_AFTER:
+                return False
+            self.reset()
+            return self.add(t, x)
+        self.rejected_run = 0
+        alpha = 1.0 - math.exp(-dt / self.tau_s)
+        self.mean += alpha * d
+        self.var = (1.0 - alpha) * (self.var + alpha * d * d)
+        self.last_t = t
+        self.n += 1
+        return True
+
+    def sigma(self) -> float:
+        return math.sqrt(self.var)
+
+
+class DecayingRegression:
+    """
+    指数遗忘加权最小二乘 y = a + b·(t - t0)。每个样本先把全部累加量乘以 exp(-dt/tau) 再加入；
+    t0 随时间前移（累加量做平移变换），避免长时间运行后 t² 累加失去精度。
+    """
+
+    __slots__ = (
+        "tau_s", "floor", "t0", "last_t", "first_t", "n",
+        "sw", "sw2", "st", "sy", "stt", "sty", "syy", "rejected_run",
+    )
+
+    def __init__(self, tau_s: float, floor: float):
+        self.tau_s = tau_s
+        self.floor = floor
+        self.reset()
+
+    def reset(self) -> None:
+        self.t0 = self.last_t = self.first_t = 0.0
+        self.n = 0
+        self.sw = self.sw2 = self.st = self.sy = self.stt = self.sty = self.syy = 0.0
+        self.rejected_run = 0
+
+    def _fit(self) -> tuple[float, float, float, float] | None:
+        """(截距, 斜率/秒, 残差标准差, 斜率标准误)；样本不足返回 None"""
+        if self.n < 3 or self.sw <= 0:
+            return None
+        sxx = self.stt - self.st * self.st / self.sw
+        if sxx <= 1e-9:
+            return None
+        b = (self.sty - self.st * self.sy / self.sw) / sxx
+        a = (self.sy - b * self.st) / self.sw
+        sse = max(0.0, self.syy - a * self.sy - b * self.sty)
+        # 有效样本数（Kish）
+        n_eff = self.sw * self.sw / self.sw2 if self.sw2 > 0 else 0.0
+        dof = max(1.0, n_eff - 2.0)
+        s2 = sse / self.sw * n_eff / dof
+        se = math.sqrt(s2 / sxx)
+        return a, b, math.sqrt(s2), se
+
+    def add(self, t: float, y: float) -> bool:
+        """加入样本，返回是否被采纳"""
+        if self.n == 0:
+            self.t0 = self.first_t = t
+        elif t <= self.last_t:
+            return False
+        elif self.n >= MIN_SAMPLES:
+            fit = self._fit()
+            if fit is not None:
+                a, b, s, _ = fit
+                if abs(y - (a + b * (t - self.t0))) > max(REJECT_K * s, self.floor):
+                    self.rejected_run += 1
+                    if self.rejected_run < RESET_AFTER:
+                        return False
+                    self.reset()
+                    return self.add(t, y)
+        self.rejected_run = 0
+        if self.n:
+            f = math.exp(-(t - self.last_t) / self.tau_s)
+            self.sw *= f
+            self.sw2 *= f * f
+            self.st *= f
+            self.sy *= f
+            self.stt *= f
+            self.sty *= f
+            self.syy *= f
+            # 原点前移：t' = t - d
+            d = t - self.t0
+            if d > self.tau_s:
+                self.stt += -2.0 * d * self.st + d * d * self.sw
+                self.sty -= d * self.sy
+                self.st -= d * self.sw
+                self.t0 = t
+        x = t - self.t0
+        self.sw += 1.0
+        self.sw2 += 1.0
+        self.st += x
+        self.sy += y
+        self.stt += x * x
+        self.sty += x * y
+        self.syy += y * y
+        self.last_t = t
+        self.n += 1
+        return True
+
+    def slope_per_h(self) -> tuple[float, float] | None:
+        """(斜率, 标准误)，单位 /h；样本数或跨度不足返回 None"""
+        if self.n < MIN_SAMPLES or self.last_t - self.first_t < MIN_SPAN_S:
+            return None
+        fit = self._fit()
+        if fit is None:
+            return None
+        return fit[1] * 3600.0, fit[3] * 3600.0
+
+
+def _eta(remaining: float, rate: float, sigma: float) -> tuple[float | None, float | None, float | None]:
+    """按变化率（朝目标方向为正）求 (估计, 下限, 上限) 秒；上限在置信带跨过 0 时为 None"""
+    if rate < MIN_RATE_PER_H or remaining <= 0:
+        return None, None, None
+    mid = remaining / rate * 3600.0
+    lo = remaining / (rate + Z * sigma) * 3600.0
+    slow = rate - Z * sigma
+    hi = remaining / slow * 3600.0 if slow >= MIN_RATE_PER_H else None
+    return mid, lo, hi
+
+
+def _make_estimate(level: float, rate: float, sigma: float) -> Estimate:
+    sigma = max(sigma, MIN_REL_SIGMA * abs(rate))
+    empty = _eta(level, -rate, sigma)
+    full = _eta(100.0 - level, rate, sigma)
+    return Estimate(level, rate, sigma, *empty, *full)
+
+
+class LevelEstimator:
+    """单一液位/电量（%）的耗尽时间：只用回归斜率"""
+
+    def __init__(self, tau_s: float, floor: float):
+        self._reg = DecayingRegression(tau_s, floor)
+        self._level: float | None = None
+
+    def add(self, t: float, level: float) -> bool:
+        self._level = level
+        return self._reg.add(t, level)
+
+    def level(self) -> float | None:
+        return self._level
+
+    def slope_per_h(self) -> tuple[float, float] | None:
+        return self._reg.slope_per_h()
+
+    def estimate(self) -> Estimate | None:
+        if self._level is None:
+            return None
+        slope = self.slope_per_h()
+        if slope is None:
+            return None
+        return _make_estimate(self._level, *slope)
+
+
+class BatteryEstimator:
+    """电池：EWMA 功率换算的变化率与 SOC 回归斜率逆方差融合；容量为 0 时只用回归"""
+
+    def __init__(self, capacity_wh: float):
+        self.capacity_wh = capacity_wh
+        self._soc = LevelEstimator(SOC_TAU_S, floor=0.5)
+        self._power = Ewma(POWER_TAU_S, floor=50.0)
+        self._dt = Ewma(POWER_TAU_S)
+
+    def add_soc(self, t: float, soc_pct: float) -> bool:
+        return self._soc.add(t, soc_pct)
+
+    def add_power(self, t: float, power_w: float) -> bool:
+        """电池功率 W（正为充电）"""
+        last = self._power.last_t
+        ok = self._power.add(t, power_w)
+        if ok and self._power.n > 1:
+            self._dt.add(t, t - last)
+        return ok
+
+    def _power_rate(self) -> tuple[float, float] | None:
+        if self.capacity_wh <= 0 or self._power.mean is None or self._power.n < MIN_SAMPLES:
+            return None
+        rate = self._power.mean / self.capacity_wh * 100.0
+        # 均值的标准误：有效样本数约 2τ/采样间隔
+        dt = self._dt.mean or 1.0
+        se = self._power.sigma() * math.sqrt(dt / (2.0 * POWER_TAU_S)) / self.capacity_wh * 100.0
+        return rate, math.hypot(se, POWER_MODEL_ERR * abs(rate))
+
+    def estimate(self) -> Estimate | None:
+        level = self._soc.level()
+        if level is None:
+            return None
+        parts = [r for r in (self._power_rate(), self._soc.slope_per_h()) if r is not None]
+        if not parts:
+            return None
+        wsum = rsum = 0.0
+        for rate, sigma in parts:
+            w = 1.0 / max(sigma, 1e-3) ** 2
+            wsum += w
+            rsum += w * rate
+        return _make_estimate(level, rsum / wsum, math.sqrt(1.0 / wsum))
+
+
+class RangeEstimators(QObject):
+    """订阅 AppState.sampled，维护电池与副油箱估算；battery() / fuel() 供页面直接读取"""
+
+    def __init__(self, app_state: AppState, battery_capacity_wh: float, parent=None):
+        super().__init__(parent)
+        self._app_state = app_state
+        self._battery = BatteryEstimator(battery_capacity_wh)
+        # 油位传感器受晃动影响，量化下限放宽到 2%
+        self._fuel = LevelEstimator(FUEL_TAU_S, floor=2.0)
+
+    def start(self) -> None:
+        self._app_state.sampled.connect(self.add_batch)
+
+    def add_batch(self, ts: float, samples: dict) -> None:
+        power = samples.get("power")
+        if power:
+            soc = power.get("soc_x10")
+            if soc is not None:
+                self._battery.add_soc(ts, soc / 10.0)
+            p = power.get("batt_p_w")
+            if p is not None:
+                self._battery.add_power(ts, float(p))
+        aux = samples.get("auxfuel")
+        if aux:
+            level = aux.get("aux_fuel_level_x10")
+            if level is not None:
+                self._fuel.add(ts, level / 10.0)
+
+    def battery(self) -> Estimate | None:
+        return self._battery.estimate()
+
+    def fuel(self) -> Estimate | None:
+        return self._fuel.estimate()
+
+
+# ---------- 全局实例 ----------
+
+_estimators: RangeEstimators | None = None
+
+
+def register_range_estimators(estimators: RangeEstimators | None) -> None:
+    """启动时注册，供仪表盘等获取"""
+    global _estimators
+    _estimators = estimators
+
+
+def get_range_estimators() -> RangeEstimators | None:
+    """获取已注册的续航估算，未启动时返回 None"""
+    return _estimators
@@ -0,0 +1,482 @@
+"""
+局域网实时状态 API（手机/平板镜像 HMI）：独立线程上的 asyncio HTTP + WebSocket 服务，只用标准库。
+
+- GET /api/snapshot：当前状态 JSON {"sid", "seq", "state": {子域: {字段: 值}}}
+- GET /ws：WebSocket（只读）。连接后先发全量，之后推送字段级增量：
+    全量 {"t": "s", "sid", "seq", "k": [字段路径…], "v": [值…]}
+    增量 {"t": "d", "seq", "p": 上一条消息的 seq, "c": [[索引, 值]…], "k": [[索引, 路径]…]（仅出现新字段时）}
+  字段以索引代替名称（路径如 "power.soc_x10"、"comm.4"、"faults.<键>"、"stale"），索引在 sid 内只增不变。
+- 重同步：客户端收到的 p 与本地 seq 不符时发 {"t": "resync"} 取全量；重连时带 ?sid=…&since=本地 seq，
+  服务端在 HISTORY 条历史内补发合并后的增量，否则发全量。
+- 背压：每客户端一个待发字典（索引 → 最新值）；上一帧未写出（内核缓冲已满）时新变化只覆盖其中的值，
+  中间值丢弃，内存上限为字段数。写缓冲高水位为 0，追平的客户端不会积压。
+- 扇出：每次增量只编码一次，已追平且空闲的客户端共享同一帧字节；快照比对在服务线程，与客户端数无关。
+- 鉴权：全部请求须以 ?token= 或 Authorization: Bearer 携带 token；token 为空时拒绝创建服务（不提供免登录模式）
+"""
+
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import hmac
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from app.core.state import AppState, Snapshot
+
+logger = logging.getLogger(__name__)
+
+_DOMAINS = ("power", "hvac", "webasto", "lighting", "pdu", "env", "gas", "auxfuel")
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# 保留的增量条数（断线重连补发）
+HISTORY = 256
+# 服务端 ping 间隔与客户端无任何帧的超时（秒）
+PING_INTERVAL_S = 20.0
+IDLE_TIMEOUT_S = 60.0
+# 客户端消息与 HTTP 请求头的大小上限（字节）
+MAX_CLIENT_MESSAGE = 4096
+MAX_HEADER_BYTES = 8192
+# 每连接内核发送缓冲（字节）：缓冲小，慢客户端很快进入合并，积压的旧值不超过约此大小
+SEND_BUFFER_BYTES = 16384
+
+_OP_CONT, _OP_TEXT, _OP_BINARY, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+_field_names: dict[type, tuple[str, ...]] = {}
+
+
+def flatten_snapshot(snap: Snapshot) -> dict[str, Any]:
+    """快照展平为 {路径: 值}；元组转列表，通信状态只取 online"""
+    out: dict[str, Any] = {}
+    for domain in _DOMAINS:
+        obj = getattr(snap, domain)
+        names = _field_names.get(type(obj))
+        if names is None:
+            names = _field_names[type(obj)] = tuple(f.name for f in dataclasses.fields(obj))
+        for name in names:
+            v = getattr(obj, name)
+            out[f"{domain}.{name}"] = list(v) if isinstance(v, tuple) else v
+    for sid, comm in snap.comm.items():
+        out[f"comm.{sid}"] = comm.online
+    for key, v in snap.faults.items():
+        out[f"faults.{key}"] = v
+    out["stale"] = sorted(snap.stale)
+    return out
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def ws_frame(opcode: int, payload: bytes) -> bytes:
+    """服务端帧（不加掩码）"""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 0x10000:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+def ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+class _Client:
+    __slots__ = ("writer", "last_seq", "known_keys", "pending", "resync", "sending", "wake", "last_rx")
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.last_seq = -1
+        self.known_keys = 0
+        self.pending: dict[int, Any] = {}
+        self.resync = True
+        self.sending = False
+        self.wake = asyncio.Event()
+        self.last_rx = time.monotonic()
+
+
+class LiveApiServer:
+    """start() 起服务线程并订阅 AppState.changed；stop() 断开全部客户端并等待线程退出。token 不能为空（ValueError）"""
+
+    def __init__(
+        self,
+        app_state: AppState,
+        host: str = "0.0.0.0",
+        port: int = 8765,
+        max_clients: int = 8,
+        token: str = "",
+    ):
+        if not token:
+            raise ValueError("live_api 需要非空 token")
+        self._app_state = app_state
+        self._host = host
+        self._port = port
+        self._max_clients = max(1, max_clients)
+        self._token = token
+        # 服务实例 id：重启后索引与 seq 重新开始，客户端据此判断能否续传
+        self.sid = os.urandom(4).hex()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._stopping: asyncio.Event | None = None
+        # 以下只在服务线程访问
+        self._keys: list[str] = []
+        self._index: dict[str, int] = {}
+        self._values: list[Any] = []
+        self._seq = 0
+        # (seq, 该次变化, 该次之后的字段数)
+        self._history: deque[tuple[int, dict[int, Any], int]] = deque(maxlen=HISTORY)
+        self._clients: set[_Client] = set()
+        self._handlers: set[asyncio.Task] = set()
+
+    # ---------- 生命周期 ----------
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="LiveApi", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._apply, self._app_state.get_snapshot())
+            self._app_state.changed.connect(self._on_changed)
+
+    def stop(self) -> None:
+        try:
+            self._app_state.changed.disconnect(self._on_changed)
+        except TypeError:
+            pass
+        loop = self._loop
+        if loop is not None and self._stopping is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    @property
+    def port(self) -> int:
+        """实际监听端口（配置为 0 时由系统分配）"""
+        if self._server is not None and self._server.sockets:
+            return self._server.sockets[0].getsockname()[1]
+        return self._port
+
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def _on_changed(self, snap: Snapshot) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._apply, snap)
+            except RuntimeError:
+                pass
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve())
+        except OSError as e:
+            logger.warning("实时状态 API 启动失败 %s:%s: %s", self._host, self._port, e)
+        except Exception:
+            logger.exception("实时状态 API 异常退出")
+        finally:
+            self._ready.set()
+            self._loop = None
+            loop.close()
+
+    async def _serve(self) -> None:
+        self._stopping = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        self._loop = asyncio.get_running_loop()
+        logger.info("实时状态 API 已启动: http://%s:%d (sid=%s)", self._host, self.port, self.sid)
+        self._ready.set()
+        pinger = asyncio.create_task(self._ping_loop())
+        await self._stopping.wait()
+        pinger.cancel()
+        self._server.close()
+        for c in list(self._clients):
+            self._close_client(c, 1001)
+        if self._handlers:
+            await asyncio.wait(self._handlers, timeout=2.0)
+        await self._server.wait_closed()
+
+    # ---------- 状态与扇出（服务线程）----------
+
+    def _apply(self, snap: Snapshot) -> None:
+        flat = flatten_snapshot(snap)
+        changes: dict[int, Any] = {}
+        for idx, path in enumerate(self._keys):
+            v = flat.get(path)
+            if v != self._values[idx]:
+                self._values[idx] = v
+                changes[idx] = v
+        n_old = len(self._keys)
+        for path, v in flat.items():
+            if path not in self._index:
+                self._index[path] = len(self._keys)
+                self._keys.append(path)
+                self._values.append(v)
+                changes[self._index[path]] = v
+        if not changes:
+            return
+        self._seq += 1
+        seq = self._seq
+        n_keys = len(self._keys)
+        self._history.append((seq, changes, n_keys))
+        shared: bytes | None = None
+        for c in self._clients:
+            if c.resync:
+                continue
+            if (
+                not c.pending and not c.sending and c.last_seq == seq - 1 and c.known_keys == n_old
+                and c.writer.transport.get_write_buffer_size() == 0
+            ):
+                if shared is None:
+                    shared = ws_frame(_OP_TEXT, self._encode_delta(seq, seq - 1, changes, n_old))
+                c.writer.write(shared)
+                c.last_seq = seq
+                c.known_keys = n_keys
+            else:
+                c.pending.update(changes)
+                c.wake.set()
+
+    def _encode_delta(self, seq: int, prev: int, changes: dict[int, Any], known_keys: int) -> bytes:
+        msg: dict[str, Any] = {"t": "d", "seq": seq, "p": prev, "c": [[i, v] for i, v in changes.items()]}
+        if known_keys < len(self._keys):
+            msg["k"] = [[i, self._keys[i]] for i in range(known_keys, len(self._keys))]
+        return _dumps(msg)
+
+    def _encode_full(self) -> bytes:
+        return _dumps({"t": "s", "sid": self.sid, "seq": self._seq, "k": self._keys, "v": self._values})
+
+    def state_json(self) -> bytes:
+        state: dict[str, Any] = {}
+        for path, v in zip(self._keys, self._values):
+            domain, _, name = path.partition(".")
+            if name:
+                state.setdefault(domain, {})[name] = v
+            else:
+                state[domain] = v
+        return _dumps({"sid": self.sid, "seq": self._seq, "state": state})
+
+    def _resume(self, c: _Client, sid: str, since: int) -> None:
+        """sid 相同且历史覆盖 since 之后的全部增量时，合并为一条待发增量；否则保持全量"""
+        if sid != self.sid or since > self._seq:
+            return
+        if since == self._seq:
+            c.resync = False
+            c.last_seq = since
+            c.known_keys = len(self._keys)
+            return
+        entries = [h for h in self._history if h[0] >= since]
+        if not entries or entries[0][0] != since:
+            return
+        merged: dict[int, Any] = {}
+        for _, changes, _ in entries[1:]:
+            merged.update(changes)
+        c.resync = False
+        c.last_seq = since
+        c.known_keys = entries[0][2]
+        c.pending = merged
+
+    async def _sender(self, c: _Client) -> None:
+        writer = c.writer
+        while True:
+            await c.wake.wait()
+            c.wake.clear()
+            c.sending = True
+            # 上一帧写出前（慢客户端）新变化继续合并进 pending
+            await writer.drain()
+            if writer.is_closing():
+                return
+            if c.resync:
+                c.resync = False
+                c.pending = {}
+                data = self._encode_full()
+            elif c.pending:
+                data = self._encode_delta(self._seq, c.last_seq, c.pending, c.known_keys)
+                c.pending = {}
+            else:
+                c.sending = False
+                continue
+            c.last_seq = self._seq
+            c.known_keys = len(self._keys)
+            writer.write(ws_frame(_OP_TEXT, data))
+            c.sending = False
+
+    async def _ping_loop(self) -> None:
+        ping = ws_frame(_OP_PING, b"")
+        while True:
+            await asyncio.sleep(PING_INTERVAL_S)
+            now = time.monotonic()
+            for c in list(self._clients):
+                if now - c.last_rx > IDLE_TIMEOUT_S:
+                    self._close_client(c, 1001)
+                elif not c.sending:
+                    c.writer.write(ping)
+
+    def _close_client(self, c: _Client, code: int) -> None:
+        if c in self._clients:
+            self._clients.discard(c)
+            c.wake.set()
+            try:
+                c.writer.write(ws_frame(_OP_CLOSE, struct.pack("!H", code)))
+                c.writer.close()
+            except (OSError, RuntimeError):
+                pass
+
+    # ---------- HTTP / WebSocket ----------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._handlers.add(task)
+            task.add_done_callback(self._handlers.discard)
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10.0)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        try:
+            if len(head) > MAX_HEADER_BYTES:
+                raise ValueError("header too large")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                k, sep, v = line.partition(":")
+                if sep:
+                    headers[k.strip().lower()] = v.strip()
+        except ValueError:
+            await self._respond(writer, 400, b"bad request")
+            return
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        given = query.get("token") or headers.get("authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(given.encode("utf-8"), self._token.encode("utf-8")):
+            await self._respond(writer, 401, b"unauthorized")
+            return
+        if method != "GET":
+            await self._respond(writer, 405, b"method not allowed")
+        elif url.path == "/api/snapshot":
+            await self._respond(writer, 200, self.state_json(), "application/json")
+        elif url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+            await self._websocket(reader, writer, headers, query)
+        else:
+            await self._respond(writer, 404, b"not found")
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes, ctype: str = "text/plain") -> None:
+        reason = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+                  405: "Method Not Allowed", 503: "Service Unavailable"}.get(status, "")
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: {ctype}; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nAccess-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n"
+            .encode("latin-1") + body
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _websocket(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict, query: dict,
+    ) -> None:
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, 400, b"missing Sec-WebSocket-Key")
+            return
+        if len(self._clients) >= self._max_clients:
+            await self._respond(writer, 503, b"too many clients")
+            return
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {ws_accept_key(key)}\r\n\r\n".encode("latin-1")
+        )
+        # 高水位 0：内核缓冲写满即暂停，drain 等到全部写出
+        writer.transport.set_write_buffer_limits(high=0)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
+            except OSError:
+                pass
+        c = _Client(writer)
+        try:
+            self._resume(c, query.get("sid", ""), int(query.get("since", -1)))
+        except ValueError:
+            pass
+        self._clients.add(c)
+        c.wake.set()
+        peer = writer.get_extra_info("peername")
+        logger.info("实时状态客户端接入 %s（共 %d）", peer, len(self._clients))
+        sender = asyncio.create_task(self._sender(c))
+        try:
+            await self._read_frames(reader, c)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            sender.cancel()
+            self._close_client(c, 1000)
+            await asyncio.gather(sender, return_exceptions=True)
+            logger.info("实时状态客户端断开 %s（剩 %d）", peer, len(self._clients))
+
+    async def _read_frames(self, reader: asyncio.StreamReader, c: _Client) -> None:
+        while c in self._clients:
+            b0, b1 = await reader.readexactly(2)
+            opcode = b0 & 0x0F
+            n = b1 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            # 客户端帧必须带掩码；只接受不分片的小消息
+            if not b1 & 0x80 or n > MAX_CLIENT_MESSAGE or not b0 & 0x80 or opcode == _OP_CONT:
+                self._close_client(c, 1002 if n <= MAX_CLIENT_MESSAGE else 1009)
+                return
+            mask = await reader.readexactly(4)
+            payload = bytes(b ^ mask[i & 3] for i, b in enumerate(await reader.readexactly(n)))
+            c.last_rx = time.monotonic()
+            if opcode == _OP_CLOSE:
+                return
+            if opcode == _OP_PING:
+                c.writer.write(ws_frame(_OP_PONG, payload))
+            elif opcode == _OP_TEXT:
+                self._on_message(c, payload)
+
+    def _on_message(self, c: _Client, payload: bytes) -> None:
+        try:
+            msg = json.loads(payload)
+        except ValueError:
+            return
+        if isinstance(msg, dict) and msg.get("t") == "resync":
+            c.resync = True
+            c.pending = {}
+            c.wake.set()
+
+
+# ---------- 全局实例 ----------
+
+_live_api: LiveApiServer | None = None
+
+
+def register_live_api(server: LiveApiServer | None) -> None:
+    """启动时注册，供诊断页等获取"""
+    global _live_api
+    _live_api = server
+
+
+def get_live_api() -> LiveApiServer | None:
+    """获取已注册的实时状态 API，未启用时返回 None"""
+    return _live_api
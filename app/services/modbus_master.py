@@ -9,8 +9,11 @@ import logging
 import queue
 import threading
 import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+
+from app.services.bus_metrics import BLOCK_FC, WRITE_FC, WRITE_MULTI_FC, BusMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +29,10 @@ OFFLINE_THRESHOLD = 3
 # 重连退避序列（秒），上限 10s
 RECONNECT_BACKOFF = (1, 2, 5, 10)
 
+# 单次读请求上限（Modbus 协议：FC01 2000 位，FC03 125 寄存器）
+MAX_READ_BITS = 2000
+MAX_READ_REGS = 125
+
 
 # ---------- Transport 接口 ----------
 
@@ -55,6 +62,16 @@ class ModbusTransport:
     def write_holding_register(self, slave: int, addr0: int, value: int) -> None:
         raise NotImplementedError
 
+    def write_coils(self, slave: int, addr0: int, values: list[int]) -> None:
+        """FC15 连续多线圈写；默认逐个 FC05，子类可覆盖为单帧"""
+        for i, v in enumerate(values):
+            self.write_coil(slave, addr0 + i, v)
+
+    def write_holding_registers(self, slave: int, addr0: int, values: list[int]) -> None:
+        """FC16 连续多寄存器写；默认逐个 FC06，子类可覆盖为单帧"""
+        for i, v in enumerate(values):
+            self.write_holding_register(slave, addr0 + i, v)
+
 
 # ---------- RealSerialTransport ----------
 
@@ -167,6 +184,20 @@ class RealSerialTransport(ModbusTransport):
         if r.isError():
             self._on_disconnect()
 
+    def write_coils(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._ensure_connected()
+        with self._lock:
+            r = self._client.write_coils(addr0, [bool(v) for v in values], slave=slave)
+        if r.isError():
+            self._on_disconnect()
+
+    def write_holding_registers(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._ensure_connected()
+        with self._lock:
+            r = self._client.write_registers(addr0, list(values), slave=slave)
+        if r.isError():
+            self._on_disconnect()
+
     def close(self) -> None:
         with self._lock:
             if self._client:
@@ -184,7 +215,8 @@ class MockTransport(ModbusTransport):
 
     def __init__(self):
         self._data: dict[int, dict[str, dict[int, int]]] = {}
-        self._lock = threading.Lock()
+        # set_* 持锁后再调用 _ensure_slave，需可重入
+        self._lock = threading.RLock()
         self._fail_slaves: set[int] = set()
 
     def _ensure_slave(self, slave: int) -> dict[str, dict[int, int]]:
@@ -235,6 +267,20 @@ class MockTransport(ModbusTransport):
         with self._lock:
             self._ensure_slave(slave)["hr"][addr0] = value
 
+    def write_coils(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._check_fail(slave)
+        with self._lock:
+            d = self._ensure_slave(slave)["coils"]
+            for i, v in enumerate(values):
+                d[addr0 + i] = 1 if v else 0
+
+    def write_holding_registers(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._check_fail(slave)
+        with self._lock:
+            d = self._ensure_slave(slave)["hr"]
+            for i, v in enumerate(values):
+                d[addr0 + i] = v
+
     def set_input_register(self, slave: int, addr0: int, value: int) -> None:
         with self._lock:
             self._ensure_slave(slave)["ir"][addr0] = value
@@ -318,7 +364,7 @@ def _build_read_plan(spec: dict, poll_group: str) -> list[tuple[str, str, int, i
 # ---------- 写队列与写后回读确认 ----------
 
 class WriteRequest:
-    __slots__ = ("slave", "kind", "addr0", "value", "verify_timeout_s", "verify_user_data")
+    __slots__ = ("slave", "kind", "addr0", "value", "verify_timeout_s", "verify_user_data", "enqueue_ts")
 
     def __init__(
         self,
@@ -335,6 +381,8 @@ class WriteRequest:
         self.value = value
         self.verify_timeout_s = verify_timeout_s
         self.verify_user_data = verify_user_data
+        # 入队时刻（perf_counter），用于统计排队等待与入队→应答延迟
+        self.enqueue_ts = time.perf_counter()
 
 
 # 写后回读待确认项：slave/point/expected/deadline/user_data
@@ -350,6 +398,43 @@ class _PendingVerify:
         self.user_data = user_data
 
 
+# ---------- 批量写（场景）----------
+
+class WriteFrame:
+    """一帧连续写：values 长度为 1 时用 FC05/06，否则 FC15/16；verify=False（脉冲线圈）不参与回读比对"""
+    __slots__ = ("slave", "kind", "addr0", "values", "verify")
+
+    def __init__(self, slave: int, kind: str, addr0: int, values: list[int], verify: bool = True):
+        self.slave = slave
+        self.kind = kind
+        self.addr0 = addr0
+        self.values = list(values)
+        self.verify = verify
+
+    def __repr__(self) -> str:
+        return f"WriteFrame(slave={self.slave}, {self.kind}@{self.addr0}, {self.values}, verify={self.verify})"
+
+
+@dataclass
+class BatchResult:
+    """批量写结果：mismatches 为回读不符的点 (slave, kind, addr0, 期望, 实际/None 未读到)"""
+    ok: bool
+    frames_sent: int
+    points: int
+    mismatches: list[tuple[int, str, int, int, int | None]] = field(default_factory=list)
+    error: str | None = None
+    elapsed_ms: float = 0.0
+
+
+class WriteBatch:
+    __slots__ = ("frames", "on_done", "enqueue_ts")
+
+    def __init__(self, frames: list[WriteFrame], on_done: Callable[[BatchResult], None] | None):
+        self.frames = frames
+        self.on_done = on_done
+        self.enqueue_ts = time.perf_counter()
+
+
 # ---------- ModbusMaster ----------
 
 class ModbusMaster:
@@ -364,15 +449,20 @@ class ModbusMaster:
         device_parser: Any = None,
         update_bridge: Any = None,
         spec: dict[str, Any] | None = None,
+        idle_wait_s: float = 0.1,
     ):
         self._transport = transport
         self._app_state = app_state
-        self._poll_ms = poll_ms or {}
+        self._poll_ms = dict(poll_ms or {})
+        # 轮询间隔代号：set_poll_ms 后 +1，主循环见到新代号才重新读取间隔
+        self._poll_ms_gen = 0
         self._spec_path = spec_path or _SPEC_PATH
         self._device_parser = device_parser
         self._update_bridge = update_bridge
-        self._write_queue: queue.Queue[WriteRequest] = queue.Queue()
+        self._write_queue: queue.Queue[WriteRequest | WriteBatch] = queue.Queue()
         self._spec = spec
+        # 主循环每轮末尾的等待（秒）；基准测试可设为 0 以测吞吐上限
+        self._idle_wait_s = max(0.0, idle_wait_s)
         self._stop = threading.Event()
         self._thread: threading.Thread | None = None
         self._stats_lock = threading.Lock()
@@ -383,6 +473,8 @@ class ModbusMaster:
         # 写后回读待确认列表（主循环内检查，不阻塞 UI）
         self._pending_verifies: list[_PendingVerify] = []
         self._pending_lock = threading.Lock()
+        # 总线计时统计：默认关闭，诊断页打开时由 set_metrics_enabled 开启
+        self._metrics = BusMetrics()
 
     def _slave_stat(self, sid: int) -> dict[str, Any]:
         """返回已有 dict，不插入新 key；若 key 不存在则返回默认结构但不写入。"""
@@ -427,19 +519,35 @@ class ModbusMaster:
             WriteRequest(slave, "holding", addr0, value, verify_timeout_s, verify_user_data)
         )
 
-    def _drain_writes(self) -> None:
+    def apply_batch(self, frames: list[WriteFrame], on_done: Callable[[BatchResult], None] | None = None) -> None:
+        """
+        按顺序写出 frames 并统一回读确认，在主循环的一轮内完成（不与轮询交错）。
+        任一帧失败则中止其余帧（顺序中含安全约束）。on_done 在 Modbus 线程回调，UI 需经信号转到主线程。
+        """
+        self._write_queue.put(WriteBatch(list(frames), on_done))
+
+    def _drain_writes(self, accumulated: dict[str, dict[str, dict[int, int]]] | None = None) -> None:
         while True:
             try:
                 req = self._write_queue.get_nowait()
             except queue.Empty:
                 break
+            if isinstance(req, WriteBatch):
+                self._run_batch(req, accumulated if accumulated is not None else {})
+                continue
+            metrics = self._metrics if self._metrics.enabled else None
+            t0 = time.perf_counter()
             try:
-                t0 = time.perf_counter()
                 if req.kind == "coil":
                     self._transport.write_coil(req.slave, req.addr0, req.value)
                 else:
                     self._transport.write_holding_register(req.slave, req.addr0, req.value)
-                rtt = (time.perf_counter() - t0) * 1000
+                t1 = time.perf_counter()
+                rtt = (t1 - t0) * 1000
+                if metrics is not None:
+                    fc = WRITE_FC.get(req.kind, 0)
+                    metrics.record_txn(req.slave, fc, (t0 - req.enqueue_ts) * 1000, rtt)
+                    metrics.record_write_ack(req.slave, (t1 - req.enqueue_ts) * 1000)
                 s = self._slave_stat(req.slave)
                 s["success_count"] = s.get("success_count", 0) + 1
                 s["last_rtt_ms"] = rtt
@@ -462,16 +570,150 @@ class ModbusMaster:
                         )
             except TransportError as e:
                 logger.debug("写失败 slave=%s addr=%s: %s", req.slave, req.addr0, e)
+                if metrics is not None:
+                    metrics.record_error(req.slave, WRITE_FC.get(req.kind, 0), (time.perf_counter() - t0) * 1000)
                 s = self._slave_stat(req.slave)
                 s["fail_count"] = s.get("fail_count", 0) + 1
 
+    def _run_batch(self, batch: WriteBatch, accumulated: dict[str, dict[str, dict[int, int]]]) -> None:
+        metrics = self._metrics if self._metrics.enabled else None
+        t_start = time.perf_counter()
+        sent = points = 0
+        error: str | None = None
+        for frame in batch.frames:
+            multi = len(frame.values) > 1
+            fc = (WRITE_MULTI_FC if multi else WRITE_FC).get(frame.kind, 0)
+            t0 = time.perf_counter()
+            try:
+                if frame.kind == "coil":
+                    if multi:
+                        self._transport.write_coils(frame.slave, frame.addr0, frame.values)
+                    else:
+                        self._transport.write_coil(frame.slave, frame.addr0, frame.values[0])
+                elif multi:
+                    self._transport.write_holding_registers(frame.slave, frame.addr0, frame.values)
+                else:
+                    self._transport.write_holding_register(frame.slave, frame.addr0, frame.values[0])
+            except TransportError as e:
+                logger.debug("批量写失败 %r: %s", frame, e)
+                if metrics is not None:
+                    metrics.record_error(frame.slave, fc, (time.perf_counter() - t0) * 1000)
+                s = self._slave_stat(frame.slave)
+                s["fail_count"] = s.get("fail_count", 0) + 1
+                error = f"slave {frame.slave} {frame.kind}@{frame.addr0}: {e}"
+                break
+            t1 = time.perf_counter()
+            rtt = (t1 - t0) * 1000
+            if metrics is not None:
+                metrics.record_txn(frame.slave, fc, (t0 - batch.enqueue_ts) * 1000, rtt)
+                metrics.record_write_ack(frame.slave, (t1 - batch.enqueue_ts) * 1000)
+            s = self._slave_stat(frame.slave)
+            s["success_count"] = s.get("success_count", 0) + 1
+            s["last_rtt_ms"] = rtt
+            s["last_ok_ts"] = time.time()
+            sent += 1
+            points += len(frame.values)
+
+        mismatches = self._read_back(batch.frames[:sent], accumulated)
+        result = BatchResult(
+            ok=error is None and not mismatches,
+            frames_sent=sent,
+            points=points,
+            mismatches=mismatches,
+            error=error,
+            elapsed_ms=(time.perf_counter() - t_start) * 1000,
+        )
+        if batch.on_done is not None:
+            try:
+                batch.on_done(result)
+            except Exception:
+                logger.exception("批量写回调异常")
+
+    def _read_back(
+        self, frames: list[WriteFrame], accumulated: dict[str, dict[str, dict[int, int]]],
+    ) -> list[tuple[int, str, int, int, int | None]]:
+        """
+        每个 (slave, 类型) 用一次读覆盖全部已写地址（中间未写的地址一并读回，无副作用），
+        跨度超过单次读上限时退回逐帧读。读回值并入 accumulated 并立即解析更新状态，不等下一轮轮询。
+        """
+        spans: dict[tuple[int, str], list[int]] = {}
+        for f in frames:
+            if not f.verify:
+                continue
+            end = f.addr0 + len(f.values)
+            span = spans.get((f.slave, f.kind))
+            if span is None:
+                spans[(f.slave, f.kind)] = [f.addr0, end]
+            else:
+                span[0] = min(span[0], f.addr0)
+                span[1] = max(span[1], end)
+        got: dict[tuple[int, str], dict[int, int]] = {}
+        for (slave, kind), (start, end) in spans.items():
+            limit = MAX_READ_BITS if kind == "coil" else MAX_READ_REGS
+            if end - start <= limit:
+                reads = [(start, end - start)]
+            else:
+                reads = [
+                    (f.addr0, len(f.values)) for f in frames
+                    if f.verify and f.slave == slave and f.kind == kind
+                ]
+            block = "coils" if kind == "coil" else "holding_regs"
+            for addr0, count in reads:
+                vals, _ = self._read_batch(str(slave), block, addr0, count)
+                if vals is None:
+                    continue
+                dst = got.setdefault((slave, kind), {})
+                for i, v in enumerate(vals):
+                    dst[addr0 + i] = v
+
+        mismatches: list[tuple[int, str, int, int, int | None]] = []
+        for f in frames:
+            if not f.verify:
+                continue
+            read = got.get((f.slave, f.kind), {})
+            for i, v in enumerate(f.values):
+                expected = (1 if v else 0) if f.kind == "coil" else int(v) & 0xFFFF
+                actual = read.get(f.addr0 + i)
+                if actual != expected:
+                    mismatches.append((f.slave, f.kind, f.addr0 + i, expected, actual))
+
+        if got:
+            for (slave, kind), vals in got.items():
+                raw = accumulated.setdefault(str(slave), {"coils": {}, "di": {}, "ir": {}, "hr": {}})
+                raw["coils" if kind == "coil" else "hr"].update(vals)
+            self._decode_and_apply(self._spec or {}, accumulated, {str(slave) for slave, _ in got})
+        return mismatches
+
+    def _decode_and_apply(
+        self,
+        spec: dict,
+        accumulated: dict[str, dict[str, dict[int, int]]],
+        slave_ids: Any,
+        metrics: BusMetrics | None = None,
+    ) -> None:
+        """按累计原始值解析 slave_ids 各从站，合并后一次更新 AppState"""
+        if not self._device_parser or not spec:
+            return
+        merged: dict[str, Any] = {}
+        for slave_id in slave_ids:
+            raw = accumulated.get(slave_id, {"coils": {}, "di": {}, "ir": {}, "hr": {}})
+            t_dec = time.perf_counter() if metrics is not None else 0.0
+            updates = self._device_parser(slave_id, raw, spec)
+            if metrics is not None:
+                metrics.record_decode(int(slave_id), (time.perf_counter() - t_dec) * 1000)
+            for domain, fields in (updates or {}).items():
+                if isinstance(fields, dict):
+                    merged.setdefault(domain, {}).update(fields)
+        if merged:
+            self._apply_update(**merged)
+
     def _read_batch(
-        self, slave_id: str, block: str, start: int, count: int,
+        self, slave_id: str, block: str, start: int, count: int, queue_wait_ms: float = 0.0,
     ) -> tuple[list[int] | None, float | None]:
-        """返回 (vals, rtt_ms)，失败返回 (None, None)"""
+        """返回 (vals, rtt_ms)，失败返回 (None, None)。queue_wait_ms 仅用于计时统计。"""
         slave = int(slave_id)
+        t0 = time.perf_counter()
         try:
-            t0 = time.perf_counter()
             if block == "coils":
                 vals = self._transport.read_coils(slave, start, count)
             elif block == "discrete_inputs":
@@ -483,6 +725,8 @@ class ModbusMaster:
             else:
                 return None, None
             rtt = (time.perf_counter() - t0) * 1000
+            if self._metrics.enabled:
+                self._metrics.record_txn(slave, BLOCK_FC.get(block, 0), queue_wait_ms, rtt)
             s = self._slave_stat(slave)
             s["success_count"] = s.get("success_count", 0) + 1
             s["fail_count"] = 0  # 成功则清零连续失败
@@ -491,18 +735,25 @@ class ModbusMaster:
             return vals, rtt
         except TransportError as e:
             logger.debug("读失败 slave=%s %s @%s: %s", slave_id, block, start, e)
+            if self._metrics.enabled:
+                self._metrics.record_error(slave, BLOCK_FC.get(block, 0), (time.perf_counter() - t0) * 1000)
             s = self._slave_stat(slave)
             s["fail_count"] = s.get("fail_count", 0) + 1
             return None, None
 
-    def _poll_group(self, spec: dict, poll_group: str) -> dict[str, dict[str, dict[int, int]]]:
+    def _poll_group(
+        self, spec: dict, poll_group: str, late_ms: float = 0.0,
+    ) -> dict[str, dict[str, dict[int, int]]]:
+        """读取一个轮询组。late_ms 为本轮相对计划时刻的延迟，计入各批次的排队等待。"""
         plan = _build_read_plan(spec, poll_group)
         result: dict[str, dict[str, dict[int, int]]] = {}
+        cycle_t0 = time.perf_counter()
         for slave_id, block, start, count in plan:
             if slave_id not in result:
                 result[slave_id] = {"coils": {}, "di": {}, "ir": {}, "hr": {}}
             raw_key = "di" if block == "discrete_inputs" else "ir" if block == "input_regs" else "hr" if block == "holding_regs" else "coils"
-            vals, _ = self._read_batch(slave_id, block, start, count)
+            queue_wait_ms = late_ms + (time.perf_counter() - cycle_t0) * 1000 if self._metrics.enabled else 0.0
+            vals, _ = self._read_batch(slave_id, block, start, count, queue_wait_ms)
             if vals is None:
                 continue
             for i, v in enumerate(vals):
@@ -565,37 +816,45 @@ class ModbusMaster:
         spec = self._spec or {}
         accumulated: dict[str, dict[str, dict[int, int]]] = {}
         last_poll: dict[str, float] = {g: 0.0 for g in POLL_GROUPS}
-        poll_ms = {
-            POLL_FAST: self._poll_ms.get("FAST_MS", 300),
-            POLL_SLOW: self._poll_ms.get("SLOW_MS", 1000),
-            POLL_VERY_SLOW: self._poll_ms.get("VERY_SLOW_MS", 5000),
-        }
+        poll_ms: dict[str, int] = {}
+        poll_ms_gen = -1
 
         while not self._stop.is_set():
+            if poll_ms_gen != self._poll_ms_gen:
+                poll_ms_gen = self._poll_ms_gen
+                cur = self._poll_ms
+                poll_ms = {
+                    POLL_FAST: cur.get("FAST_MS", 300),
+                    POLL_SLOW: cur.get("SLOW_MS", 1000),
+                    POLL_VERY_SLOW: cur.get("VERY_SLOW_MS", 5000),
+                }
             now = time.time()
-            self._drain_writes()
+            self._drain_writes(accumulated)
 
             for group in POLL_GROUPS:
-                if (now - last_poll[group]) * 1000 >= poll_ms[group]:
+                elapsed_ms = (now - last_poll[group]) * 1000
+                if elapsed_ms >= poll_ms[group]:
+                    prev_poll = last_poll[group]
                     last_poll[group] = now
                     if spec:
-                        res = self._poll_group(spec, group)
+                        metrics = self._metrics if self._metrics.enabled else None
+                        late_ms = max(0.0, elapsed_ms - poll_ms[group]) if prev_poll else 0.0
+                        cycle_t0 = time.perf_counter()
+                        res = self._poll_group(spec, group, late_ms)
                         self._merge_poll_into(accumulated, res)
-                        if res and self._device_parser:
-                            merged: dict[str, Any] = {}
-                            for slave_id in res:
-                                raw = accumulated.get(slave_id, {"coils": {}, "di": {}, "ir": {}, "hr": {}})
-                                updates = self._device_parser(slave_id, raw, spec)
-                                for domain, fields in (updates or {}).items():
-                                    if isinstance(fields, dict):
-                                        merged.setdefault(domain, {}).update(fields)
-                            if merged:
-                                self._apply_update(**merged)
+                        if res:
+                            self._decode_and_apply(spec, accumulated, res, metrics)
+                        if metrics is not None:
+                            metrics.record_cycle(
+                                group,
+                                (time.perf_counter() - cycle_t0) * 1000,
+                                elapsed_ms if prev_poll else None,
+                            )
                     break
 
             self._check_pending_verifies(accumulated)
             self._update_comm_status()
-            self._stop.wait(timeout=0.1)
+            self._stop.wait(timeout=self._idle_wait_s)
 
     def start(self) -> None:
         if self._spec is None:
@@ -628,6 +887,26 @@ class ModbusMaster:
         total_errors = sum(snap.get(sid, {}).get("fail_count", 0) for sid in range(1, 10))
         return {"online_slaves": online, "total_errors": total_errors}
 
+    def set_poll_ms(self, poll_ms: dict[str, int]) -> None:
+        """更新轮询间隔（任意线程可调，主循环下一轮生效）；与当前相同时忽略"""
+        new = dict(poll_ms or {})
+        if new == self._poll_ms:
+            return
+        self._poll_ms = new
+        self._poll_ms_gen += 1
+        logger.info("轮询间隔已更新: %s", new)
+
+    def set_metrics_enabled(self, enabled: bool) -> None:
+        """开启/关闭总线计时统计（诊断页显示时开启，隐藏时关闭；关闭时热路径不计时）。"""
+        self._metrics.set_enabled(enabled)
+
+    def get_metrics(self) -> dict[str, Any]:
+        """
+        返回总线计时摘要：bus_utilization（0~1）、transactions（按 slave+功能码的排队/线上耗时分位数）、
+        decode（按 slave 的解析耗时）、cycle/interval（按轮询组）、write_ack（写入入队→应答）。
+        """
+        return self._metrics.snapshot()
+
     def is_slave_online(self, slave_id: int) -> bool:
         """判断从站是否在线：success_count>0 且 fail_count<阈值。"""
         with self._stats_lock:
@@ -711,14 +990,40 @@ def get_modbus_master() -> ModbusMaster | None:
 # ---------- 工厂 ----------
 
 def create_transport_from_config(config: Any) -> ModbusTransport:
-    """根据 config.modbus 创建 Transport，use_mock 为 True 时返回 MockTransport"""
+    """
+    根据 config.modbus 创建 Transport：replay_path 非空时返回 ReplayTransport，
+    use_mock 为 True 时返回 MockTransport（sim 为 True 时为 SimTransport），否则 RealSerialTransport；
+    capture_path 非空时再包一层 RecordingTransport。
+    """
     m = config.modbus
-    if getattr(m, "use_mock", True):
-        return MockTransport()
-    return RealSerialTransport(
-        port=m.port,
-        baudrate=m.baudrate,
-        parity=m.parity,
-        stopbits=m.stopbits,
-        timeout=m.timeout,
-    )
+    replay_path = getattr(m, "replay_path", "")
+    if replay_path:
+        from app.services.wire_capture import ReplayTransport
+        return ReplayTransport(replay_path, realtime=True, loop=True)
+    transport: ModbusTransport
+    if getattr(m, "use_mock", True) and getattr(m, "sim", False):
+        from app.services.sim_transport import SimTransport
+        transport = SimTransport(
+            latency_ms=getattr(m, "sim_latency_ms", 3.0),
+            baudrate=m.baudrate,
+            speed=getattr(m, "sim_speed", 1.0),
+        )
+    elif getattr(m, "use_mock", True):
+        transport = MockTransport()
+    else:
+        transport = RealSerialTransport(
+            port=m.port,
+            baudrate=m.baudrate,
+            parity=m.parity,
+            stopbits=m.stopbits,
+            timeout=m.timeout,
+        )
+    capture_path = getattr(m, "capture_path", "")
+    if capture_path:
+        from app.services.wire_capture import RecordingTransport
+        transport = RecordingTransport(
+            transport,
+            capture_path,
+            max_bytes=int(getattr(m, "capture_max_mb", 16)) * 1024 * 1024,
+        )
+    return transport
@@ -0,0 +1,343 @@
+"""
+场景执行：声明式目标状态（跨 1/2/3/8 号从站）一次性写出。
+
+- 比对：点位有对应快照字段、所在从站在线且子域不是缓存恢复值时，与当前值相同的写入跳过
+- 分帧：其余写入按阶段分组，阶段内同一从站、同一类型的连续地址合并为一帧（FC15/FC16，单点为 FC05/06）
+- 顺序（PHASES）：先关负载（地址从高到低：先压缩机后空调总使能、先电磁炉后逆变输出）→ 灯光与设定值 →
+  开负载（地址从低到高：先空调总使能后压缩机、先逆变输出后电磁炉）→ 最后脉冲（停止/场景脉冲）；
+  8 号从站的脉冲须急停明确为未按下才发出；离线或在线状态未知的从站的点位不发出
+- 支腿/遮阳棚伸缩（MOTION_POINTS）不能作为场景目标：场景可由单击或自动化触发，
+  而运动须在外部页长按确认并经故障/反向运动互锁
+- 确认：ModbusMaster.apply_batch 在一轮主循环内写完全部帧，按 (从站, 类型) 各一次回读比对；脉冲点不回读
+"""
+
+import logging
+from dataclasses import dataclass, field
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from app.core.state import AppState, Snapshot
+from app.services.modbus_master import BatchResult, WriteFrame, get_modbus_master
+
+logger = logging.getLogger(__name__)
+
+PHASE_SHED = 0
+PHASE_SET = 1
+PHASE_START = 2
+PHASE_MOTION = 3
+
+# 负载类点位：关闭放在最前、开启放在设定值之后
+LOAD_POINTS: frozenset[tuple[int, str]] = frozenset({
+    (1, "AC_ENABLE"),
+    (1, "COMP_ENABLE"),
+    (2, "HEATER_ON"),
+    (2, "HYDRONIC_PUMP_ON"),
+    (8, "FRIDGE_24V_ON"),
+    (8, "INV_AC_OUT_ON"),
+    (8, "PURE_WATER_PUMP_ON"),
+    (8, "HYDRONIC_PUMP_ON"),
+    (8, "MAIN_FUEL_PUMP_ON"),
+    (8, "AUX_FUEL_PUMP_ON"),
+    (8, "COOKTOP_ENABLE_48V"),
+})
+
+_PDU_SLAVE = 8
+
+# 运动脉冲：只允许在外部页长按操作，场景中拒绝（停止脉冲不在此列）
+MOTION_POINTS: frozenset[tuple[int, str]] = frozenset({
+    (_PDU_SLAVE, "LEG_EXTEND"),
+    (_PDU_SLAVE, "LEG_RETRACT"),
+    (_PDU_SLAVE, "AWNING_EXTEND"),
+    (_PDU_SLAVE, "AWNING_RETRACT"),
+})
+
+# (从站, 点位) -> (快照子域, 字段)：用于跳过无变化的写入；未列出的点位总是写出
+STATE_FIELDS: dict[tuple[int, str], tuple[str, str]] = {
+    (1, "AC_ENABLE"): ("hvac", "ac_enable"),
+    (1, "COMP_ENABLE"): ("hvac", "comp_enable"),
+    (1, "MODE"): ("hvac", "mode"),
+    (1, "TARGET_TEMP_x10"): ("hvac", "target_temp_x10"),
+    (1, "EVAP_FAN_LEVEL"): ("hvac", "evap_fan_level"),
+    (1, "COND_FAN_LEVEL"): ("hvac", "cond_fan_level"),
+    (2, "HEATER_ON"): ("webasto", "heater_on"),
+    (2, "HYDRONIC_PUMP_ON"): ("webasto", "hydronic_pump_on"),
+    (2, "TARGET_WATER_TEMP_x10"): ("webasto", "target_water_temp_x10"),
+    (3, "LIGHT_MAIN_CEILING"): ("lighting", "main"),
+    (3, "LIGHT_SIDE_STRIP_ON"): ("lighting", "strip"),
+    (3, "LIGHT_NIGHT"): ("lighting", "night"),
+    (3, "LIGHT_READING"): ("lighting", "reading"),
+    (3, "STRIP_BRIGHTNESS_0_1000"): ("lighting", "strip_brightness"),
+    (8, "EXT_LIGHT_ON"): ("pdu", "ext_light_on"),
+    (8, "FRIDGE_24V_ON"): ("pdu", "fridge_24v_on"),
+    (8, "INV_AC_OUT_ON"): ("pdu", "inv_ac_out_on"),
+}
+
+
+@dataclass(frozen=True)
+class SceneTarget:
+    """目标状态：线圈 value 为 0/1，寄存器为原始单位（x10 点位写 ×10 后的整数）；脉冲点 value 为 1"""
+    slave: int
+    point: str
+    value: int
+
+
+@dataclass(frozen=True)
+class Scene:
+    id: str
+    title: str
+    targets: tuple[SceneTarget, ...]
+
+
+def _t(slave: int, point: str, value: bool | int) -> SceneTarget:
+    return SceneTarget(slave, point, int(value))
+
+
+BUILTIN_SCENES: tuple[Scene, ...] = (
+    Scene("sleep", "睡眠", (
+        _t(3, "LIGHT_MAIN_CEILING", False),
+        _t(3, "LIGHT_READING", False),
+        _t(3, "LIGHT_SIDE_STRIP_ON", False),
+        _t(3, "LIGHT_NIGHT", True),
+        _t(8, "EXT_LIGHT_ON", False),
+    )),
+    Scene("reading", "阅读", (
+        _t(3, "LIGHT_MAIN_CEILING", False),
+        _t(3, "LIGHT_NIGHT", False),
+        _t(3, "LIGHT_READING", True),
+        _t(3, "LIGHT_SIDE_STRIP_ON", True),
+        _t(3, "STRIP_BRIGHTNESS_0_1000", 300),
+    )),
+    Scene("camp", "驻营", (
+        _t(3, "LIGHT_SIDE_STRIP_ON", True),
+        _t(3, "STRIP_BRIGHTNESS_0_1000", 600),
+        _t(8, "EXT_LIGHT_ON", True),
+        _t(8, "FRIDGE_24V_ON", True),
+        _t(8, "PURE_WATER_PUMP_ON", True),
+    )),
+)
+
+
+@dataclass(frozen=True)
+class _Point:
+    kind: str  # coil / holding
+    addr0: int
+    pulse: bool  # rw 仅 W：写 1 后自动清零
+
+
+def build_point_map(spec: dict) -> dict[int, dict[str, _Point]]:
+    """spec 中可写点位：{从站: {名称: _Point}}"""
+    out: dict[int, dict[str, _Point]] = {}
+    for sid, blocks in (spec or {}).items():
+        try:
+            slave = int(sid)
+        except (TypeError, ValueError):
+            continue
+        for block, kind in (("coils", "coil"), ("holding_regs", "holding")):
+            for p in blocks.get(block, []):
+                rw = (p.get("rw") or "").upper()
+                name = (p.get("name") or "").strip()
+                if "W" in rw and name:
+                    out.setdefault(slave, {})[name] = _Point(kind, int(p.get("addr0", 0)), "R" not in rw)
+    return out
+
+
+def parse_scenes(raw: list[dict] | None, points: dict[int, dict[str, _Point]]) -> list[Scene]:
+    """
+    config.automation.scenes -> 场景表（与内置同 id 时覆盖内置）；无效场景记警告并跳过。
+    targets 为 [{slave, point, value}, ...]。
+    """
+    scenes: dict[str, Scene] = {s.id: s for s in BUILTIN_SCENES}
+    for i, d in enumerate(raw or []):
+        try:
+            if not isinstance(d, dict):
+                raise ValueError("场景应为字典")
+            sid = str(d.get("id") or "").strip()
+            if not sid:
+                raise ValueError("缺少 id")
+            targets = []
+            for t in d.get("targets") or []:
+                target = SceneTarget(int(t["slave"]), str(t["point"]).strip(), int(t.get("value", 1)))
+                _check_target(target, points)
+                targets.append(target)
+            if not targets:
+                raise ValueError("targets 为空")
+            scenes[sid] = Scene(sid, str(d.get("title") or sid), tuple(targets))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("场景 #%d 无效，已跳过: %s", i + 1, e)
+    return list(scenes.values())
+
+
+def _check_target(target: SceneTarget, points: dict[int, dict[str, _Point]]) -> None:
+    if (target.slave, target.point) in MOTION_POINTS:
+        raise ValueError(f"{target.point} 为运动点位，须在外部页长按操作，不能用于场景")
+    p = points.get(target.slave, {}).get(target.point)
+    if p is None:
+        raise ValueError(f"从站 {target.slave} 无可写点位 {target.point}")
+    if p.kind == "holding" and not 0 <= target.value <= 0xFFFF:
+        raise ValueError(f"{target.point} 值越界: {target.value}")
+
+
+@dataclass
+class ScenePlan:
+    frames: list[WriteFrame]
+    # 与当前状态相同而跳过 / 因急停、运动互锁或离线未发出的点位（"从站.点位"）
+    skipped: list[str] = field(default_factory=list)
+    blocked: list[str] = field(default_factory=list)
+
+
+def _current(snap: Snapshot, slave: int, point: str) -> int | None:
+    """可比对时返回当前原始值，否则 None"""
+    loc = STATE_FIELDS.get((slave, point))
+    if loc is None:
+        return None
+    domain, attr = loc
+    comm = snap.comm.get(slave)
+    if domain in snap.stale or comm is None or not comm.online:
+        return None
+    v = getattr(getattr(snap, domain), attr, None)
+    return None if v is None else int(v)
+
+
+def plan_scene(scene: Scene, snap: Snapshot, points: dict[int, dict[str, _Point]]) -> ScenePlan:
+    """按快照比对并分阶段合并为写帧（见模块说明）"""
+    plan = ScenePlan([])
+    # (阶段, 从站, 类型, 是否回读) -> {地址: 值}
+    groups: dict[tuple[int, int, str, bool], dict[int, int]] = {}
+    for t in scene.targets:
+        name = f"{t.slave}.{t.point}"
+        p = points.get(t.slave, {}).get(t.point)
+        if p is None or (t.slave, t.point) in MOTION_POINTS:
+            plan.blocked.append(name)
+            continue
+        value = (1 if t.value else 0) if p.kind == "coil" else t.value & 0xFFFF
+        comm = snap.comm.get(t.slave)
+        if comm is None or not comm.online:
+            plan.blocked.append(name)
+            continue
+        if p.pulse:
+            if not value:
+                continue
+            # 急停状态未知（None）或 PDU 为缓存恢复值时同样不发
+            if t.slave == _PDU_SLAVE and (snap.pdu.e_stop is None or snap.pdu.e_stop or "pdu" in snap.stale):
+                plan.blocked.append(name)
+                continue
+            phase = PHASE_MOTION
+        else:
+            if _current(snap, t.slave, t.point) == value:
+                plan.skipped.append(name)
+                continue
+            if (t.slave, t.point) in LOAD_POINTS:
+                phase = PHASE_START if value else PHASE_SHED
+            else:
+                phase = PHASE_SET
+        groups.setdefault((phase, t.slave, p.kind, not p.pulse), {})[p.addr0] = value
+
+    for key in sorted(groups):
+        phase, slave, kind, verify = key
+        values = groups[key]
+        runs: list[WriteFrame] = []
+        for addr in sorted(values):
+            last = runs[-1] if runs else None
+            if last is not None and last.addr0 + len(last.values) == addr:
+                last.values.append(values[addr])
+            else:
+                runs.append(WriteFrame(slave, kind, addr, [values[addr]], verify))
+        if phase == PHASE_SHED:
+            runs.reverse()
+        plan.frames.extend(runs)
+    return plan
+
+
+@dataclass(frozen=True)
+class SceneResult:
+    scene_id: str
+    ok: bool
+    frames: int = 0
+    points: int = 0
+    skipped: tuple[str, ...] = ()
+    blocked: tuple[str, ...] = ()
+    # 回读不符："从站.点位 期望→实际"
+    mismatches: tuple[str, ...] = ()
+    error: str | None = None
+    elapsed_ms: float = 0.0
+
+
+class SceneExecutor(QObject):
+    """
+    apply(scene_id) 在主线程规划并提交到 ModbusMaster；finished(SceneResult) 从 Modbus 线程发出，
+    页面须以 QueuedConnection 连接。
+    """
+
+    finished = pyqtSignal(object)
+
+    def __init__(self, app_state: AppState, spec: dict, raw_scenes: list[dict] | None = None, parent=None):
+        super().__init__(parent)
+        self._app_state = app_state
+        self._points = build_point_map(spec)
+        self._names = {
+            (slave, p.kind, p.addr0): name
+            for slave, pts in self._points.items()
+            for name, p in pts.items()
+        }
+        self._scenes: dict[str, Scene] = {}
+        self.set_scenes(raw_scenes)
+
+    def set_scenes(self, raw_scenes: list[dict] | None) -> None:
+        self._scenes = {s.id: s for s in parse_scenes(raw_scenes, self._points)}
+
+    def scenes(self) -> list[Scene]:
+        return list(self._scenes.values())
+
+    def plan(self, scene_id: str) -> ScenePlan | None:
+        scene = self._scenes.get(scene_id)
+        if scene is None:
+            return None
+        return plan_scene(scene, self._app_state.get_snapshot(), self._points)
+
+    def apply(self, scene_id: str) -> bool:
+        """提交场景；未知场景返回 False。无需写入或主站未就绪时直接发出 finished"""
+        plan = self.plan(scene_id)
+        if plan is None:
+            logger.warning("未知场景: %s", scene_id)
+            return False
+        skipped, blocked = tuple(plan.skipped), tuple(plan.blocked)
+        master = get_modbus_master()
+        if not plan.frames or master is None:
+            error = None if master is not None else "no_master"
+            self.finished.emit(SceneResult(scene_id, error is None, skipped=skipped, blocked=blocked, error=error))
+            return True
+        logger.info(
+            "场景 %s: %d 帧 / %d 点，跳过 %d，未发出 %d",
+            scene_id, len(plan.frames), sum(len(f.values) for f in plan.frames), len(skipped), len(blocked),
+        )
+
+        def _done(r: BatchResult) -> None:
+            mismatches = tuple(
+                f"{slave}.{self._names.get((slave, kind, addr0), addr0)} {expected}→{actual}"
+                for slave, kind, addr0, expected, actual in r.mismatches
+            )
+            result = SceneResult(
+                scene_id, r.ok, r.frames_sent, r.points, skipped, blocked, mismatches, r.error, r.elapsed_ms,
+            )
+            if not r.ok:
+                logger.warning("场景 %s 未完全生效: %s %s", scene_id, r.error or "", ", ".join(mismatches))
+            self.finished.emit(result)
+
+        master.apply_batch(plan.frames, _done)
+        return True
+
+
+# ---------- 全局实例 ----------
+
+_scene_executor: SceneExecutor | None = None
+
+
+def register_scene_executor(executor: SceneExecutor | None) -> None:
+    """启动时注册，供灯光页、自动化等获取"""
+    global _scene_executor
+    _scene_executor = executor
+
+
+def get_scene_executor() -> SceneExecutor | None:
+    """获取已注册的场景执行器，未启动时返回 None"""
+    return _scene_executor
@@ -0,0 +1,462 @@
+"""
+仿真 Transport：按 spec 分配数组寄存器文件，模拟每个从站的应答延迟与串口波特率帧时间，
+并由可插拔物理模型驱动数值变化（电池 SOC、舱温、CO、支腿电机电流），支持按时间表注入故障。
+用于高负载/长时间浸泡测试；接口与 MockTransport 一致（set_* / inject_failure），可直接复用 Mock 预填。
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from array import array
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.services.modbus_master import ModbusTransport, TransportError, load_spec
+
+logger = logging.getLogger(__name__)
+
+# spec block -> 寄存器文件键（与 MockTransport 一致）
+_BLOCK_KEYS = {
+    "coils": "coils",
+    "discrete_inputs": "di",
+    "holding_regs": "hr",
+    "input_regs": "ir",
+}
+
+# RTU 每字符位数（1 起始 + 8 数据 + 校验/停止 共 11 位按最坏计）
+_BITS_PER_CHAR = 11
+# 请求帧长度（slave + fc + addr + count + crc）
+_REQ_BYTES = 8
+# 模型最小步长（仿真秒），避免每次读都重算
+_MIN_STEP_S = 0.05
+
+
+def _u16(value: int) -> int:
+    return int(value) & 0xFFFF
+
+
+def expand_spec(spec: dict[str, Any], n_slaves: int) -> dict[str, Any]:
+    """
+    返回扩展到 n_slaves 个从站的 spec：1..len(spec) 保持原样，其余按原从站循环复制布局。
+    用于浸泡测试超过 9 个从站的总线负载（多出的从站无解析器，只占总线时间）。
+    """
+    base_ids = sorted(spec.keys(), key=lambda k: int(k))
+    out = {k: spec[k] for k in base_ids}
+    for i in range(len(base_ids) + 1, max(n_slaves, len(base_ids)) + 1):
+        out[str(i)] = spec[base_ids[(i - 1) % len(base_ids)]]
+    return out
+
+
+# ---------- 寄存器文件 ----------
+
+class SimRegisters:
+    """
+    数组寄存器文件：每个从站 4 个定长数组（位用 array('B')，寄存器用 array('H')），按 spec 最大地址分配。
+    get/set 按点位名访问，S16 点位按补码换算；供模型使用。
+    """
+
+    def __init__(self, spec: dict[str, Any]):
+        self.files: dict[int, dict[str, array]] = {}
+        self._names: dict[int, dict[str, tuple[str, int, bool]]] = {}
+        for sid, slave_spec in spec.items():
+            slave = int(sid)
+            blocks: dict[str, array] = {}
+            names: dict[str, tuple[str, int, bool]] = {}
+            for block, key in _BLOCK_KEYS.items():
+                points = slave_spec.get(block, []) or []
+                size = max((int(p.get("addr0", 0)) for p in points), default=-1) + 1
+                blocks[key] = array("B" if key in ("coils", "di") else "H", bytes(size * (1 if key in ("coils", "di") else 2)))
+                for p in points:
+                    name = (p.get("name") or "").strip()
+                    if name:
+                        signed = (p.get("dtype") or "").strip().upper() == "S16"
+                        names[name] = (key, int(p.get("addr0", 0)), signed)
+            self.files[slave] = blocks
+            self._names[slave] = names
+
+    def addr_of(self, slave: int, name: str) -> tuple[str, int] | None:
+        """点位名 -> (寄存器文件键, addr0)；spec 中无此点位返回 None"""
+        t = self._names.get(slave, {}).get(name)
+        return (t[0], t[1]) if t else None
+
+    def get(self, slave: int, name: str, default: int = 0) -> int:
+        t = self._names.get(slave, {}).get(name)
+        if t is None:
+            return default
+        key, addr0, signed = t
+        v = self.files[slave][key][addr0]
+        if signed and v >= 0x8000:
+            v -= 0x10000
+        return v
+
+    def set(self, slave: int, name: str, value: float | int) -> None:
+        t = self._names.get(slave, {}).get(name)
+        if t is None:
+            return
+        key, addr0, _ = t
+        if key in ("coils", "di"):
+            self.files[slave][key][addr0] = 1 if value else 0
+        else:
+            self.files[slave][key][addr0] = _u16(int(round(value)))
+
+    def ensure(self, slave: int, key: str, addr0: int) -> array:
+        """set_* 写入 spec 外地址时按需扩容（与 MockTransport 的字典语义一致）"""
+        blocks = self.files.setdefault(slave, {k: array("B" if k in ("coils", "di") else "H") for k in _BLOCK_KEYS.values()})
+        arr = blocks[key]
+        if addr0 >= len(arr):
+            arr.extend([0] * (addr0 + 1 - len(arr)))
+        return arr
+
+
+# ---------- 模型 ----------
+
+class SimModel:
+    """
+    仿真模型基类：step 按仿真时间推进，on_write 响应主站写入（脉冲线圈等）。
+    噪声一律取自 self.rng（SimTransport 注入其私有随机源，seed 可复现，不影响全局 random）
+    """
+
+    rng: random.Random = random.Random()
+
+    def step(self, regs: SimRegisters, dt_s: float, t_s: float) -> None:
+        pass
+
+    def on_write(self, regs: SimRegisters, slave: int, key: str, addr0: int, value: int) -> None:
+        pass
+
+
+class BatteryModel(SimModel):
+    """Slave04：按负载/充电功率积分 SOC，电压随 SOC 与电流变化；BATT_P_W 正为充电、负为放电"""
+
+    def __init__(self, capacity_wh: float = 4800.0, base_load_w: float = 120.0,
+                 hvac_load_w: float = 650.0, charge_w: float = 900.0):
+        self.capacity_wh = capacity_wh
+        self.base_load_w = base_load_w
+        self.hvac_load_w = hvac_load_w
+        self.charge_w = charge_w
+        self._soc: float | None = None
+
+    def step(self, regs: SimRegisters, dt_s: float, t_s: float) -> None:
+        if self._soc is None:
+            self._soc = regs.get(4, "SOC_x10", 850) / 10.0 or 85.0
+        load = self.base_load_w + regs.get(4, "INV_AC_P_W")
+        if regs.get(1, "COMP_RUNNING"):
+            load += self.hvac_load_w
+        if regs.get(8, "FRIDGE_FB"):
+            load += 60.0
+        charge = self.charge_w if regs.get(4, "CHARGE_SRC") else 0.0
+        p = charge - load + self.rng.uniform(-10.0, 10.0)
+        self._soc = max(0.0, min(100.0, self._soc + p * dt_s / 3600.0 / self.capacity_wh * 100.0))
+        v = 46.0 + 8.0 * self._soc / 100.0
+        i = p / v
+        v += i * 0.02  # 内阻压降/抬升
+        regs.set(4, "SOC_x10", self._soc * 10)
+        regs.set(4, "BATT_P_W", p)
+        regs.set(4, "BATT_I_x100", i * 100)
+        regs.set(4, "BATT_V_x100", v * 100)
+
+
+class CabinThermalModel(SimModel):
+    """舱温一阶模型：向舱外温度漂移；HVAC 制冷（MODE 1/3）拉向目标温度，Webasto 加热抬升"""
+
+    def __init__(self, outside_c: float = 30.0, leak_tau_s: float = 1800.0,
+                 cool_c_per_s: float = 0.01, heat_c_per_s: float = 0.008):
+        self.outside_c = outside_c
+        self.leak_tau_s = leak_tau_s
+        self.cool_c_per_s = cool_c_per_s
+        self.heat_c_per_s = heat_c_per_s
+        self._temp: float | None = None
+
+    def step(self, regs: SimRegisters, dt_s: float, t_s: float) -> None:
+        if self._temp is None:
+            self._temp = regs.get(1, "CABIN_TEMP_x10", 235) / 10.0
+        outside = self.outside_c + 3.0 * math.sin(t_s / 3600.0)
+        self._temp += (outside - self._temp) * min(1.0, dt_s / self.leak_tau_s)
+        mode = regs.get(1, "MODE")
+        target = regs.get(1, "TARGET_TEMP_x10", 240) / 10.0
+        cooling = mode in (1, 3) and self._temp > target + 0.3
+        if cooling:
+            self._temp -= self.cool_c_per_s * dt_s
+        if regs.get(2, "HEATER_ON"):
+            self._temp += self.heat_c_per_s * dt_s
+        regs.set(1, "COMP_RUNNING", cooling)
+        regs.set(1, "COMP_PWM_ACT_x10", 800 if cooling else 0)
+        regs.set(1, "CABIN_TEMP_x10", self._temp * 10)
+        regs.set(6, "CABIN_TEMP_x10", self._temp * 10 + self.rng.uniform(-2, 2))
+        regs.set(9, "OUT_TEMP_x10", outside * 10)
+
+
+class GasModel(SimModel):
+    """Slave07：灶具 48V 供电时 CO 线性上升，关闭后指数回落到本底"""
+
+    def __init__(self, base_ppm: float = 5.0, ramp_ppm_per_s: float = 1.5,
+                 max_ppm: float = 400.0, decay_tau_s: float = 120.0):
+        self.base_ppm = base_ppm
+        self.ramp_ppm_per_s = ramp_ppm_per_s
+        self.max_ppm = max_ppm
+        self.decay_tau_s = decay_tau_s
+        self._co: float | None = None
+
+    def step(self, regs: SimRegisters, dt_s: float, t_s: float) -> None:
+        if self._co is None:
+            self._co = float(regs.get(7, "CO_PPM")) or self.base_ppm
+        if regs.get(8, "COOKTOP_ENABLE_48V"):
+            self._co = min(self.max_ppm, self._co + self.ramp_ppm_per_s * dt_s)
+        else:
+            self._co += (self.base_ppm - self._co) * min(1.0, dt_s / self.decay_tau_s)
+        regs.set(7, "CO_PPM", self._co)
+
+
+class LegMotorModel(SimModel):
+    """Slave08 支腿：LEG_EXTEND/RETRACT 脉冲启动行程，行程中电机电流带启动冲击与噪声，到位置限位并回 Idle"""
+
+    STATE_IDLE, STATE_LEG_EXT, STATE_LEG_RET = 0, 1, 2
+
+    def __init__(self, travel_s: float = 12.0, run_current_a: float = 9.0, inrush_a: float = 22.0):
+        self.travel_s = travel_s
+        self.run_current_a = run_current_a
+        self.inrush_a = inrush_a
+        self._dir = 0
+        self._elapsed = 0.0
+
+    def on_write(self, regs: SimRegisters, slave: int, key: str, addr0: int, value: int) -> None:
+        if slave != 8 or key != "coils" or not value:
+            return
+        name = next(
+            (n for n in ("LEG_EXTEND", "LEG_RETRACT", "LEG_STOP") if regs.addr_of(8, n) == ("coils", addr0)),
+            None,
+        )
+        if name is None:
+            return
+        # 脉冲线圈：写入即动作，回读为 0
+        regs.files[8]["coils"][addr0] = 0
+        if name == "LEG_STOP":
+            self._dir = 0
+        elif not regs.get(8, "E_STOP"):
+            self._dir = 1 if name == "LEG_EXTEND" else -1
+            self._elapsed = 0.0
+            regs.set(8, "LEG_UP_LIMIT", 0)
+            regs.set(8, "LEG_DOWN_LIMIT", 0)
+
+    def step(self, regs: SimRegisters, dt_s: float, t_s: float) -> None:
+        if self._dir == 0 or regs.get(8, "E_STOP"):
+            self._dir = 0
+            regs.set(8, "LEG_MOTOR_I_x100", 0)
+            if regs.get(8, "STATE") in (self.STATE_LEG_EXT, self.STATE_LEG_RET):
+                regs.set(8, "STATE", self.STATE_IDLE)
+            return
+        self._elapsed += dt_s
+        if self._elapsed >= self.travel_s:
+            regs.set(8, "LEG_DOWN_LIMIT" if self._dir > 0 else "LEG_UP_LIMIT", 1)
+            self._dir = 0
+            regs.set(8, "LEG_MOTOR_I_x100", 0)
+            regs.set(8, "STATE", self.STATE_IDLE)
+            return
+        inrush = self.inrush_a * math.exp(-self._elapsed / 0.4)
+        current = self.run_current_a + inrush + self.rng.uniform(-0.5, 0.5)
+        if self._dir > 0:
+            current += 2.0 * self._elapsed / self.travel_s  # 伸出末段承重
+        regs.set(8, "LEG_MOTOR_I_x100", current * 100)
+        regs.set(8, "STATE", self.STATE_LEG_EXT if self._dir > 0 else self.STATE_LEG_RET)
+
+
+def default_models() -> list[SimModel]:
+    return [BatteryModel(), CabinThermalModel(), GasModel(), LegMotorModel()]
+
+
+# ---------- 故障时间表 ----------
+
+@dataclass
+class SimFault:
+    """
+    故障事件：仿真时间 at_s 起生效，duration_s 后恢复（0 表示不恢复）。
+    point 为空时该从站整站掉线；否则把点位强制为 value（如 FAULT_CODE、E_STOP）。
+    """
+    at_s: float
+    slave: int
+    duration_s: float = 0.0
+    point: str | None = None
+    value: int = 1
+    _active: bool = field(default=False, init=False, repr=False)
+    _done: bool = field(default=False, init=False, repr=False)
+    _prev: int = field(default=0, init=False, repr=False)
+
+
+# ---------- SimTransport ----------
+
+class SimTransport(ModbusTransport):
+    """
+    仿真传输：
+    - latency_ms：从站处理延迟（全局默认或 {slave: ms}），baudrate 决定帧传输时间；总线独占，事务串行。
+    - bus_time_scale：总线延迟倍率（0 关闭延迟，用于纯吞吐测试）。
+    - speed：模型仿真时间倍速（60 表示 1 秒墙钟推进 1 分钟）。
+    """
+
+    def __init__(
+        self,
+        spec: dict[str, Any] | None = None,
+        latency_ms: float | dict[int, float] = 3.0,
+        baudrate: int = 19200,
+        bus_time_scale: float = 1.0,
+        speed: float = 1.0,
+        models: list[SimModel] | None = None,
+        faults: list[SimFault] | None = None,
+        seed: int | None = None,
+    ):
+        if spec is None:
+            spec = load_spec() or {}
+        self.regs = SimRegisters(spec)
+        if isinstance(latency_ms, dict):
+            self._latency_ms = dict(latency_ms)
+            self._default_latency_ms = 3.0
+        else:
+            self._latency_ms = {}
+            self._default_latency_ms = float(latency_ms)
+        self._char_s = _BITS_PER_CHAR / max(1, int(baudrate))
+        self._bus_time_scale = max(0.0, float(bus_time_scale))
+        self._speed = max(0.0, float(speed))
+        self._rng = random.Random(seed)
+        self._models = list(models) if models is not None else default_models()
+        for m in self._models:
+            m.rng = self._rng
+        self._faults = list(faults or [])
+        self._fail_slaves: set[int] = set()
+        self._lock = threading.RLock()
+        self._bus_lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._sim_t = 0.0
+        self._last_wall = self._t0
+
+    # ----- 仿真推进 -----
+
+    def _advance_locked(self) -> None:
+        now = time.monotonic()
+        dt = (now - self._last_wall) * self._speed
+        if dt < _MIN_STEP_S:
+            return
+        self._last_wall = now
+        self._sim_t += dt
+        for f in self._faults:
+            if not f._active and not f._done and self._sim_t >= f.at_s:
+                f._active = True
+                if f.point is None:
+                    self._fail_slaves.add(f.slave)
+                else:
+                    f._prev = self.regs.get(f.slave, f.point)
+                    self.regs.set(f.slave, f.point, f.value)
+                logger.info("SimTransport 故障生效: slave=%s point=%s t=%.1fs", f.slave, f.point, self._sim_t)
+            elif f._active and f.duration_s > 0 and self._sim_t >= f.at_s + f.duration_s:
+                f._active = False
+                f._done = True
+                if f.point is None:
+                    self._fail_slaves.discard(f.slave)
+                else:
+                    self.regs.set(f.slave, f.point, f._prev)
+                logger.info("SimTransport 故障恢复: slave=%s point=%s", f.slave, f.point)
+        for m in self._models:
+            m.step(self.regs, dt, self._sim_t)
+        for f in self._faults:
+            if f._active and f.point is not None:
+                self.regs.set(f.slave, f.point, f.value)
+
+    def _bus_wait(self, slave: int, resp_bytes: int) -> None:
+        if self._bus_time_scale <= 0:
+            return
+        frame_s = (_REQ_BYTES + resp_bytes + 7) * self._char_s  # 含前后 3.5 字符帧间隔
+        delay = (self._latency_ms.get(slave, self._default_latency_ms) / 1000.0 + frame_s) * self._bus_time_scale
+        time.sleep(delay)
+
+    def _transact(self, slave: int, key: str, addr0: int, count: int, resp_bytes: int) -> list[int]:
+        with self._bus_lock:
+            self._bus_wait(slave, resp_bytes)
+            with self._lock:
+                self._advance_locked()
+                if slave in self._fail_slaves:
+                    raise TransportError(f"SimTransport: slave {slave} offline")
+                arr = self.regs.files.get(slave, {}).get(key)
+                if arr is None:
+                    raise TransportError(f"SimTransport: slave {slave} 不存在")
+                end = addr0 + count
+                if end <= len(arr):
+                    return arr[addr0:end].tolist()
+                return [arr[a] if a < len(arr) else 0 for a in range(addr0, end)]
+
+    # ----- ModbusTransport -----
+
+    def read_coils(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._transact(slave, "coils", addr0, count, 5 + (count + 7) // 8)
+
+    def read_discrete_inputs(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._transact(slave, "di", addr0, count, 5 + (count + 7) // 8)
+
+    def read_input_registers(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._transact(slave, "ir", addr0, count, 5 + 2 * count)
+
+    def read_holding_registers(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._transact(slave, "hr", addr0, count, 5 + 2 * count)
+
+    def _write(self, slave: int, key: str, addr0: int, values: list[int], req_bytes: int = _REQ_BYTES) -> None:
+        """一帧写入连续 values（单点写为长度 1）；整帧占用一次总线时间"""
+        with self._bus_lock:
+            # _bus_wait 已计入 8 字节（此处为写应答），另一方向传请求帧长；多点写请求含字节数与数据
+            self._bus_wait(slave, req_bytes)
+            with self._lock:
+                self._advance_locked()
+                if slave in self._fail_slaves:
+                    raise TransportError(f"SimTransport: slave {slave} offline")
+                arr = self.regs.ensure(slave, key, addr0 + len(values) - 1)
+                for i, v in enumerate(values):
+                    arr[addr0 + i] = v
+                for i, v in enumerate(values):
+                    for m in self._models:
+                        m.on_write(self.regs, slave, key, addr0 + i, v)
+
+    def write_coil(self, slave: int, addr0: int, value: bool | int) -> None:
+        self._write(slave, "coils", addr0, [1 if value else 0])
+
+    def write_holding_register(self, slave: int, addr0: int, value: int) -> None:
+        self._write(slave, "hr", addr0, [_u16(value)])
+
+    def write_coils(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._write(slave, "coils", addr0, [1 if v else 0 for v in values], 9 + (len(values) + 7) // 8)
+
+    def write_holding_registers(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._write(slave, "hr", addr0, [_u16(v) for v in values], 9 + 2 * len(values))
+
+    def close(self) -> None:
+        pass
+
+    # ----- 与 MockTransport 一致的测试接口 -----
+
+    def inject_failure(self, slave: int) -> None:
+        self._fail_slaves.add(slave)
+
+    def clear_failure(self, slave: int) -> None:
+        self._fail_slaves.discard(slave)
+
+    def add_fault(self, fault: SimFault) -> None:
+        """追加故障事件；at_s 为仿真时间（可用 sim_time_s 取当前值后加偏移）"""
+        with self._lock:
+            self._faults.append(fault)
+
+    @property
+    def sim_time_s(self) -> float:
+        return self._sim_t
+
+    def set_input_register(self, slave: int, addr0: int, value: int) -> None:
+        with self._lock:
+            self.regs.ensure(slave, "ir", addr0)[addr0] = _u16(value)
+
+    def set_discrete_input(self, slave: int, addr0: int, value: bool | int) -> None:
+        with self._lock:
+            self.regs.ensure(slave, "di", addr0)[addr0] = 1 if value else 0
+
+    def set_coil(self, slave: int, addr0: int, value: bool | int) -> None:
+        with self._lock:
+            self.regs.ensure(slave, "coils", addr0)[addr0] = 1 if value else 0
+
+    def set_holding_register(self, slave: int, addr0: int, value: int) -> None:
+        with self._lock:
+            self.regs.ensure(slave, "hr", addr0)[addr0] = _u16(value)
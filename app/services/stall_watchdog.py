@@ -0,0 +1,218 @@
+"""
+主线程卡顿看门狗：后台线程定期向 Qt 事件循环投递 ping（队列信号），主线程处理后回 pong。
+ping 超过 THRESHOLDS_MS 各级仍未得到响应时，抓取主线程 Python 调用栈（sys._current_frames），
+事件结束后把耗时、达到的级别与调用栈记入环形缓冲；≥ LOG_THRESHOLD_MS 的卡顿即时写 WARNING 日志，
+卡顿点汇总（按最内层应用代码帧归并）供诊断页展示并定期写日志。
+卡顿从 ping 投递时刻起算，记录的耗时是下限（比实际开始时刻最多晚 PING_INTERVAL_S）。
+"""
+
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+# 卡顿分级阈值（ms），跨过每一级时重新抓栈（保留最后一次，即最接近卡顿末尾的位置）
+THRESHOLDS_MS = (50, 200, 1000)
+# 立即写 WARNING 日志的卡顿阈值（ms）
+LOG_THRESHOLD_MS = 200
+# 两次 ping 之间的间隔（秒）
+PING_INTERVAL_S = 0.1
+# 环形缓冲容量（最近 N 次卡顿）
+RING_SIZE = 128
+# 调用栈保留的最内层帧数
+STACK_DEPTH = 12
+# 卡顿汇总写日志的最小间隔（秒），期间无新卡顿则不写
+SUMMARY_INTERVAL_S = 600.0
+
+_ROOT = Path(__file__).resolve().parent.parent.parent
+_APP_DIR = str(_ROOT / "app")
+
+
+@dataclass(frozen=True)
+class StallEvent:
+    """一次主线程卡顿"""
+    ts: float  # 开始时刻（time.time()）
+    duration_ms: float  # ping 投递到主线程处理的总耗时
+    level_ms: int  # 达到的最高阈值
+    site: str  # 卡顿点：最内层应用代码帧 "path:line func"
+    stack: tuple[str, ...]  # 抓栈时主线程最内层 STACK_DEPTH 帧（外层在前）
+
+
+def _frame_label(fs: traceback.FrameSummary) -> str:
+    path = fs.filename
+    try:
+        path = str(Path(path).resolve().relative_to(_ROOT))
+    except ValueError:
+        pass
+    return f"{path}:{fs.lineno} {fs.name}"
+
+
+def _capture_stack(thread_id: int) -> tuple[str, tuple[str, ...]]:
+    """抓取指定线程当前调用栈，返回 (卡顿点, 帧列表)"""
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return "?", ()
+    summaries = traceback.extract_stack(frame)[-STACK_DEPTH:]
+    site_fs = next((fs for fs in reversed(summaries) if fs.filename.startswith(_APP_DIR)), None)
+    site = _frame_label(site_fs or summaries[-1]) if summaries else "?"
+    return site, tuple(_frame_label(fs) for fs in summaries)
+
+
+class StallWatchdog(QObject):
+    """须在主线程创建；start() 启动看门狗线程，stop() 停止并写出汇总"""
+
+    _ping = pyqtSignal(int)
+
+    def __init__(self, thresholds_ms: tuple[int, ...] = THRESHOLDS_MS, parent=None):
+        super().__init__(parent)
+        self._thresholds = tuple(sorted(thresholds_ms))
+        self._main_ident = threading.main_thread().ident
+        self._pong_seq = 0
+        self._pong_ts = 0.0
+        self._pong = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._events: collections.deque[StallEvent] = collections.deque(maxlen=RING_SIZE)
+        # 累计（不受环形缓冲容量限制）：各级次数；卡顿点 -> [次数, 总耗时, 最长耗时]
+        self._level_counts: dict[int, int] = {t: 0 for t in self._thresholds}
+        self._sites: dict[str, list[float]] = {}
+        self._pings = 0
+        self._last_summary = time.monotonic()
+        self._new_since_summary = 0
+        self._thread: threading.Thread | None = None
+        self._ping.connect(self._on_ping, Qt.ConnectionType.QueuedConnection)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="StallWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._pong.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        if self._level_counts.get(self._thresholds[0]):
+            self.log_summary()
+
+    def _on_ping(self, seq: int) -> None:
+        """主线程：回 pong"""
+        self._pong_ts = time.monotonic()
+        self._pong_seq = seq
+        self._pong.set()
+
+    def _run(self) -> None:
+        seq = 0
+        thresholds_s = [t / 1000.0 for t in self._thresholds]
+        while not self._stop.is_set():
+            seq += 1
+            self._pong.clear()
+            sent = time.monotonic()
+            start_ts = time.time()
+            self._ping.emit(seq)
+            level = 0
+            site, stack = "", ()
+            while self._pong_seq < seq and not self._stop.is_set():
+                elapsed = time.monotonic() - sent
+                while level < len(thresholds_s) and elapsed >= thresholds_s[level]:
+                    level += 1
+                    site, stack = _capture_stack(self._main_ident)
+                timeout = thresholds_s[level] - elapsed if level < len(thresholds_s) else 0.5
+                self._pong.wait(max(0.001, timeout))
+                self._pong.clear()
+            if self._stop.is_set():
+                break
+            self._pings += 1
+            if level:
+                self._record(StallEvent(
+                    ts=start_ts,
+                    duration_ms=(self._pong_ts - sent) * 1000,
+                    level_ms=self._thresholds[level - 1],
+                    site=site,
+                    stack=stack,
+                ))
+            if self._new_since_summary and time.monotonic() - self._last_summary >= SUMMARY_INTERVAL_S:
+                self.log_summary()
+            self._stop.wait(PING_INTERVAL_S)
+
+    def _record(self, ev: StallEvent) -> None:
+        with self._lock:
+            self._events.append(ev)
+            for t in self._thresholds:
+                if t <= ev.level_ms:
+                    self._level_counts[t] += 1
+            s = self._sites.setdefault(ev.site, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += ev.duration_ms
+            s[2] = max(s[2], ev.duration_ms)
+            self._new_since_summary += 1
+        if ev.level_ms >= LOG_THRESHOLD_MS:
+            logger.warning(
+                "主线程卡顿 %.0fms（≥%dms）于 %s\n  %s",
+                ev.duration_ms, ev.level_ms, ev.site, "\n  ".join(ev.stack),
+            )
+
+    # ---------- 查询 ----------
+
+    def recent(self, limit: int = 20) -> list[StallEvent]:
+        """最近的卡顿（新的在前）"""
+        with self._lock:
+            return list(self._events)[-limit:][::-1]
+
+    def top_sites(self, n: int = 5) -> list[dict[str, Any]]:
+        """按累计卡顿耗时排序的卡顿点"""
+        with self._lock:
+            items = [(site, int(c), total, mx) for site, (c, total, mx) in self._sites.items()]
+        items.sort(key=lambda x: x[2], reverse=True)
+        return [
+            {"site": site, "count": c, "total_ms": round(total, 1), "max_ms": round(mx, 1)}
+            for site, c, total, mx in items[:n]
+        ]
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._level_counts)
+            longest = max((e.duration_ms for e in self._events), default=None)
+        return {"pings": self._pings, "counts": counts, "longest_ms": longest}
+
+    def log_summary(self) -> None:
+        """把卡顿分级次数与前几个卡顿点写入日志"""
+        stats = self.get_stats()
+        sites = self.top_sites()
+        with self._lock:
+            self._new_since_summary = 0
+        self._last_summary = time.monotonic()
+        lines = [f"  {s['site']}: {s['count']} 次，累计 {s['total_ms']:.0f}ms，最长 {s['max_ms']:.0f}ms" for s in sites]
+        logger.info(
+            "主线程卡顿汇总（ping %d 次）: %s\n%s",
+            stats["pings"],
+            "，".join(f"≥{t}ms {c} 次" for t, c in stats["counts"].items()),
+            "\n".join(lines) or "  无",
+        )
+
+
+# ---------- 全局实例（供诊断页查询）----------
+
+_stall_watchdog: StallWatchdog | None = None
+
+
+def register_stall_watchdog(watchdog: StallWatchdog | None) -> None:
+    """启动时注册，供诊断页等获取"""
+    global _stall_watchdog
+    _stall_watchdog = watchdog
+
+
+def get_stall_watchdog() -> StallWatchdog | None:
+    """获取已注册的看门狗，未启用时返回 None"""
+    return _stall_watchdog
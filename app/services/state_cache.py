@@ -0,0 +1,157 @@
+"""
+状态缓存（warm start）：周期把 AppState 各子域的最近值写入紧凑二进制文件，启动时在窗口显示前恢复。
+
+- 格式：MAGIC + marshal({"v": 版本, "domains": {域: (保存时刻, {字段: 值})}})；仅含基本类型，
+  不执行代码，Python 版本变化导致无法解析时直接忽略缓存
+- 保存：state.changed 只置脏标记，定时器按 interval_s 检查；编码在主线程（纯字典，微秒级），
+  原子写盘（临时文件 + fsync + rename）在后台线程，SD 卡慢写不阻塞 UI
+- 恢复：超过 MAX_AGE_S 的子域丢弃；恢复值标记 stale，页面淡显直到该域收到实时数据。
+  faults 为各从站合并的一个子域：首个实时故障更新到达时，其余从站的恢复值被删除（见 AppState.update）
+- comm（在线状态）只反映实时链路，不缓存
+"""
+
+import logging
+import marshal
+import threading
+import time
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any
+
+from PyQt6.QtCore import QObject, QTimer
+
+from app.core.atomic_io import atomic_write_bytes
+from app.core.state import AppState, Snapshot
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ZSC1"
+FORMAT_VERSION = 1
+# 缓存子域最长有效期（秒），更旧的值不再恢复
+MAX_AGE_S = 24 * 3600.0
+CACHED_DOMAINS = ("power", "hvac", "webasto", "lighting", "pdu", "env", "gas", "auxfuel", "faults")
+
+
+def _domain_values(snap: Snapshot, domain: str) -> dict[str, Any]:
+    obj = getattr(snap, domain)
+    if is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    return dict(obj)
+
+
+def encode_state(domains: dict[str, tuple[float, dict[str, Any]]]) -> bytes:
+    return MAGIC + marshal.dumps({"v": FORMAT_VERSION, "domains": domains})
+
+
+def decode_state(data: bytes) -> dict[str, tuple[float, dict[str, Any]]]:
+    """解析缓存文件内容；格式不符抛 ValueError"""
+    if not data.startswith(MAGIC):
+        raise ValueError("状态缓存文件头不符")
+    payload = marshal.loads(data[len(MAGIC):])
+    if not isinstance(payload, dict) or payload.get("v") != FORMAT_VERSION:
+        raise ValueError("状态缓存版本不符")
+    domains = payload.get("domains")
+    if not isinstance(domains, dict):
+        raise ValueError("状态缓存内容无效")
+    return domains
+
+
+class StateCache(QObject):
+    """AppState 的周期快照缓存。restore() 在窗口创建前调用，start() 后开始周期保存，close() 退出前最后保存一次。"""
+
+    def __init__(self, app_state: AppState, path: str | Path, interval_s: float = 10.0, parent=None):
+        super().__init__(parent)
+        self._app_state = app_state
+        self._path = Path(path)
+        self._dirty = False
+        # 各子域上次保存/恢复时刻：仍为 stale 的子域沿用原时刻，不因重写缓存而“变新”
+        self._domain_ts: dict[str, float] = {}
+        self._pending: bytes | None = None
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run_writer, name="StateCache", daemon=True)
+        self._timer = QTimer(self)
+        self._timer.setInterval(int(max(1.0, interval_s) * 1000))
+        self._timer.timeout.connect(self._save_if_dirty)
+
+    def restore(self) -> bool:
+        """读取缓存并恢复到 AppState（值标记 stale），返回是否恢复了任何子域"""
+        try:
+            domains = decode_state(self._path.read_bytes())
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("状态缓存无法读取，忽略 %s: %s", self._path, e)
+            return False
+        now = time.time()
+        fresh: dict[str, dict[str, Any]] = {}
+        for domain, item in domains.items():
+            try:
+                ts, values = item
+            except (TypeError, ValueError):
+                continue
+            if domain in CACHED_DOMAINS and isinstance(values, dict) and now - ts <= MAX_AGE_S:
+                fresh[domain] = values
+                self._domain_ts[domain] = ts
+        if not fresh:
+            return False
+        self._app_state.restore(fresh)
+        return True
+
+    def start(self) -> None:
+        self._app_state.changed.connect(self._on_state_changed)
+        self._thread.start()
+        self._timer.start()
+
+    def close(self) -> None:
+        """停止定时器，保存最后一份并等待写线程结束"""
+        self._timer.stop()
+        self._save_if_dirty()
+        self._stopped = True
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(5.0)
+
+    def _on_state_changed(self, snap: Snapshot) -> None:
+        if len(snap.stale) < len(CACHED_DOMAINS):
+            self._dirty = True
+
+    def _save_if_dirty(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        snap = self._app_state.get_snapshot()
+        now = time.time()
+        domains: dict[str, tuple[float, dict[str, Any]]] = {}
+        for domain in CACHED_DOMAINS:
+            if domain in snap.stale:
+                ts = self._domain_ts.get(domain)
+                if ts is None:
+                    continue
+            else:
+                ts = now
+                self._domain_ts[domain] = ts
+            domains[domain] = (ts, _domain_values(snap, domain))
+        try:
+            data = encode_state(domains)
+        except ValueError as e:
+            logger.warning("状态缓存编码失败: %s", e)
+            return
+        with self._pending_lock:
+            self._pending = data
+        self._wake.set()
+
+    def _run_writer(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._pending_lock:
+                data, self._pending = self._pending, None
+            if data is not None:
+                try:
+                    atomic_write_bytes(self._path, data)
+                except OSError as e:
+                    logger.warning("状态缓存写入失败 %s: %s", self._path, e)
+            if self._stopped:
+                return
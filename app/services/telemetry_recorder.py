@@ -0,0 +1,539 @@
+"""
+遥测记录器：把实时数据长期保存到数据目录（保修分析用），按列分块、差分编码并压缩后追加写入段文件。
+
+- 分层：1s（每秒平均，每块 CHUNK_ROWS["1s"] 行）与 1min（每分钟平均，由 1s 汇总），各层独立目录
+- 块格式：帧头 b"TL" + 编码(1B) + 长度 + CRC32 + 压缩体；压缩体内为 JSON 块头（子域/字段/行数）+ 各列字节，
+  列为相邻值差分的 zigzag varint（0 表示缺失），时间列为毫秒
+- 段文件：<层>/<起始秒>.seg 只追加，旁路 .idx 为定长索引项（时间范围、子域、偏移、长度）；
+  新建段/索引文件与配额删除后 fsync 层目录（目录项落盘）；先写段、fsync，再写索引、fsync；启动时按 CRC 校验段尾，截掉掉电写了一半的帧并补齐索引。
+  掉电最多丢失内存中尚未写出的当前块
+- 写入预算：每天写入字节超过 write_budget_mb_per_day 时暂停 1s 层（1min 层照写），次日恢复；
+  攒块后整批写出，每批每层段与索引各一次 write + fsync，控制 SD 卡写放大
+- 保留：总占用超过 quota_mb 时先删 1s 层最旧的段，再删 1min 层
+- 调用线程（AppState.sampled）只做按秒累加；编码、压缩、写盘、清理都在后台写线程
+"""
+
+import json
+import logging
+import lzma
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core.atomic_io import fsync_dir
+from app.services.timeseries import DOMAIN_TYPES, numeric_fields
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+FRAME_MAGIC = b"TL"
+# 帧头：MAGIC(2) + 编码(1) + 压缩体长度(4) + CRC32(4)
+_FRAME_HEAD = struct.Struct("<2scII")
+# 索引项：t0_ms, t1_ms, 偏移, 帧长, 子域名（定长）
+_INDEX_ENTRY = struct.Struct("<qqQI16s")
+
+TIERS = ("1s", "1min")
+TIER_PERIOD_S = {"1s": 1.0, "1min": 60.0}
+# 每块行数：1s 层 5 分钟一块，1min 层 1 小时一块
+CHUNK_ROWS = {"1s": 300, "1min": 60}
+# 段文件达到此大小后新开一段（也是保留清理的粒度）
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+
+_CODECS = {
+    "zlib": (b"z", lambda b: zlib.compress(b, 6), zlib.decompress),
+    "lzma": (b"x", lzma.compress, lzma.decompress),
+}
+_DECOMPRESS = {tag: dec for tag, _, dec in _CODECS.values()}
+
+_STOP = object()
+
+
+# ---------- 列编码 ----------
+
+def _put_varint(out: bytearray, u: int) -> None:
+    while u >= 0x80:
+        out.append((u & 0x7F) | 0x80)
+        u >>= 7
+    out.append(u)
+
+
+def encode_column(values: list[int | None]) -> bytes:
+    """相邻非缺失值差分 -> zigzag + 1 -> varint；缺失写 0"""
+    out = bytearray()
+    prev = 0
+    for v in values:
+        if v is None:
+            out.append(0)
+            continue
+        d = v - prev
+        prev = v
+        _put_varint(out, (d * 2 if d >= 0 else -d * 2 - 1) + 1)
+    return bytes(out)
+
+
+def decode_column(data: bytes, n: int) -> list[int | None]:
+    out: list[int | None] = []
+    prev = 0
+    pos = 0
+    for _ in range(n):
+        u = 0
+        shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            u |= (b & 0x7F) << shift
+            if b < 0x80:
+                break
+            shift += 7
+        if u == 0:
+            out.append(None)
+            continue
+        u -= 1
+        prev += (u >> 1) if not (u & 1) else -((u + 1) >> 1)
+        out.append(prev)
+    return out
+
+
+@dataclass
+class Chunk:
+    """一块：某层某子域连续若干行（时间为毫秒）"""
+    tier: str
+    domain: str
+    fields: tuple[str, ...]
+    ts_ms: list[int]
+    columns: dict[str, list[int | None]]
+
+
+def encode_chunk(chunk: Chunk, codec: str = "zlib") -> bytes:
+    """编码为一帧（含帧头与 CRC）"""
+    tag, compress, _ = _CODECS[codec]
+    header = json.dumps(
+        {"v": FORMAT_VERSION, "tier": chunk.tier, "domain": chunk.domain, "fields": list(chunk.fields), "n": len(chunk.ts_ms)},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    parts = [struct.pack("<H", len(header)), header]
+    for col in (chunk.ts_ms, *(chunk.columns[f] for f in chunk.fields)):
+        data = encode_column(col)
+        parts.append(struct.pack("<I", len(data)))
+        parts.append(data)
+    body = compress(b"".join(parts))
+    return _FRAME_HEAD.pack(FRAME_MAGIC, tag, len(body), zlib.crc32(body)) + body
+
+
+def decode_frame(frame: bytes) -> Chunk:
+    """解析一帧；帧头或 CRC 不符抛 ValueError"""
+    if len(frame) < _FRAME_HEAD.size:
+        raise ValueError("帧不完整")
+    magic, tag, length, crc = _FRAME_HEAD.unpack_from(frame)
+    body = frame[_FRAME_HEAD.size:_FRAME_HEAD.size + length]
+    if magic != FRAME_MAGIC or len(body) != length or zlib.crc32(body) != crc or tag not in _DECOMPRESS:
+        raise ValueError("帧头或校验不符")
+    raw = _DECOMPRESS[tag](body)
+    (hlen,) = struct.unpack_from("<H", raw)
+    header = json.loads(raw[2:2 + hlen].decode("utf-8"))
+    if header.get("v") != FORMAT_VERSION:
+        raise ValueError("块版本不符")
+    n = int(header["n"])
+    pos = 2 + hlen
+    cols: list[list[int | None]] = []
+    for _ in range(1 + len(header["fields"])):
+        (clen,) = struct.unpack_from("<I", raw, pos)
+        pos += 4
+        cols.append(decode_column(raw[pos:pos + clen], n))
+        pos += clen
+    fields_ = tuple(header["fields"])
+    return Chunk(
+        tier=header["tier"],
+        domain=header["domain"],
+        fields=fields_,
+        ts_ms=[int(t or 0) for t in cols[0]],
+        columns=dict(zip(fields_, cols[1:])),
+    )
+
+
+# ---------- 段文件 ----------
+
+@dataclass(frozen=True)
+class IndexEntry:
+    t0_ms: int
+    t1_ms: int
+    offset: int
+    length: int
+    domain: str
+
+
+def read_index(idx_path: Path) -> list[IndexEntry]:
+    """读取完整的索引项（末尾不完整的项忽略）"""
+    try:
+        data = idx_path.read_bytes()
+    except OSError:
+        return []
+    n = len(data) // _INDEX_ENTRY.size
+    out = []
+    for i in range(n):
+        t0, t1, off, length, dom = _INDEX_ENTRY.unpack_from(data, i * _INDEX_ENTRY.size)
+        out.append(IndexEntry(t0, t1, off, length, dom.rstrip(b"\0").decode("utf-8", "replace")))
+    return out
+
+
+def _index_bytes(t0_ms: int, t1_ms: int, offset: int, length: int, domain: str) -> bytes:
+    return _INDEX_ENTRY.pack(t0_ms, t1_ms, offset, length, domain.encode("utf-8")[:16])
+
+
+def _append_fsync(path: Path, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def recover_segment(seg_path: Path) -> int:
+    """
+    校验段文件与索引一致：截掉索引末尾的残缺项与越界项，扫描最后一个索引项之后的帧，
+    CRC 通过的补写索引，遇到残缺帧截断段文件。返回恢复后的段大小。
+    """
+    idx_path = seg_path.with_suffix(".idx")
+    size = seg_path.stat().st_size
+    entries = [e for e in read_index(idx_path) if e.offset + e.length <= size]
+    with open(idx_path, "wb") as f:
+        f.write(b"".join(_index_bytes(e.t0_ms, e.t1_ms, e.offset, e.length, e.domain) for e in entries))
+    pos = max((e.offset + e.length for e in entries), default=0)
+    if pos >= size:
+        return size
+    data = seg_path.read_bytes()[pos:]
+    extra = []
+    off = 0
+    while off + _FRAME_HEAD.size <= len(data):
+        _, _, length, _ = _FRAME_HEAD.unpack_from(data, off)
+        frame = data[off:off + _FRAME_HEAD.size + length]
+        try:
+            chunk = decode_frame(frame)
+        except Exception:
+            break
+        if chunk.ts_ms:
+            extra.append(_index_bytes(chunk.ts_ms[0], chunk.ts_ms[-1], pos + off, len(frame), chunk.domain))
+        off += len(frame)
+    if extra:
+        _append_fsync(idx_path, b"".join(extra))
+    if pos + off < size:
+        logger.warning("遥测段 %s 尾部 %d 字节不完整，已截断", seg_path.name, size - pos - off)
+        with open(seg_path, "r+b") as f:
+            f.truncate(pos + off)
+    return pos + off
+
+
+# ---------- 记录器 ----------
+
+class _Accum:
+    """按周期累加的平均桶"""
+
+    __slots__ = ("key", "sums", "counts")
+
+    def __init__(self, key: int):
+        self.key = key
+        self.sums: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, row: dict[str, float]) -> None:
+        for name, v in row.items():
+            self.sums[name] = self.sums.get(name, 0.0) + v
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def averages(self) -> dict[str, float]:
+        return {name: self.sums[name] / c for name, c in self.counts.items()}
+
+
+class _DomainBuffer:
+    """一个子域各层的当前桶与未写出的块"""
+
+    def __init__(self, domain: str, names: tuple[str, ...]):
+        self.domain = domain
+        self.names = names
+        self.accum: dict[str, _Accum | None] = {t: None for t in TIERS}
+        self.rows: dict[str, tuple[list[int], dict[str, list[int | None]]]] = {t: self._empty() for t in TIERS}
+        self.last_ts = 0.0
+
+    def _empty(self) -> tuple[list[int], dict[str, list[int | None]]]:
+        return [], {n: [] for n in self.names}
+
+    def take(self, tier: str) -> Chunk | None:
+        ts, cols = self.rows[tier]
+        if not ts:
+            return None
+        self.rows[tier] = self._empty()
+        return Chunk(tier=tier, domain=self.domain, fields=self.names, ts_ms=ts, columns=cols)
+
+
+class TelemetryRecorder:
+    """add_batch 接 AppState.sampled；close() 写出未满的块并停止写线程"""
+
+    def __init__(
+        self,
+        root: str | Path,
+        quota_mb: int = 2048,
+        write_budget_mb_per_day: int = 64,
+        codec: str = "zlib",
+    ):
+        self._root = Path(root)
+        self._quota = max(1, quota_mb) * 1024 * 1024
+        self._budget = max(1, write_budget_mb_per_day) * 1024 * 1024
+        self._codec = codec if codec in _CODECS else "zlib"
+        self._lock = threading.Lock()
+        self._buffers = {d: _DomainBuffer(d, numeric_fields(cls)) for d, cls in DOMAIN_TYPES.items()}
+        self._queue: queue.Queue = queue.Queue()
+        self._day = ""
+        self._day_bytes = 0
+        self._budget_dropped = 0
+        self._bytes_written = 0
+        self._chunks_written = 0
+        # 写线程内初始化：各层当前段 [路径, 大小]、目录总占用
+        self._open: dict[str, list] = {}
+        self._usage = 0
+        self._thread = threading.Thread(target=self._run_writer, name="TelemetryRecorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    # ---------- 采样（调用线程） ----------
+
+    def add_batch(self, ts: float, samples: dict[str, dict[str, Any]]) -> None:
+        ready: list[Chunk] = []
+        with self._lock:
+            for domain, values in samples.items():
+                buf = self._buffers.get(domain)
+                if buf is None:
+                    continue
+                row = {}
+                for name in buf.names:
+                    v = values.get(name)
+                    if isinstance(v, (int, float)):
+                        row[name] = float(v)
+                if row:
+                    self._feed(buf, "1s", max(ts, buf.last_ts), row, ready)
+                    buf.last_ts = max(ts, buf.last_ts)
+        if ready:
+            self._queue.put(ready)
+
+    def _feed(self, buf: _DomainBuffer, tier: str, ts: float, row: dict[str, float], ready: list[Chunk]) -> None:
+        key = int(ts // TIER_PERIOD_S[tier])
+        acc = buf.accum[tier]
+        if acc is not None and acc.key != key:
+            self._close_bucket(buf, tier, acc, ready)
+            acc = None
+        if acc is None:
+            acc = buf.accum[tier] = _Accum(key)
+        acc.add(row)
+
+    def _close_bucket(self, buf: _DomainBuffer, tier: str, acc: _Accum, ready: list[Chunk]) -> None:
+        buf.accum[tier] = None
+        avg = acc.averages()
+        bucket_ts = acc.key * TIER_PERIOD_S[tier]
+        ts_list, cols = buf.rows[tier]
+        ts_list.append(int(bucket_ts * 1000))
+        for name in buf.names:
+            v = avg.get(name)
+            cols[name].append(None if v is None else int(round(v)))
+        if len(ts_list) >= CHUNK_ROWS[tier]:
+            chunk = buf.take(tier)
+            if chunk is not None:
+                ready.append(chunk)
+        if tier == "1s":
+            self._feed(buf, "1min", bucket_ts, avg, ready)
+
+    # ---------- 写线程 ----------
+
+    def _run_writer(self) -> None:
+        try:
+            for tier in TIERS:
+                (self._root / tier).mkdir(parents=True, exist_ok=True)
+            fsync_dir(self._root)
+            self._open = {tier: self._open_segment(tier) for tier in TIERS}
+            self._usage = self._scan_usage()
+        except OSError as e:
+            logger.error("遥测记录目录不可用 %s: %s", self._root, e)
+            return
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            try:
+                self._write_chunks(item)
+                self._enforce_quota()
+            except Exception as e:
+                logger.warning("遥测写入失败: %s", e)
+
+    def _open_segment(self, tier: str) -> list:
+        """返回 [段路径, 当前大小]；最新段未满则继续追加（先做掉电恢复）"""
+        segs = sorted((self._root / tier).glob("*.seg"), key=lambda p: int(p.stem) if p.stem.isdigit() else 0)
+        if segs:
+            size = recover_segment(segs[-1])
+            if size < SEGMENT_MAX_BYTES:
+                return [segs[-1], size]
+        return self._new_segment(tier)
+
+    def _new_segment(self, tier: str) -> list:
+        path = self._root / tier / f"{int(time.time())}.seg"
+        n = 0
+        while path.exists():
+            n += 1
+            path = self._root / tier / f"{int(time.time()) + n}.seg"
+        path.touch()
+        path.with_suffix(".idx").touch()
+        # 目录项落盘：否则掉电后新段连同其中已 fsync 的帧可能整体丢失
+        fsync_dir(path.parent)
+        return [path, 0]
+
+    def _scan_usage(self) -> int:
+        return sum(p.stat().st_size for tier in TIERS for p in (self._root / tier).iterdir() if p.is_file())
+
+    def _write_chunks(self, chunks: list[Chunk]) -> None:
+        day = time.strftime("%Y-%m-%d")
+        if day != self._day:
+            if self._budget_dropped:
+                logger.warning("遥测 %s 超出写入预算，丢弃 1s 层 %d 块", self._day, self._budget_dropped)
+            self._day, self._day_bytes, self._budget_dropped = day, 0, 0
+        for tier in TIERS:
+            frames = [(c, encode_chunk(c, self._codec)) for c in chunks if c.tier == tier and c.ts_ms]
+            if not frames:
+                continue
+            total = sum(len(f) for _, f in frames)
+            if tier == "1s" and self._day_bytes + total > self._budget:
+                if not self._budget_dropped:
+                    logger.warning("遥测今日写入已达预算 %d MB，暂停 1s 层", self._budget // (1024 * 1024))
+                self._budget_dropped += len(frames)
+                continue
+            seg = self._open[tier]
+            if seg[1] and seg[1] + total > SEGMENT_MAX_BYTES:
+                seg = self._open[tier] = self._new_segment(tier)
+            offset = seg[1]
+            index = bytearray()
+            for c, f in frames:
+                index += _index_bytes(c.ts_ms[0], c.ts_ms[-1], offset, len(f), c.domain)
+                offset += len(f)
+            # 段先落盘，再写索引：掉电时索引只会落后于段，启动时可补齐
+            _append_fsync(seg[0], b"".join(f for _, f in frames))
+            _append_fsync(seg[0].with_suffix(".idx"), bytes(index))
+            written = total + len(index)
+            seg[1] = offset
+            self._day_bytes += written
+            self._usage += written
+            self._bytes_written += written
+            self._chunks_written += len(frames)
+
+    def _enforce_quota(self) -> None:
+        if self._usage <= self._quota:
+            return
+        open_segs = {seg[0] for seg in self._open.values()}
+        for tier in TIERS:
+            segs = sorted((self._root / tier).glob("*.seg"), key=lambda p: int(p.stem) if p.stem.isdigit() else 0)
+            removed = False
+            for seg in segs:
+                if self._usage <= self._quota:
+                    break
+                if seg in open_segs:
+                    continue
+                for p in (seg, seg.with_suffix(".idx")):
+                    try:
+                        size = p.stat().st_size
+                        p.unlink()
+                        self._usage -= size
+                        removed = True
+                    except OSError:
+                        pass
+                logger.info("遥测超出配额，删除旧段 %s/%s", tier, seg.name)
+            if removed:
+                fsync_dir(self._root / tier)
+            if self._usage <= self._quota:
+                return
+
+    def flush(self, close_buckets: bool = False) -> None:
+        """把未满的块交给写线程；close_buckets 时先结束当前平均桶（退出前调用，不丢最后一秒/一分钟）"""
+        ready: list[Chunk] = []
+        with self._lock:
+            for buf in self._buffers.values():
+                if close_buckets:
+                    for tier in TIERS:
+                        acc = buf.accum[tier]
+                        if acc is not None:
+                            self._close_bucket(buf, tier, acc, ready)
+                ready.extend(c for t in TIERS if (c := buf.take(t)) is not None)
+        if ready:
+            self._queue.put(ready)
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(close_buckets=True)
+        self._queue.put(_STOP)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # ---------- 查询 ----------
+
+    def query(self, key: str, t0: float, t1: float, tier: str = "1s") -> list[tuple[float, int]]:
+        """
+        读取 "子域.字段" 在 [t0, t1] 内已落盘的 (时间, 值)，按时间升序；读文件解压，勿在 UI 线程查询长时间段。
+        未知字段抛 KeyError。
+        """
+        domain, _, name = key.partition(".")
+        buf = self._buffers.get(domain)
+        if buf is None or name not in buf.names or tier not in TIERS:
+            raise KeyError(key)
+        t0_ms, t1_ms = int(t0 * 1000), int(t1 * 1000)
+        out: list[tuple[float, int]] = []
+        for seg in sorted((self._root / tier).glob("*.seg"), key=lambda p: int(p.stem) if p.stem.isdigit() else 0):
+            entries = [
+                e for e in read_index(seg.with_suffix(".idx"))
+                if e.domain == domain and e.t1_ms >= t0_ms and e.t0_ms <= t1_ms
+            ]
+            if not entries:
+                continue
+            try:
+                with open(seg, "rb") as f:
+                    for e in entries:
+                        f.seek(e.offset)
+                        chunk = decode_frame(f.read(e.length))
+                        col = chunk.columns.get(name)
+                        if col is None:
+                            continue
+                        out.extend(
+                            (t / 1000.0, v) for t, v in zip(chunk.ts_ms, col)
+                            if v is not None and t0_ms <= t <= t1_ms
+                        )
+            except (OSError, ValueError) as e:
+                logger.warning("读取遥测段 %s 失败: %s", seg.name, e)
+        out.sort(key=lambda p: p[0])
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "root": str(self._root),
+            "usage_bytes": self._usage,
+            "quota_bytes": self._quota,
+            "bytes_written": self._bytes_written,
+            "chunks_written": self._chunks_written,
+            "today_bytes": self._day_bytes,
+            "budget_dropped": self._budget_dropped,
+        }
+
+
+# ---------- 全局实例 ----------
+
+_telemetry_recorder: TelemetryRecorder | None = None
+
+
+def register_telemetry_recorder(recorder: TelemetryRecorder | None) -> None:
+    """启动时注册，供诊断/上传等获取"""
+    global _telemetry_recorder
+    _telemetry_recorder = recorder
+
+
+def get_telemetry_recorder() -> TelemetryRecorder | None:
+    """获取已注册的遥测记录器，未启用时返回 None"""
+    return _telemetry_recorder
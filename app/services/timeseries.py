@@ -0,0 +1,376 @@
+"""
+时序存储：AppState.update 中的实时数据按子域写入预分配的环形数组（array 模块），内存固定、可预估。
+
+- 三级分辨率：raw 原始样本（同一子域相邻样本至少间隔 RAW_MIN_INTERVAL_S）保留 10 分钟；
+  每秒平均保留 6 小时；每分钟平均保留 7 天
+- 同一子域各字段共用一条时间戳数组（每批样本只存一次时间戳）；raw 层整数存储，缺失记 MISSING，
+  平均层 float32，缺失记 NaN；bool 字段按 0/1 记录，平均值即占空比
+- 查询按时间二分定位，只拷贝请求时间窗内的数据；全部数值字段合计约 10MB
+- 写入方为 AppState.sampled 的发出线程，查询方为 UI 线程，锁内只做数组读写
+"""
+
+import bisect
+import math
+import threading
+import time
+import typing
+from array import array
+from dataclasses import dataclass, fields
+from typing import Any, Iterator
+
+from app.services.downsample import BucketStat, buckets, lttb
+from app.core.state import (
+    AuxFuelState,
+    EnvState,
+    GasState,
+    HvacState,
+    LightingState,
+    PduState,
+    PowerState,
+    WebastoState,
+)
+
+# raw 层缺失值
+MISSING = -(2 ** 31)
+
+RAW_WINDOW_S = 600.0
+RAW_MIN_INTERVAL_S = 0.2
+SEC_WINDOW_S = 6 * 3600.0
+MIN_WINDOW_S = 7 * 24 * 3600.0
+
+# 分辨率名 -> (桶长秒数，0 表示原始样本；容量)
+RESOLUTIONS: dict[str, tuple[float, int]] = {
+    "raw": (0.0, int(RAW_WINDOW_S / RAW_MIN_INTERVAL_S)),
+    "1s": (1.0, int(SEC_WINDOW_S)),
+    "1min": (60.0, int(MIN_WINDOW_S / 60)),
+}
+
+DOMAIN_TYPES: dict[str, type] = {
+    "power": PowerState,
+    "hvac": HvacState,
+    "webasto": WebastoState,
+    "lighting": LightingState,
+    "pdu": PduState,
+    "env": EnvState,
+    "gas": GasState,
+    "auxfuel": AuxFuelState,
+}
+
+
+def numeric_fields(cls: type) -> tuple[str, ...]:
+    """dataclass 中类型为 int / bool（可为 None）的字段"""
+    out = []
+    for f in fields(cls):
+        args = typing.get_args(f.type) or (f.type,)
+        if int in args or bool in args:
+            out.append(f.name)
+    return tuple(out)
+
+
+def resolution_for_window(window_s: float) -> str:
+    """能完整覆盖 window_s 的最细分辨率"""
+    if window_s <= RAW_WINDOW_S:
+        return "raw"
+    if window_s <= SEC_WINDOW_S:
+        return "1s"
+    return "1min"
+
+
+@dataclass(frozen=True)
+class Series:
+    """一次查询结果：ts 与 values 等长，按时间升序；raw 层缺失为 MISSING，平均层缺失为 NaN"""
+    key: str
+    resolution: str
+    ts: array
+    values: array
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def points(self) -> Iterator[tuple[float, float]]:
+        """跳过缺失值的 (时间, 值)"""
+        raw = self.resolution == "raw"
+        for t, v in zip(self.ts, self.values):
+            if raw:
+                if v != MISSING:
+                    yield t, v
+            elif not math.isnan(v):
+                yield t, v
+
+
+class _TsView:
+    """按逻辑下标（0 为最旧）访问环形时间戳，供 bisect 使用，不拷贝"""
+
+    __slots__ = ("_ring",)
+
+    def __init__(self, ring: "_Ring"):
+        self._ring = ring
+
+    def __len__(self) -> int:
+        return self._ring.size
+
+    def __getitem__(self, j: int) -> float:
+        r = self._ring
+        return r.ts[(r.head - r.size + j) % r.capacity]
+
+
+class _Ring:
+    """一个子域在一种分辨率下的环形缓冲：ts 与各字段数组下标一一对应，head 为下一个写入位置"""
+
+    __slots__ = ("capacity", "ts", "values", "fill", "head", "size")
+
+    def __init__(self, capacity: int, names: tuple[str, ...], typecode: str, fill: int | float):
+        self.capacity = capacity
+        self.fill = fill
+        self.ts = array("d", bytes(8 * capacity))
+        self.values = {name: array(typecode, [fill]) * capacity for name in names}
+        self.head = 0
+        self.size = 0
+
+    def append(self, ts: float, row: dict[str, int | float]) -> None:
+        i = self.head
+        self.ts[i] = ts
+        fill = self.fill
+        for name, arr in self.values.items():
+            arr[i] = row.get(name, fill)
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def last_ts(self) -> float | None:
+        return self.ts[(self.head - 1) % self.capacity] if self.size else None
+
+    def window(self, t0: float, t1: float) -> tuple[int, int]:
+        view = _TsView(self)
+        return bisect.bisect_left(view, t0), bisect.bisect_right(view, t1)
+
+    def _slice(self, arr: array, j0: int, j1: int) -> array:
+        n = j1 - j0
+        if n <= 0:
+            return arr[:0]
+        p0 = (self.head - self.size + j0) % self.capacity
+        if p0 + n <= self.capacity:
+            return arr[p0:p0 + n]
+        return arr[p0:] + arr[:p0 + n - self.capacity]
+
+    def read(self, name: str, j0: int, j1: int) -> tuple[array, array]:
+        return self._slice(self.ts, j0, j1), self._slice(self.values[name], j0, j1)
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.ts, *self.values.values()))
+
+
+class _Bucket:
+    """平均层的当前桶：各字段累加和与样本数"""
+
+    __slots__ = ("key", "sums", "counts")
+
+    def __init__(self, key: int):
+        self.key = key
+        self.sums: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, row: dict[str, int | float]) -> None:
+        for name, v in row.items():
+            if v != v:  # NaN
+                continue
+            self.sums[name] = self.sums.get(name, 0.0) + v
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def averages(self) -> dict[str, float]:
+        return {name: self.sums[name] / c for name, c in self.counts.items()}
+
+
+class _DomainSeries:
+    """一个子域的三级环形缓冲与聚合桶"""
+
+    def __init__(self, names: tuple[str, ...]):
+        self.names = names
+        raw_cap = RESOLUTIONS["raw"][1]
+        self.rings: dict[str, _Ring] = {"raw": _Ring(raw_cap, names, "i", MISSING)}
+        for res in ("1s", "1min"):
+            self.rings[res] = _Ring(RESOLUTIONS[res][1], names, "f", math.nan)
+        self._buckets: dict[str, _Bucket | None] = {"1s": None, "1min": None}
+        self._last_ts = 0.0
+
+    def add(self, ts: float, values: dict[str, Any]) -> None:
+        # 时钟回拨时沿用上一时间戳，保持各层时间单调
+        if ts < self._last_ts:
+            ts = self._last_ts
+        row: dict[str, int] = {}
+        for name in self.names:
+            v = values.get(name)
+            if v is None or isinstance(v, (tuple, list, str)):
+                continue
+            try:
+                iv = int(round(v))
+            except (TypeError, ValueError, OverflowError):
+                continue
+            if MISSING < iv < 2 ** 31:
+                row[name] = iv
+        if not row:
+            return
+        raw = self.rings["raw"]
+        last_raw = raw.last_ts()
+        if last_raw is None or ts - last_raw >= RAW_MIN_INTERVAL_S:
+            raw.append(ts, row)
+        self._last_ts = ts
+        self._feed("1s", ts, row)
+
+    def _feed(self, res: str, ts: float, row: dict[str, int | float]) -> None:
+        period = RESOLUTIONS[res][0]
+        key = int(ts // period)
+        bucket = self._buckets[res]
+        if bucket is not None and bucket.key != key:
+            self._close(res, bucket)
+            bucket = None
+        if bucket is None:
+            bucket = self._buckets[res] = _Bucket(key)
+        bucket.add(row)
+
+    def _close(self, res: str, bucket: _Bucket) -> None:
+        period = RESOLUTIONS[res][0]
+        avg = bucket.averages()
+        self.rings[res].append(bucket.key * period, avg)
+        self._buckets[res] = None
+        if res == "1s":
+            self._feed("1min", bucket.key * period, avg)
+
+    def roll(self, now: float) -> None:
+        """关闭已结束的桶（子域停止更新时，最后一个桶在查询时落入平均层）"""
+        for res in ("1s", "1min"):
+            bucket = self._buckets[res]
+            if bucket is not None and (bucket.key + 1) * RESOLUTIONS[res][0] <= now:
+                self._close(res, bucket)
+
+
+class TimeSeriesStore:
+    """全部子域数值字段的时序存储；add_batch 接 AppState.sampled，query 供 UI 查询趋势"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._domains = {d: _DomainSeries(numeric_fields(cls)) for d, cls in DOMAIN_TYPES.items()}
+
+    def add_batch(self, ts: float, samples: dict[str, dict[str, Any]]) -> None:
+        with self._lock:
+            for domain, values in samples.items():
+                series = self._domains.get(domain)
+                if series is not None:
+                    series.add(ts, values)
+
+    def keys(self) -> list[str]:
+        """可查询的字段键 "子域.字段"""
+        return [f"{d}.{name}" for d, s in self._domains.items() for name in s.names]
+
+    def _lookup(self, key: str) -> tuple[_DomainSeries, str]:
+        domain, _, name = key.partition(".")
+        series = self._domains.get(domain)
+        if series is None or name not in series.names:
+            raise KeyError(key)
+        return series, name
+
+    def query(
+        self,
+        key: str,
+        window_s: float,
+        now: float | None = None,
+        resolution: str | None = None,
+    ) -> Series:
+        """最近 window_s 秒的数据；resolution 为空时取能覆盖窗口的最细分辨率。未知字段抛 KeyError"""
+        series, name = self._lookup(key)
+        res = resolution or resolution_for_window(window_s)
+        if res not in RESOLUTIONS:
+            raise ValueError(f"未知分辨率: {res}")
+        now = time.time() if now is None else now
+        with self._lock:
+            series.roll(now)
+            ring = series.rings[res]
+            j0, j1 = ring.window(now - window_s, now)
+            ts, values = ring.read(name, j0, j1)
+        return Series(key=key, resolution=res, ts=ts, values=values)
+
+    def _read_range(
+        self, key: str, t0: float, t1: float, now: float | None, resolution: str | None
+    ) -> tuple[str, list[float], list[float]]:
+        """[t0, t1] 内剔除缺失值后的 (分辨率, 时间, 值)"""
+        series, name = self._lookup(key)
+        now = time.time() if now is None else now
+        res = resolution or resolution_for_window(now - t0)
+        if res not in RESOLUTIONS:
+            raise ValueError(f"未知分辨率: {res}")
+        with self._lock:
+            series.roll(now)
+            ring = series.rings[res]
+            j0, j1 = ring.window(t0, t1)
+            ts, values = ring.read(name, j0, j1)
+        if res == "raw":
+            pairs = [(t, v) for t, v in zip(ts, values) if v != MISSING]
+        else:
+            pairs = [(t, v) for t, v in zip(ts, values) if v == v]
+        return res, [p[0] for p in pairs], [p[1] for p in pairs]
+
+    def query_range(
+        self,
+        key: str,
+        t0: float,
+        t1: float,
+        max_points: int,
+        now: float | None = None,
+        resolution: str | None = None,
+    ) -> Series:
+        """
+        [t0, t1] 内的数据，剔除缺失值后用 LTTB 降到不超过 max_points 点（值为 float）。
+        resolution 为空时取仍保留 t0 时刻数据的最细分辨率。
+        """
+        res, xs, ys = self._read_range(key, t0, t1, now, resolution)
+        xs, ys = lttb(xs, ys, max_points)
+        return Series(key=key, resolution=res, ts=array("d", xs), values=array("d", ys))
+
+    def query_buckets(
+        self,
+        key: str,
+        t0: float,
+        t1: float,
+        n: int,
+        now: float | None = None,
+        resolution: str | None = None,
+    ) -> list[BucketStat]:
+        """[t0, t1) 等分 n 桶的 min/max/avg（空桶省略）"""
+        _, xs, ys = self._read_range(key, t0, t1, now, resolution)
+        return buckets(xs, ys, t0, t1, n)
+
+    def latest(self, key: str) -> tuple[float, int] | None:
+        """raw 层最近一个非缺失值 (时间, 值)"""
+        series, name = self._lookup(key)
+        with self._lock:
+            ring = series.rings["raw"]
+            arr = ring.values[name]
+            for j in range(ring.size - 1, -1, -1):
+                p = (ring.head - ring.size + j) % ring.capacity
+                if arr[p] != MISSING:
+                    return ring.ts[p], arr[p]
+        return None
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "fields": sum(len(s.names) for s in self._domains.values()),
+                "bytes": sum(r.nbytes() for s in self._domains.values() for r in s.rings.values()),
+                "samples": {res: sum(s.rings[res].size for s in self._domains.values()) for res in RESOLUTIONS},
+            }
+
+
+# ---------- 全局实例 ----------
+
+_timeseries_store: TimeSeriesStore | None = None
+
+
+def register_timeseries_store(store: TimeSeriesStore | None) -> None:
+    """启动时注册，供页面查询趋势"""
+    global _timeseries_store
+    _timeseries_store = store
+
+
+def get_timeseries_store() -> TimeSeriesStore | None:
+    """获取已注册的时序存储，未启用时返回 None"""
+    return _timeseries_store
@@ -0,0 +1,486 @@
+"""
+遥测上行（先存后传）：把实时采样与告警变迁打包为压缩、带序号的分块，先落盘排队，联网时按序上传到
+backend 的批量接收接口 POST {url}/telemetry/<车辆>/streams/<流>/chunks/<序号>。
+
+- 采样：add_batch 接 AppState.sampled，只记各字段最新值；每 sample_interval_s 出一行，只含相对上一行变化的字段。
+  每块第一行为全量关键帧，单块可独立解析，中间块丢失（超配额删除、被拒）不影响后续块
+- 事件：record 接 AppState.alarm_transitions，逐条记录
+- 分块：每 chunk_interval_s（或行数/事件数达上限）封一块：JSON（字段表 + 行 + 事件）经 zlib 压缩，
+  原子写入 <root>/queue/<序号>.chunk；流 id 与下一序号持久化在 <root>/state.json。
+  流 id 首次启动随机生成，数据目录清空后换新流，不会与服务端已有序号冲突
+- 上传：后台线程按序号升序逐块 POST，带 X-Chunk-Sha256；服务端按 (车辆, 流, 序号) 幂等，
+  应答丢失后重传同一块返回 duplicate，不会重复入库。成功后删除本地文件；网络错误/5xx 按指数退避重试，
+  离线期间分块留在磁盘。每次（重新）联网先取服务端游标（已收到的最大序号），跳过已确认的分块
+- 拒收：400/409/413/422 为内容问题，重试无用，移入 <root>/rejected/（保留最近 REJECTED_KEEP 个）后继续下一块
+- 配额：队列超过 max_queue_mb 时删除最旧的分块
+- 调用线程只做字典更新与追加；压缩、写盘、HTTP 都在后台线程
+"""
+
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from pathlib import Path
+from typing import Any
+
+from app.core.atomic_io import atomic_write_bytes, atomic_write_text
+from app.services.timeseries import DOMAIN_TYPES, numeric_fields
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# 单块上限：行数、事件数（先到先封）
+MAX_ROWS_PER_CHUNK = 720
+MAX_EVENTS_PER_CHUNK = 500
+# 失败重试的退避（秒）：BACKOFF_MIN_S 起翻倍，封顶 BACKOFF_MAX_S
+BACKOFF_MIN_S = 5.0
+BACKOFF_MAX_S = 300.0
+# 重试无用的应答码：分块移入 rejected/
+REJECT_STATUSES = frozenset({400, 409, 413, 422})
+REJECTED_KEEP = 20
+CHUNK_SUFFIX = ".chunk"
+
+
+def chunk_name(seq: int) -> str:
+    return f"{seq:012d}{CHUNK_SUFFIX}"
+
+
+def encode_chunk(
+    vehicle_id: str,
+    stream_id: str,
+    seq: int,
+    rows: list[tuple[float, dict[str, float]]],
+    events: list[dict],
+) -> bytes:
+    """
+    分块编码：{"v", "vehicle", "stream", "seq", "t0", "t1", "keys", "rows": [[ts, [[键序号, 值], ...]], ...], "events"}，
+    JSON 紧凑序列化后 zlib 压缩。字段名只在 keys 中出现一次
+    """
+    keys: dict[str, int] = {}
+    out_rows = []
+    for ts, values in rows:
+        pairs = []
+        for k, v in values.items():
+            i = keys.get(k)
+            if i is None:
+                i = keys[k] = len(keys)
+            pairs.append([i, v])
+        out_rows.append([round(ts, 3), pairs])
+    stamps = [r[0] for r in rows] + [e["ts"] for e in events]
+    doc = {
+        "v": FORMAT_VERSION,
+        "vehicle": vehicle_id,
+        "stream": stream_id,
+        "seq": seq,
+        "t0": min(stamps) if stamps else 0.0,
+        "t1": max(stamps) if stamps else 0.0,
+        "keys": list(keys),
+        "rows": out_rows,
+        "events": events,
+    }
+    raw = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, 6)
+
+
+def _event_dict(t: Any) -> dict:
+    """AlarmTransition -> 上行事件"""
+    a = t.alarm
+    return {
+        "ts": round(float(t.ts), 3),
+        "id": a.id,
+        "kind": getattr(t.kind, "value", str(t.kind)),
+        "severity": getattr(a.severity, "value", str(a.severity)),
+        "title": a.title,
+        "message": a.message,
+        "slave": a.source_slave,
+    }
+
+
+def _safe_id(s: str) -> str:
+    """
+    车辆 id 限于 backend 接受的字符集 [A-Za-z0-9_.-]（中文等非 ASCII 字符替换为 "-"），最长 64；
+    全为点（"."、".." 会被当作路径段）或为空时用 "vehicle"
+    """
+    s = "".join(c if (c.isascii() and c.isalnum()) or c in "-_." else "-" for c in s.strip())[:64]
+    return s if s.strip(".") else "vehicle"
+
+
+class TelemetryUplink:
+    """add_batch 接 AppState.sampled，record 接 AppState.alarm_transitions；close() 封存未满的块并停止上传线程"""
+
+    def __init__(
+        self,
+        root: str | Path,
+        url: str,
+        vehicle_id: str,
+        token: str = "",
+        sample_interval_s: float = 10.0,
+        chunk_interval_s: float = 60.0,
+        max_queue_mb: int = 64,
+        timeout_s: float = 10.0,
+    ):
+        self._root = Path(root)
+        self._queue_dir = self._root / "queue"
+        self._rejected_dir = self._root / "rejected"
+        self._vehicle = _safe_id(vehicle_id)
+        self._url = url.rstrip("/")
+        self._token = token
+        self._sample_interval_s = max(0.1, sample_interval_s)
+        self._chunk_interval_s = max(self._sample_interval_s, chunk_interval_s)
+        self._quota = max(1, max_queue_mb) * 1024 * 1024
+        self._timeout_s = max(1.0, timeout_s)
+        self._fields = {d: frozenset(numeric_fields(cls)) for d, cls in DOMAIN_TYPES.items()}
+
+        # 调用线程写、上传线程取：以下由 _lock 保护
+        self._lock = threading.Lock()
+        self._latest: dict[str, float] = {}
+        self._emitted: dict[str, float] = {}
+        self._next_row_ts = 0.0
+        self._rows: list[tuple[float, dict[str, float]]] = []
+        self._events: list[dict] = []
+        self._chunk_started = 0.0
+
+        # 上传线程内使用
+        self._stream = ""
+        self._next_seq = 1
+        self._sizes: dict[int, int] = {}
+        self._cursor_known = False
+        self._backoff = 0.0
+
+        self._uploaded = 0
+        self._duplicates = 0
+        self._rejected = 0
+        self._dropped = 0
+        self._last_error = ""
+        self._last_ok_ts = 0.0
+        self._online = False
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TelemetryUplink", daemon=True)
+        self._thread.start()
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def set_endpoint(self, url: str, token: str) -> None:
+        """配置热更新：地址变化时重新取游标并立即重试"""
+        url = url.rstrip("/")
+        if url != self._url:
+            self._cursor_known = False
+        self._url, self._token = url, token
+        self._backoff = 0.0
+        self._wake.set()
+
+    def status(self) -> dict[str, Any]:
+        """诊断用快照"""
+        sizes = dict(self._sizes)
+        return {
+            "vehicle": self._vehicle,
+            "stream": self._stream,
+            "online": self._online,
+            "queued_chunks": len(sizes),
+            "queued_bytes": sum(sizes.values()),
+            "uploaded": self._uploaded,
+            "duplicates": self._duplicates,
+            "rejected": self._rejected,
+            "dropped": self._dropped,
+            "last_ok_ts": self._last_ok_ts,
+            "last_error": self._last_error,
+        }
+
+    # ---------- 采集（调用线程） ----------
+
+    def add_batch(self, ts: float, samples: dict[str, dict[str, Any]]) -> None:
+        with self._lock:
+            for domain, values in samples.items():
+                names = self._fields.get(domain)
+                if names is None:
+                    continue
+                for name, v in values.items():
+                    if name in names and isinstance(v, (int, float)):
+                        self._latest[f"{domain}.{name}"] = float(v)
+            if ts < self._next_row_ts:
+                return
+            self._next_row_ts = (ts // self._sample_interval_s + 1) * self._sample_interval_s
+            # 块内第一行为全量关键帧
+            base = {} if not self._rows else self._emitted
+            row = {k: v for k, v in self._latest.items() if base.get(k) != v}
+            if not row:
+                return
+            if not self._rows and not self._events:
+                self._chunk_started = ts
+            self._rows.append((ts, row))
+            self._emitted.update(row)
+            full = len(self._rows) >= MAX_ROWS_PER_CHUNK
+        if full:
+            self._wake.set()
+
+    def record(self, transitions: list) -> None:
+        """告警变迁（AppState.alarm_transitions 的槽）"""
+        events = []
+        for t in transitions or ():
+            try:
+                events.append(_event_dict(t))
+            except Exception as e:
+                logger.debug("上行事件转换失败: %s", e)
+        if not events:
+            return
+        with self._lock:
+            if not self._rows and not self._events:
+                self._chunk_started = events[0]["ts"]
+            self._events.extend(events)
+            full = len(self._events) >= MAX_EVENTS_PER_CHUNK
+        if full:
+            self._wake.set()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """封存内存中的行与事件并停止上传线程（未上传的分块留在队列，下次启动续传）"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    # ---------- 上传线程 ----------
+
+    def _run(self) -> None:
+        try:
+            self._queue_dir.mkdir(parents=True, exist_ok=True)
+            self._load_state()
+        except OSError as e:
+            logger.error("遥测上行目录不可用 %s: %s", self._root, e)
+            return
+        logger.info(
+            "遥测上行: 车辆 %s 流 %s，队列 %d 块，目标 %s",
+            self._vehicle, self._stream, len(self._sizes), self._url or "(未配置)",
+        )
+        while not self._stop.is_set():
+            self._seal(force=False)
+            # 退避期间照常按时封块
+            delay = min(self._upload_pending(), self._seal_wait())
+            self._wake.wait(delay)
+            self._wake.clear()
+        self._seal(force=True)
+
+    def _load_state(self) -> None:
+        """读 state.json 与队列目录；下一序号取两者较大者（封块后、写 state 前掉电时以文件为准）"""
+        state_path = self._root / "state.json"
+        state: dict = {}
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("遥测上行状态文件损坏，新建流: %s", e)
+        self._sizes = {}
+        for p in self._queue_dir.glob("*" + CHUNK_SUFFIX):
+            if p.stem.isdigit():
+                try:
+                    self._sizes[int(p.stem)] = p.stat().st_size
+                except OSError:
+                    continue
+        stream = str(state.get("stream") or "")
+        if not stream:
+            stream = secrets.token_hex(8)
+        self._stream = stream
+        self._next_seq = max(int(state.get("next_seq") or 1), max(self._sizes, default=0) + 1)
+        self._save_state()
+
+    def _save_state(self) -> None:
+        atomic_write_text(
+            self._root / "state.json",
+            json.dumps({"stream": self._stream, "next_seq": self._next_seq}),
+        )
+
+    def _seal(self, force: bool) -> None:
+        """到期（或 force）时取出内存中的行与事件编码落盘"""
+        now = time.time()
+        with self._lock:
+            if not self._rows and not self._events:
+                return
+            due = (
+                force
+                or now - self._chunk_started >= self._chunk_interval_s
+                or len(self._rows) >= MAX_ROWS_PER_CHUNK
+                or len(self._events) >= MAX_EVENTS_PER_CHUNK
+            )
+            if not due:
+                return
+            rows, events = self._rows, self._events
+            self._rows, self._events = [], []
+        seq = self._next_seq
+        data = encode_chunk(self._vehicle, self._stream, seq, rows, events)
+        try:
+            atomic_write_bytes(self._queue_dir / chunk_name(seq), data)
+            self._next_seq = seq + 1
+            self._save_state()
+        except OSError as e:
+            self._last_error = f"写入分块失败: {e}"
+            logger.error("遥测上行写入分块 %d 失败: %s", seq, e)
+            return
+        self._sizes[seq] = len(data)
+        self._enforce_quota()
+
+    def _seal_wait(self) -> float:
+        """距内存中的块到期的秒数"""
+        with self._lock:
+            if not self._rows and not self._events:
+                return self._chunk_interval_s
+            return max(0.05, self._chunk_started + self._chunk_interval_s - time.time())
+
+    def _enforce_quota(self) -> None:
+        total = sum(self._sizes.values())
+        for seq in sorted(self._sizes):
+            if total <= self._quota or len(self._sizes) <= 1:
+                break
+            total -= self._sizes.pop(seq)
+            self._unlink(seq)
+            self._dropped += 1
+            logger.warning("遥测上行队列超过配额，丢弃最旧分块 %d", seq)
+
+    def _unlink(self, seq: int) -> None:
+        try:
+            (self._queue_dir / chunk_name(seq)).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug("删除分块 %d 失败: %s", seq, e)
+
+    def _upload_pending(self) -> float:
+        """按序上传队列；返回下次唤醒前的等待秒数"""
+        idle = self._chunk_interval_s
+        if not self._url or not self._sizes:
+            return idle
+        if not self._cursor_known and not self._fetch_cursor():
+            return self._fail()
+        for seq in sorted(self._sizes):
+            if self._stop.is_set():
+                break
+            path = self._queue_dir / chunk_name(seq)
+            try:
+                data = path.read_bytes()
+            except OSError as e:
+                logger.warning("读取分块 %d 失败，移出队列: %s", seq, e)
+                self._sizes.pop(seq, None)
+                continue
+            status, body = self._request("POST", self._chunk_url(seq), data)
+            if status is not None and 200 <= status < 300:
+                self._sizes.pop(seq, None)
+                self._unlink(seq)
+                if isinstance(body, dict) and body.get("data", {}).get("duplicate"):
+                    self._duplicates += 1
+                else:
+                    self._uploaded += 1
+                self._mark_ok()
+            elif status in REJECT_STATUSES:
+                self._reject(seq, status, body)
+            else:
+                return self._fail()
+            # 上传期间可能有新块到期
+            self._seal(force=False)
+        return idle
+
+    def _fetch_cursor(self) -> bool:
+        """取服务端已收到的最大序号，丢弃本地已确认的分块；按序上传保证不大于该序号的块都已处理"""
+        status, body = self._request("GET", f"{self._stream_url()}/cursor")
+        if status is None or not 200 <= status < 300 or not isinstance(body, dict):
+            return False
+        try:
+            last = int(body["data"]["last_seq"])
+        except (KeyError, TypeError, ValueError):
+            last = 0
+        for seq in [s for s in self._sizes if s <= last]:
+            self._sizes.pop(seq)
+            self._unlink(seq)
+        if last >= self._next_seq:
+            # 本地状态落后于服务端（如从备份恢复），跳到服务端之后，避免序号冲突
+            self._next_seq = last + 1
+            self._save_state()
+        self._cursor_known = True
+        self._mark_ok()
+        return True
+
+    def _reject(self, seq: int, status: int, body: Any) -> None:
+        self._sizes.pop(seq, None)
+        self._rejected += 1
+        msg = body.get("message") if isinstance(body, dict) else body
+        logger.error("遥测分块 %d 被服务端拒收（HTTP %s）: %s", seq, status, msg)
+        try:
+            self._rejected_dir.mkdir(parents=True, exist_ok=True)
+            os.replace(self._queue_dir / chunk_name(seq), self._rejected_dir / chunk_name(seq))
+            kept = sorted(self._rejected_dir.glob("*" + CHUNK_SUFFIX))
+            for p in kept[:-REJECTED_KEEP]:
+                p.unlink()
+        except OSError as e:
+            logger.debug("移动被拒分块 %d 失败: %s", seq, e)
+            self._unlink(seq)
+
+    def _mark_ok(self) -> None:
+        self._online = True
+        self._backoff = 0.0
+        self._last_ok_ts = time.time()
+
+    def _fail(self) -> float:
+        if self._online:
+            logger.warning("遥测上行中断: %s", self._last_error)
+        self._online = False
+        self._cursor_known = False
+        self._backoff = min(BACKOFF_MAX_S, self._backoff * 2 if self._backoff else BACKOFF_MIN_S)
+        return self._backoff
+
+    def _stream_url(self) -> str:
+        v = urllib.parse.quote(self._vehicle, safe="")
+        return f"{self._url}/telemetry/{v}/streams/{self._stream}"
+
+    def _chunk_url(self, seq: int) -> str:
+        return f"{self._stream_url()}/chunks/{seq}"
+
+    def _request(self, method: str, url: str, data: bytes | None = None) -> tuple[int | None, Any]:
+        """(HTTP 状态码, 解析后的 JSON 或文本)；网络错误状态码为 None，原因记入 last_error"""
+        headers = {"Accept": "application/json"}
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+        if data is not None:
+            headers["Content-Type"] = "application/octet-stream"
+            headers["X-Chunk-Sha256"] = hashlib.sha256(data).hexdigest()
+        req = urllib.request.Request(url, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=self._timeout_s) as resp:
+                status, raw = resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            status, raw = e.code, e.read()
+        except (OSError, ValueError) as e:
+            self._last_error = str(getattr(e, "reason", e))
+            return None, None
+        try:
+            body: Any = json.loads(raw.decode("utf-8")) if raw else None
+        except ValueError:
+            body = raw[:200].decode("utf-8", "replace")
+        if not 200 <= status < 300:
+            msg = body.get("message") if isinstance(body, dict) else body
+            self._last_error = f"HTTP {status}: {msg}"
+        return status, body
+
+
+# ---------- 全局实例 ----------
+
+_uplink: TelemetryUplink | None = None
+
+
+def register_uplink(uplink: TelemetryUplink | None) -> None:
+    """启动时注册，供诊断页等获取"""
+    global _uplink
+    _uplink = uplink
+
+
+def get_uplink() -> TelemetryUplink | None:
+    """获取已注册的遥测上行，未启动时返回 None"""
+    return _uplink
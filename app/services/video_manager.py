@@ -134,13 +134,24 @@ class VideoManager:
         self._embed_result: bool | None = None  # 工作线程设置，start_embedded 轮询
         self._selected_sink: str = ""
         self._backend: str = "auto"
+        self._config_cache = None  # 见 _get_config
+        # _resolve_sink 需逐个探测 GStreamer 元素，按 (会话, backend, sink 配置) 缓存结果，配置变更时清除
+        self._resolved_sink: tuple[tuple[str, str, str], str] | None = None
 
     def _get_config(self):
-        try:
-            from app.core.config import get_config
-            return get_config()
-        except Exception:
-            return None
+        """缓存的配置对象：首次取单例并订阅变更，之后只在变更通知时替换引用"""
+        if self._config_cache is None:
+            try:
+                from app.core.config import get_config, subscribe_config
+                self._config_cache = get_config()
+                subscribe_config(self._on_config_changed)
+            except Exception:
+                return None
+        return self._config_cache
+
+    def _on_config_changed(self, cfg, _version: int) -> None:
+        self._config_cache = cfg
+        self._resolved_sink = None
 
     def on_status_change(self, callback: Callable[[str], None]) -> None:
         self._status_callbacks.append(callback)
@@ -323,7 +334,13 @@ class VideoManager:
         st = self._session_type or _get_session_type()
         prefer_backend = getattr(video_cfg, "prefer_backend", "auto") if video_cfg else "auto"
         sink_config = getattr(video_cfg, "sink", "auto") if video_cfg else "auto"
-        sink_name = _resolve_sink(st, prefer_backend, sink_config)
+        key = (st, prefer_backend, sink_config)
+        cached = self._resolved_sink
+        if cached is not None and cached[0] == key:
+            sink_name = cached[1]
+        else:
+            sink_name = _resolve_sink(st, prefer_backend, sink_config)
+            self._resolved_sink = (key, sink_name)
         self._backend = prefer_backend
         self._selected_sink = sink_name
         try:
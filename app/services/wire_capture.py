@@ -0,0 +1,366 @@
+"""
+Modbus 线路抓包与回放：
+- RecordingTransport：包装任意 ModbusTransport，把每次请求/响应（含失败）追加为带时间戳的二进制记录，按大小轮转。
+- ReplayTransport：读取抓包文件回放，可按原始时间节奏或尽快回放，用于离线复现现场问题、基准测试与回归测试。
+
+文件格式：8 字节文件头 CAPTURE_MAGIC，其后为连续记录：
+    <d B B H H B H  = ts(time.time) fc slave addr0 count status nvals
+    随后 nvals 个 uint16（读为响应值；写为写入值）。status: 0 成功，1 失败（TransportError）。
+"""
+
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from app.services.modbus_master import ModbusTransport, TransportError
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_MAGIC = b"ZMCAP\x00\x01\n"
+_REC = struct.Struct("<dBBHHBH")
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+FC_READ_COILS = 1
+FC_READ_DI = 2
+FC_READ_HR = 3
+FC_READ_IR = 4
+FC_WRITE_COIL = 5
+FC_WRITE_HR = 6
+FC_WRITE_COILS = 15
+FC_WRITE_HRS = 16
+
+# 写功能码（回放时不作为读响应）
+WRITE_FCS = (FC_WRITE_COIL, FC_WRITE_HR, FC_WRITE_COILS, FC_WRITE_HRS)
+
+# 轮转默认：单文件 16MB，保留 5 个历史文件（与 RotatingFileHandler 命名一致：path.1 最新）
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+# 抓包写缓冲的刷出间隔（秒）：进程崩溃最多丢失这段时间的记录
+FLUSH_INTERVAL_S = 1.0
+
+
+@dataclass
+class CaptureRecord:
+    """一条抓包记录"""
+    ts: float
+    fc: int
+    slave: int
+    addr0: int
+    count: int
+    status: int
+    values: list[int]
+
+
+def _encode(rec_ts: float, fc: int, slave: int, addr0: int, count: int, status: int, values: list[int]) -> bytes:
+    vals = array("H", (int(v) & 0xFFFF for v in values))
+    if sys.byteorder != "little":
+        vals.byteswap()
+    return _REC.pack(rec_ts, fc, slave, addr0, count, status, len(vals)) + vals.tobytes()
+
+
+def capture_files(path: str | Path) -> list[Path]:
+    """返回一组轮转抓包文件，按时间从旧到新（path.N … path.1, path）。"""
+    p = Path(path)
+    files: list[Path] = []
+    i = 1
+    while True:
+        rotated = p.with_name(f"{p.name}.{i}")
+        if not rotated.exists():
+            break
+        files.append(rotated)
+        i += 1
+    files.reverse()
+    if p.exists():
+        files.append(p)
+    return files
+
+
+def iter_capture(path: str | Path) -> Iterator[CaptureRecord]:
+    """按时间顺序迭代单个抓包文件的全部记录；文件尾部不完整的记录（写入中断电）被忽略。"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(CAPTURE_MAGIC):
+        raise ValueError(f"不是抓包文件: {path}")
+    pos = len(CAPTURE_MAGIC)
+    end = len(data)
+    while pos + _REC.size <= end:
+        ts, fc, slave, addr0, count, status, nvals = _REC.unpack_from(data, pos)
+        pos += _REC.size
+        nbytes = nvals * 2
+        if pos + nbytes > end:
+            logger.warning("抓包文件尾部记录不完整，已忽略: %s", path)
+            break
+        vals = array("H")
+        vals.frombytes(data[pos:pos + nbytes])
+        if sys.byteorder != "little":
+            vals.byteswap()
+        pos += nbytes
+        yield CaptureRecord(ts, fc, slave, addr0, count, status, vals.tolist())
+
+
+def iter_capture_set(path: str | Path) -> Iterator[CaptureRecord]:
+    """迭代一组轮转文件（旧→新）。"""
+    for f in capture_files(path):
+        yield from iter_capture(f)
+
+
+# ---------- RecordingTransport ----------
+
+class RecordingTransport(ModbusTransport):
+    """
+    抓包包装器：调用内层 transport，并把请求与响应写入二进制日志。
+    写文件失败只记日志，不影响总线读写。inner 供 Mock 预填数据等场景直接访问内层。
+    """
+
+    def __init__(
+        self,
+        inner: ModbusTransport,
+        path: str | Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
+    ):
+        self.inner = inner
+        self._path = Path(path)
+        self._max_bytes = max(0, int(max_bytes))
+        self._backup_count = max(0, int(backup_count))
+        self._lock = threading.Lock()
+        self._file: Any = None
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._open()
+
+    def _open(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._path, "ab")
+            self._size = self._file.tell()
+            if self._size == 0:
+                self._file.write(CAPTURE_MAGIC)
+                self._size = len(CAPTURE_MAGIC)
+            logger.info("Modbus 抓包已开启: %s", self._path)
+        except OSError as e:
+            logger.warning("Modbus 抓包文件打开失败，抓包关闭: %s", e)
+            self._file = None
+
+    def _rotate_locked(self) -> None:
+        self._file.close()
+        self._file = None
+        if self._backup_count > 0:
+            for i in range(self._backup_count - 1, 0, -1):
+                src = self._path.with_name(f"{self._path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self._path.with_name(f"{self._path.name}.{i + 1}"))
+            os.replace(self._path, self._path.with_name(f"{self._path.name}.1"))
+        else:
+            self._path.unlink(missing_ok=True)
+        self._open()
+
+    def _record(self, fc: int, slave: int, addr0: int, count: int, status: int, values: list[int]) -> None:
+        if self._file is None:
+            return
+        buf = _encode(time.time(), fc, slave, addr0, count, status, values)
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                if self._max_bytes and self._size + len(buf) > self._max_bytes:
+                    self._rotate_locked()
+                    if self._file is None:
+                        return
+                self._file.write(buf)
+                self._size += len(buf)
+                now = time.monotonic()
+                if now - self._last_flush >= FLUSH_INTERVAL_S:
+                    self._file.flush()
+                    self._last_flush = now
+            except OSError as e:
+                logger.warning("Modbus 抓包写入失败，抓包关闭: %s", e)
+                try:
+                    self._file.close()
+                except Exception:
+                    pass
+                self._file = None
+
+    def _read(self, fc: int, fn, slave: int, addr0: int, count: int) -> list[int]:
+        try:
+            vals = fn(slave, addr0, count)
+        except TransportError:
+            self._record(fc, slave, addr0, count, STATUS_ERROR, [])
+            raise
+        self._record(fc, slave, addr0, count, STATUS_OK, vals)
+        return vals
+
+    def read_coils(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._read(FC_READ_COILS, self.inner.read_coils, slave, addr0, count)
+
+    def read_discrete_inputs(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._read(FC_READ_DI, self.inner.read_discrete_inputs, slave, addr0, count)
+
+    def read_input_registers(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._read(FC_READ_IR, self.inner.read_input_registers, slave, addr0, count)
+
+    def read_holding_registers(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._read(FC_READ_HR, self.inner.read_holding_registers, slave, addr0, count)
+
+    def write_coil(self, slave: int, addr0: int, value: bool | int) -> None:
+        v = 1 if value else 0
+        try:
+            self.inner.write_coil(slave, addr0, value)
+        except TransportError:
+            self._record(FC_WRITE_COIL, slave, addr0, 1, STATUS_ERROR, [v])
+            raise
+        self._record(FC_WRITE_COIL, slave, addr0, 1, STATUS_OK, [v])
+
+    def write_holding_register(self, slave: int, addr0: int, value: int) -> None:
+        try:
+            self.inner.write_holding_register(slave, addr0, value)
+        except TransportError:
+            self._record(FC_WRITE_HR, slave, addr0, 1, STATUS_ERROR, [value])
+            raise
+        self._record(FC_WRITE_HR, slave, addr0, 1, STATUS_OK, [value])
+
+    def _write_multi(self, fc: int, fn, slave: int, addr0: int, values: list[int]) -> None:
+        try:
+            fn(slave, addr0, values)
+        except TransportError:
+            self._record(fc, slave, addr0, len(values), STATUS_ERROR, values)
+            raise
+        self._record(fc, slave, addr0, len(values), STATUS_OK, values)
+
+    def write_coils(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._write_multi(FC_WRITE_COILS, self.inner.write_coils, slave, addr0, [1 if v else 0 for v in values])
+
+    def write_holding_registers(self, slave: int, addr0: int, values: list[int]) -> None:
+        self._write_multi(FC_WRITE_HRS, self.inner.write_holding_registers, slave, addr0, list(values))
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.flush()
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+        if hasattr(self.inner, "close"):
+            self.inner.close()
+
+
+# ---------- ReplayTransport ----------
+
+class ReplayTransport(ModbusTransport):
+    """
+    抓包回放：每个 (fc, slave, addr0, count) 请求按录制顺序依次返回响应，录制时失败的请求回放时同样抛 TransportError。
+    realtime=True 时按录制时间节奏回放（speed 为倍速），False 时尽快回放（基准/回归用）。
+    某请求的录制响应用尽后：loop=True 从头循环（第 n 遍的时间基准后移 n 个录制周期），否则重复最后一次响应；
+    从未录制过的请求抛 TransportError。
+    写请求只记录到 writes 列表，不改变回放数据。
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        realtime: bool = False,
+        speed: float = 1.0,
+        loop: bool = False,
+    ):
+        self._realtime = bool(realtime)
+        self._speed = speed if speed > 0 else 1.0
+        self._loop = bool(loop)
+        self._lock = threading.Lock()
+        self._responses: dict[tuple[int, int, int, int], list[tuple[float, int, list[int]]]] = {}
+        self._cursor: dict[tuple[int, int, int, int], int] = {}
+        self.writes: deque[CaptureRecord] = deque(maxlen=10000)
+        t_first: float | None = None
+        total = 0
+        for rec in iter_capture_set(path):
+            if rec.fc in WRITE_FCS:
+                continue
+            if t_first is None:
+                t_first = rec.ts
+            key = (rec.fc, rec.slave, rec.addr0, rec.count)
+            self._responses.setdefault(key, []).append((rec.ts - t_first, rec.status, rec.values))
+            total += 1
+        if total == 0:
+            raise ValueError(f"抓包文件中没有读请求记录: {path}")
+        # 录制周期：录制跨度加一个平均记录间隔（循环首尾之间的间隔）
+        span = max(seq[-1][0] for seq in self._responses.values())
+        self._period = span + span / total
+        self._t0: float | None = None
+        logger.info("Modbus 回放已加载: %s (%d 条读记录, %d 种请求)", path, total, len(self._responses))
+
+    @property
+    def exhausted(self) -> bool:
+        """所有请求的录制响应都已回放过至少一遍"""
+        with self._lock:
+            return all(self._cursor.get(k, 0) >= len(v) for k, v in self._responses.items())
+
+    def _next(self, fc: int, slave: int, addr0: int, count: int) -> list[int]:
+        key = (fc, slave, addr0, count)
+        with self._lock:
+            seq = self._responses.get(key)
+            if not seq:
+                raise TransportError(f"ReplayTransport: 无录制响应 fc={fc} slave={slave} addr={addr0} count={count}")
+            n = self._cursor.get(key, 0)
+            self._cursor[key] = n + 1
+            lap, idx = divmod(n, len(seq))
+            if lap and not self._loop:
+                lap, idx = 0, len(seq) - 1
+            offset, status, values = seq[idx]
+            offset += lap * self._period
+            if self._t0 is None:
+                self._t0 = time.monotonic() - offset / self._speed
+            t0 = self._t0
+        if self._realtime:
+            delay = t0 + offset / self._speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        if status != STATUS_OK:
+            raise TransportError(f"ReplayTransport: 录制时失败 fc={fc} slave={slave} addr={addr0}")
+        return list(values)
+
+    def read_coils(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._next(FC_READ_COILS, slave, addr0, count)
+
+    def read_discrete_inputs(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._next(FC_READ_DI, slave, addr0, count)
+
+    def read_input_registers(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._next(FC_READ_IR, slave, addr0, count)
+
+    def read_holding_registers(self, slave: int, addr0: int, count: int) -> list[int]:
+        return self._next(FC_READ_HR, slave, addr0, count)
+
+    def write_coil(self, slave: int, addr0: int, value: bool | int) -> None:
+        self.writes.append(CaptureRecord(time.time(), FC_WRITE_COIL, slave, addr0, 1, STATUS_OK, [1 if value else 0]))
+
+    def write_holding_register(self, slave: int, addr0: int, value: int) -> None:
+        self.writes.append(CaptureRecord(time.time(), FC_WRITE_HR, slave, addr0, 1, STATUS_OK, [int(value)]))
+
+    def write_coils(self, slave: int, addr0: int, values: list[int]) -> None:
+        vals = [1 if v else 0 for v in values]
+        self.writes.append(CaptureRecord(time.time(), FC_WRITE_COILS, slave, addr0, len(vals), STATUS_OK, vals))
+
+    def write_holding_registers(self, slave: int, addr0: int, values: list[int]) -> None:
+        vals = [int(v) for v in values]
+        self.writes.append(CaptureRecord(time.time(), FC_WRITE_HRS, slave, addr0, len(vals), STATUS_OK, vals))
+
+    def close(self) -> None:
+        pass
@@ -19,7 +19,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, QTimer, QSize
 from PyQt6.QtGui import QKeySequence, QShortcut
 
-from app.core.config import get_config, save_config
+from app.core.config import AppConfig, get_config, save_config_async, subscribe_config
 from app.services.modbus_master import get_modbus_master
 from app.ui.widgets.alarm_banner import AlarmBanner
 from app.ui.layout_profile import get_tokens, LayoutTokens
@@ -52,6 +52,7 @@ class MainWindow(QMainWindow):
         logger.info("布局 profile: %s", self._tokens.profile)
         self._stack = QStackedWidget()
         self._tab_buttons: list[QToolButton] = []
+        self._backlight_pct: int | None = None  # 最近应用的背光亮度（配置变更时比较）
         self._setup_ui()
         self._load_theme()
 
@@ -103,6 +104,7 @@ class MainWindow(QMainWindow):
             esc_shortcut.activated.connect(self._on_escape_fullscreen)
 
         QTimer.singleShot(1000, self._apply_backlight_from_config)
+        subscribe_config(self._on_config_changed)
 
     def _apply_backlight_from_config(self) -> None:
         """启动后约 1s 应用 config 中的硬件背光亮度。"""
@@ -114,9 +116,22 @@ class MainWindow(QMainWindow):
             cfg = get_config()
             pct = max(5, min(100, getattr(cfg.display, "brightness_percent", 60)))
             svc.set_percent(pct, min_pct=5)
+            self._backlight_pct = pct
         except Exception as e:
             logger.debug("启动时应用背光亮度失败: %s", e)
 
+    def _on_config_changed(self, cfg: AppConfig, _version: int) -> None:
+        """配置变更：背光亮度与上次应用值不同时重新应用（设置页已预览写入的同值由 backlight 防抖跳过）"""
+        pct = getattr(cfg.display, "brightness_percent", None)
+        if pct is None or pct == self._backlight_pct:
+            return
+        self._backlight_pct = pct
+        try:
+            from app.services.backlight import BacklightService
+            BacklightService().apply_percent_from_config(cfg)
+        except Exception as e:
+            logger.debug("配置变更后应用背光亮度失败: %s", e)
+
     def _resolve_layout_tokens(self) -> LayoutTokens:
         """从 config 获取目标分辨率并选用对应 profile。ui.force_resolution 优先，否则用 display。"""
         cfg = get_config()
@@ -255,7 +270,7 @@ class MainWindow(QMainWindow):
 
         t = self._tokens
         cfg_get = get_config
-        save_cfg = save_config
+        save_cfg = save_config_async
         mm_get = get_modbus_master
 
         pages = [
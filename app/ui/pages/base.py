@@ -4,11 +4,15 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
 from PyQt6.QtCore import Qt
 
 from app.ui.layout_profile import LayoutTokens
+from app.ui.widgets.trend_chart import TrendChart
 
 
 class PageBase(QWidget):
     """页面统一基类：大标题 + TODO 占位。支持 set_tokens 注入布局 token。"""
 
+    # 页面显示的 Snapshot 子域；其中有缓存恢复值（stale）时整页淡显（theme.qss 中 [stale="true"]）
+    STATE_DOMAINS: tuple[str, ...] = ()
+
     def __init__(self, title: str):
         super().__init__()
         self._tokens: LayoutTokens | None = None
@@ -38,3 +42,17 @@ class PageBase(QWidget):
                 tokens.pad_page, tokens.pad_page,
                 tokens.pad_page, tokens.pad_page,
             )
+        for chart in self.findChildren(TrendChart):
+            chart.set_tokens(tokens)
+
+    def _update_stale(self, snap) -> None:
+        """按快照 stale 子域切换淡显；仅在状态变化时重新 polish 子控件"""
+        stale_domains = getattr(snap, "stale", ())
+        stale = bool(stale_domains) and any(d in stale_domains for d in self.STATE_DOMAINS)
+        if stale == bool(self.property("stale")):
+            return
+        self.setProperty("stale", stale)
+        style = self.style()
+        for w in (self, *self.findChildren(QWidget)):
+            style.unpolish(w)
+            style.polish(w)
@@ -22,6 +22,37 @@ SUB_LIGHTING, SUB_ENV, SUB_DIAG, SUB_SETTINGS, SUB_CAMERA = 1, 2, 3, 4, 5
 HVAC_MODE_NAMES = {0: "Off", 1: "Cool", 2: "Vent", 3: "Auto"}
 
 
+def _get_range_estimators():
+    try:
+        from app.services.estimators import get_range_estimators
+        return get_range_estimators()
+    except Exception:
+        return None
+
+
+def _duration(s: float | None) -> str:
+    if s is None:
+        return "∞"
+    if s < 3600:
+        return f"{max(1, round(s / 60))}分钟"
+    if s < 48 * 3600:
+        return f"{s / 3600:.1f}小时"
+    return f"{s / 86400:.1f}天"
+
+
+def _eta_text(est, full: bool = True) -> str:
+    """估算 -> "约 3.2小时后耗尽 (2.8小时~4.1小时)"；无趋势时为空"""
+    if est is None:
+        return ""
+    if est.time_to_empty_s is not None:
+        mid, lo, hi, what = est.time_to_empty_s, est.time_to_empty_lo_s, est.time_to_empty_hi_s, "耗尽"
+    elif full and est.time_to_full_s is not None:
+        mid, lo, hi, what = est.time_to_full_s, est.time_to_full_lo_s, est.time_to_full_hi_s, "充满"
+    else:
+        return ""
+    return f"约 {_duration(mid)}后{what} ({_duration(lo)}~{_duration(hi)})"
+
+
 def _v(x10: int | None) -> str:
     return f"{x10 / 10:.1f}" if x10 is not None else "--"
 
@@ -64,6 +95,8 @@ class ClickableCard(QFrame):
 class DashboardPage(PageBase):
     """仪表盘：标题 + 快捷按钮 | 2 列 4 卡片 | 底部状态条。布局由 tokens 驱动。"""
 
+    STATE_DOMAINS = ("power", "hvac", "pdu", "env", "gas", "auxfuel")
+
     def __init__(self, app_state=None, on_switch_page=None):
         super().__init__("仪表盘")
         self._app_state = app_state
@@ -156,6 +189,12 @@ class DashboardPage(PageBase):
         self._batt_detail = QLabel("电压 --V | 功率 --W")
         self._batt_detail.setObjectName("small")
         lay.addWidget(self._batt_detail)
+        self._batt_eta = QLabel("")
+        self._batt_eta.setObjectName("small")
+        lay.addWidget(self._batt_eta)
+        self._fuel_label = QLabel("副油箱 --%")
+        self._fuel_label.setObjectName("small")
+        lay.addWidget(self._fuel_label)
         return card
 
     def _build_climate_card(self) -> QFrame:
@@ -217,6 +256,7 @@ class DashboardPage(PageBase):
     def _on_state_changed(self, snap) -> None:
         if snap is None:
             return
+        self._update_stale(snap)
         p, h, pd, env, gas, comm = (
             snap.power, snap.hvac, snap.pdu, snap.env, snap.gas, snap.comm,
         )
@@ -226,6 +266,13 @@ class DashboardPage(PageBase):
         v = _voltage(p.batt_v_x100)
         pw = str(p.batt_p_w) if p.batt_p_w is not None else "--"
         self._batt_detail.setText(f"电压 {v}V | 功率 {pw}W")
+        estimators = _get_range_estimators()
+        batt_est = estimators.battery() if estimators else None
+        fuel_est = estimators.fuel() if estimators else None
+        self._batt_eta.setText(_eta_text(batt_est))
+        fuel = _v(snap.auxfuel.aux_fuel_level_x10)
+        fuel_eta = _eta_text(fuel_est, full=False)
+        self._fuel_label.setText(f"副油箱 {fuel}%" + (f" · {fuel_eta}" if fuel_eta else ""))
 
         mode = HVAC_MODE_NAMES.get(h.mode, str(h.mode)) if h.mode is not None else "--"
         target = _v(h.target_temp_x10) if h.target_temp_x10 is not None else "--"
@@ -1,6 +1,8 @@
 """诊断页面 - WVGA：从站列表样式（每行在线点+错误计数）+ 告警列表折叠"""
 
+import bisect
 import datetime
+import threading
 
 from PyQt6.QtWidgets import (
     QWidget,
@@ -19,11 +21,12 @@ from PyQt6.QtWidgets import (
     QDialogButtonBox,
     QGridLayout,
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 from app.ui.pages.base import PageBase
 from app.ui.layout_profile import LayoutTokens, get_tokens
-from app.core.alarm_engine import Alarm, Severity
+from app.core.alarm_engine import Alarm, AlarmTransition, Severity, TransitionKind
+from app.ui.widgets.alarm_history import AlarmHistoryView
 
 def _get_video_diagnostics() -> dict:
     try:
@@ -32,6 +35,54 @@ def _get_video_diagnostics() -> dict:
     except Exception:
         return {}
 
+
+def _get_modbus_master():
+    try:
+        from app.services.modbus_master import get_modbus_master
+        return get_modbus_master()
+    except Exception:
+        return None
+
+
+def _fmt_ms(v) -> str:
+    if v is None:
+        return "--"
+    return f"{v:.1f}" if v < 100 else f"{v:.0f}"
+
+
+def _get_stall_watchdog():
+    try:
+        from app.services.stall_watchdog import get_stall_watchdog
+        return get_stall_watchdog()
+    except Exception:
+        return None
+
+
+def _dump_flight_recorder():
+    try:
+        from app.core.logging import dump_flight_recorder
+        return dump_flight_recorder("manual")
+    except Exception:
+        return None
+
+
+def _get_alarm_journal():
+    try:
+        from app.services.alarm_journal import get_alarm_journal
+        return get_alarm_journal()
+    except Exception:
+        return None
+
+
+# 告警变迁后刷新历史首页的延迟（ms），需大于告警日志批量提交间隔
+ALARM_HISTORY_REFRESH_DELAY_MS = 1500
+
+# 总线性能刷新周期（ms），仅在页面可见且区块展开时运行
+BUS_METRICS_REFRESH_MS = 1000
+
+# 自动化记录显示条数
+AUTOMATION_AUDIT_ROWS = 10
+
 # 告警 ID -> 建议动作
 SUGGESTED_ACTIONS: dict[str, str] = {
     "HVAC_HP_TRIP": "检查制冷系统压力，联系售后",
@@ -49,6 +100,14 @@ SUGGESTED_ACTIONS: dict[str, str] = {
 }
 
 
+def _get_automation():
+    try:
+        from app.services.automation import get_automation
+        return get_automation()
+    except Exception:
+        return None
+
+
 def _format_ts(ts: float) -> str:
     if ts is None or ts <= 0:
         return "--"
@@ -113,6 +172,8 @@ class AlarmDetailDialog(QDialog):
 class CollapsibleSection(QFrame):
     """可折叠区块：标题按钮 + 内容区。样式由 theme.qss collapsibleHeaderBtn 统一。"""
 
+    expanded_changed = pyqtSignal(bool)
+
     def __init__(self, title: str, tokens: LayoutTokens | None, parent=None):
         super().__init__(parent)
         self.setObjectName("collapsibleSection")
@@ -145,6 +206,10 @@ class CollapsibleSection(QFrame):
         self._update_header_text()
         if self._content:
             self._content.setVisible(expanded)
+        self.expanded_changed.emit(expanded)
+
+    def is_expanded(self) -> bool:
+        return self._expanded
 
     def _toggle(self) -> None:
         self._expanded = not self._expanded
@@ -154,11 +219,15 @@ class CollapsibleSection(QFrame):
 class DiagnosticsPage(PageBase):
     """诊断页：从站列表（每行在线点+错误计数）+ 告警列表折叠。布局由 tokens 驱动，无内联 setStyleSheet。"""
 
+    _log_dumped = pyqtSignal(object)  # 飞行记录导出路径，失败为 None
+
     def __init__(self, app_state=None, alarm_controller=None):
         super().__init__("诊断")
         self._app_state = app_state
         self._alarm_controller = alarm_controller
-        self._alarms: list[Alarm] = []
+        self._alarms: dict[str, Alarm] = {}
+        # 告警表当前行对应的告警 id（按 first_seen 倒序），增量插入/删除行时保持同步
+        self._alarm_rows: list[str] = []
         self._severity_filter: Severity | None = None
         self._tokens: LayoutTokens | None = get_tokens()
         t = self._tokens
@@ -246,6 +315,59 @@ class DiagnosticsPage(PageBase):
         self._video_diag_section = video_diag_section
         self._refresh_video_diagnostics()
 
+        # 总线性能：折叠区块，默认折叠；展开且页面可见时 1s 刷新，页面隐藏时关闭统计
+        bus_section = CollapsibleSection("总线性能", t, self)
+        bus_inner = QWidget()
+        bus_ly = QVBoxLayout(bus_inner)
+        bus_ly.setSpacing(4)
+        self._bus_util_lbl = QLabel("总线占用率: --")
+        self._bus_util_lbl.setObjectName("accent")
+        bus_ly.addWidget(self._bus_util_lbl)
+        self._bus_cycle_lbl = QLabel("--")
+        self._bus_cycle_lbl.setObjectName("small")
+        self._bus_cycle_lbl.setWordWrap(True)
+        bus_ly.addWidget(self._bus_cycle_lbl)
+        self._bus_ack_lbl = QLabel("--")
+        self._bus_ack_lbl.setObjectName("small")
+        self._bus_ack_lbl.setWordWrap(True)
+        bus_ly.addWidget(self._bus_ack_lbl)
+        self._alarm_eval_lbl = QLabel("告警评估: --")
+        self._alarm_eval_lbl.setObjectName("small")
+        self._alarm_eval_lbl.setWordWrap(True)
+        bus_ly.addWidget(self._alarm_eval_lbl)
+        self._stall_lbl = QLabel("主线程卡顿: --")
+        self._stall_lbl.setObjectName("small")
+        self._stall_lbl.setWordWrap(True)
+        bus_ly.addWidget(self._stall_lbl)
+        log_row = QHBoxLayout()
+        self._log_dump_btn = QPushButton("导出最近日志")
+        self._log_dump_btn.setMinimumHeight(bh)
+        self._log_dump_btn.clicked.connect(self._on_dump_log)
+        log_row.addWidget(self._log_dump_btn)
+        self._log_dump_lbl = QLabel("")
+        self._log_dump_lbl.setObjectName("small")
+        self._log_dump_lbl.setWordWrap(True)
+        log_row.addWidget(self._log_dump_lbl, 1)
+        bus_ly.addLayout(log_row)
+        self._log_dumped.connect(self._on_log_dumped, Qt.ConnectionType.QueuedConnection)
+        self._bus_table = QTableWidget(0, 8)
+        self._bus_table.setHorizontalHeaderLabels(
+            ["从站", "FC", "次数", "错误", "排队p95", "线上p50", "线上p99", "解析p95"]
+        )
+        self._bus_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self._bus_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._bus_table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self._bus_table.verticalHeader().setVisible(False)
+        self._bus_table.setMinimumHeight(bh * 5)
+        bus_ly.addWidget(self._bus_table)
+        bus_section.set_content(bus_inner)
+        bus_section.expanded_changed.connect(self._update_bus_timer)
+        inner_layout.addWidget(bus_section)
+        self._bus_section = bus_section
+        self._bus_timer = QTimer(self)
+        self._bus_timer.setInterval(BUS_METRICS_REFRESH_MS)
+        self._bus_timer.timeout.connect(self._refresh_bus_metrics)
+
         # 告警列表：折叠区块，默认折叠
         alarm_section = CollapsibleSection("告警列表", t, self)
         alarm_section.set_expanded(False)
@@ -276,6 +398,30 @@ class DiagnosticsPage(PageBase):
         alarm_section.set_content(alarm_inner)
         inner_layout.addWidget(alarm_section)
 
+        # 告警历史：折叠区块，展开且页面可见时分页查询告警日志
+        history_section = CollapsibleSection("告警历史", t, self)
+        history_section.set_expanded(False)
+        self._history_view = AlarmHistoryView(_get_alarm_journal, t)
+        history_section.set_content(self._history_view)
+        history_section.expanded_changed.connect(self._refresh_history_if_shown)
+        inner_layout.addWidget(history_section)
+        self._history_section = history_section
+        self._history_timer = QTimer(self)
+        self._history_timer.setSingleShot(True)
+        self._history_timer.setInterval(ALARM_HISTORY_REFRESH_DELAY_MS)
+        self._history_timer.timeout.connect(self._refresh_history_if_shown)
+
+        # 自动化记录：折叠区块，展开时显示最近的规则执行/抑制
+        automation_section = CollapsibleSection("自动化记录", t, self)
+        automation_section.set_expanded(False)
+        self._automation_lbl = QLabel("--")
+        self._automation_lbl.setObjectName("small")
+        self._automation_lbl.setWordWrap(True)
+        automation_section.set_content(self._automation_lbl)
+        automation_section.expanded_changed.connect(self._refresh_automation_audit)
+        inner_layout.addWidget(automation_section)
+        self._automation_section = automation_section
+
         inner_layout.addStretch()
         scroll.setWidget(inner)
         layout.addWidget(scroll)
@@ -285,17 +431,23 @@ class DiagnosticsPage(PageBase):
                 self._on_state_changed,
                 Qt.ConnectionType.QueuedConnection,
             )
-            app_state.alarms_changed.connect(
-                self._on_alarms_changed,
+            app_state.alarm_transitions.connect(
+                self._on_alarm_transitions,
                 Qt.ConnectionType.QueuedConnection,
             )
             QTimer.singleShot(0, self._refresh_once)
 
     def _get_filtered_sorted_alarms(self) -> list[Alarm]:
-        filtered = self._alarms
-        if self._severity_filter is not None:
-            filtered = [a for a in filtered if a.severity == self._severity_filter]
-        return sorted(filtered, key=lambda a: a.last_seen_ts or 0, reverse=True)
+        filtered = [a for a in self._alarms.values() if self._passes_filter(a)]
+        return sorted(filtered, key=self._row_key)
+
+    def _passes_filter(self, a: Alarm) -> bool:
+        return self._severity_filter is None or a.severity == self._severity_filter
+
+    @staticmethod
+    def _row_key(a: Alarm) -> tuple[float, str]:
+        """行排序键：first_seen 倒序（置位后不变），同时刻按 id"""
+        return (-(a.first_seen_ts or 0.0), a.id)
 
     def _on_filter_changed(self, text: str) -> None:
         if text == "全部":
@@ -326,35 +478,70 @@ class DiagnosticsPage(PageBase):
             dot.style().unpolish(dot)
             dot.style().polish(dot)
 
-    def _on_alarms_changed(self, alarms: list) -> None:
-        self._alarms = alarms if isinstance(alarms, list) else []
-        self._refresh_alarm_table()
+    def _on_alarm_transitions(self, transitions: list[AlarmTransition]) -> None:
+        """按变迁增量更新告警表：置位插入一行、清除删除一行、确认只改 Ack 列"""
+        for t in transitions:
+            a = t.alarm
+            if t.kind == TransitionKind.CLEARED:
+                self._alarms.pop(a.id, None)
+                self._remove_alarm_row(a.id)
+                continue
+            self._alarms[a.id] = a
+            if a.id in self._alarm_rows:
+                self._set_alarm_ack(self._alarm_rows.index(a.id), a)
+            elif self._passes_filter(a):
+                self._insert_alarm_row(a)
+        # 历史首页可见时，待日志落盘后刷新（多次变迁合并为一次查询）
+        if self._history_view.is_first_page() and not self._history_timer.isActive():
+            self._history_timer.start()
+
+    def _refresh_history_if_shown(self, *_args) -> None:
+        if self.isVisible() and self._history_section.is_expanded():
+            self._history_view.refresh()
 
     def _refresh_alarm_table(self) -> None:
+        """全量重建（首次显示、切换过滤条件时）"""
         alarms = self._get_filtered_sorted_alarms()
+        self._alarm_rows = [a.id for a in alarms]
         self._alarm_table.setRowCount(len(alarms))
         for row, a in enumerate(alarms):
-            if isinstance(a, Alarm):
-                self._alarm_table.setItem(row, 0, QTableWidgetItem(a.id))
-                self._alarm_table.setItem(row, 1, QTableWidgetItem(str(a.severity.value)))
-                self._alarm_table.setItem(row, 2, QTableWidgetItem(f"{a.title}: {a.message}"))
-                self._alarm_table.setItem(row, 3, QTableWidgetItem("已确认" if a.ack else "未确认"))
-                btn = QPushButton("Ack")
-                btn.setMinimumHeight(self._tokens.btn_h if self._tokens else 44)
-                btn.setEnabled(not a.ack)
-                btn.clicked.connect(lambda checked, aid=a.id: self._on_ack(aid))
-                self._alarm_table.setCellWidget(row, 4, btn)
-            else:
-                for col in range(5):
-                    self._alarm_table.setItem(row, col, QTableWidgetItem("--"))
+            self._fill_alarm_row(row, a)
+
+    def _insert_alarm_row(self, a: Alarm) -> None:
+        keys = [self._row_key(self._alarms[aid]) for aid in self._alarm_rows]
+        row = bisect.bisect_left(keys, self._row_key(a))
+        self._alarm_rows.insert(row, a.id)
+        self._alarm_table.insertRow(row)
+        self._fill_alarm_row(row, a)
+
+    def _remove_alarm_row(self, alarm_id: str) -> None:
+        if alarm_id in self._alarm_rows:
+            row = self._alarm_rows.index(alarm_id)
+            del self._alarm_rows[row]
+            self._alarm_table.removeRow(row)
+
+    def _fill_alarm_row(self, row: int, a: Alarm) -> None:
+        self._alarm_table.setItem(row, 0, QTableWidgetItem(a.id))
+        self._alarm_table.setItem(row, 1, QTableWidgetItem(str(a.severity.value)))
+        self._alarm_table.setItem(row, 2, QTableWidgetItem(f"{a.title}: {a.message}"))
+        btn = QPushButton("Ack")
+        btn.setMinimumHeight(self._tokens.btn_h if self._tokens else 44)
+        btn.clicked.connect(lambda checked, aid=a.id: self._on_ack(aid))
+        self._alarm_table.setCellWidget(row, 4, btn)
+        self._set_alarm_ack(row, a)
+
+    def _set_alarm_ack(self, row: int, a: Alarm) -> None:
+        self._alarm_table.setItem(row, 3, QTableWidgetItem("已确认" if a.ack else "未确认"))
+        btn = self._alarm_table.cellWidget(row, 4)
+        if btn is not None:
+            btn.setEnabled(not a.ack)
 
     def _on_alarm_cell_clicked(self, row: int, col: int) -> None:
         if col == 4:
             return
-        alarms = self._get_filtered_sorted_alarms()
-        if 0 <= row < len(alarms):
-            a = alarms[row]
-            if isinstance(a, Alarm):
+        if 0 <= row < len(self._alarm_rows):
+            a = self._alarms.get(self._alarm_rows[row])
+            if a is not None:
                 dlg = AlarmDetailDialog(a, self)
                 dlg.exec()
 
@@ -379,12 +566,122 @@ class DiagnosticsPage(PageBase):
         self._vd_error_lbl.setVisible(checked)
         self._vd_error_btn.setText("收起最近错误" if checked else "显示最近错误")
 
+    def _update_bus_timer(self, *_args) -> None:
+        if self.isVisible() and self._bus_section.is_expanded():
+            if not self._bus_timer.isActive():
+                self._refresh_bus_metrics()
+                self._bus_timer.start()
+        else:
+            self._bus_timer.stop()
+
+    def _refresh_bus_metrics(self) -> None:
+        if self._alarm_controller is not None:
+            em = self._alarm_controller.get_eval_metrics()
+            self._alarm_eval_lbl.setText(
+                f"告警评估: {em.get('evaluated', 0)} 次，跳过过期快照 {em.get('skipped', 0)} 次，"
+                f"延迟 p50 {_fmt_ms(em.get('lag_p50_ms'))}ms / p95 {_fmt_ms(em.get('lag_p95_ms'))}ms，"
+                f"耗时 p95 {_fmt_ms(em.get('eval_p95_ms'))}ms"
+            )
+        self._refresh_stall_stats()
+        master = _get_modbus_master()
+        if master is None:
+            self._bus_util_lbl.setText("总线占用率: --（Modbus 未启动）")
+            return
+        m = master.get_metrics()
+        self._bus_util_lbl.setText(f"总线占用率: {m.get('bus_utilization', 0.0) * 100:.1f}%")
+        cycle = m.get("cycle") or {}
+        interval = m.get("interval") or {}
+        parts = []
+        for group, c in cycle.items():
+            iv = interval.get(group) or {}
+            parts.append(
+                f"{group}: 周期 p95 {_fmt_ms(c.get('p95_ms'))}ms / 间隔 p50 {_fmt_ms(iv.get('p50_ms'))}ms"
+            )
+        self._bus_cycle_lbl.setText("；".join(parts) or "轮询周期: --")
+        acks = m.get("write_ack") or {}
+        if acks:
+            self._bus_ack_lbl.setText("写入应答 p95: " + "，".join(
+                f"S{sid} {_fmt_ms(h.get('p95_ms'))}ms" for sid, h in acks.items()
+            ))
+        else:
+            self._bus_ack_lbl.setText("写入应答: --")
+        decode = m.get("decode") or {}
+        txns = m.get("transactions") or []
+        self._bus_table.setRowCount(len(txns))
+        for row, tx in enumerate(txns):
+            wire = tx.get("wire") or {}
+            qw = tx.get("queue_wait") or {}
+            dec = decode.get(tx.get("slave")) or {}
+            cells = (
+                str(tx.get("slave", "--")),
+                str(tx.get("fc", "--")),
+                str(wire.get("count", 0)),
+                str(tx.get("errors", 0)),
+                _fmt_ms(qw.get("p95_ms")),
+                _fmt_ms(wire.get("p50_ms")),
+                _fmt_ms(wire.get("p99_ms")),
+                _fmt_ms(dec.get("p95_ms")),
+            )
+            for col, text in enumerate(cells):
+                self._bus_table.setItem(row, col, QTableWidgetItem(text))
+
+    def _refresh_stall_stats(self) -> None:
+        wd = _get_stall_watchdog()
+        if wd is None:
+            self._stall_lbl.setText("主线程卡顿: --（看门狗未启动）")
+            return
+        st = wd.get_stats()
+        counts = "，".join(f"≥{t}ms {c} 次" for t, c in st["counts"].items())
+        lines = [f"主线程卡顿: {counts}，最长 {_fmt_ms(st['longest_ms'])}ms"]
+        for s in wd.top_sites(3):
+            lines.append(f"  {s['site']} ×{s['count']}（累计 {s['total_ms']:.0f}ms，最长 {s['max_ms']:.0f}ms）")
+        self._stall_lbl.setText("\n".join(lines))
+
+    def _refresh_automation_audit(self, *_args) -> None:
+        if not self._automation_section.is_expanded():
+            return
+        automation = _get_automation()
+        if automation is None:
+            self._automation_lbl.setText("自动化未启用")
+            return
+        lines = [f"规则 {len(automation.rules())} 条"]
+        for e in automation.recent_audit(AUTOMATION_AUDIT_ROWS):
+            args = ", ".join(str(a) for a in e.args)
+            lines.append(f"{_format_ts_short(e.ts)} {e.rule_id} {e.action}({args}) {e.result} | {e.reason}")
+        self._automation_lbl.setText("\n".join(lines))
+
+    def _on_dump_log(self) -> None:
+        """飞行记录格式化与落盘在后台线程完成，避免 SD 卡写入卡住界面"""
+        self._log_dump_btn.setEnabled(False)
+        self._log_dump_lbl.setText("正在导出…")
+        threading.Thread(
+            target=lambda: self._log_dumped.emit(_dump_flight_recorder()), name="FlightDump", daemon=True
+        ).start()
+
+    def _on_log_dumped(self, path) -> None:
+        self._log_dump_btn.setEnabled(True)
+        self._log_dump_lbl.setText(f"已导出: {path}" if path else "导出失败（日志未启用或写入错误）")
+
     def showEvent(self, event) -> None:
         super().showEvent(event)
         self._refresh_video_diagnostics()
+        master = _get_modbus_master()
+        if master is not None:
+            master.set_metrics_enabled(True)
+        self._update_bus_timer()
+        self._refresh_history_if_shown()
+        self._refresh_automation_audit()
+
+    def hideEvent(self, event) -> None:
+        super().hideEvent(event)
+        self._bus_timer.stop()
+        master = _get_modbus_master()
+        if master is not None:
+            master.set_metrics_enabled(False)
 
     def _refresh_once(self) -> None:
         if self._app_state:
             self._on_state_changed(self._app_state.get_snapshot())
+            self._alarms = {a.id: a for a in self._app_state.get_alarms()}
         self._refresh_alarm_table()
         self._refresh_video_diagnostics()
@@ -12,6 +12,7 @@ from PyQt6.QtCore import Qt, QTimer
 
 from app.ui.pages.base import PageBase
 from app.ui.layout_profile import LayoutTokens, get_tokens
+from app.ui.widgets.trend_chart import TrendChart
 
 
 def _temp_str(x10: int | None) -> str:
@@ -41,6 +42,8 @@ def _lpg_str(x10: int | None) -> str:
 class EnvironmentPage(PageBase):
     """环境页：室内外两张小卡片并排；气体一张大卡片；离线用横条。布局由 tokens 驱动。"""
 
+    STATE_DOMAINS = ("env", "gas")
+
     def __init__(self, app_state=None):
         super().__init__("环境")
         self._app_state = app_state
@@ -131,6 +134,16 @@ class EnvironmentPage(PageBase):
         gas_ly.addWidget(self._gas_status_label)
         ly.addWidget(gas_card)
 
+        # 趋势：室内温度 / CO，点击曲线切换时间窗
+        trend_card = QFrame(objectName="card")
+        trend_ly = QVBoxLayout(trend_card)
+        trend_ly.setSpacing(g)
+        trend_ly.setContentsMargins(p, p, p, p)
+        trend_ly.addWidget(QLabel("趋势", objectName="accent"))
+        trend_ly.addWidget(TrendChart("env.cabin_temp_x10", "室内", "°C", scale=0.1, tokens=t))
+        trend_ly.addWidget(TrendChart("gas.co_ppm", "CO", "ppm", decimals=0, tokens=t))
+        ly.addWidget(trend_card)
+
         ly.addStretch()
         scroll.setWidget(inner)
         layout.addWidget(scroll)
@@ -149,6 +162,7 @@ class EnvironmentPage(PageBase):
     def _on_state_changed(self, snap) -> None:
         if snap is None:
             return
+        self._update_stale(snap)
         env = snap.env
         gas = snap.gas
         comm = snap.comm
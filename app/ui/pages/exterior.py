@@ -54,6 +54,8 @@ def _awning_limit_str(ai: bool | None, ao: bool | None) -> str:
 class ExteriorPage(PageBase):
     """外设页：顶部状态卡 + 支腿 2×2 + 遮阳棚 2×2 + 外部照明。布局由 tokens 驱动。"""
 
+    STATE_DOMAINS = ("pdu",)
+
     def __init__(self, app_state=None):
         super().__init__("外设")
         self._app_state = app_state
@@ -250,6 +252,7 @@ class ExteriorPage(PageBase):
     def _on_state_changed(self, snap) -> None:
         if snap is None:
             return
+        self._update_stale(snap)
         pd = snap.pdu
         state = pd.pdu_state if pd.pdu_state is not None else 0
         leg_running = state in (LEG_EXTEND_STATE, LEG_RETRACT_STATE)
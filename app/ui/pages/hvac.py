@@ -18,6 +18,7 @@ from PyQt6.QtCore import Qt, QTimer
 from app.ui.pages.base import PageBase
 from app.ui.layout_profile import LayoutTokens, get_tokens
 from app.ui.widgets.long_press_button import LongPressButton
+from app.ui.widgets.trend_chart import TrendChart
 from app.devices.hvac import get_hvac_controller
 from app.devices.webasto import get_webasto_controller
 
@@ -69,6 +70,8 @@ class StatusLight(QLabel):
 class HvacPage(PageBase):
     """空调页：单列 3 卡片 + 可折叠高级参数，布局由 tokens 驱动。"""
 
+    STATE_DOMAINS = ("hvac", "webasto")
+
     def __init__(self, app_state=None):
         super().__init__("空调")
         self._app_state = app_state
@@ -129,6 +132,9 @@ class HvacPage(PageBase):
         card3 = self._build_card3_webasto()
         ly.addWidget(card3)
 
+        # 趋势：舱温 / 压缩机实际 PWM
+        ly.addWidget(self._build_trend_card())
+
         # 可折叠：实际PWM / 故障码详情（WVGA 默认收起）
         self._advanced_widget, self._advanced_btn = self._build_collapsible_advanced()
         ly.addWidget(self._advanced_btn)
@@ -314,6 +320,17 @@ class HvacPage(PageBase):
 
         return card
 
+    def _build_trend_card(self) -> QFrame:
+        t = self._tokens
+        card = QFrame(objectName="card")
+        ly = QVBoxLayout(card)
+        ly.setSpacing(t.gap)
+        ly.setContentsMargins(t.pad_card, t.pad_card, t.pad_card, t.pad_card)
+        ly.addWidget(QLabel("趋势", objectName="accent"))
+        ly.addWidget(TrendChart("env.cabin_temp_x10", "舱温", "°C", scale=0.1, tokens=t))
+        ly.addWidget(TrendChart("hvac.comp_pwm_act_x10", "压缩机 PWM", "%", scale=0.1, tokens=t))
+        return card
+
     def _build_collapsible_advanced(self) -> tuple[QWidget, QPushButton]:
         """可折叠区域：故障码、压缩机/蒸发/冷凝 PWM（默认收起）"""
         t = self._tokens
@@ -380,6 +397,7 @@ class HvacPage(PageBase):
     def _on_state_changed(self, snap) -> None:
         if snap is None:
             return
+        self._update_stale(snap)
         h = snap.hvac
         w = snap.webasto
 
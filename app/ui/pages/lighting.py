@@ -18,13 +18,17 @@ from app.ui.pages.base import PageBase
 from app.ui.layout_profile import LayoutTokens, get_tokens
 from app.ui.widgets import CompactToggleRow, TwoColumnFormRow
 from app.devices.lighting import get_lighting_controller
+from app.services.scene_executor import get_scene_executor
 
 _LIGHTING_SLAVE_ID = 3
+_PDU_SLAVE_ID = 8
 
 
 class LightingPage(PageBase):
     """灯光页：两列开关（CompactToggleRow btn_h）+ 灯带亮度滑条。布局由 tokens 驱动。"""
 
+    STATE_DOMAINS = ("lighting",)
+
     def __init__(self, app_state=None):
         super().__init__("灯光")
         self._app_state = app_state
@@ -106,9 +110,21 @@ class LightingPage(PageBase):
         self._reading_scene_btn = QPushButton("Reading")
         self._reading_scene_btn.setMinimumHeight(bh)
         self._reading_scene_btn.clicked.connect(self._on_reading_scene_clicked)
+        self._camp_scene_btn = QPushButton("Camp")
+        self._camp_scene_btn.setMinimumHeight(bh)
+        self._camp_scene_btn.clicked.connect(self._on_camp_scene_clicked)
         scene_row.addWidget(self._sleep_btn)
         scene_row.addWidget(self._reading_scene_btn)
+        scene_row.addWidget(self._camp_scene_btn)
         card_ly.addLayout(scene_row)
+        self._scene_status = QLabel("")
+        self._scene_status.setObjectName("small")
+        card_ly.addWidget(self._scene_status)
+        # 无场景执行器时退回固件场景脉冲（无驻营场景）
+        executor = get_scene_executor()
+        self._camp_scene_btn.setVisible(executor is not None)
+        if executor is not None:
+            executor.finished.connect(self._on_scene_finished, Qt.ConnectionType.QueuedConnection)
 
         ly.addWidget(card)
         ly.addStretch()
@@ -129,6 +145,7 @@ class LightingPage(PageBase):
     def _on_state_changed(self, snap) -> None:
         if snap is None:
             return
+        self._update_stale(snap)
         L = snap.lighting
         for row, val in [
             (self._main_row, L.main),
@@ -146,14 +163,16 @@ class LightingPage(PageBase):
         self._strip_slider.blockSignals(False)
         self._strip_value_label.setText(str(bright))
 
-    def _ensure_online_then_write(self, slave_id: int) -> bool:
-        """写入前检查从站是否在线，离线则提示并返回 False。"""
+    def _ensure_online_then_write(self, *slave_ids: int) -> bool:
+        """写入前检查从站是否均在线，任一离线则提示并返回 False。"""
         if not self._app_state:
             return True
-        comm = self._app_state.get_snapshot().comm.get(slave_id)
-        if not (comm and comm.online):
-            QMessageBox.warning(self, "设备离线", "设备离线，无法写入。")
-            return False
+        comm_map = self._app_state.get_snapshot().comm
+        for slave_id in slave_ids:
+            comm = comm_map.get(slave_id)
+            if not (comm and comm.online):
+                QMessageBox.warning(self, "设备离线", "设备离线，无法写入。")
+                return False
         return True
 
     def _on_main_clicked(self, checked: bool) -> None:
@@ -195,10 +214,31 @@ class LightingPage(PageBase):
     def _on_sleep_clicked(self) -> None:
         if not self._ensure_online_then_write(_LIGHTING_SLAVE_ID):
             return
+        if self._apply_scene("sleep"):
+            return
         ctrl = get_lighting_controller()
         if ctrl:
             ctrl.scene_sleep_pulse()
 
+    def _apply_scene(self, scene_id: str) -> bool:
+        """经场景执行器应用（跨从站批量写 + 回读确认）；未启用时返回 False"""
+        executor = get_scene_executor()
+        if executor is None or not executor.apply(scene_id):
+            return False
+        self._scene_status.setText("场景执行中…")
+        return True
+
+    def _on_scene_finished(self, result) -> None:
+        if result.error == "no_master":
+            self._scene_status.setText("总线未就绪")
+        elif not result.ok:
+            detail = result.error or "，".join(result.mismatches)
+            self._scene_status.setText(f"场景未完全生效：{detail}")
+        elif result.blocked:
+            self._scene_status.setText(f"已应用，未发出：{'，'.join(result.blocked)}")
+        else:
+            self._scene_status.setText(f"已应用（{result.points} 点 / {result.frames} 帧，{result.elapsed_ms:.0f} ms）")
+
     def set_tokens(self, tokens: LayoutTokens) -> None:
         super().set_tokens(tokens)
         self._tokens = tokens
@@ -222,6 +262,14 @@ class LightingPage(PageBase):
     def _on_reading_scene_clicked(self) -> None:
         if not self._ensure_online_then_write(_LIGHTING_SLAVE_ID):
             return
+        if self._apply_scene("reading"):
+            return
         ctrl = get_lighting_controller()
         if ctrl:
             ctrl.scene_reading_pulse()
+
+    def _on_camp_scene_clicked(self) -> None:
+        # 驻营场景同时写灯光（3 号）与 PDU（8 号）
+        if not self._ensure_online_then_write(_LIGHTING_SLAVE_ID, _PDU_SLAVE_ID):
+            return
+        self._apply_scene("camp")
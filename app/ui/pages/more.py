@@ -127,10 +127,10 @@ class MorePage(PageBase):
         from app.ui.pages.diagnostics import DiagnosticsPage
         from app.ui.pages.settings import SettingsPage
         from app.ui.pages.camera import CameraPage
-        from app.core.config import get_config, save_config
+        from app.core.config import get_config, save_config_async
 
         cfg_get = self._config_getter or get_config
-        save_cfg = self._save_config_fn or save_config
+        save_cfg = self._save_config_fn or save_config_async
         mm_get = self._modbus_master_getter or (lambda: None)
 
         self._sub_widgets = [
@@ -14,6 +14,7 @@ from PyQt6.QtCore import Qt, QTimer
 
 from app.ui.pages.base import PageBase
 from app.ui.widgets.long_press_button import LongPressButton
+from app.ui.widgets.trend_chart import TrendChart
 from app.ui.layout_profile import LayoutTokens, get_tokens
 from app.devices.pdu import get_pdu_controller
 
@@ -24,6 +25,20 @@ SOC_WARN_THRESH = 200   # 20%
 SOC_CRIT_THRESH = 100   # 10%
 
 
+def _get_energy_meter():
+    try:
+        from app.services.energy import get_energy_meter
+        return get_energy_meter()
+    except Exception:
+        return None
+
+
+def _kwh_str(wh: float | None) -> str:
+    if wh is None:
+        return "--.--"
+    return f"{wh / 1000:.2f}"
+
+
 def _soc_str(x10: int | None) -> str:
     if x10 is None:
         return "--.-"
@@ -54,6 +69,8 @@ def _apply_severity(widget: QLabel, severity: str | None) -> None:
 class PowerPage(PageBase):
     """动力页：首屏 3 卡片（电池 | 220V | 冰箱）+ 更多详情折叠。布局由 tokens 驱动。"""
 
+    STATE_DOMAINS = ("power", "pdu")
+
     def __init__(self, app_state=None):
         super().__init__("动力")
         self._app_state = app_state
@@ -100,6 +117,8 @@ class PowerPage(PageBase):
         ly.addWidget(card2)
         card3 = self._build_fridge_card()
         ly.addWidget(card3)
+        ly.addWidget(self._build_energy_card())
+        ly.addWidget(self._build_trend_card())
 
         self._detail_widget, self._detail_btn = self._build_collapsible_detail()
         ly.addWidget(self._detail_btn)
@@ -133,6 +152,8 @@ class PowerPage(PageBase):
                 inner_ly.setContentsMargins(t.pad_page, t.gap, t.pad_page, t.pad_page)
         for w in self.findChildren(LongPressButton):
             w.setMinimumHeight(t.btn_h_key)
+        for w in self.findChildren(TrendChart):
+            w.set_tokens(t)
         for w in self.findChildren(QPushButton):
             if w.isCheckable():
                 txt = w.text()
@@ -243,6 +264,65 @@ class PowerPage(PageBase):
         ly.addLayout(btn_row)
         return card
 
+    def _build_energy_card(self) -> QFrame:
+        """电能累计：今日 / 行程 / 总计（kWh），数值来自 EnergyMeter 的累计量，不扫描历史"""
+        t = self._tokens
+        card = QFrame(objectName="card")
+        ly = QVBoxLayout(card)
+        ly.setSpacing(t.gap)
+        ly.setContentsMargins(t.pad_card, t.pad_card, t.pad_card, t.pad_card)
+        ly.addWidget(QLabel("能耗", objectName="accent"))
+        self._energy_labels: dict[str, QLabel] = {}
+        for bucket, name in (("today", "今日"), ("trip", "行程"), ("lifetime", "总计")):
+            row = QHBoxLayout()
+            row.addWidget(QLabel(f"{name}:"))
+            label = QLabel("--")
+            label.setObjectName("small")
+            row.addWidget(label)
+            row.addStretch()
+            ly.addLayout(row)
+            self._energy_labels[bucket] = label
+        self._trip_reset_btn = LongPressButton("长按清零行程")
+        self._trip_reset_btn.setHoldMs(1000)
+        self._trip_reset_btn.setMinimumHeight(t.btn_h_key)
+        self._trip_reset_btn.confirmed.connect(self._on_trip_reset)
+        ly.addWidget(self._trip_reset_btn)
+        meter = _get_energy_meter()
+        if meter is None:
+            card.setVisible(False)
+        return card
+
+    def _update_energy(self) -> None:
+        meter = _get_energy_meter()
+        if meter is None:
+            return
+        for bucket, wh in meter.totals().items():
+            label = self._energy_labels.get(bucket)
+            if label is None:
+                continue
+            label.setText(
+                f"放电 {_kwh_str(wh.get('batt_discharge'))}  充电 {_kwh_str(wh.get('batt_charge'))}  "
+                f"交流 {_kwh_str(wh.get('inverter_ac'))} kWh"
+            )
+
+    def _on_trip_reset(self) -> None:
+        meter = _get_energy_meter()
+        if meter is not None:
+            meter.reset_trip()
+            self._update_energy()
+
+    def _build_trend_card(self) -> QFrame:
+        """SOC / 电池电流趋势，点击曲线切换时间窗"""
+        t = self._tokens
+        card = QFrame(objectName="card")
+        ly = QVBoxLayout(card)
+        ly.setSpacing(t.gap)
+        ly.setContentsMargins(t.pad_card, t.pad_card, t.pad_card, t.pad_card)
+        ly.addWidget(QLabel("趋势", objectName="accent"))
+        ly.addWidget(TrendChart("power.soc_x10", "SOC", "%", scale=0.1, tokens=t))
+        ly.addWidget(TrendChart("power.batt_i_x100", "电流", "A", scale=0.01, decimals=2, tokens=t))
+        return card
+
     def _build_collapsible_detail(self) -> tuple[QWidget, QPushButton]:
         t = self._tokens
         content = QFrame(objectName="card")
@@ -301,6 +381,7 @@ class PowerPage(PageBase):
     def _on_state_changed(self, snap) -> None:
         if snap is None:
             return
+        self._update_stale(snap)
         p = snap.power
         pd = snap.pdu
         comm4 = snap.comm.get(4)
@@ -372,6 +453,8 @@ class PowerPage(PageBase):
             self._soc_hint.setText("")
             _apply_severity(self._soc_hint, None)
 
+        self._update_energy()
+
     def _ensure_pdu_online(self) -> bool:
         if not self._app_state:
             return True
@@ -20,12 +20,12 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QSizePolicy,
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 
 from app.ui.pages.base import PageBase
 from app.core.config import (
     get_config,
-    save_config,
+    save_config_async,
     load_config,
     AppConfig,
     get_config_path,
@@ -104,6 +104,9 @@ class _CollapsibleSection(QFrame):
 class SettingsPage(PageBase):
     """设置页：显示/语言、时间、通讯、告警阈值、维护。控件值与 config 双向绑定，点击保存才落盘。"""
 
+    # 后台保存结果（写线程发出，排队回主线程）：ok, 成功后执行的回调
+    _save_finished = pyqtSignal(bool, object)
+
     def __init__(
         self,
         config_getter=None,
@@ -114,7 +117,9 @@ class SettingsPage(PageBase):
     ):
         super().__init__("设置")
         self._config_getter = config_getter or get_config
-        self._save_config_fn = save_config_fn or save_config
+        # save_config_fn(config, on_done)：后台保存，on_done(ok, error) 在写线程回调
+        self._save_config_fn = save_config_fn or save_config_async
+        self._save_finished.connect(self._on_save_finished, Qt.ConnectionType.QueuedConnection)
         self._app_state = app_state
         self._modbus_master_getter = modbus_master_getter or (lambda: None)
         self._alarm_controller = alarm_controller
@@ -382,12 +387,22 @@ class SettingsPage(PageBase):
                 _backlight_service.set_percent(pct, min_pct=5)
             except (BacklightError, Exception):
                 pass
-        if self._save_config_fn(self._config):
-            self._screen_brightness_hint.setText("已保存")
-            self._screen_brightness_saved_timer.stop()
-            self._screen_brightness_saved_timer.start(2000)
-        else:
+        self._save(self._config, self._show_brightness_saved)
+
+    def _show_brightness_saved(self) -> None:
+        self._screen_brightness_hint.setText("已保存")
+        self._screen_brightness_saved_timer.stop()
+        self._screen_brightness_saved_timer.start(2000)
+
+    def _save(self, cfg: AppConfig, on_ok=None) -> None:
+        """后台保存配置；完成后在主线程执行 on_ok，失败弹窗。连续保存由写线程合并。"""
+        self._save_config_fn(cfg, lambda ok, _err: self._save_finished.emit(ok, on_ok))
+
+    def _on_save_finished(self, ok: bool, on_ok) -> None:
+        if not ok:
             self._show_save_error_dialog()
+        elif on_ok is not None:
+            on_ok()
 
     def _restore_brightness_hint_text(self) -> None:
         if self._backlight_available:
@@ -422,12 +437,7 @@ class SettingsPage(PageBase):
         self._screen_brightness_slider.setValue(pct)
         self._screen_brightness_label.setText(f"{pct}%")
         self._config.display.brightness_percent = pct
-        if self._save_config_fn(self._config):
-            self._screen_brightness_hint.setText("已保存")
-            self._screen_brightness_saved_timer.stop()
-            self._screen_brightness_saved_timer.start(2000)
-        else:
-            self._show_save_error_dialog()
+        self._save(self._config, self._show_brightness_saved)
 
     def _on_restore_default_brightness(self) -> None:
         """长按确认后：设为默认亮度、写硬件、写 config 并保存。"""
@@ -445,12 +455,12 @@ class SettingsPage(PageBase):
         self._screen_brightness_slider.setValue(default_pct)
         self._screen_brightness_label.setText(f"{default_pct}%")
         cfg.display.brightness_percent = default_pct
-        if self._save_config_fn(cfg):
+
+        def _done() -> None:
             self._screen_brightness_hint.setText(f"已恢复默认亮度：{default_pct}%")
             self._screen_brightness_saved_timer.stop()
             self._screen_brightness_saved_timer.start(2500)
-        else:
-            self._show_save_error_dialog()
+        self._save(cfg, _done)
 
     def _load_from_config(self) -> None:
         """从 config 加载到控件（进入页面时调用）；进入设置页时应用一次保存的亮度（防抖在 backlight 内）。"""
@@ -610,10 +620,10 @@ class SettingsPage(PageBase):
         if r != QMessageBox.StandardButton.Yes:
             return
         self._apply_to_config()
-        if self._save_config_fn(self._config):
-            QMessageBox.information(self, "保存成功", "配置已保存。请手动重启应用使部分设置生效。")
-        else:
-            self._show_save_error_dialog()
+        self._save(
+            self._config,
+            lambda: QMessageBox.information(self, "保存成功", "配置已保存。请手动重启应用使部分设置生效。"),
+        )
 
     def _on_ntp_sync(self) -> None:
         QMessageBox.information(self, "同步时间", "已触发同步请求（TODO）")
@@ -623,7 +633,8 @@ class SettingsPage(PageBase):
             return
         self._apply_to_config()
         self._config.modbus.use_mock = False
-        if self._save_config_fn(self._config):
+
+        def _restart() -> None:
             try:
                 mm = self._modbus_master_getter()
                 if mm and hasattr(mm, "restart_with_config"):
@@ -633,17 +644,16 @@ class SettingsPage(PageBase):
                     QMessageBox.information(self, "重新连接", "配置已保存。Modbus 未就绪或需手动重启应用。")
             except Exception as e:
                 QMessageBox.warning(self, "重新连接", f"配置已保存，但重启连接失败：{e}")
-        else:
-            self._show_save_error_dialog()
+        self._save(self._config, _restart)
 
     def _on_save_thresholds(self) -> None:
         if not self._maintenance_verified:
             return
         self._apply_to_config()
-        if self._save_config_fn(self._config):
-            QMessageBox.information(self, "保存成功", "告警阈值已保存，AlarmEngine 将读取最新阈值生效。")
-        else:
-            self._show_save_error_dialog()
+        self._save(
+            self._config,
+            lambda: QMessageBox.information(self, "保存成功", "告警阈值已保存，AlarmEngine 将读取最新阈值生效。"),
+        )
 
     def _on_export_logs(self) -> None:
         if not self._maintenance_verified:
@@ -700,13 +710,13 @@ class SettingsPage(PageBase):
             if _CONFIG_PATH.exists():
                 shutil.copy2(_CONFIG_PATH, backup)
             default_cfg = AppConfig()
-            if self._save_config_fn(default_cfg):
+
+            def _apply_defaults() -> None:
                 from app.core.config import set_config
                 set_config(default_cfg)
                 self._config = default_cfg
                 self._load_from_config()
                 QMessageBox.information(self, "恢复默认", f"已备份至 {backup}\n默认设置已应用，请手动重启应用。")
-            else:
-                self._show_save_error_dialog()
+            self._save(default_cfg, _apply_defaults)
         except Exception as e:
             QMessageBox.warning(self, "失败", f"恢复默认失败：{e}")
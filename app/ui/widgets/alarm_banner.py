@@ -1,11 +1,11 @@
-"""告警横幅：订阅 AppState.alarms_changed，显示最高严重级 1 条告警 + Ack 按钮。支持 set_tokens。"""
+"""告警横幅：订阅 AppState.alarm_transitions，显示最高严重级 1 条告警 + Ack 按钮。支持 set_tokens。"""
 
 from typing import TYPE_CHECKING
 
 from PyQt6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton
 from PyQt6.QtCore import Qt
 
-from app.core.alarm_engine import Alarm, Severity
+from app.core.alarm_engine import Alarm, AlarmTransition, Severity, TransitionKind
 
 if TYPE_CHECKING:
     from app.core.state import AppState
@@ -28,7 +28,7 @@ def _top_alarm(alarms: list[Alarm]) -> Alarm | None:
 
 
 class AlarmBanner(QFrame):
-    """告警横幅：订阅 alarms_changed，显示最高级 1 条，Ack 调用 AlarmController。支持 set_tokens。"""
+    """告警横幅：按告警变迁增量维护激活告警，显示最高级 1 条，Ack 调用 AlarmController。支持 set_tokens。"""
 
     def __init__(
         self,
@@ -42,6 +42,7 @@ class AlarmBanner(QFrame):
         self._app_state = app_state
         self._alarm_controller = alarm_controller
         self._current: Alarm | None = None
+        self._alarms: dict[str, Alarm] = {a.id: a for a in app_state.get_alarms()}
         self._tokens = tokens
 
         layout = QHBoxLayout(self)
@@ -58,10 +59,11 @@ class AlarmBanner(QFrame):
         self._ack_btn.clicked.connect(self._on_ack)
         layout.addWidget(self._ack_btn)
 
-        app_state.alarms_changed.connect(self._on_alarms_changed)
+        app_state.alarm_transitions.connect(self._on_alarm_transitions)
         if tokens:
             self.setFixedHeight(tokens.btn_h + tokens.gap * 2)
         self.hide()
+        self._show_top()
 
     def _apply_tokens(self, layout: QHBoxLayout) -> None:
         t = self._tokens
@@ -80,21 +82,33 @@ class AlarmBanner(QFrame):
         self._ack_btn.setMinimumHeight(tokens.btn_h)
         self.setFixedHeight(tokens.btn_h + tokens.gap * 2)
 
-    def _on_alarms_changed(self, alarms: list) -> None:
-        top = _top_alarm(alarms)
+    def _on_alarm_transitions(self, transitions: list[AlarmTransition]) -> None:
+        for t in transitions:
+            if t.kind == TransitionKind.CLEARED:
+                self._alarms.pop(t.alarm.id, None)
+            else:
+                self._alarms[t.alarm.id] = t.alarm
+        self._show_top()
+
+    def _show_top(self) -> None:
+        """最高级告警未变化（同一对象）时不触碰控件，避免无谓的重排与 polish"""
+        top = _top_alarm(list(self._alarms.values()))
+        if top is self._current:
+            return
+        prev = self._current
+        self._current = top
         if top is None:
             self.hide()
-            self._current = None
             self.setProperty("severity", "")
             return
-        self._current = top
         raw = f"{top.title}: {top.message}"
         max_len = 60
         self._label.setText(raw if len(raw) <= max_len else raw[: max_len - 3] + "...")
         # QSS 通过 property severity 区分颜色：info(绿) / warn(黄) / critical(红)
-        self.setProperty("severity", top.severity.value.lower())
-        self.style().unpolish(self)
-        self.style().polish(self)
+        if prev is None or prev.severity != top.severity:
+            self.setProperty("severity", top.severity.value.lower())
+            self.style().unpolish(self)
+            self.style().polish(self)
         self._ack_btn.setEnabled(not top.ack)
         self.show()
 
@@ -0,0 +1,166 @@
+"""告警历史：分页查询 AlarmJournal 的 model/view 表格（每页 PAGE_SIZE 行，只持有当前页数据）。支持 set_tokens。"""
+
+import datetime
+from typing import TYPE_CHECKING, Any
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QComboBox,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+if TYPE_CHECKING:
+    from app.services.alarm_journal import AlarmJournal, JournalEvent
+    from app.ui.layout_profile import LayoutTokens
+
+PAGE_SIZE = 50
+
+_KIND_TEXT = {
+    "RAISED": "触发",
+    "CLEARED": "解除",
+    "ACKED": "确认",
+    "ESCALATED": "升级",
+}
+
+
+def _fmt_time(ts: float | None) -> str:
+    if not ts:
+        return "--"
+    try:
+        return datetime.datetime.fromtimestamp(ts).strftime("%m-%d %H:%M:%S")
+    except Exception:
+        return "--"
+
+
+class AlarmHistoryModel(QAbstractTableModel):
+    """当前页的告警事件（时间倒序）；翻页/筛选时整体替换，避免一次载入全部历史"""
+
+    HEADERS = ("时间", "事件", "级别", "ID", "消息")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list["JournalEvent"] = []
+
+    def set_rows(self, rows: list["JournalEvent"]) -> None:
+        self.beginResetModel()
+        self._rows = list(rows)
+        self.endResetModel()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        e = self._rows[index.row()]
+        col = index.column()
+        if col == 0:
+            return _fmt_time(e.ts)
+        if col == 1:
+            return _KIND_TEXT.get(e.kind, e.kind)
+        if col == 2:
+            return e.severity
+        if col == 3:
+            return e.alarm_id
+        return f"{e.title}: {e.message}"
+
+
+class AlarmHistoryView(QWidget):
+    """级别筛选 + 分页表格；journal_getter 返回已注册的 AlarmJournal（未启用时为 None）"""
+
+    def __init__(self, journal_getter, tokens: "LayoutTokens | None" = None, parent=None):
+        super().__init__(parent)
+        self._journal_getter = journal_getter
+        self._page = 0
+        self._total = 0
+        self._severity: str | None = None
+        bh = tokens.btn_h if tokens else 44
+
+        ly = QVBoxLayout(self)
+        ly.setContentsMargins(0, 0, 0, 0)
+        ly.setSpacing(tokens.gap if tokens else 6)
+
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("级别:"))
+        self._severity_combo = QComboBox()
+        self._severity_combo.addItems(["全部", "INFO", "WARN", "CRITICAL"])
+        self._severity_combo.currentTextChanged.connect(self._on_severity_changed)
+        bar.addWidget(self._severity_combo)
+        bar.addStretch()
+        self._prev_btn = QPushButton("上一页")
+        self._prev_btn.setMinimumHeight(bh)
+        self._prev_btn.clicked.connect(lambda: self._go(self._page - 1))
+        bar.addWidget(self._prev_btn)
+        self._page_lbl = QLabel("--")
+        self._page_lbl.setObjectName("small")
+        bar.addWidget(self._page_lbl)
+        self._next_btn = QPushButton("下一页")
+        self._next_btn.setMinimumHeight(bh)
+        self._next_btn.clicked.connect(lambda: self._go(self._page + 1))
+        bar.addWidget(self._next_btn)
+        ly.addLayout(bar)
+
+        self._model = AlarmHistoryModel(self)
+        self._table = QTableView()
+        self._table.setModel(self._model)
+        self._table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self._table.horizontalHeader().setStretchLastSection(True)
+        self._table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self._table.verticalHeader().setVisible(False)
+        self._table.setMinimumHeight(bh * 5)
+        ly.addWidget(self._table)
+
+        self._counts_lbl = QLabel("")
+        self._counts_lbl.setObjectName("small")
+        self._counts_lbl.setWordWrap(True)
+        ly.addWidget(self._counts_lbl)
+
+    def refresh(self) -> None:
+        """重新查询总数与当前页（页码越界时收回到最后一页）"""
+        journal: "AlarmJournal | None" = self._journal_getter()
+        if journal is None:
+            self._model.set_rows([])
+            self._page_lbl.setText("告警日志未启用")
+            self._prev_btn.setEnabled(False)
+            self._next_btn.setEnabled(False)
+            self._counts_lbl.setText("")
+            return
+        self._total = journal.count(severity=self._severity)
+        pages = max(1, (self._total + PAGE_SIZE - 1) // PAGE_SIZE)
+        self._page = max(0, min(self._page, pages - 1))
+        self._model.set_rows(journal.recent(PAGE_SIZE, self._page * PAGE_SIZE, severity=self._severity))
+        self._page_lbl.setText(f"{self._page + 1}/{pages}（共 {self._total} 条）")
+        self._prev_btn.setEnabled(self._page > 0)
+        self._next_btn.setEnabled(self._page < pages - 1)
+        top = list(journal.counts().items())[:5]
+        self._counts_lbl.setText(
+            "累计触发: " + "，".join(f"{aid} ×{n}" for aid, n in top) if top else "累计触发: --"
+        )
+
+    def is_first_page(self) -> bool:
+        return self._page == 0
+
+    def _go(self, page: int) -> None:
+        self._page = max(0, page)
+        self.refresh()
+
+    def _on_severity_changed(self, text: str) -> None:
+        self._severity = None if text == "全部" else text
+        self._page = 0
+        self.refresh()
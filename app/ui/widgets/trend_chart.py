@@ -0,0 +1,226 @@
+"""
+趋势图：QPainter 绘制单个字段的历史曲线（数据来自 TimeSeriesStore）。支持 set_tokens。
+
+- 曲线以数据坐标缓存为 QPainterPath（x 为相对 _origin 的秒数，y 为显示值），绘制时用 QTransform 映射到控件，
+  时间窗滑动只改变换，不重建路径；cosmetic 画笔保证线宽不随缩放变化
+- 页面可见时每 REFRESH_MS 增量取新样本 lineTo 到路径末尾；增量点数超过 max_points 一半或窗口变化时
+  才整体重建（LTTB 降到约每 2 像素一个点）
+- 点击切换时间窗：10 分钟 / 6 小时 / 7 天
+"""
+
+import datetime
+import time
+from typing import TYPE_CHECKING
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, QTimer
+from PyQt6.QtGui import QColor, QPainter, QPainterPath, QPalette, QPen, QTransform
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+if TYPE_CHECKING:
+    from app.ui.layout_profile import LayoutTokens
+
+REFRESH_MS = 1000
+WINDOWS_S = (600.0, 6 * 3600.0, 7 * 24 * 3600.0)
+_WINDOW_TEXT = {600.0: "10分钟", 6 * 3600.0: "6小时", 7 * 24 * 3600.0: "7天"}
+
+_LINE_COLOR = QColor(37, 99, 235)
+_GRID_COLOR = QColor(128, 128, 128, 60)
+
+
+def _get_timeseries_store():
+    try:
+        from app.services.timeseries import get_timeseries_store
+        return get_timeseries_store()
+    except Exception:
+        return None
+
+
+class TrendChart(QWidget):
+    """单字段趋势曲线。key 为 "子域.字段"，显示值 = 原始值 × scale（如 x10 字段传 0.1）。"""
+
+    def __init__(
+        self,
+        key: str,
+        title: str = "",
+        unit: str = "",
+        scale: float = 1.0,
+        decimals: int = 1,
+        window_s: float = WINDOWS_S[0],
+        tokens: "LayoutTokens | None" = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._key = key
+        self._title = title
+        self._unit = unit
+        self._scale = scale
+        self._decimals = decimals
+        self._window_s = window_s
+        self._tokens = tokens
+        self._path = QPainterPath()
+        self._origin = 0.0
+        self._last_t = 0.0
+        self._last_value: float | None = None
+        self._ymin = 0.0
+        self._ymax = 0.0
+        self._n_points = 0
+        self._n_appended = 0
+        self._resolution: str | None = None
+        self._now = time.time()
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self._tick)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.set_tokens(tokens)
+
+    def set_tokens(self, tokens: "LayoutTokens | None") -> None:
+        self._tokens = tokens
+        self.setFixedHeight((tokens.btn_h if tokens else 44) * 3)
+
+    def max_points(self) -> int:
+        return max(16, self.width() // 2)
+
+    def window_s(self) -> float:
+        return self._window_s
+
+    def set_window(self, window_s: float) -> None:
+        self._window_s = window_s
+        self.rebuild()
+
+    # ---------- 数据 ----------
+
+    def rebuild(self) -> None:
+        """从存储重新取整个时间窗（LTTB 降采样）并重建路径"""
+        self._path = QPainterPath()
+        self._n_points = 0
+        self._n_appended = 0
+        self._last_t = 0.0
+        self._now = time.time()
+        self._origin = self._now
+        store = _get_timeseries_store()
+        if store is not None:
+            try:
+                s = store.query_range(self._key, self._now - self._window_s, self._now, self.max_points(), now=self._now)
+            except (KeyError, ValueError):
+                s = None
+            if s is not None:
+                self._resolution = s.resolution
+                for t, v in zip(s.ts, s.values):
+                    self._add_point(t, v * self._scale)
+        self._n_appended = 0
+        self.update()
+
+    def append(self, t: float, value: float) -> None:
+        """追加一个显示值（增量，不重建路径）"""
+        if t <= self._last_t:
+            return
+        self._add_point(t, value)
+        self._n_appended += 1
+        self.update()
+
+    def _add_point(self, t: float, y: float) -> None:
+        p = QPointF(t - self._origin, y)
+        if self._n_points == 0:
+            self._path.moveTo(p)
+            self._ymin = self._ymax = y
+        else:
+            self._path.lineTo(p)
+            self._ymin = min(self._ymin, y)
+            self._ymax = max(self._ymax, y)
+        self._n_points += 1
+        self._last_t = t
+        self._last_value = y
+
+    def _tick(self) -> None:
+        self._now = time.time()
+        if self._n_appended > self.max_points() // 2 or self._n_points == 0:
+            self.rebuild()
+            return
+        store = _get_timeseries_store()
+        if store is None:
+            return
+        try:
+            s = store.query_range(
+                self._key, self._last_t, self._now, self.max_points(), now=self._now, resolution=self._resolution
+            )
+        except (KeyError, ValueError):
+            return
+        for t, v in zip(s.ts, s.values):
+            if t > self._last_t:
+                self.append(t, v * self._scale)
+        self.update()
+
+    # ---------- 绘制 ----------
+
+    def paintEvent(self, event) -> None:
+        painter = QPainter(self)
+        fm = painter.fontMetrics()
+        text_color = self.palette().color(QPalette.ColorRole.WindowText)
+        pad = self._tokens.gap if self._tokens else 4
+        label_h = fm.height()
+        plot = QRectF(pad, label_h + pad, self.width() - 2 * pad, self.height() - 2 * label_h - 2 * pad)
+
+        painter.setPen(QPen(_GRID_COLOR, 1))
+        painter.drawRect(plot)
+        painter.setPen(text_color)
+        cur = "--" if self._last_value is None else f"{self._last_value:.{self._decimals}f}"
+        painter.drawText(QRectF(pad, 0, self.width() - 2 * pad, label_h), Qt.AlignmentFlag.AlignLeft,
+                         f"{self._title} {cur} {self._unit}".strip())
+        painter.drawText(QRectF(pad, 0, self.width() - 2 * pad, label_h), Qt.AlignmentFlag.AlignRight,
+                         _WINDOW_TEXT.get(self._window_s, f"{self._window_s:.0f}s"))
+
+        if self._n_points > 0 and plot.width() > 0 and plot.height() > 0:
+            ymin, ymax = self._ymin, self._ymax
+            if ymax - ymin < 1e-9:
+                ymin, ymax = ymin - 1, ymax + 1
+            margin = (ymax - ymin) * 0.05
+            ymin, ymax = ymin - margin, ymax + margin
+            x0 = self._now - self._window_s - self._origin
+            sx = plot.width() / self._window_s
+            sy = plot.height() / (ymax - ymin)
+            # 数据坐标 -> 控件坐标：x 按时间窗平移缩放，y 翻转
+            transform = QTransform(sx, 0, 0, -sy, plot.left() - x0 * sx, plot.bottom() + ymin * sy)
+            painter.save()
+            painter.setClipRect(plot)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setTransform(transform)
+            pen = QPen(_LINE_COLOR, 2)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.drawPath(self._path)
+            painter.restore()
+
+            painter.setPen(text_color)
+            bottom = QRectF(pad, plot.bottom(), self.width() - 2 * pad, label_h)
+            painter.drawText(bottom, Qt.AlignmentFlag.AlignLeft,
+                             f"{self._ymin:.{self._decimals}f} ~ {self._ymax:.{self._decimals}f}")
+            painter.drawText(bottom, Qt.AlignmentFlag.AlignRight,
+                             datetime.datetime.fromtimestamp(self._now).strftime("%H:%M:%S"))
+        else:
+            painter.setPen(text_color)
+            painter.drawText(plot, Qt.AlignmentFlag.AlignCenter, "暂无数据")
+        painter.end()
+
+    # ---------- 交互与可见性 ----------
+
+    def mousePressEvent(self, event) -> None:
+        if event.button() == Qt.MouseButton.LeftButton:
+            i = WINDOWS_S.index(self._window_s) if self._window_s in WINDOWS_S else -1
+            self.set_window(WINDOWS_S[(i + 1) % len(WINDOWS_S)])
+            event.accept()
+            return
+        super().mousePressEvent(event)
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        self.rebuild()
+        self._timer.start()
+
+    def hideEvent(self, event) -> None:
+        super().hideEvent(event)
+        self._timer.stop()
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        # 宽度变化改变 max_points，下一个 tick 重建
+        self._n_appended = self.max_points()
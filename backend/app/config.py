@@ -11,3 +11,6 @@ DATABASE_URL = os.getenv(
 
 # 报表存储路径
 REPORTS_DIR = os.getenv("REPORTS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "reports"))
+
+# 车端遥测上行：非空时 /telemetry 接口须携带 Authorization: Bearer <token>
+TELEMETRY_TOKEN = os.getenv("TELEMETRY_TOKEN", "")
@@ -4,7 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from .config import VERSION
 from .database import engine, Base, get_db
 from .models import AppJobRun
-from .routers import health, runs, reports
+from .routers import health, runs, reports, telemetry
 
 
 app = FastAPI(title="Crawler API", version=VERSION)
@@ -20,6 +20,7 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(runs.router)
 app.include_router(reports.router)
+app.include_router(telemetry.router)
 
 
 @app.exception_handler(HTTPException)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Index, UniqueConstraint
 from .database import Base
 
 
@@ -12,3 +12,49 @@ class AppJobRun(Base):
     started_at = Column(DateTime(timezone=True), nullable=True)
     finished_at = Column(DateTime(timezone=True), nullable=True)
     message = Column(Text, nullable=True)
+
+
+class TelemetryChunk(Base):
+    """车端上行分块台账：(vehicle_id, stream_id, seq) 唯一，用于幂等去重与续传游标"""
+    __tablename__ = "telemetry_chunk"
+    __table_args__ = (UniqueConstraint("vehicle_id", "stream_id", "seq", name="uq_telemetry_chunk"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    vehicle_id = Column(String(64), nullable=False, index=True)
+    stream_id = Column(String(32), nullable=False)
+    seq = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    events = Column(Integer, nullable=False, default=0)
+    t0 = Column(DateTime(timezone=True), nullable=True)
+    t1 = Column(DateTime(timezone=True), nullable=True)
+    received_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class TelemetrySample(Base):
+    """遥测采样：字段为 "子域.字段"（如 power.soc_x10），值为原始单位"""
+    __tablename__ = "telemetry_sample"
+    __table_args__ = (Index("ix_telemetry_sample_vehicle_field_ts", "vehicle_id", "field", "ts"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    vehicle_id = Column(String(64), nullable=False)
+    ts = Column(DateTime(timezone=True), nullable=False)
+    field = Column(String(64), nullable=False)
+    value = Column(Float, nullable=False)
+
+
+class TelemetryEvent(Base):
+    """告警变迁（RAISED/CLEARED/ACKED/ESCALATED）"""
+    __tablename__ = "telemetry_event"
+    __table_args__ = (Index("ix_telemetry_event_vehicle_ts", "vehicle_id", "ts"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    vehicle_id = Column(String(64), nullable=False)
+    ts = Column(DateTime(timezone=True), nullable=False)
+    alarm_id = Column(String(64), nullable=False)
+    kind = Column(String(16), nullable=False)
+    severity = Column(String(16), nullable=True)
+    title = Column(String(255), nullable=True)
+    message = Column(Text, nullable=True)
+    source_slave = Column(Integer, nullable=True)
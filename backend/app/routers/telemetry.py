@@ -0,0 +1,157 @@
+"""
+车端遥测上行（见 HMI app/services/uplink.py）：分块批量接收与续传游标。
+
+分块为 zlib 压缩的 JSON，请求头 X-Chunk-Sha256 为请求体摘要。(vehicle_id, stream_id, seq) 幂等：
+相同内容重复提交返回 duplicate=true 不再入库；同序号不同内容返回 409。
+"""
+import hashlib
+import hmac
+import json
+import zlib
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Request
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import TELEMETRY_TOKEN
+from ..database import get_db
+from ..models import TelemetryChunk
+from ..services import get_telemetry_chunk, get_telemetry_cursor, ingest_telemetry_chunk
+
+router = APIRouter(prefix="/telemetry", tags=["telemetry"])
+
+FORMAT_VERSION = 1
+# 压缩体与解压后的大小上限
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+MAX_RAW_BYTES = 32 * 1024 * 1024
+
+ID_PATTERN = r"^[A-Za-z0-9_.\-]{1,64}$"
+STREAM_PATTERN = r"^[0-9a-f]{1,32}$"
+
+
+def _check_token(authorization: str | None = Header(None)):
+    if not TELEMETRY_TOKEN:
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip(), TELEMETRY_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid telemetry token")
+
+
+def _ts(v) -> datetime:
+    return datetime.fromtimestamp(float(v), tz=timezone.utc)
+
+
+def _decode_chunk(body: bytes) -> dict:
+    d = zlib.decompressobj()
+    try:
+        raw = d.decompress(body, MAX_RAW_BYTES)
+    except zlib.error as e:
+        raise HTTPException(status_code=400, detail=f"Bad chunk encoding: {e}")
+    if d.unconsumed_tail:
+        raise HTTPException(status_code=413, detail="Chunk too large after decompression")
+    try:
+        doc = json.loads(raw)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad chunk JSON: {e}")
+    if not isinstance(doc, dict) or doc.get("v") != FORMAT_VERSION:
+        raise HTTPException(status_code=400, detail="Unsupported chunk version")
+    return doc
+
+
+def _chunk_rows(vehicle_id: str, doc: dict) -> tuple[list[dict], list[dict]]:
+    """分块 -> 采样行、事件行（批量 insert 参数）"""
+    try:
+        keys = [str(k) for k in doc.get("keys") or []]
+        samples = []
+        for ts, pairs in doc.get("rows") or []:
+            t = _ts(ts)
+            for i, v in pairs:
+                samples.append({"vehicle_id": vehicle_id, "ts": t, "field": keys[i][:64], "value": float(v)})
+        events = []
+        for e in doc.get("events") or []:
+            events.append({
+                "vehicle_id": vehicle_id,
+                "ts": _ts(e["ts"]),
+                "alarm_id": str(e["id"])[:64],
+                "kind": str(e["kind"])[:16],
+                "severity": str(e.get("severity") or "")[:16] or None,
+                "title": str(e.get("title") or "")[:255] or None,
+                "message": e.get("message"),
+                "source_slave": e.get("slave"),
+            })
+    except (KeyError, IndexError, TypeError, ValueError, OverflowError, OSError) as e:
+        raise HTTPException(status_code=422, detail=f"Bad chunk content: {e!r}")
+    return samples, events
+
+
+def _duplicate_or_conflict(existing: TelemetryChunk, sha: str, seq: int) -> dict:
+    if existing.sha256 != sha:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Chunk seq already used with different content", "seq": seq},
+        )
+    return {"ok": True, "data": {"seq": seq, "duplicate": True}}
+
+
+@router.post("/{vehicle_id}/streams/{stream_id}/chunks/{seq}", dependencies=[Depends(_check_token)])
+async def ingest_chunk(
+    request: Request,
+    vehicle_id: str = Path(..., pattern=ID_PATTERN),
+    stream_id: str = Path(..., pattern=STREAM_PATTERN),
+    seq: int = Path(..., ge=1),
+    x_chunk_sha256: str = Header(...),
+    db: AsyncSession = Depends(get_db),
+):
+    if int(request.headers.get("content-length") or 0) > MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+    body = await request.body()
+    if len(body) > MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=413, detail="Chunk too large")
+    sha = hashlib.sha256(body).hexdigest()
+    if not hmac.compare_digest(sha, x_chunk_sha256.strip().lower()):
+        raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+
+    existing = await get_telemetry_chunk(db, vehicle_id, stream_id, seq)
+    if existing:
+        return _duplicate_or_conflict(existing, sha, seq)
+
+    doc = _decode_chunk(body)
+    if doc.get("seq") != seq or doc.get("stream") != stream_id:
+        raise HTTPException(status_code=400, detail="Chunk header does not match URL")
+    samples, events = _chunk_rows(vehicle_id, doc)
+    chunk = TelemetryChunk(
+        vehicle_id=vehicle_id,
+        stream_id=stream_id,
+        seq=seq,
+        sha256=sha,
+        size=len(body),
+        samples=len(samples),
+        events=len(events),
+        t0=_ts(doc["t0"]) if doc.get("t0") else None,
+        t1=_ts(doc["t1"]) if doc.get("t1") else None,
+        received_at=datetime.now(timezone.utc),
+    )
+    try:
+        await ingest_telemetry_chunk(db, chunk, samples, events)
+    except IntegrityError:
+        # 并发重复提交：以先入库者为准
+        await db.rollback()
+        existing = await get_telemetry_chunk(db, vehicle_id, stream_id, seq)
+        if existing is None:
+            raise
+        return _duplicate_or_conflict(existing, sha, seq)
+    return {
+        "ok": True,
+        "data": {"seq": seq, "duplicate": False, "samples": len(samples), "events": len(events)},
+    }
+
+
+@router.get("/{vehicle_id}/streams/{stream_id}/cursor", dependencies=[Depends(_check_token)])
+async def stream_cursor(
+    vehicle_id: str = Path(..., pattern=ID_PATTERN),
+    stream_id: str = Path(..., pattern=STREAM_PATTERN),
+    db: AsyncSession = Depends(get_db),
+):
+    last_seq = await get_telemetry_cursor(db, vehicle_id, stream_id)
+    return {"ok": True, "data": {"vehicle_id": vehicle_id, "stream_id": stream_id, "last_seq": last_seq}}
@@ -1,6 +1,6 @@
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from .models import AppJobRun
+from .models import AppJobRun, TelemetryChunk, TelemetrySample, TelemetryEvent
 
 
 async def get_runs_list(
@@ -24,3 +24,37 @@ async def get_run_by_id(db: AsyncSession, run_id: str) -> AppJobRun | None:
     q = select(AppJobRun).where(AppJobRun.run_id == run_id)
     result = await db.execute(q)
     return result.scalar_one_or_none()
+
+
+async def get_telemetry_chunk(
+    db: AsyncSession, vehicle_id: str, stream_id: str, seq: int
+) -> TelemetryChunk | None:
+    q = select(TelemetryChunk).where(
+        TelemetryChunk.vehicle_id == vehicle_id,
+        TelemetryChunk.stream_id == stream_id,
+        TelemetryChunk.seq == seq,
+    )
+    result = await db.execute(q)
+    return result.scalar_one_or_none()
+
+
+async def get_telemetry_cursor(db: AsyncSession, vehicle_id: str, stream_id: str) -> int:
+    """已收到的最大序号（无则 0）；车端按序上传，不大于该序号的分块均已处理"""
+    q = select(func.max(TelemetryChunk.seq)).where(
+        TelemetryChunk.vehicle_id == vehicle_id,
+        TelemetryChunk.stream_id == stream_id,
+    )
+    return (await db.execute(q)).scalar() or 0
+
+
+async def ingest_telemetry_chunk(
+    db: AsyncSession, chunk: TelemetryChunk, samples: list[dict], events: list[dict]
+) -> None:
+    """台账、采样、事件在同一事务内写入；台账唯一约束冲突（并发重复提交）时抛 IntegrityError"""
+    db.add(chunk)
+    await db.flush()
+    if samples:
+        await db.execute(insert(TelemetrySample), samples)
+    if events:
+        await db.execute(insert(TelemetryEvent), events)
+    await db.commit()
@@ -0,0 +1,148 @@
+"""
+车端遥测上行端到端自测：临时 SQLite + 本地 uvicorn，HMI 侧 TelemetryUplink 先离线排队并重启，再联网续传，
+最后校验重复提交幂等、同序号不同内容 409、续传游标与入库行数。
+
+用法（仓库根目录）: python backend/scripts/uplink_e2e.py
+"""
+import hashlib
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# HMI 与 backend 的包名都是 app：本脚本只导入 HMI 侧，backend 在子进程中运行
+sys.path.insert(0, str(BACKEND_DIR.parent))
+
+from app.services.uplink import CHUNK_SUFFIX, TelemetryUplink, encode_chunk  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until(cond, timeout: float, what: str) -> None:
+    deadline = time.monotonic() + timeout
+    while not cond():
+        if time.monotonic() > deadline:
+            raise SystemExit(f"超时: {what}")
+        time.sleep(0.1)
+
+
+def _http(method: str, url: str, data: bytes | None = None, headers: dict | None = None) -> tuple[int, dict]:
+    req = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _server_up(base: str) -> bool:
+    try:
+        return _http("GET", f"{base}/health")[0] == 200
+    except OSError:
+        return False
+
+
+def _alarm(i: int, ts: float) -> SimpleNamespace:
+    alarm = SimpleNamespace(
+        id=f"E2E_{i}", severity="WARN", title=f"测试告警 {i}", message="e2e", source_slave=8,
+    )
+    return SimpleNamespace(kind="RAISED", alarm=alarm, ts=ts)
+
+
+def main() -> int:
+    tmp = Path(tempfile.mkdtemp(prefix="uplink_e2e_"))
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    vehicle = "e2e-van"
+
+    # 1. 离线：服务未启动，分块在本地排队
+    uplink = TelemetryUplink(tmp / "uplink", base, vehicle, sample_interval_s=0.1, chunk_interval_s=0.5)
+    for i in range(30):
+        now = time.time()
+        uplink.add_batch(now, {"power": {"soc_x10": 800 - i, "batt_p_w": -300 - (i % 3)}})
+        if i % 10 == 0:
+            uplink.record([_alarm(i, now)])
+        time.sleep(0.1)
+    _wait_until(lambda: uplink.status()["queued_chunks"] >= 3, 10, "离线排队")
+    offline = uplink.status()
+    print(f"离线排队: {offline['queued_chunks']} 块 {offline['queued_bytes']} 字节, online={offline['online']}")
+    stream = offline["stream"]
+    uplink.close()
+    # 重启：从 state.json 与队列目录恢复流 id 与序号
+    uplink = TelemetryUplink(tmp / "uplink", base, vehicle, sample_interval_s=0.1, chunk_interval_s=0.5)
+    _wait_until(lambda: uplink.status()["stream"] == stream, 5, "重启恢复")
+    assert uplink.status()["queued_chunks"] >= offline["queued_chunks"]
+
+    # 2. 启动本地 uvicorn 后续传
+    env = dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{tmp / 'e2e.db'}")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until(lambda: _server_up(base), 20, "uvicorn 启动")
+        uplink.set_endpoint(base, "")
+        _wait_until(lambda: uplink.status()["queued_chunks"] == 0, 20, "续传完成")
+        uplink.close()
+        st = uplink.status()
+        print(f"续传完成: uploaded={st['uploaded']} duplicates={st['duplicates']} rejected={st['rejected']}")
+        assert st["rejected"] == 0 and st["dropped"] == 0
+
+        # 3. 幂等：同序号不同内容为 409，同一块重传为 duplicate，摘要不符为 400
+        seq1 = encode_chunk(vehicle, stream, 1, [(time.time(), {"power.soc_x10": 1.0})], [])
+        url = f"{base}/telemetry/{vehicle}/streams/{stream}/chunks/1"
+        status, body = _http("POST", url, seq1, {"X-Chunk-Sha256": hashlib.sha256(seq1).hexdigest()})
+        print(f"同序号不同内容: HTTP {status} {body.get('message')}")
+        assert status == 409
+        # 上传成功的本地块已删除，以新序号的块验证重传
+        seq_new = st["uploaded"] + 1
+        data = encode_chunk(vehicle, stream, seq_new, [(1.0e9, {"power.soc_x10": 500.0})], [])
+        h = {"X-Chunk-Sha256": hashlib.sha256(data).hexdigest()}
+        url = f"{base}/telemetry/{vehicle}/streams/{stream}/chunks/{seq_new}"
+        first = _http("POST", url, data, h)
+        again = _http("POST", url, data, h)
+        print(f"重复提交: 首次 {first[1]['data']} 再次 {again[1]['data']}")
+        assert first[0] == 200 and not first[1]["data"]["duplicate"]
+        assert again[0] == 200 and again[1]["data"]["duplicate"]
+        bad = _http("POST", url, data, {"X-Chunk-Sha256": "0" * 64})
+        assert bad[0] == 400
+
+        status, body = _http("GET", f"{base}/telemetry/{vehicle}/streams/{stream}/cursor")
+        print(f"游标: {body['data']}")
+        assert body["data"]["last_seq"] == seq_new
+
+        # 4. 入库行数与分块台账一致
+        db = sqlite3.connect(tmp / "e2e.db")
+        chunks, samples, events = db.execute(
+            "SELECT COUNT(*), SUM(samples), SUM(events) FROM telemetry_chunk WHERE vehicle_id = ?", (vehicle,)
+        ).fetchone()
+        rows = db.execute("SELECT COUNT(*) FROM telemetry_sample").fetchone()[0]
+        evs = db.execute("SELECT COUNT(*) FROM telemetry_event").fetchone()[0]
+        db.close()
+        print(f"入库: {chunks} 块, 采样 {rows} 行, 事件 {evs} 条")
+        assert (rows, evs) == (samples, events) and evs == 3
+        assert not any((tmp / "uplink" / "queue").glob("*" + CHUNK_SUFFIX))
+    finally:
+        server.terminate()
+        server.wait(10)
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
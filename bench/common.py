@@ -0,0 +1,67 @@
+"""基准测试公共工具：样本统计、运行环境信息、JSON 结果输出"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+def summarize(samples_ms: list[float]) -> dict[str, Any]:
+    """精确百分位（排序后取秩），样本为空时各项为 None"""
+    n = len(samples_ms)
+    if n == 0:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    s = sorted(samples_ms)
+
+    def pct(q: float) -> float:
+        return s[min(n - 1, max(0, int(round(q * n)) - 1))]
+
+    return {
+        "count": n,
+        "mean_ms": round(sum(s) / n, 4),
+        "p50_ms": round(pct(0.50), 4),
+        "p95_ms": round(pct(0.95), 4),
+        "p99_ms": round(pct(0.99), 4),
+        "max_ms": round(s[-1], 4),
+    }
+
+
+def git_rev() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, timeout=5,
+        )
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def env_info() -> dict[str, Any]:
+    return {
+        "git_rev": git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_result(result: dict[str, Any], out_path: str | None) -> None:
+    """写 JSON 结果；out_path 为空时打印到 stdout"""
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if out_path:
+        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(out_path).write_text(text + "\n", encoding="utf-8")
+        print(f"结果已写入 {out_path}", file=sys.stderr)
+    else:
+        print(text)
@@ -0,0 +1,72 @@
+"""
+比较两次基准结果 JSON（core_bench / ui_bench 输出），打印差异并在回归超过阈值时返回非零。
+
+用法：
+    python -m bench.compare bench_results/base.json bench_results/head.json --threshold 10
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+# 越大越好的指标；其余（耗时类）越小越好
+_HIGHER_IS_BETTER = {"updates_per_s"}
+
+
+def _flatten(d: Any, prefix: str = "") -> dict[str, float]:
+    out: dict[str, float] = {}
+    if isinstance(d, dict):
+        for k, v in d.items():
+            out.update(_flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+    elif isinstance(d, (int, float)) and not isinstance(d, bool):
+        out[prefix] = float(d)
+    return out
+
+
+def _comparable(key: str) -> bool:
+    """只比较吞吐与耗时分位数（p50/p95/p99、每次更新 CPU），忽略计数与环境信息"""
+    leaf = key.rsplit(".", 1)[-1]
+    return leaf in ("updates_per_s", "cpu_ms_per_update", "p50_ms", "p95_ms", "p99_ms")
+
+
+def compare(base: dict, head: dict, threshold_pct: float) -> tuple[list[tuple[str, float, float, float]], list[str]]:
+    fb = {k: v for k, v in _flatten(base).items() if _comparable(k)}
+    fh = {k: v for k, v in _flatten(head).items() if _comparable(k)}
+    rows: list[tuple[str, float, float, float]] = []
+    regressions: list[str] = []
+    for key in sorted(set(fb) & set(fh)):
+        b, h = fb[key], fh[key]
+        if b == 0:
+            continue
+        delta = (h - b) / b * 100.0
+        rows.append((key, b, h, delta))
+        worse = -delta if key.rsplit(".", 1)[-1] in _HIGHER_IS_BETTER else delta
+        if worse > threshold_pct:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="比较两次基准结果")
+    ap.add_argument("base")
+    ap.add_argument("head")
+    ap.add_argument("--threshold", type=float, default=10.0, help="回归阈值（百分比）")
+    args = ap.parse_args(argv)
+    base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    head = json.loads(Path(args.head).read_text(encoding="utf-8"))
+    print(f"base: {base.get('env', {}).get('git_rev', '?')}  head: {head.get('env', {}).get('git_rev', '?')}")
+    rows, regressions = compare(base, head, args.threshold)
+    width = max((len(r[0]) for r in rows), default=10)
+    for key, b, h, delta in rows:
+        mark = "  <-- 回归" if key in regressions else ""
+        print(f"{key:<{width}}  {b:>10.3f}  {h:>10.3f}  {delta:>+7.1f}%{mark}")
+    if regressions:
+        print(f"\n{len(regressions)} 项回归超过 {args.threshold:.0f}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
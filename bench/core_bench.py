@@ -0,0 +1,212 @@
+"""
+核心链路基准（无显示）：Transport -> ModbusMaster -> 设备解析 -> StateUpdateBridge -> AppState.update -> AlarmController。
+
+用 QCoreApplication 驱动真实的 ModbusMaster / AppState / AlarmController，统计：
+- 端到端吞吐（updates/s）与每次更新的 CPU 时间（进程 CPU 时间 / 更新数）
+- 端到端延迟（后台线程发出更新 -> 主线程 AppState.update 完成）
+- AppState.update、_copy_snapshot、AlarmEngine.evaluate、各从站解析器的耗时分位数
+
+用法：
+    python -m bench.core_bench --duration 10 --out bench_results/core.json
+    python -m bench.core_bench --transport sim --latency-ms 3   # 带真实串口时序
+"""
+
+import argparse
+import collections
+import logging
+import sys
+import threading
+import time
+from typing import Any
+
+from bench.common import env_info, summarize, write_result
+
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+import app.core.state as state_mod
+from app.core.alarm_controller import AlarmController
+from app.core.state import AppState
+from app.devices import apply_device_parsers
+from app.main import StateUpdateBridge, _seed_mock_transport
+from app.services.modbus_master import MockTransport, ModbusMaster, load_spec
+from app.services.sim_transport import SimTransport, expand_spec
+
+
+class _Samples:
+    """线程安全的耗时样本收集（list.append 在 GIL 下原子）"""
+
+    def __init__(self) -> None:
+        self.data: dict[str, list[float]] = collections.defaultdict(list)
+
+    def add(self, name: str, ms: float) -> None:
+        self.data[name].append(ms)
+
+    def timed(self, name: str, fn):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(name, (time.perf_counter() - t0) * 1000)
+        return wrapper
+
+
+def _make_transport(args: argparse.Namespace, spec: dict) -> Any:
+    if args.transport == "mock":
+        t = MockTransport()
+        _seed_mock_transport(t)
+        return t
+    if args.transport.startswith("replay:"):
+        from app.services.wire_capture import ReplayTransport
+        return ReplayTransport(args.transport.split(":", 1)[1], realtime=False, loop=True)
+    # sim：latency 为 0 时不模拟总线时序，测纯软件吞吐
+    t = SimTransport(
+        spec=spec,
+        latency_ms=args.latency_ms,
+        baudrate=args.baudrate,
+        bus_time_scale=1.0 if args.latency_ms > 0 else 0.0,
+        speed=args.sim_speed,
+        seed=1,
+    )
+    _seed_mock_transport(t)
+    return t
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    # app.main 导入时按 DEBUG 配置了根日志，基准中日志 IO 会淹没被测耗时
+    logging.getLogger().setLevel(getattr(logging, args.log_level.upper(), logging.WARNING))
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    samples = _Samples()
+
+    spec = load_spec() or {}
+    if args.slaves > len(spec):
+        spec = expand_spec(spec, args.slaves)
+
+    # 函数级计时：_copy_snapshot 为模块全局，AppState 方法调用时按名查找，替换模块属性即可
+    orig_copy = state_mod._copy_snapshot
+    state_mod._copy_snapshot = samples.timed("copy_snapshot", orig_copy)
+
+    app_state = AppState()
+    app_state.update = samples.timed("appstate_update", app_state.update)
+    alarm_controller = AlarmController(app_state, spec)
+    engine = alarm_controller._engine
+    engine.evaluate = samples.timed("alarm_evaluate", engine.evaluate)
+
+    def timed_parser(slave_id: str, raw: dict, spec_: dict) -> dict:
+        t0 = time.perf_counter()
+        out = apply_device_parsers(slave_id, raw, spec_)
+        samples.add(f"parse_slave{int(slave_id):02d}", (time.perf_counter() - t0) * 1000)
+        return out
+
+    # 端到端：后台线程 emit 时入队时间戳，主线程 update 完成后出队（队列连接保证 FIFO）
+    inflight: collections.deque[float] = collections.deque()
+    counters = {"updates": 0}
+
+    class BenchBridge(StateUpdateBridge):
+        def _on_updates_ready(self, d):
+            self._app_state.update(**d)
+            t_emit = inflight.popleft() if inflight else None
+            if t_emit is not None:
+                samples.add("end_to_end", (time.perf_counter() - t_emit) * 1000)
+            counters["updates"] += 1
+
+    bridge = BenchBridge(app_state)
+    bridge.state_updates_ready.connect(bridge._on_updates_ready)
+
+    scale = args.poll_scale
+    master = ModbusMaster(
+        transport=_make_transport(args, spec),
+        app_state=app_state,
+        poll_ms={
+            "FAST_MS": int(300 * scale),
+            "SLOW_MS": int(1000 * scale),
+            "VERY_SLOW_MS": int(5000 * scale),
+        },
+        device_parser=timed_parser,
+        update_bridge=bridge,
+        spec=spec,
+        idle_wait_s=args.idle_wait_ms / 1000.0,
+    )
+    orig_apply = master._apply_update
+
+    def stamped_apply(**kwargs):
+        inflight.append(time.perf_counter())
+        orig_apply(**kwargs)
+
+    master._apply_update = stamped_apply
+
+    # 预热后清零，只统计稳态
+    measure: dict[str, float] = {}
+
+    def start_measure() -> None:
+        samples.data.clear()
+        inflight.clear()
+        counters["updates"] = 0
+        measure["wall0"] = time.perf_counter()
+        measure["cpu0"] = time.process_time()
+        QTimer.singleShot(int(args.duration * 1000), stop_measure)
+
+    def stop_measure() -> None:
+        measure["wall1"] = time.perf_counter()
+        measure["cpu1"] = time.process_time()
+        measure["updates"] = counters["updates"]
+        app.quit()
+
+    master.start()
+    QTimer.singleShot(int(args.warmup * 1000), start_measure)
+    app.exec()
+    master.stop()
+    eval_metrics = alarm_controller.get_eval_metrics()
+    alarm_controller._thread.quit()
+    alarm_controller._thread.wait(2000)
+    state_mod._copy_snapshot = orig_copy
+
+    wall = measure["wall1"] - measure["wall0"]
+    cpu = measure["cpu1"] - measure["cpu0"]
+    n = int(measure["updates"])
+    return {
+        "bench": "core",
+        "env": env_info(),
+        "params": {
+            "transport": args.transport,
+            "slaves": len(spec),
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "poll_scale": args.poll_scale,
+            "idle_wait_ms": args.idle_wait_ms,
+            "latency_ms": args.latency_ms,
+            "baudrate": args.baudrate,
+            "threads": threading.active_count(),
+        },
+        "throughput": {
+            "updates": n,
+            "updates_per_s": round(n / wall, 2) if wall > 0 else None,
+            "cpu_s": round(cpu, 4),
+            "cpu_ms_per_update": round(cpu * 1000 / n, 4) if n else None,
+            "cpu_utilization": round(cpu / wall, 4) if wall > 0 else None,
+        },
+        "latency": {name: summarize(v) for name, v in sorted(samples.data.items())},
+        "alarm_eval": eval_metrics,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="核心链路基准（poll -> parse -> state -> alarm）")
+    ap.add_argument("--duration", type=float, default=10.0, help="统计时长（秒）")
+    ap.add_argument("--warmup", type=float, default=2.0, help="预热时长（秒），不计入统计")
+    ap.add_argument("--transport", default="sim", help="sim | mock | replay:<抓包文件>")
+    ap.add_argument("--slaves", type=int, default=9, help="从站数（>9 时按 spec 复制布局）")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="sim 从站延迟；0 表示不模拟总线时序")
+    ap.add_argument("--baudrate", type=int, default=19200)
+    ap.add_argument("--sim-speed", type=float, default=60.0, help="sim 模型时间倍速")
+    ap.add_argument("--poll-scale", type=float, default=0.01, help="轮询间隔倍率（相对 300/1000/5000ms）")
+    ap.add_argument("--idle-wait-ms", type=float, default=1.0, help="ModbusMaster 每轮空闲等待（0 为忙等，CPU 统计失真）")
+    ap.add_argument("--log-level", default="WARNING", help="运行期间根日志级别")
+    ap.add_argument("--out", default=None, help="JSON 输出路径，缺省打印到 stdout")
+    args = ap.parse_args(argv)
+    write_result(run(args), args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+离屏 UI 渲染基准：QT_QPA_PLATFORM=offscreen 下实例化 MainWindow，按脚本化快照流逐页统计：
+- refresh：页面 _on_state_changed(snapshot) 耗时
+- paint：刷新后 grab() 整页重绘耗时
+- polish：每次刷新触发的 style polish 次数（QSS 动态属性 unpolish/polish）
+分别在 WVGA(800×480) 与 WXGA(1280×800) 两个 LayoutTokens profile 下运行（每个 profile 一个子进程，
+离屏屏幕尺寸由 offscreen configfile 指定，保证页面内 get_tokens() 取到对应 profile），并按帧预算列出最差页面。
+
+用法：
+    python -m bench.ui_bench --updates 200 --budget-ms 16.7 --out bench_results/ui.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from bench.common import env_info, summarize, write_result
+
+PROFILES: dict[str, tuple[int, int]] = {
+    "WVGA": (800, 480),
+    "WXGA": (1280, 800),
+}
+
+
+def _scripted_updates(n: int, seed: int) -> list[dict[str, Any]]:
+    """确定性的 update 字典序列（与 ModbusMaster 合并后交给 AppState.update 的形态一致）"""
+    rnd = random.Random(seed)
+    soc, temp, co = 850, 235, 10
+    out: list[dict[str, Any]] = []
+    for i in range(n):
+        soc = max(0, min(1000, soc + rnd.randint(-3, 2)))
+        temp = max(-200, min(450, temp + rnd.randint(-3, 3)))
+        co = max(0, min(300, co + rnd.randint(-8, 10)))
+        batt_p = rnd.randint(-900, 900)
+        out.append({
+            "power": {
+                "soc_x10": soc,
+                "batt_v_x100": 5000 + soc // 2,
+                "batt_i_x100": batt_p * 100 // 52,
+                "batt_p_w": batt_p,
+                "inv_state": 1,
+                "inv_fault": False,
+                "inv_ac_v_x10": 2200 + rnd.randint(-20, 20),
+                "inv_ac_p_w": rnd.randint(0, 1500),
+            },
+            "hvac": {
+                "mode": (i // 20) % 4,
+                "target_temp_x10": 240,
+                "hp_ok": True,
+                "lp_ok": True,
+                "refrig_ok": True,
+                "comp_pwm_act_x10": rnd.choice((0, 400, 800)),
+                "hvac_fault_code": 0,
+                "ac_enable": bool(i % 2),
+            },
+            "webasto": {"heater_on": (i // 30) % 2 == 1, "water_temp_x10": 400 + i % 200, "heater_state": 0},
+            "lighting": {"main": i % 3 == 0, "strip": i % 5 == 0, "night": False, "reading": i % 7 == 0,
+                         "strip_brightness": (i * 37) % 1000},
+            "pdu": {"pdu_state": (i // 10) % 3, "leg_limits": (1, 0), "awning_limits": (1, 0), "e_stop": False,
+                    "pdu_fault_code": 0, "leg_motor_i_x100": rnd.randint(0, 1200), "inv_ac_out_on": bool(i % 4)},
+            "env": {"cabin_temp_x10": temp, "cabin_rh_x10": 500 + rnd.randint(-30, 30),
+                    "out_temp_x10": temp + 50, "out_rh_x10": 600},
+            "gas": {"co_ppm": co, "lpg_lel_x10": rnd.randint(0, 30), "gas_alarm": co > 200, "warmup": False},
+            "auxfuel": {"aux_fuel_level_x10": 600 - i % 100},
+            "comm": {str(sid): {"online": not (sid == 6 and (i // 25) % 2), "error_count": i // 50,
+                                "last_ok_ts": time.time()} for sid in range(1, 10)},
+        })
+    return out
+
+
+def _run_child(profile: str, args: argparse.Namespace) -> dict[str, Any]:
+    """子进程内：离屏屏幕尺寸已由父进程设置，按 profile 构建 MainWindow 并逐页计时"""
+    import logging
+
+    from PyQt6.QtWidgets import QApplication, QProxyStyle
+
+    import app.main  # noqa: F401  导入时配置日志，下面统一降级
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from app.core.config import get_config
+    from app.core.state import AppState, Snapshot, _copy_snapshot, _merge_comm, _merge_dataclass
+    from app.core.alarm_controller import AlarmController
+    from app.ui.main_window import MainWindow
+
+    w, h = PROFILES[profile]
+    cfg = get_config()
+    cfg.ui.force_resolution = [w, h]
+    cfg.display.width, cfg.display.height = w, h
+    cfg.display.fullscreen = False
+
+    polish_count = [0]
+
+    class CountingStyle(QProxyStyle):
+        def polish(self, *a):
+            if a and hasattr(a[0], "isWidgetType"):
+                polish_count[0] += 1
+            return super().polish(*a)
+
+    qapp = QApplication.instance() or QApplication(sys.argv[:1])
+    qapp.setStyle(CountingStyle())
+
+    # 窗口自带 AppState 不喂数据（避免队列信号重复刷新），由本基准直接调用各页 _on_state_changed
+    app_state = AppState()
+    alarm_controller = AlarmController(app_state)
+    win = MainWindow(app_state, alarm_controller, None)
+    win.setFixedSize(w, h)
+    win.show()
+    qapp.processEvents()
+
+    stack = win._stack
+    updates = _scripted_updates(args.updates, args.seed)
+    snaps: list[Snapshot] = []
+    snap = Snapshot()
+    for d in updates:
+        _merge_comm(snap.comm, d["comm"])
+        for domain, fields in d.items():
+            if domain != "comm":
+                _merge_dataclass(getattr(snap, domain), fields)
+        snaps.append(_copy_snapshot(snap))
+
+    pages: dict[str, Any] = {}
+    for idx in range(stack.count()):
+        page = stack.widget(idx)
+        handler = getattr(page, "_on_state_changed", None)
+        if handler is None:
+            continue
+        stack.setCurrentIndex(idx)
+        qapp.processEvents()
+        handler(snaps[0])  # 首次刷新（建表/布局）不计入
+        page.grab()
+        refresh_ms: list[float] = []
+        paint_ms: list[float] = []
+        polishes: list[int] = []
+        for s in snaps[1:]:
+            p0 = polish_count[0]
+            t0 = time.perf_counter()
+            handler(s)
+            t1 = time.perf_counter()
+            polishes.append(polish_count[0] - p0)
+            page.grab()
+            t2 = time.perf_counter()
+            refresh_ms.append((t1 - t0) * 1000)
+            paint_ms.append((t2 - t1) * 1000)
+            qapp.processEvents()
+        total = [a + b for a, b in zip(refresh_ms, paint_ms)]
+        pages[type(page).__name__] = {
+            "refresh": summarize(refresh_ms),
+            "paint": summarize(paint_ms),
+            "frame": summarize(total),
+            "polish_per_update": round(sum(polishes) / len(polishes), 2) if polishes else 0,
+            "polish_max": max(polishes) if polishes else 0,
+        }
+
+    alarm_controller._thread.quit()
+    alarm_controller._thread.wait(2000)
+    win.close()
+    return {"profile": profile, "size": [w, h], "tokens": win._tokens.profile, "pages": pages}
+
+
+def _spawn(profile: str, args: argparse.Namespace) -> dict[str, Any]:
+    w, h = PROFILES[profile]
+    screen_cfg = {
+        "synchronousWindowSystemEvents": False,
+        "windowFrameMargins": False,
+        "screens": [{"name": profile, "x": 0, "y": 0, "width": w, "height": h,
+                     "logicalDpiX": 96, "logicalDpiY": 96, "dpr": 1}],
+    }
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(screen_cfg, f)
+        cfg_path = f.name
+    try:
+        env = dict(os.environ)
+        env["QT_QPA_PLATFORM"] = f"offscreen:configfile={cfg_path}"
+        cmd = [sys.executable, "-m", "bench.ui_bench", "--child", profile,
+               "--updates", str(args.updates), "--seed", str(args.seed)]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True, timeout=args.timeout)
+        if out.returncode != 0:
+            raise RuntimeError(f"{profile} 子进程失败 (rc={out.returncode}):\n{out.stderr[-2000:]}")
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    finally:
+        os.unlink(cfg_path)
+
+
+def _worst_offenders(results: list[dict[str, Any]], budget_ms: float, top: int) -> list[dict[str, Any]]:
+    rows = []
+    for r in results:
+        for name, m in r["pages"].items():
+            p95 = m["frame"]["p95_ms"] or 0.0
+            rows.append({
+                "profile": r["profile"],
+                "page": name,
+                "frame_p95_ms": p95,
+                "refresh_p95_ms": m["refresh"]["p95_ms"],
+                "paint_p95_ms": m["paint"]["p95_ms"],
+                "polish_per_update": m["polish_per_update"],
+                "over_budget": p95 > budget_ms,
+            })
+    rows.sort(key=lambda x: x["frame_p95_ms"], reverse=True)
+    return rows[:top]
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="离屏 UI 渲染基准（逐页 refresh/paint/polish）")
+    ap.add_argument("--updates", type=int, default=200, help="每页喂入的快照数")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--profiles", default="WVGA,WXGA", help="逗号分隔：WVGA,WXGA")
+    ap.add_argument("--budget-ms", type=float, default=16.7, help="帧预算（refresh+paint 的 p95）")
+    ap.add_argument("--top", type=int, default=5, help="列出最差的前 N 项")
+    ap.add_argument("--timeout", type=float, default=600.0, help="单个 profile 子进程超时（秒）")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--out", default=None, help="JSON 输出路径，缺省打印到 stdout")
+    args = ap.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_run_child(args.child, args), ensure_ascii=False))
+        return 0
+
+    profiles = [p.strip().upper() for p in args.profiles.split(",") if p.strip().upper() in PROFILES]
+    results = [_spawn(p, args) for p in profiles]
+    worst = _worst_offenders(results, args.budget_ms, args.top)
+    write_result({
+        "bench": "ui",
+        "env": env_info(),
+        "params": {"updates": args.updates, "seed": args.seed, "budget_ms": args.budget_ms},
+        "profiles": {r["profile"]: r for r in results},
+        "worst_offenders": worst,
+    }, args.out)
+    over = [w for w in worst if w["over_budget"]]
+    for w in worst:
+        flag = "超预算" if w["over_budget"] else "ok"
+        print(f"[{flag}] {w['profile']:<5} {w['page']:<18} frame p95 {w['frame_p95_ms']:.2f}ms "
+              f"(refresh {w['refresh_p95_ms']:.2f} / paint {w['paint_p95_ms']:.2f}) "
+              f"polish/update {w['polish_per_update']}", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())